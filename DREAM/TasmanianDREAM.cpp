@@ -31,6 +31,9 @@
 #ifndef __TASMANIAN_DREAM_CPP
 #define __TASMANIAN_DREAM_CPP
 
+#include <memory>
+#include <cmath>
+
 #include "TasmanianDREAM.hpp"
 
 namespace TasDREAM{
@@ -521,6 +524,211 @@ void TasmanianDREAM::getPDFHistory(std::vector<double> &history) const{
     history = pdf_history; // copy assignment
 }
 
+//////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+//
+//  C Interface for use with Python ctypes (internal use only)
+//
+//////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+// log-density computed by a callback, the callback takes all points at once and returns non-zero on error
+typedef int (*TdrLogDensityCallback)(int num_points, int num_dimensions, const double x[], double y[]);
+
+class CallbackLogDensity : public ProbabilityWeightFunction{
+public:
+    CallbackLogDensity(int dimensions, TdrLogDensityCallback log_density, const double lower[], const double upper[]) :
+        num_dimensions(dimensions), callback(log_density), lower_bound(lower, lower + dimensions), upper_bound(upper, upper + dimensions){}
+    ~CallbackLogDensity(){}
+
+    int getNumDimensions() const{ return num_dimensions; }
+
+    void evaluate(const std::vector<double> &x, std::vector<double> &y, bool useLogForm){
+        int num_points = (int) (x.size() / num_dimensions);
+        y.resize(num_points);
+        if (num_points == 0) return;
+        if (callback(num_points, num_dimensions, x.data(), y.data()) != 0) throw std::runtime_error("ERROR: the log-density callback failed");
+        if (!useLogForm) for(auto &v : y) v = exp(v);
+    }
+
+    void getInitialSample(double x[]){
+        for(int j=0; j<num_dimensions; j++){
+            if (std::isinf(lower_bound[j]) || std::isinf(upper_bound[j]))
+                throw std::runtime_error("ERROR: cannot sample the initial state in an unbounded domain, use setChainState()");
+            x[j] = lower_bound[j] + unifrom_cpp.getSample01() * (upper_bound[j] - lower_bound[j]);
+        }
+    }
+
+    void getDomainBounds(std::vector<bool> &lower, std::vector<bool> &upper){
+        lower.resize(num_dimensions);
+        upper.resize(num_dimensions);
+        for(int j=0; j<num_dimensions; j++){
+            lower[j] = !std::isinf(lower_bound[j]);
+            upper[j] = !std::isinf(upper_bound[j]);
+        }
+    }
+    void getDomainBounds(std::vector<double> &lower, std::vector<double> &upper){
+        lower = lower_bound;
+        upper = upper_bound;
+    }
+
+private:
+    int num_dimensions;
+    TdrLogDensityCallback callback;
+    std::vector<double> lower_bound, upper_bound;
+    CppUniformSampler unifrom_cpp;
+};
+
+// owns everything that TasmanianDREAM holds only as an alias
+class DreamPythonSampler{
+public:
+    DreamPythonSampler() : num_chains(-1), posterior(0), likely_tsg(0){}
+    ~DreamPythonSampler(){ clearTarget(); }
+
+    void clearTarget(){
+        target.reset();
+        likelihood.reset();
+        posterior = 0;
+        likely_tsg = 0;
+        priors.clear();
+        owned_corrections.clear();
+        corrections.clear();
+        data.clear();
+    }
+    void setTarget(ProbabilityWeightFunction *new_target){
+        target = std::unique_ptr<ProbabilityWeightFunction>(new_target);
+        corrections.resize(target->getNumDimensions(), 0);
+        attach();
+    }
+    // (re)loads the target into dream, call after the bounds of the target change
+    void attach(){
+        dream.setProbabilityWeightFunction(target.get());
+        if (num_chains > 0) dream.setNumChains(num_chains);
+        for(int j=0; j<(int) corrections.size(); j++) dream.setCorrection(j, corrections[j]);
+    }
+
+    TasmanianDREAM dream;
+    int num_chains;
+
+    std::unique_ptr<ProbabilityWeightFunction> target;
+    PosteriorFromModel *posterior;
+    LikelihoodTSG *likely_tsg;
+    std::unique_ptr<BaseLikelihood> likelihood;
+    std::vector<double> data;
+
+    std::vector<std::unique_ptr<BasePDF>> priors, owned_corrections;
+    std::vector<BasePDF*> corrections;
+};
+
+BasePDF* tdrMakePDF(const char *type, const double params[]){
+    std::string stype(type);
+    if (stype == "uniform"){
+        return new UniformPDF(params[0], params[1]);
+    }else if (stype == "gaussian"){
+        return new GaussianPDF(params[0], params[1]);
+    }else if (stype == "truncated-gaussian"){
+        return new TruncatedGaussianPDF(params[0], params[1], params[2], params[3]);
+    }else if (stype == "exponential"){
+        return new ExponentialPDF(params[0], params[1]);
+    }else if (stype == "gamma"){
+        return new GammaPDF(params[0], params[1], params[2]);
+    }else if (stype == "beta"){
+        return new BetaPDF(params[0], params[1], params[2], params[3]);
+    }
+    return 0;
+}
+
+extern "C" {
+void* tdrConstructTasmanianDREAM(){ return (void*) new DreamPythonSampler(); }
+void tdrDestructTasmanianDREAM(void *sampler){ delete ((DreamPythonSampler*) sampler); }
+
+int tdrGetNumDimensions(void *sampler){ return ((DreamPythonSampler*) sampler)->dream.getNumDimensions(); }
+int tdrGetNumChains(void *sampler){ return ((DreamPythonSampler*) sampler)->num_chains; }
+
+void tdrSetLogDensityCallback(void *sampler, int num_dimensions, TdrLogDensityCallback log_density, const double lower[], const double upper[]){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    s->clearTarget();
+    s->setTarget(new CallbackLogDensity(num_dimensions, log_density, lower, upper));
+}
+int tdrSetPosteriorFromGrid(void *sampler, void *grid, const char *likelihood, const double covariance[], int num_data, const double data[]){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    s->clearTarget();
+    try{
+        const TasGrid::TasmanianSparseGrid *tsg = (const TasGrid::TasmanianSparseGrid*) grid;
+        std::string slikely(likelihood);
+        TypeLikelihood likely_type = (slikely == "gauss-dense") ? likely_gauss_dense : ((slikely == "gauss-diagonal") ? likely_gauss_diagonal : likely_gauss_scale);
+        s->data = std::vector<double>(data, data + num_data * tsg->getNumOutputs());
+        s->likelihood = std::unique_ptr<BaseLikelihood>(new GaussianLikelihood(tsg->getNumOutputs(), likely_type, covariance, num_data, s->data.data()));
+        s->posterior = new PosteriorFromModel(tsg);
+        s->posterior->setLikelihood(s->likelihood.get());
+        s->posterior->setData(num_data, s->data.data());
+        s->setTarget(s->posterior);
+        return 1;
+    }catch(std::runtime_error e){
+        #ifndef NDEBUG
+        std::cerr << e.what() << std::endl;
+        #endif // NDEBUG
+        s->clearTarget();
+        return 0;
+    }
+}
+int tdrSetLikelihoodFromGrid(void *sampler, void *grid, int saved_log_form){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    s->clearTarget();
+    try{
+        s->likely_tsg = new LikelihoodTSG((const TasGrid::TasmanianSparseGrid*) grid, (saved_log_form != 0));
+        s->setTarget(s->likely_tsg);
+        return 1;
+    }catch(std::runtime_error e){
+        #ifndef NDEBUG
+        std::cerr << e.what() << std::endl;
+        #endif // NDEBUG
+        s->clearTarget();
+        return 0;
+    }
+}
+void tdrSetPrior(void *sampler, int dimension, const char *type, const double params[]){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    BasePDF *prior = tdrMakePDF(type, params);
+    s->priors.push_back(std::unique_ptr<BasePDF>(prior));
+    if (s->posterior != 0) s->posterior->overwritePDF(dimension, prior);
+    if (s->likely_tsg != 0) s->likely_tsg->setPDF(dimension, prior);
+    s->attach(); // the prior changes the domain bounds
+}
+void tdrSetCorrection(void *sampler, int dimension, const char *type, const double params[]){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    BasePDF *correction = tdrMakePDF(type, params);
+    s->owned_corrections.push_back(std::unique_ptr<BasePDF>(correction));
+    if (dimension < 0){
+        for(auto &c : s->corrections) c = correction;
+        s->dream.setCorrectionAll(correction);
+    }else{
+        s->corrections[dimension] = correction;
+        s->dream.setCorrection(dimension, correction);
+    }
+}
+void tdrSetNumChains(void *sampler, int num_chains){
+    DreamPythonSampler *s = (DreamPythonSampler*) sampler;
+    s->num_chains = num_chains;
+    s->dream.setNumChains(num_chains);
+}
+void tdrSetChainState(void *sampler, const double state[]){ ((DreamPythonSampler*) sampler)->dream.setChainState(state); }
+int tdrCollectSamples(void *sampler, int num_burnup, int num_samples, double samples[], int use_log_form){
+    try{
+        ((DreamPythonSampler*) sampler)->dream.collectSamples(num_burnup, num_samples, samples, (use_log_form != 0));
+        return 1;
+    }catch(std::runtime_error e){
+        #ifndef NDEBUG
+        std::cerr << e.what() << std::endl;
+        #endif // NDEBUG
+        return 0;
+    }
+}
+void tdrGetPDFHistory(void *sampler, double history[]){
+    std::vector<double> hist;
+    ((DreamPythonSampler*) sampler)->dream.getPDFHistory(hist);
+    std::copy(hist.begin(), hist.end(), history);
+}
+}
+
 }
 
 #endif
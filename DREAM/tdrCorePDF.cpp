@@ -311,7 +311,7 @@ GaussianLikelihood::GaussianLikelihood(int outputs, TypeLikelihood likelihood, c
         covariance_cache = new double[1];
         covariance_cache[0] = 1.0 / covariance[0];
         model_scale *= covariance_cache[0];
-    }else if (likely_type == likely_gauss_scale){
+    }else if (likely_type == likely_gauss_diagonal){
         covariance_cache = new double[num_outputs];
         for(int i=0; i<num_outputs; i++) covariance_cache[i] = 1.0 / covariance[i];
     }else if (likely_type == likely_gauss_dense){
@@ -0,0 +1,459 @@
+##############################################################################################################################################################################
+# Copyright (c) 2017, Miroslav Stoyanov
+#
+# This file is part of
+# Toolkit for Adaptive Stochastic Modeling And Non-Intrusive ApproximatioN: TASMANIAN
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse
+#    or promote products derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# UT-BATTELLE, LLC AND THE UNITED STATES GOVERNMENT MAKE NO REPRESENTATIONS AND DISCLAIM ALL WARRANTIES, BOTH EXPRESSED AND IMPLIED.
+# THERE ARE NO EXPRESS OR IMPLIED WARRANTIES OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR PURPOSE, OR THAT THE USE OF THE SOFTWARE WILL NOT INFRINGE ANY PATENT,
+# COPYRIGHT, TRADEMARK, OR OTHER PROPRIETARY RIGHTS, OR THAT THE SOFTWARE WILL ACCOMPLISH THE INTENDED RESULTS OR THAT THE SOFTWARE OR ITS USE WILL NOT RESULT IN INJURY OR DAMAGE.
+# THE USER ASSUMES RESPONSIBILITY FOR ALL LIABILITIES, PENALTIES, FINES, CLAIMS, CAUSES OF ACTION, AND COSTS AND EXPENSES, CAUSED BY, RESULTING FROM OR ARISING OUT OF,
+# IN WHOLE OR IN PART THE USE, STORAGE OR DISPOSAL OF THE SOFTWARE.
+##############################################################################################################################################################################
+
+from ctypes import c_char_p, c_int, c_double, c_void_p, POINTER, CFUNCTYPE, cdll
+import numpy as np
+import sys
+import threading
+
+import TasmanianSG
+from TasmanianSG import TasmanianInputError, _tsgDoublePointer
+
+__version__ = "@Tasmanian_VERSION_MAJOR@.@Tasmanian_VERSION_MINOR@"
+__license__ = "@Tasmanian_license@"
+__author__ = "Miroslav Stoyanov"
+
+# distribution name and number of parameters, see setPrior() for the meaning of the parameters
+dTdrDistributions = {"uniform" : 2, "gaussian" : 2, "truncated-gaussian" : 4, "exponential" : 2, "gamma" : 3, "beta" : 4}
+lsTdrLikelihoods = ["gauss-scale", "gauss-diagonal", "gauss-dense"]
+
+# signature of the log-density callback: num_points, num_dimensions, x, y
+_pTdrLogDensityType = CFUNCTYPE(c_int, c_int, c_int, POINTER(c_double), POINTER(c_double))
+
+_pTdrLibraryLock = threading.Lock()
+_dTdrLibraryCache = {}
+
+def _tdrSetPrototypes(pLibTDR):
+    '''
+    declares the return and argument types of the C functions on pLibTDR,
+    this is called only once per library object
+
+    '''
+    pLibTDR.tdrConstructTasmanianDREAM.restype = c_void_p
+    pLibTDR.tdrDestructTasmanianDREAM.argtypes = [c_void_p]
+
+    pLibTDR.tdrGetNumDimensions.restype = c_int
+    pLibTDR.tdrGetNumDimensions.argtypes = [c_void_p]
+    pLibTDR.tdrGetNumChains.restype = c_int
+    pLibTDR.tdrGetNumChains.argtypes = [c_void_p]
+
+    pLibTDR.tdrSetLogDensityCallback.argtypes = [c_void_p, c_int, _pTdrLogDensityType, POINTER(c_double), POINTER(c_double)]
+    pLibTDR.tdrSetPosteriorFromGrid.restype = c_int
+    pLibTDR.tdrSetPosteriorFromGrid.argtypes = [c_void_p, c_void_p, c_char_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTDR.tdrSetLikelihoodFromGrid.restype = c_int
+    pLibTDR.tdrSetLikelihoodFromGrid.argtypes = [c_void_p, c_void_p, c_int]
+    pLibTDR.tdrSetPrior.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_double)]
+    pLibTDR.tdrSetCorrection.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_double)]
+    pLibTDR.tdrSetNumChains.argtypes = [c_void_p, c_int]
+    pLibTDR.tdrSetChainState.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTDR.tdrCollectSamples.restype = c_int
+    pLibTDR.tdrCollectSamples.argtypes = [c_void_p, c_int, c_int, POINTER(c_double), c_int]
+    pLibTDR.tdrGetPDFHistory.argtypes = [c_void_p, POINTER(c_double)]
+
+def _tdrGetLibrary(tasmanian_library):
+    '''
+    returns the ctypes library object with all prototypes declared,
+    the library is loaded and configured only on the first call for
+    a given path (or library object), subsequent calls use the cache
+
+    the sparse grid library is loaded first, since the DREAM library
+    links to it and works with the grids created by TasmanianSG
+
+    tasmanian_library: see the constructor of TasmanianDREAM
+
+    '''
+    if (isinstance(tasmanian_library, int)):
+        sLibPath = "@Tasmanian_libdream_path@"
+    elif ((sys.version_info.major == 3) and isinstance(tasmanian_library, str)):
+        sLibPath = tasmanian_library
+    elif ((sys.version_info.major == 2) and isinstance(tasmanian_library, basestring)):
+        sLibPath = tasmanian_library
+    else:
+        sLibPath = None
+
+    with _pTdrLibraryLock:
+        if (sLibPath is not None):
+            if (sLibPath not in _dTdrLibraryCache):
+                TasmanianSG._tsgGetLibrary(0)
+                pLibTDR = cdll.LoadLibrary(sLibPath)
+                _tdrSetPrototypes(pLibTDR)
+                _dTdrLibraryCache[sLibPath] = pLibTDR
+            return _dTdrLibraryCache[sLibPath]
+        if (not getattr(tasmanian_library, "_bTdrPrototypesSet", False)):
+            _tdrSetPrototypes(tasmanian_library)
+            tasmanian_library._bTdrPrototypesSet = True
+        return tasmanian_library
+
+def _tdrDistributionParameters(sVar, sType, lfParameters):
+    '''
+    checks the distribution type and parameters used by setPrior() and
+    setCorrection(), returns the parameters as a numpy.ndarray
+
+    '''
+    if (sType not in dTdrDistributions):
+        raise TasmanianInputError(sVar, "ERROR: invalid distribution type {0:1s}, see TasmanianDREAM.dTdrDistributions for the list of accepted types".format(str(sType)))
+    aParameters = np.array(lfParameters, np.float64).reshape([-1])
+    if (aParameters.shape[0] != dTdrDistributions[sType]):
+        raise TasmanianInputError("lfParameters", "ERROR: distribution {0:1s} requires {1:1d} parameters, instead {2:1d} were given".format(sType, dTdrDistributions[sType], aParameters.shape[0]))
+    return aParameters
+
+
+class TasmanianDREAM:
+    def __init__(self, tasmanian_library=0):
+        '''
+        constructor, creates an empty DREAM sampler
+
+        tasmanian_library: indicates the libtasmaniandream.so file
+                           int, string or ctypes.cdll, see the constructor
+                           of TasmanianSG.TasmanianSparseGrid
+
+        the sampler is set up in the following order:
+            1. the probability density, either
+               setLogDensity(), setPosteriorFromGrid() or
+               setLikelihoodFromGrid()
+            2. (optional) setPrior(), only for the grid based densities
+            3. setNumChains()
+            4. (optional) setCorrection() and setChainState()
+            5. collectSamples()
+
+        '''
+        self.pLibTDR = _tdrGetLibrary(tasmanian_library)
+        self.pDream = c_void_p(self.pLibTDR.tdrConstructTasmanianDREAM())
+
+        # the library keeps only aliases, keep the grid and the callback alive
+        self.pGrid = None
+        self.pCallback = None
+        # exception raised inside the callback, re-raised by collectSamples()
+        self.lCallbackError = [None]
+        # True if the density cannot provide an initial state
+        self.bNeedsState = False
+        # number of entries in the history of the last collectSamples()
+        self.iNumHistory = 0
+
+    def __del__(self):
+        '''
+        destructor, calls the C++ destructor and releases all memory
+        used by this instance of the class
+
+        '''
+        self.pLibTDR.tdrDestructTasmanianDREAM(self.pDream)
+
+    def getNumDimensions(self):
+        '''
+        returns the number of dimensions of the probability density,
+        or -1 if the density has not been set
+
+        '''
+        return self.pLibTDR.tdrGetNumDimensions(self.pDream)
+
+    def getNumChains(self):
+        '''
+        returns the number of chains, or -1 if not set
+
+        '''
+        return self.pLibTDR.tdrGetNumChains(self.pDream)
+
+    def setLogDensity(self, iNumDimensions, pLogDensity, llfLower=[], llfUpper=[]):
+        '''
+        sets an arbitrary (not normalized) probability density given by
+        the logarithm of the density
+
+        iNumDimensions: positive integer, the dimension of the domain
+
+        pLogDensity: callable object, pLogDensity(aX) returns the log of
+                     the density at all rows of aX, where aX is a
+                     read-only 2-D numpy.ndarray with shape
+                     iNumChains X iNumDimensions
+                     the result is anything that numpy can reshape to a
+                     1-D array with length iNumChains
+                     pLogDensity is called once per MCMC iteration with
+                     all chains at once (the chains that fall outside of
+                     the domain are excluded)
+
+        llfLower, llfUpper: (optional) 1-D array or list of length
+                            iNumDimensions, the bounds of the domain,
+                            -numpy.inf and numpy.inf denote unbounded
+                            directions, the default is unbounded domain
+                            if the domain is unbounded in some direction,
+                            setChainState() must be called before
+                            collectSamples()
+
+        '''
+        if (iNumDimensions < 1):
+            raise TasmanianInputError("iNumDimensions", "ERROR: dimension should be a positive integer")
+        if (not callable(pLogDensity)):
+            raise TasmanianInputError("pLogDensity", "ERROR: pLogDensity must be a callable object")
+        aBounds = []
+        for sVar, llfBound, fDefault in [("llfLower", llfLower, -np.inf), ("llfUpper", llfUpper, np.inf)]:
+            if (len(llfBound) == 0):
+                aBounds.append(np.full([iNumDimensions], fDefault, np.float64))
+            else:
+                aBound = np.array(llfBound, np.float64).reshape([-1])
+                if (aBound.shape[0] != iNumDimensions):
+                    raise TasmanianInputError(sVar, "ERROR: {0:1s} should have length {1:1d} instead it has length {2:1d}".format(sVar, iNumDimensions, aBound.shape[0]))
+                aBounds.append(aBound)
+        if (np.any(aBounds[0] >= aBounds[1])):
+            raise TasmanianInputError("llfUpper", "ERROR: the upper bounds must be larger than the lower bounds")
+
+        lError = self.lCallbackError
+        def tdrLogDensity(iNumPoints, iNumDims, pX, pY):
+            try:
+                aX = np.ctypeslib.as_array(pX, shape = (iNumPoints, iNumDims))
+                aX.flags.writeable = False
+                aY = np.ctypeslib.as_array(pY, shape = (iNumPoints,))
+                aY[:] = np.asarray(pLogDensity(aX), np.float64).reshape([iNumPoints])
+                return 0
+            except BaseException as e:
+                lError[0] = e
+                return 1
+
+        self.pGrid = None
+        self.pCallback = _pTdrLogDensityType(tdrLogDensity)
+        self.bNeedsState = not (np.all(np.isfinite(aBounds[0])) and np.all(np.isfinite(aBounds[1])))
+        self.pLibTDR.tdrSetLogDensityCallback(self.pDream, iNumDimensions, self.pCallback, _tsgDoublePointer(aBounds[0]), _tsgDoublePointer(aBounds[1]))
+
+    def _checkGrid(self, sMethod, grid):
+        '''
+        checks that the grid can be used as a model or likelihood
+
+        '''
+        if (not isinstance(grid, TasmanianSG.TasmanianSparseGrid)):
+            raise TasmanianInputError("grid", "ERROR: grid must be an instance of TasmanianSG.TasmanianSparseGrid")
+        iNumDims, iNumOutputs, iNumLoaded = grid.getMetadata()[0:3]
+        if (iNumDims == 0):
+            raise TasmanianInputError(sMethod, "ERROR: cannot use an empty grid")
+        if (iNumLoaded == 0):
+            raise TasmanianInputError(sMethod, "ERROR: cannot use a grid before any points are loaded, i.e., call loadNeededPoints first!")
+        return iNumOutputs
+
+    def setPosteriorFromGrid(self, grid, llfData, sLikelihood="gauss-scale", lfCovariance=[1.0]):
+        '''
+        sets the probability density to the posterior of a model
+        approximated by a sparse grid, i.e., the grid outputs are the
+        model outputs and the posterior is computed with a Gaussian
+        likelihood and priors (see setPrior())
+        each MCMC iteration makes one call to evaluateBatch() for all
+        chains and the likelihood is computed in the library
+
+        grid: instance of TasmanianSG.TasmanianSparseGrid with loaded
+              values, the grid is not copied and it should not be
+              modified while used by the sampler
+
+        llfData: 1-D or 2-D numpy.ndarray with iOutputs columns
+                 each row is one observation of the model outputs
+
+        sLikelihood: string, the type of covariance of the Gaussian
+                     likelihood, see TasmanianDREAM.lsTdrLikelihoods
+                     "gauss-scale"    lfCovariance has one entry
+                                      (the variance of all outputs)
+                     "gauss-diagonal" lfCovariance has iOutputs entries
+                     "gauss-dense"    lfCovariance has iOutputs^2
+                                      entries (the covariance matrix)
+
+        lfCovariance: list or numpy.ndarray, see sLikelihood
+
+        the default priors are uniform over the domain of the grid,
+        or Gaussian and Gamma for Gauss-Hermite and Gauss-Laguerre rules
+
+        '''
+        iNumOutputs = self._checkGrid("setPosteriorFromGrid", grid)
+        if (iNumOutputs == 0):
+            raise TasmanianInputError("setPosteriorFromGrid", "ERROR: cannot use a grid with no outputs")
+        if (sLikelihood not in lsTdrLikelihoods):
+            raise TasmanianInputError("sLikelihood", "ERROR: invalid likelihood type, see TasmanianDREAM.lsTdrLikelihoods for the list of accepted types")
+        aData = np.array(llfData, np.float64)
+        if (len(aData.shape) == 1):
+            aData = aData.reshape([1, -1])
+        if ((len(aData.shape) != 2) or (aData.shape[0] == 0) or (aData.shape[1] != iNumOutputs)):
+            raise TasmanianInputError("llfData", "ERROR: llfData should be a 2-D array with {0:1d} columns".format(iNumOutputs))
+        iNumCovariance = {"gauss-scale" : 1, "gauss-diagonal" : iNumOutputs, "gauss-dense" : iNumOutputs * iNumOutputs}[sLikelihood]
+        aCovariance = np.array(lfCovariance, np.float64).reshape([-1])
+        if (aCovariance.shape[0] != iNumCovariance):
+            raise TasmanianInputError("lfCovariance", "ERROR: likelihood {0:1s} requires {1:1d} covariance entries, instead {2:1d} were given".format(sLikelihood, iNumCovariance, aCovariance.shape[0]))
+        aData = np.ascontiguousarray(aData)
+
+        self.pGrid = grid
+        self.pCallback = None
+        self.bNeedsState = False
+        if (self.pLibTDR.tdrSetPosteriorFromGrid(self.pDream, grid.pGrid, bytes(sLikelihood, encoding='utf8') if (sys.version_info.major == 3) else sLikelihood,
+                                                  _tsgDoublePointer(aCovariance), aData.shape[0], _tsgDoublePointer(aData)) == 0):
+            self.pGrid = None
+            raise TasmanianInputError("setPosteriorFromGrid", "ERROR: the library could not create the posterior")
+
+    def setLikelihoodFromGrid(self, grid, bSavedLogForm=True):
+        '''
+        sets the probability density to a likelihood approximated by a
+        sparse grid times the priors (see setPrior()), i.e., output 0
+        of the grid is the likelihood or the log of the likelihood
+        each MCMC iteration makes one call to evaluateBatch() for all
+        chains
+
+        grid: instance of TasmanianSG.TasmanianSparseGrid with loaded
+              values, the grid is not copied and it should not be
+              modified while used by the sampler
+
+        bSavedLogForm: boolean, if True the grid approximates the log of
+                       the likelihood, otherwise the likelihood
+
+        '''
+        if (self._checkGrid("setLikelihoodFromGrid", grid) != 1):
+            raise TasmanianInputError("setLikelihoodFromGrid", "ERROR: the likelihood grid must have exactly one output")
+        self.pGrid = grid
+        self.pCallback = None
+        self.bNeedsState = False
+        if (self.pLibTDR.tdrSetLikelihoodFromGrid(self.pDream, grid.pGrid, 1 if bSavedLogForm else 0) == 0):
+            self.pGrid = None
+            raise TasmanianInputError("setLikelihoodFromGrid", "ERROR: the library could not create the likelihood")
+
+    def setPrior(self, iDimension, sType, lfParameters):
+        '''
+        overwrites the prior for one dimension of a grid based density,
+        the chains and corrections are kept but the chain state is reset
+
+        iDimension: integer between 0 and getNumDimensions() - 1
+
+        sType: string, the type of the prior distribution
+               see TasmanianDREAM.dTdrDistributions
+
+        lfParameters: list with the parameters of the distribution
+            "uniform"            lower, upper
+            "gaussian"           mean, variance
+            "truncated-gaussian" mean, variance, lower, upper
+            "exponential"        rate, lower
+            "gamma"              lower, shape, rate
+            "beta"               lower, upper, alpha, beta
+
+        '''
+        if (self.pGrid is None):
+            raise TasmanianInputError("setPrior", "ERROR: priors can be set only for densities from setPosteriorFromGrid() or setLikelihoodFromGrid()")
+        if ((iDimension < 0) or (iDimension >= self.getNumDimensions())):
+            raise TasmanianInputError("iDimension", "ERROR: iDimension should be between 0 and {0:1d}".format(self.getNumDimensions() - 1))
+        aParameters = _tdrDistributionParameters("sType", sType, lfParameters)
+        self.pLibTDR.tdrSetPrior(self.pDream, iDimension, bytes(sType, encoding='utf8') if (sys.version_info.major == 3) else sType, _tsgDoublePointer(aParameters))
+
+    def setNumChains(self, iNumChains):
+        '''
+        sets the number of chains and resets the chain state
+
+        iNumChains: positive integer, the number of chains
+                    (DREAM needs at least 3 chains)
+
+        '''
+        if (self.getNumDimensions() < 1):
+            raise TasmanianInputError("setNumChains", "ERROR: must set the probability density before the number of chains")
+        if (iNumChains < 3):
+            raise TasmanianInputError("iNumChains", "ERROR: the number of chains should be at least 3")
+        self.pLibTDR.tdrSetNumChains(self.pDream, iNumChains)
+
+    def setCorrection(self, sType, lfParameters, iDimension=-1):
+        '''
+        sets the correction (noise) added to each DREAM proposal
+
+        sType, lfParameters: distribution of the correction, see setPrior()
+                             a common choice is "gaussian" with [0.0, 0.01]
+
+        iDimension: integer, the dimension of the correction
+                    if negative, use the correction in all dimensions
+
+        '''
+        if (self.getNumDimensions() < 1):
+            raise TasmanianInputError("setCorrection", "ERROR: must set the probability density before the correction")
+        if (iDimension >= self.getNumDimensions()):
+            raise TasmanianInputError("iDimension", "ERROR: iDimension should be less than {0:1d}".format(self.getNumDimensions()))
+        aParameters = _tdrDistributionParameters("sType", sType, lfParameters)
+        self.pLibTDR.tdrSetCorrection(self.pDream, iDimension, bytes(sType, encoding='utf8') if (sys.version_info.major == 3) else sType, _tsgDoublePointer(aParameters))
+
+    def setChainState(self, llfState):
+        '''
+        sets the current state of the chains
+
+        llfState: 2-D numpy.ndarray with shape iNumChains X iNumDimensions
+
+        '''
+        iNumChains = self.getNumChains()
+        if (iNumChains < 1):
+            raise TasmanianInputError("setChainState", "ERROR: must call setNumChains() before setChainState()")
+        aState = np.array(llfState, np.float64)
+        if (aState.shape != (iNumChains, self.getNumDimensions())):
+            raise TasmanianInputError("llfState", "ERROR: llfState should have shape {0:1s} instead it has shape {1:1s}".format(str((iNumChains, self.getNumDimensions())), str(aState.shape)))
+        aState = np.ascontiguousarray(aState)
+        self.pLibTDR.tdrSetChainState(self.pDream, _tsgDoublePointer(aState))
+        self.bNeedsState = False
+
+    def collectSamples(self, iNumBurnup, iNumSamples, bUseLogForm=True):
+        '''
+        advances the chains and returns the samples
+
+        iNumBurnup: non-negative integer, number of iterations to discard
+
+        iNumSamples: non-negative integer, number of iterations to keep
+
+        bUseLogForm: boolean, if True the acceptance test is computed
+                     with the log of the density, which is more stable
+                     when the density has a large range
+
+        returns a 2-D numpy.ndarray with shape
+                (iNumSamples * iNumChains) X iNumDimensions,
+                the rows of each iteration are consecutive and the
+                chains follow the same order in every iteration
+
+        '''
+        iNumChains, iNumDims = self.getNumChains(), self.getNumDimensions()
+        if (iNumDims < 1):
+            raise TasmanianInputError("collectSamples", "ERROR: must set the probability density before collectSamples()")
+        if (iNumChains < 1):
+            raise TasmanianInputError("collectSamples", "ERROR: must call setNumChains() before collectSamples()")
+        if (self.bNeedsState):
+            raise TasmanianInputError("collectSamples", "ERROR: the domain is unbounded, must call setChainState() before collectSamples()")
+        if ((iNumBurnup < 0) or (iNumSamples < 0)):
+            raise TasmanianInputError("iNumSamples", "ERROR: the number of burnup and collected samples should be non-negative")
+        aSamples = np.empty([iNumSamples * iNumChains, iNumDims], np.float64)
+        self.lCallbackError[0] = None
+        self.iNumHistory = 0
+        if (self.pLibTDR.tdrCollectSamples(self.pDream, iNumBurnup, iNumSamples, _tsgDoublePointer(aSamples), 1 if bUseLogForm else 0) == 0):
+            eError = self.lCallbackError[0]
+            self.lCallbackError[0] = None
+            if (eError is not None):
+                raise eError
+            raise TasmanianInputError("collectSamples", "ERROR: the library failed to collect the samples")
+        self.iNumHistory = iNumSamples * iNumChains
+        return aSamples
+
+    def getPDFHistory(self):
+        '''
+        returns a 1-D numpy.ndarray with the values of the density
+        (or the log of the density) for each sample returned by the
+        last call to collectSamples()
+
+        '''
+        aHistory = np.empty([self.iNumHistory], np.float64)
+        if (self.iNumHistory > 0):
+            self.pLibTDR.tdrGetPDFHistory(self.pDream, _tsgDoublePointer(aHistory))
+        return aHistory
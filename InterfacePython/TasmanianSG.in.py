@@ -28,16 +28,35 @@
 # IN WHOLE OR IN PART THE USE, STORAGE OR DISPOSAL OF THE SOFTWARE.
 ##############################################################################################################################################################################
 
-from ctypes import c_char_p, c_int, c_double, c_void_p, POINTER, cdll, create_string_buffer
+from collections import OrderedDict
+from ctypes import c_char_p, c_int, c_double, c_void_p, c_size_t, c_char, POINTER, cdll, create_string_buffer, string_at
 import numpy as np
+import os
 import sys
+import threading
+import time
+import warnings
 
-bTsgPlotting = True
-try:
-    import matplotlib.pyplot as tsgPlot
-except:
-    bTsgPlotting = False
-    tsgPlot = []
+def _tsgIsModuleAvailable(sName):
+    '''
+    returns True if the module can be found, without importing it
+
+    '''
+    try:
+        from importlib.util import find_spec
+        return (find_spec(sName) is not None)
+    except ImportError: # Python 2
+        import imp
+        try:
+            imp.find_module(sName)
+            return True
+        except ImportError:
+            return False
+
+# matplotlib.pyplot is slow to import and may load a GUI backend,
+# it is imported on the first call to a plotting method, see _tsgGetPlot()
+bTsgPlotting = _tsgIsModuleAvailable("matplotlib")
+_pTsgPlot = None
 
 __version__ = "@Tasmanian_VERSION_MAJOR@.@Tasmanian_VERSION_MINOR@"
 __license__ = "@Tasmanian_license@"
@@ -51,6 +70,369 @@ lsTsgSequenceRules = ["leja", "rleja", "rleja-shifted", "max-lebesgue", "min-leb
 lsTsgLocalRules = ["localp", "semi-localp", "localp-zero", "localp-boundary"]
 lsTsgAccelTypes = ["none", "cpu-blas", "gpu-default", "gpu-cublas", "gpu-cuda", "gpu-magma"]
 
+# counts the number of times an input array had to be copied before passing it to the library
+# the copy is needed when the array is not C-contiguous, not aligned, or not of type float64
+# if bTsgWarnInputCopy is True, each copy will also issue a warning
+iTsgNumInputCopies = 0
+bTsgWarnInputCopy = False
+
+_pTsgLibraryLock = threading.Lock()
+_dTsgLibraryCache = {}
+
+def _tsgSetPrototypes(pLibTSG):
+    '''
+    declares the return and argument types of the C functions on pLibTSG,
+    this is called only once per library object and all instances of
+    TasmanianSparseGrid share the result
+
+    '''
+    # ctypes requires that we manually specify the return types of functions
+    # in C this is done by header files, so this serves as a header
+    pLibTSG.tsgConstructTasmanianSparseGrid.restype = c_void_p
+    pLibTSG.tsgGetVersion.restype = c_char_p
+    pLibTSG.tsgGetLicense.restype = c_char_p
+    pLibTSG.tsgGetVersionMajor.restype = c_int
+    pLibTSG.tsgGetVersionMinor.restype = c_int
+    pLibTSG.tsgIsOpenMPEnabled.restype = c_int
+    pLibTSG.tsgGetNumDimensions.restype = c_int
+    pLibTSG.tsgGetNumOutputs.restype = c_int
+    pLibTSG.tsgGetNumLoaded.restype = c_int
+    pLibTSG.tsgGetNumNeeded.restype = c_int
+    pLibTSG.tsgGetNumPoints.restype = c_int
+    pLibTSG.tsgRead.restype = c_int
+    pLibTSG.tsgWriteMapped.restype = c_int
+    pLibTSG.tsgReadMapped.restype = c_int
+    pLibTSG.tsgWriteBinaryToStringVoidPntr.restype = c_void_p
+    pLibTSG.tsgWriteBinaryToStringPythonGetSize.restype = c_size_t
+    pLibTSG.tsgWriteBinaryToStringPythonGetData.restype = c_void_p
+    pLibTSG.tsgReadBinaryFromBuffer.restype = c_int
+    pLibTSG.tsgGetAlpha.restype = c_double
+    pLibTSG.tsgGetBeta.restype = c_double
+    pLibTSG.tsgGetOrder.restype = c_int
+    pLibTSG.tsgGetRule.restype = c_char_p
+    pLibTSG.tsgGetCustomRuleDescription.restype = c_char_p
+    pLibTSG.tsgGetLoadedPoints.restype = POINTER(c_double)
+    pLibTSG.tsgGetNeededPoints.restype = POINTER(c_double)
+    pLibTSG.tsgGetPoints.restype = POINTER(c_double)
+    pLibTSG.tsgGetQuadratureWeights.restype = POINTER(c_double)
+    pLibTSG.tsgGetInterpolationWeights.restype = POINTER(c_double)
+    pLibTSG.tsgBatchGetInterpolationWeights.restype = POINTER(c_double)
+    pLibTSG.tsgIsSetDomainTransfrom.restype = c_int
+    pLibTSG.tsgIsSetConformalTransformASIN.restype = c_int
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ.restype = c_int
+    pLibTSG.tsgIsUsingConstruction.restype = c_int
+    pLibTSG.tsgGetCandidateConstructionPointsVoidPntr.restype = c_void_p
+    pLibTSG.tsgGetCandidateConstructionPointsPythonGetNP.restype = c_int
+    pLibTSG.tsgGetAccelerationType.restype = c_char_p
+    pLibTSG.tsgIsAccelerationAvailable.restype = c_int
+    pLibTSG.tsgIsUsingSupportIndex.restype = c_int
+    pLibTSG.tsgIsUsingMortonOrder.restype = c_int
+    pLibTSG.tsgGetIndexEntryBytes.restype = c_int
+    pLibTSG.tsgGetGPUID.restype = c_int
+    pLibTSG.tsgGetNumGPUs.restype = c_int
+    pLibTSG.tsgGetGPUMemory.restype = c_int
+    pLibTSG.tsgGetGPUName.restype = c_char_p
+
+    pLibTSG.tsgDestructTasmanianSparseGrid.argtypes = [c_void_p]
+    pLibTSG.tsgCopyGrid.argtypes = [c_void_p, c_void_p]
+    pLibTSG.tsgSetRuleCacheCapacity.argtypes = [c_int]
+    pLibTSG.tsgGetRuleCacheStats.argtypes = [POINTER(c_int)]
+    pLibTSG.tsgSetGreedyNodesCacheFile.argtypes = [c_char_p]
+    pLibTSG.tsgGetGreedyNodesCacheFile.restype = c_int
+    pLibTSG.tsgGetGreedyNodesCacheFile.argtypes = [c_char_p, c_int]
+    pLibTSG.tsgWrite.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgWriteBinary.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgWritePackedBinary.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgRead.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgWriteMapped.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgReadMapped.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgWriteBinaryToStringVoidPntr.argtypes = [c_void_p, c_int]
+    pLibTSG.tsgWriteBinaryToStringPythonGetSize.argtypes = [c_void_p]
+    pLibTSG.tsgWriteBinaryToStringPythonGetData.argtypes = [c_void_p]
+    pLibTSG.tsgWriteBinaryToStringPythonDelete.argtypes = [c_void_p]
+    pLibTSG.tsgReadBinaryFromBuffer.argtypes = [c_void_p, c_char_p, c_size_t]
+    pLibTSG.tsgMakeGlobalGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, c_char_p, POINTER(c_int), c_double, c_double, c_char_p, POINTER(c_int)]
+    pLibTSG.tsgMakeSequenceGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, c_char_p, POINTER(c_int), POINTER(c_int)]
+    pLibTSG.tsgMakeLocalPolynomialGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_int, c_char_p, POINTER(c_int)]
+    pLibTSG.tsgMakeWaveletGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_int, POINTER(c_int)]
+    pLibTSG.tsgMakeFourierGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
+    pLibTSG.tsgUpdateGlobalGrid.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
+    pLibTSG.tsgUpdateSequenceGrid.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
+    pLibTSG.tsgGetAlpha.argtypes = [c_void_p]
+    pLibTSG.tsgGetBeta.argtypes = [c_void_p]
+    pLibTSG.tsgGetOrder.argtypes = [c_void_p]
+    pLibTSG.tsgGetNumDimensions.argtypes = [c_void_p]
+    pLibTSG.tsgGetNumOutputs.argtypes = [c_void_p]
+    pLibTSG.tsgGetRule.argtypes = [c_void_p]
+    pLibTSG.tsgGetCustomRuleDescription.argtypes = [c_void_p]
+    pLibTSG.tsgGetNumLoaded.argtypes = [c_void_p]
+    pLibTSG.tsgGetNumNeeded.argtypes = [c_void_p]
+    pLibTSG.tsgGetNumPoints.argtypes = [c_void_p]
+    pLibTSG.tsgGetLoadedPoints.argtypes = [c_void_p]
+    pLibTSG.tsgGetNeededPoints.argtypes = [c_void_p]
+    pLibTSG.tsgGetPoints.argtypes = [c_void_p]
+    pLibTSG.tsgGetLoadedPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetNeededPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetQuadratureWeights.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetQuadratureWeightsStatic.argtypes = [c_void_p]
+    pLibTSG.tsgGetInterpolationWeights.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetInterpolationWeightsStatic.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgLoadNeededPoints.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgEvaluate.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgEvaluateFast.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgIntegrate.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgEvaluateBatch.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTSG.tsgEvaluateBatchThreadSafe.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTSG.tsgBatchGetInterpolationWeights.argtypes = [c_void_p, POINTER(c_double), c_int]
+    pLibTSG.tsgBatchGetInterpolationWeightsStatic.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTSG.tsgGetInterpolationWeightsSparseVoidPntr.restype = c_void_p
+    pLibTSG.tsgGetInterpolationWeightsSparseVoidPntr.argtypes = [c_void_p, POINTER(c_double), c_int]
+    pLibTSG.tsgIsGlobal.argtypes = [c_void_p]
+    pLibTSG.tsgIsSequence.argtypes = [c_void_p]
+    pLibTSG.tsgIsLocalPolynomial.argtypes = [c_void_p]
+    pLibTSG.tsgIsWavelet.argtypes = [c_void_p]
+    pLibTSG.tsgIsFourier.argtypes = [c_void_p]
+    pLibTSG.tsgSetDomainTransform.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgIsSetDomainTransfrom.argtypes = [c_void_p]
+    pLibTSG.tsgClearDomainTransform.argtypes = [c_void_p]
+    pLibTSG.tsgGetDomainTransform.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgSetConformalTransformASIN.argtypes = [c_void_p, POINTER(c_int)]
+    pLibTSG.tsgIsSetConformalTransformASIN.argtypes = [c_void_p]
+    pLibTSG.tsgClearConformalTransform.argtypes = [c_void_p]
+    pLibTSG.tsgGetConformalTransformASIN.argtypes = [c_void_p, POINTER(c_int)]
+    pLibTSG.tsgClearLevelLimits.argtypes = [c_void_p]
+    pLibTSG.tsgGetLevelLimits.argtypes = [c_void_p, POINTER(c_int)]
+    pLibTSG.tsgSetAnisotropicRefinement.argtypes = [c_void_p, c_char_p, c_int, c_int, POINTER(c_int)]
+    pLibTSG.tsgEstimateAnisotropicCoefficientsStatic.argtypes = [c_void_p, c_char_p, c_int, POINTER(c_int)]
+    pLibTSG.tsgSetGlobalSurplusRefinement.argtypes = [c_void_p, c_double, c_int, POINTER(c_int)]
+    pLibTSG.tsgSetLocalSurplusRefinement.argtypes = [c_void_p, c_double, c_char_p, c_int, POINTER(c_int)]
+    pLibTSG.tsgClearRefinement.argtypes = [c_void_p]
+    pLibTSG.tsgMergeRefinement.argtypes = [c_void_p]
+    pLibTSG.tsgRemovePointsByHierarchicalCoefficient.argtypes = [c_void_p, c_double, c_int, POINTER(c_double)]
+    pLibTSG.tsgEvaluateHierarchicalFunctions.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTSG.tsgSetHierarchicalCoefficients.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ.argtypes = [c_void_p, POINTER(c_double), c_int]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsStatic.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_int), POINTER(c_int), POINTER(c_double)]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsVoidPntr.restype = c_void_p
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsVoidPntr.argtypes = [c_void_p, POINTER(c_double), c_int]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetNZ.restype = c_int
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetNZ.argtypes = [c_void_p]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetPntr.restype = c_void_p
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetPntr.argtypes = [c_void_p]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetIndx.restype = c_void_p
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetIndx.argtypes = [c_void_p]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetVals.restype = c_void_p
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetVals.argtypes = [c_void_p]
+    pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonDelete.argtypes = [c_void_p]
+    pLibTSG.tsgGetHierarchicalCoefficientsStatic.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetHierarchicalCoefficientsPythonComplex.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgBeginConstruction.argtypes = [c_void_p]
+    pLibTSG.tsgIsUsingConstruction.argtypes = [c_void_p]
+    pLibTSG.tsgGetCandidateConstructionPointsVoidPntr.argtypes = [c_void_p, c_char_p, c_int, POINTER(c_int), POINTER(c_int)]
+    pLibTSG.tsgGetCandidateConstructionPointsPythonGetNP.argtypes = [c_void_p, c_void_p]
+    pLibTSG.tsgGetCandidateConstructionPointsPythonStatic.argtypes = [c_void_p, POINTER(c_double)]
+    pLibTSG.tsgGetCandidateConstructionPointsPythonDeleteVect.argtypes = [c_void_p]
+    pLibTSG.tsgLoadConstructedPoint.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
+    pLibTSG.tsgLoadConstructedPoints.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
+    pLibTSG.tsgFinishConstruction.argtypes = [c_void_p]
+    pLibTSG.tsgPrintStats.argtypes = [c_void_p]
+    pLibTSG.tsgEnableAcceleration.argtypes = [c_void_p, c_char_p]
+    pLibTSG.tsgGetAccelerationType.argtypes = [c_void_p]
+    pLibTSG.tsgIsAccelerationAvailable.argtypes = [c_char_p]
+    pLibTSG.tsgEnableSupportIndex.argtypes = [c_void_p, c_int]
+    pLibTSG.tsgIsUsingSupportIndex.argtypes = [c_void_p]
+    pLibTSG.tsgEnableMortonOrder.argtypes = [c_void_p, c_int, c_int]
+    pLibTSG.tsgIsUsingMortonOrder.argtypes = [c_void_p]
+    pLibTSG.tsgCompactIndexes.argtypes = [c_void_p]
+    pLibTSG.tsgGetIndexEntryBytes.argtypes = [c_void_p]
+    pLibTSG.tsgSetGPUID.argtypes = [c_void_p, c_int]
+    pLibTSG.tsgGetGPUID.argtypes = [c_void_p]
+    pLibTSG.tsgGetGPUMemory.argtypes = [c_int]
+    pLibTSG.tsgGetGPUName.argtypes = [c_int, c_int, c_char_p, POINTER(c_int)] # not really const here
+
+    ##########
+    pLibTSG.tsgPythonGetGlobalPolynomialSpace.restype = POINTER(c_int)
+    pLibTSG.tsgPythonGetGlobalPolynomialSpace.argtypes = [c_void_p, c_int, POINTER(c_int)]
+    ##########
+
+    pLibTSG.tsgDeleteInts.argtypes = [POINTER(c_int)]
+
+def _tsgGetLibrary(tasmanian_library):
+    '''
+    returns the ctypes library object with all prototypes declared,
+    the library is loaded and configured only on the first call for
+    a given path (or library object), subsequent calls use the cache
+
+    tasmanian_library: see the constructor of TasmanianSparseGrid
+
+    '''
+    if (isinstance(tasmanian_library, int)):
+        sLibPath = "@Tasmanian_libsparsegrid_path@"
+    elif ((sys.version_info.major == 3) and isinstance(tasmanian_library, str)):
+        sLibPath = tasmanian_library
+    elif ((sys.version_info.major == 2) and isinstance(tasmanian_library, basestring)):
+        sLibPath = tasmanian_library
+    else:
+        sLibPath = None
+
+    if (sLibPath is not None):
+        pLibTSG = _dTsgLibraryCache.get(sLibPath)
+        if (pLibTSG is not None):
+            return pLibTSG
+    elif (getattr(tasmanian_library, "_bTsgPrototypesSet", False)):
+        return tasmanian_library
+
+    with _pTsgLibraryLock:
+        if (sLibPath is not None):
+            if (sLibPath not in _dTsgLibraryCache):
+                pLibTSG = cdll.LoadLibrary(sLibPath)
+                _tsgSetPrototypes(pLibTSG)
+                _dTsgLibraryCache[sLibPath] = pLibTSG
+            return _dTsgLibraryCache[sLibPath]
+        if (not getattr(tasmanian_library, "_bTsgPrototypesSet", False)):
+            _tsgSetPrototypes(tasmanian_library)
+            tasmanian_library._bTsgPrototypesSet = True
+        return tasmanian_library
+
+
+def _tsgFloat64Array(sVariable, llfX):
+    '''
+    returns llfX as a C-contiguous and aligned numpy.ndarray of float64
+    arrays that already have the correct layout are returned as is,
+    otherwise exactly one copy is made and counted in iTsgNumInputCopies
+
+    sVariable: name of the variable, used in the warning message
+
+    '''
+    if ((llfX.dtype == np.float64) and llfX.flags['C_CONTIGUOUS'] and llfX.flags['ALIGNED']):
+        return llfX
+    global iTsgNumInputCopies
+    iTsgNumInputCopies += 1
+    if (bTsgWarnInputCopy):
+        warnings.warn("{0:1s} is not a C-contiguous float64 array, making a copy".format(sVariable), stacklevel = 3)
+    return np.ascontiguousarray(llfX, dtype = np.float64)
+
+def _tsgOutputArray(out, lShape, dtype = np.float64):
+    '''
+    returns the array where a bulk method will write the result
+    if out is None, allocates a new array with shape lShape and type dtype
+    otherwise, checks that out is a writeable C-contiguous array with
+    the correct shape and type and returns out
+
+    '''
+    if (out is None):
+        return np.empty(lShape, dtype)
+    if (not isinstance(out, np.ndarray)):
+        raise TasmanianInputError("out", "ERROR: out should be a numpy.ndarray")
+    if (out.shape != tuple(lShape)):
+        raise TasmanianInputError("out", "ERROR: out should have shape {0:1s} instead it has shape {1:1s}".format(str(tuple(lShape)), str(out.shape)))
+    if (out.dtype != dtype):
+        raise TasmanianInputError("out", "ERROR: out should have dtype {0:1s} instead it has dtype {1:1s}".format(str(np.dtype(dtype)), str(out.dtype)))
+    if (not (out.flags['C_CONTIGUOUS'] and out.flags['ALIGNED'])):
+        raise TasmanianInputError("out", "ERROR: out should be a C-contiguous and aligned array")
+    if (not out.flags['WRITEABLE']):
+        raise TasmanianInputError("out", "ERROR: out should be a writeable array")
+    return out
+
+def _tsgDoublePointer(aX):
+    '''
+    returns a ctypes pointer to the data of a C-contiguous float64 array
+    without making a copy, works with read-only arrays too
+
+    '''
+    return aX.ctypes.data_as(POINTER(c_double))
+
+class _TsgLibrarySparseMatrix:
+    '''
+    owns a sparse matrix held by the library, see _tsgSparseMatrixFromLibrary()
+    the memory is released when the last array that uses it is deleted
+
+    '''
+    def __init__(self, pLibTSG, pHolder):
+        self.pLibTSG = pLibTSG
+        self.pHolder = pHolder
+
+    def __del__(self):
+        self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonDelete(self.pHolder)
+
+class _TsgLibraryArray:
+    '''
+    exposes one array of a _TsgLibrarySparseMatrix to numpy,
+    numpy.asarray() keeps a reference to this object (and the owner)
+    for as long as the returned array is alive
+
+    '''
+    def __init__(self, pOwner, pData, iSize, dtype):
+        self.pOwner = pOwner
+        self.__array_interface__ = {'shape' : (iSize,), 'typestr' : np.dtype(dtype).str, 'data' : (pData, False), 'version' : 3}
+
+def _tsgSparseMatrixFromLibrary(pLibTSG, pHolder, iNumRows, iNumCols, dtype = np.float64):
+    '''
+    returns a TasmanianSimpleSparseMatrix with arrays that use the memory
+    of the sparse matrix pHolder computed by the library, i.e., without
+    a copy, pHolder is deleted when all three arrays are deleted
+
+    '''
+    iNumNZ = pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetNZ(pHolder)
+    pOwner = _TsgLibrarySparseMatrix(pLibTSG, pHolder)
+    pMat = TasmanianSimpleSparseMatrix()
+    pMat.aPntr = np.asarray(_TsgLibraryArray(pOwner, pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetPntr(pHolder), iNumRows + 1, np.int32))
+    pMat.aIndx = np.asarray(_TsgLibraryArray(pOwner, pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetIndx(pHolder), iNumNZ, np.int32))
+    pMat.aVals = np.asarray(_TsgLibraryArray(pOwner, pLibTSG.tsgEvaluateSparseHierarchicalFunctionsPythonGetVals(pHolder), iNumNZ, dtype))
+    pMat.iNumRows = iNumRows
+    pMat.iNumCols = iNumCols
+    return pMat
+
+def _tsgGetPlot(sMethod):
+    '''
+    returns the matplotlib.pyplot module, importing it on the first call
+    raises TasmanianInputError for sMethod if matplotlib cannot be loaded
+
+    '''
+    global _pTsgPlot, bTsgPlotting
+    if ((_pTsgPlot is None) and bTsgPlotting):
+        try:
+            import matplotlib.pyplot
+            _pTsgPlot = matplotlib.pyplot
+        except:
+            bTsgPlotting = False
+    if (_pTsgPlot is None):
+        raise TasmanianInputError(sMethod, "ERROR: could not load matplotlib.pyplot")
+    return _pTsgPlot
+
+def __getattr__(sName):
+    '''
+    TasmanianSG.tsgPlot is kept for backwards compatibility, the first
+    access imports matplotlib.pyplot (or gives [] if it cannot be loaded)
+    used only by Python 3.7 and newer, see PEP 562
+
+    '''
+    if (sName == "tsgPlot"):
+        try:
+            return _tsgGetPlot("tsgPlot")
+        except TasmanianInputError:
+            return []
+    raise AttributeError("module 'TasmanianSG' has no attribute '{0:1s}'".format(sName))
+
+def _tsgNextConstructionPoints(grid, iNumPoints, dRunning, sType, liAnisotropicWeightsOrOutput, liLevelLimits):
+    '''
+    returns a list with up to iNumPoints of the candidate construction
+    points of the grid, skipping the points that are keys of dRunning
+    (the keys are tuples), i.e., the points that are being computed
+
+    '''
+    if (iNumPoints <= 0):
+        return []
+    lPoints = []
+    for aX in grid.getCandidateConstructionPoints(sType, liAnisotropicWeightsOrOutput, liLevelLimits):
+        if (tuple(aX) not in dRunning):
+            lPoints.append(aX)
+            if (len(lPoints) == iNumPoints):
+                break
+    return lPoints
+
+
 class TasmanianInputError(Exception):
     '''Exception raised for incorret input to Tasmanian
 
@@ -83,13 +465,119 @@ class TasmanianSimpleSparseMatrix:
         if ((self.iNumRows == 0) or (self.iNumCols == 0)):
             return np.empty([0,0], np.float64)
         aMat = np.zeros([self.iNumRows, self.iNumCols], np.float64 if not np.iscomplexobj(self.aVals) else np.complex128)
-        for iI in range(self.iNumRows):
-            iJ = self.aPntr[iI]
-            while(iJ < self.aPntr[iI+1]):
-                aMat[iI, self.aIndx[iJ]] = self.aVals[iJ]
-                iJ += 1
+        aPntr = np.asarray(self.aPntr)
+        iNumNZ = aPntr[self.iNumRows]
+        # row index of each non-zero, then scatter all entries at once
+        aRows = np.repeat(np.arange(self.iNumRows), np.diff(aPntr[:(self.iNumRows + 1)]))
+        aMat[aRows, np.asarray(self.aIndx)[:iNumNZ]] = np.asarray(self.aVals)[:iNumNZ]
         return aMat
 
+class TasmanianEvaluationPlan:
+    def __init__(self, grid, llfX, bUseSparse = None):
+        '''
+        precomputes the interpolation matrix of grid at the points llfX,
+        i.e., the values of the hierarchical functions, so that the
+        interpolant at llfX is computed with a single matrix product
+        with the current hierarchical coefficients of the grid
+
+        the plan remains valid when new values are loaded with
+        loadNeededPoints() or setHierarchicalCoefficients(), but not
+        when the points of the grid or the domain transform change,
+        e.g., after refinement or make/update/read, evaluate() raises
+        TasmanianInputError if the plan is used after such a change
+
+        grid: instance of TasmanianSparseGrid with loaded values
+
+        llfX: a 2-D numpy.ndarray with llfX.shape[1] == iDimensions
+
+        bUseSparse: boolean or None
+                    True: store the matrix in sparse format,
+                          uses scipy.sparse if available
+                    False: store the matrix in dense format
+                    None: sparse for Local Polynomial and Wavelet grids
+                          and dense for all other grids
+
+        '''
+        iNumDims, iNumOutputs, iNumLoaded = grid.getMetadata()[0:3]
+        if (iNumLoaded == 0):
+            raise TasmanianInputError("TasmanianEvaluationPlan", "ERROR: cannot create a plan for a grid before any points are loaded, i.e., call loadNeededPoints first!")
+        if (len(llfX.shape) != 2):
+            raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray instread it has dimension {0:1d}".format(len(llfX.shape)))
+        if (llfX.shape[1] != iNumDims):
+            raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(iNumDims, llfX.shape[1]))
+        if (bUseSparse is None):
+            bUseSparse = grid.isLocalPolynomial() or grid.isWavelet()
+
+        self.grid = grid
+        self.tMetadata = (iNumDims, iNumOutputs, iNumLoaded)
+        self.iPointsGeneration = grid.iPointsGeneration
+        self.iNumX = llfX.shape[0]
+        self.bFourier = grid.isFourier()
+        self.bSparse = bUseSparse and (not self.bFourier)
+        self.bScipy = False
+        if (self.bSparse):
+            try:
+                import scipy.sparse
+                self.bScipy = True
+            except ImportError:
+                pass
+            self.pMatrix = grid.evaluateSparseHierarchicalFunctions(llfX, self.bScipy)
+            if (not self.bScipy):
+                # row of each non-zero and the first entry of the non-empty rows, see evaluate()
+                aNumPerRow = np.diff(self.pMatrix.aPntr)
+                self.aNonEmptyRows = np.nonzero(aNumPerRow)[0]
+                self.aRowStarts = self.pMatrix.aPntr[self.aNonEmptyRows]
+        else:
+            self.pMatrix = grid.evaluateHierarchicalFunctions(llfX)
+
+    def isSparse(self):
+        '''
+        returns True if the matrix is stored in sparse format
+
+        '''
+        return self.bSparse
+
+    def getNumPoints(self):
+        '''
+        returns the number of points in the plan, i.e., llfX.shape[0]
+
+        '''
+        return self.iNumX
+
+    def getMatrix(self):
+        '''
+        returns the interpolation matrix with shape
+        getNumPoints() X grid.getNumPoints(), a numpy.ndarray for dense
+        plans, or scipy.sparse.csr_matrix or TasmanianSimpleSparseMatrix
+        for sparse plans
+
+        '''
+        return self.pMatrix
+
+    def evaluate(self):
+        '''
+        returns the values of the interpolant at the points of the plan,
+        i.e., the same as grid.evaluateBatch(llfX), using the values
+        currently loaded in the grid
+
+        output: a 2-D numpy.ndarray with shape
+                getNumPoints() X iOutputs
+
+        '''
+        if ((self.grid.iPointsGeneration != self.iPointsGeneration) or (self.grid.getMetadata()[0:3] != self.tMetadata)):
+            raise TasmanianInputError("evaluate", "ERROR: the points of the grid have changed, the plan must be created again")
+        aCoeff = self.grid.getHierarchicalCoefficients()
+        if (not self.bSparse):
+            aResult = np.dot(self.pMatrix, aCoeff)
+            return np.ascontiguousarray(aResult.real) if self.bFourier else aResult
+        if (self.bScipy):
+            return np.asarray(self.pMatrix.dot(aCoeff))
+        aResult = np.zeros([self.iNumX, aCoeff.shape[1]], np.float64)
+        if (self.aNonEmptyRows.shape[0] > 0):
+            aProducts = self.pMatrix.aVals.reshape([-1, 1]) * aCoeff[self.pMatrix.aIndx]
+            aResult[self.aNonEmptyRows] = np.add.reduceat(aProducts, self.aRowStarts, axis = 0)
+        return aResult
+
 
 class TasmanianSparseGrid:
     def __init__(self, tasmanian_library=0):
@@ -112,152 +600,34 @@ class TasmanianSparseGrid:
                           )
 
         othwerwise: tasmanian_library must be an instance of ctypes.cdll
-                    this is useful when creating lots of instances of
-                    TasmanianSparseGrid in order to avoid having each
-                    instance load a sepatare copy of the common library
+
+        the library is loaded and the C prototypes are declared only
+        once per path (or cdll instance), all instances of
+        TasmanianSparseGrid created afterwards share the same binding
 
         '''
+        self.pLibTSG = _tsgGetLibrary(tasmanian_library)
+        self.pGrid = self.pLibTSG.tsgConstructTasmanianSparseGrid()
+
+        # the library used by pickle, 0 for the default or the path of the library
         if (isinstance(tasmanian_library, int)):
-            self.pLibTSG = cdll.LoadLibrary("@Tasmanian_libsparsegrid_path@")
-        elif (sys.version_info.major == 3):
-            if (isinstance(tasmanian_library, str)):
-                self.pLibTSG = cdll.LoadLibrary(tasmanian_library)
-            else:
-                self.pLibTSG = tasmanian_library
-        elif (isinstance(tasmanian_library, basestring)):
-            self.pLibTSG = cdll.LoadLibrary(tasmanian_library)
+            self.pTsgLibrary = 0
+        elif (hasattr(tasmanian_library, "_name")): # instance of ctypes.cdll
+            self.pTsgLibrary = tasmanian_library._name
         else:
-            self.pLibTSG = tasmanian_library
-
-        # ctypes requires that we manually specify the return types of functions
-        # in C this is done by header files, so this serves as a header
-        self.pLibTSG.tsgConstructTasmanianSparseGrid.restype = c_void_p
-        self.pLibTSG.tsgGetVersion.restype = c_char_p
-        self.pLibTSG.tsgGetLicense.restype = c_char_p
-        self.pLibTSG.tsgGetVersionMajor.restype = c_int
-        self.pLibTSG.tsgGetVersionMinor.restype = c_int
-        self.pLibTSG.tsgIsOpenMPEnabled.restype = c_int
-        self.pLibTSG.tsgGetNumDimensions.restype = c_int
-        self.pLibTSG.tsgGetNumOutputs.restype = c_int
-        self.pLibTSG.tsgGetNumLoaded.restype = c_int
-        self.pLibTSG.tsgGetNumNeeded.restype = c_int
-        self.pLibTSG.tsgGetNumPoints.restype = c_int
-        self.pLibTSG.tsgRead.restype = c_int
-        self.pLibTSG.tsgGetAlpha.restype = c_double
-        self.pLibTSG.tsgGetBeta.restype = c_double
-        self.pLibTSG.tsgGetOrder.restype = c_int
-        self.pLibTSG.tsgGetRule.restype = c_char_p
-        self.pLibTSG.tsgGetCustomRuleDescription.restype = c_char_p
-        self.pLibTSG.tsgGetLoadedPoints.restype = POINTER(c_double)
-        self.pLibTSG.tsgGetNeededPoints.restype = POINTER(c_double)
-        self.pLibTSG.tsgGetPoints.restype = POINTER(c_double)
-        self.pLibTSG.tsgGetQuadratureWeights.restype = POINTER(c_double)
-        self.pLibTSG.tsgGetInterpolationWeights.restype = POINTER(c_double)
-        self.pLibTSG.tsgBatchGetInterpolationWeights.restype = POINTER(c_double)
-        self.pLibTSG.tsgIsSetDomainTransfrom.restype = c_int
-        self.pLibTSG.tsgIsSetConformalTransformASIN.restype = c_int
-        self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ.restype = c_int
-        self.pLibTSG.tsgIsUsingConstruction.restype = c_int
-        self.pLibTSG.tsgGetCandidateConstructionPointsVoidPntr.restype = c_void_p
-        self.pLibTSG.tsgGetCandidateConstructionPointsPythonGetNP.restype = c_int
-        self.pLibTSG.tsgGetAccelerationType.restype = c_char_p
-        self.pLibTSG.tsgIsAccelerationAvailable.restype = c_int
-        self.pLibTSG.tsgGetGPUID.restype = c_int
-        self.pLibTSG.tsgGetNumGPUs.restype = c_int
-        self.pLibTSG.tsgGetGPUMemory.restype = c_int
-        self.pLibTSG.tsgGetGPUName.restype = c_char_p
-
-        self.pLibTSG.tsgDestructTasmanianSparseGrid.argtypes = [c_void_p]
-        self.pLibTSG.tsgCopyGrid.argtypes = [c_void_p, c_void_p]
-        self.pLibTSG.tsgWrite.argtypes = [c_void_p, c_char_p]
-        self.pLibTSG.tsgWriteBinary.argtypes = [c_void_p, c_char_p]
-        self.pLibTSG.tsgRead.argtypes = [c_void_p, c_char_p]
-        self.pLibTSG.tsgMakeGlobalGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, c_char_p, POINTER(c_int), c_double, c_double, c_char_p, POINTER(c_int)]
-        self.pLibTSG.tsgMakeSequenceGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, c_char_p, POINTER(c_int), POINTER(c_int)]
-        self.pLibTSG.tsgMakeLocalPolynomialGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_int, c_char_p, POINTER(c_int)]
-        self.pLibTSG.tsgMakeWaveletGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_int, POINTER(c_int)]
-        self.pLibTSG.tsgMakeFourierGrid.argtypes = [c_void_p, c_int, c_int, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
-        self.pLibTSG.tsgUpdateGlobalGrid.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
-        self.pLibTSG.tsgUpdateSequenceGrid.argtypes = [c_void_p, c_int, c_char_p, POINTER(c_int), POINTER(c_int)]
-        self.pLibTSG.tsgGetAlpha.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetBeta.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetOrder.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNumDimensions.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNumOutputs.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetRule.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetCustomRuleDescription.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNumLoaded.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNumNeeded.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNumPoints.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetLoadedPoints.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetNeededPoints.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetPoints.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetLoadedPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetNeededPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetPointsStatic.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetQuadratureWeights.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetQuadratureWeightsStatic.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetInterpolationWeights.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetInterpolationWeightsStatic.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgLoadNeededPoints.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgEvaluate.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgEvaluateFast.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgIntegrate.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgEvaluateBatch.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
-        self.pLibTSG.tsgBatchGetInterpolationWeights.argtypes = [c_void_p, POINTER(c_double), c_int]
-        self.pLibTSG.tsgBatchGetInterpolationWeightsStatic.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
-        self.pLibTSG.tsgIsGlobal.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsSequence.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsLocalPolynomial.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsWavelet.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsFourier.argtypes = [c_void_p]
-        self.pLibTSG.tsgSetDomainTransform.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgIsSetDomainTransfrom.argtypes = [c_void_p]
-        self.pLibTSG.tsgClearDomainTransform.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetDomainTransform.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgSetConformalTransformASIN.argtypes = [c_void_p, POINTER(c_int)]
-        self.pLibTSG.tsgIsSetConformalTransformASIN.argtypes = [c_void_p]
-        self.pLibTSG.tsgClearConformalTransform.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetConformalTransformASIN.argtypes = [c_void_p, POINTER(c_int)]
-        self.pLibTSG.tsgClearLevelLimits.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetLevelLimits.argtypes = [c_void_p, POINTER(c_int)]
-        self.pLibTSG.tsgSetAnisotropicRefinement.argtypes = [c_void_p, c_char_p, c_int, c_int, POINTER(c_int)]
-        self.pLibTSG.tsgEstimateAnisotropicCoefficientsStatic.argtypes = [c_void_p, c_char_p, c_int, POINTER(c_int)]
-        self.pLibTSG.tsgSetGlobalSurplusRefinement.argtypes = [c_void_p, c_double, c_int, POINTER(c_int)]
-        self.pLibTSG.tsgSetLocalSurplusRefinement.argtypes = [c_void_p, c_double, c_char_p, c_int, POINTER(c_int)]
-        self.pLibTSG.tsgClearRefinement.argtypes = [c_void_p]
-        self.pLibTSG.tsgMergeRefinement.argtypes = [c_void_p]
-        self.pLibTSG.tsgRemovePointsByHierarchicalCoefficient.argtypes = [c_void_p, c_double, c_int, POINTER(c_double)]
-        self.pLibTSG.tsgEvaluateHierarchicalFunctions.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_double)]
-        self.pLibTSG.tsgSetHierarchicalCoefficients.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ.argtypes = [c_void_p, POINTER(c_double), c_int]
-        self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsStatic.argtypes = [c_void_p, POINTER(c_double), c_int, POINTER(c_int), POINTER(c_int), POINTER(c_double)]
-        self.pLibTSG.tsgGetHierarchicalCoefficientsStatic.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgBeginConstruction.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsUsingConstruction.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetCandidateConstructionPointsVoidPntr.argtypes = [c_void_p, c_char_p, c_int, POINTER(c_int), POINTER(c_int)]
-        self.pLibTSG.tsgGetCandidateConstructionPointsPythonGetNP.argtypes = [c_void_p, c_void_p]
-        self.pLibTSG.tsgGetCandidateConstructionPointsPythonStatic.argtypes = [c_void_p, POINTER(c_double)]
-        self.pLibTSG.tsgGetCandidateConstructionPointsPythonDeleteVect.argtypes = [c_void_p]
-        self.pLibTSG.tsgLoadConstructedPoint.argtypes = [c_void_p, POINTER(c_double), POINTER(c_double)]
-        self.pLibTSG.tsgFinishConstruction.argtypes = [c_void_p]
-        self.pLibTSG.tsgPrintStats.argtypes = [c_void_p]
-        self.pLibTSG.tsgEnableAcceleration.argtypes = [c_void_p, c_char_p]
-        self.pLibTSG.tsgGetAccelerationType.argtypes = [c_void_p]
-        self.pLibTSG.tsgIsAccelerationAvailable.argtypes = [c_char_p]
-        self.pLibTSG.tsgSetGPUID.argtypes = [c_void_p, c_int]
-        self.pLibTSG.tsgGetGPUID.argtypes = [c_void_p]
-        self.pLibTSG.tsgGetGPUMemory.argtypes = [c_int]
-        self.pLibTSG.tsgGetGPUName.argtypes = [c_int, c_int, c_char_p, POINTER(c_int)] # not really const here
-
-        ##########
-        self.pLibTSG.tsgPythonGetGlobalPolynomialSpace.restype = POINTER(c_int)
-        self.pLibTSG.tsgPythonGetGlobalPolynomialSpace.argtypes = [c_void_p, c_int, POINTER(c_int)]
-        ##########
-
-        self.pLibTSG.tsgDeleteInts.argtypes = [POINTER(c_int)]
-
-        self.pGrid = self.pLibTSG.tsgConstructTasmanianSparseGrid()
+            self.pTsgLibrary = tasmanian_library
+
+        # cached (dimensions, outputs, loaded, needed, points), see getMetadata()
+        self.tMetadata = None
+        # incremented whenever the points or the transforms change, see TasmanianEvaluationPlan
+        self.iPointsGeneration = 0
+        # optional cache of evaluate() and evaluateBatch(), see enableEvaluateCache()
+        self.dEvaluateCache = None
+        self.iEvaluateCacheCapacity = 0
+        self.iEvaluateCacheHits = 0
+        self.iEvaluateCacheMisses = 0
+        # cached quadrature weights, see integrateValues()
+        self.aQuadratureWeights = None
 
     def __del__(self):
         '''
@@ -306,6 +676,76 @@ class TasmanianSparseGrid:
         '''
         return (self.pLibTSG.tsgIsOpenMPEnabled() != 0)
 
+    def setRuleCacheCapacity(self, iCapacity):
+        '''
+        sets the maximum number of one dimensional rules kept in the
+        library cache, the cache is shared by all grids in the process
+        and reused by makeGlobalGrid(), makeSequenceGrid() and the other
+        methods that compute the nodes, weights and coefficients of
+        Gauss and greedy rules, custom-tabulated rules are never cached
+
+        iCapacity: non-negative integer, 0 disables the cache
+                   the default capacity is 64
+
+        '''
+        if (iCapacity < 0):
+            raise TasmanianInputError("iCapacity", "ERROR: iCapacity must be non-negative")
+        self.pLibTSG.tsgSetRuleCacheCapacity(iCapacity)
+
+    def clearRuleCache(self):
+        '''
+        drops all rules from the library cache of one dimensional rules
+        and resets the statistics, affects all grids in the process
+
+        '''
+        self.pLibTSG.tsgClearRuleCache()
+
+    def getRuleCacheStats(self):
+        '''
+        returns a tuple with the number of cache hits, misses,
+        the number of cached rules and the capacity of the library
+        cache of one dimensional rules, see setRuleCacheCapacity()
+
+        '''
+        aStats = np.zeros([4], np.int32)
+        self.pLibTSG.tsgGetRuleCacheStats(aStats.ctypes.data_as(POINTER(c_int)))
+        return tuple(int(iS) for iS in aStats)
+
+    def setGreedyNodesCacheFile(self, sFilename):
+        '''
+        sets the file that keeps the nodes of the greedy sequence rules
+        'leja', 'max-lebesgue', 'min-lebesgue' and 'min-delta' between
+        runs, the nodes are computed by expensive optimization and the
+        file is updated every time a longer sequence is computed
+
+        the default is the value of the environment variable
+        TASMANIAN_GREEDY_NODES_CACHE, the setting is shared by all grids
+        in the process
+
+        sFilename: string with the path to the file
+                   empty string disables the file
+
+        the file is ignored and overwritten if it was written by
+        a different version of Tasmanian
+        '''
+        if (sys.version_info.major == 3):
+            sFilename = bytes(sFilename, encoding='utf8')
+        self.pLibTSG.tsgSetGreedyNodesCacheFile(c_char_p(sFilename))
+
+    def getGreedyNodesCacheFile(self):
+        '''
+        returns the file set by setGreedyNodesCacheFile()
+        empty string means that the file is disabled
+
+        '''
+        iLength = self.pLibTSG.tsgGetGreedyNodesCacheFile(None, 0)
+        pName = create_string_buffer(iLength + 1)
+        self.pLibTSG.tsgGetGreedyNodesCacheFile(pName, iLength + 1)
+        sFilename = pName.value
+        if (sys.version_info.major == 3):
+            sFilename = str(sFilename, encoding='utf8')
+        return sFilename
+
     def read(self, sFilename):
         '''
         reads the grid from a file
@@ -323,9 +763,11 @@ class TasmanianSparseGrid:
         '''
         if (sys.version_info.major == 3):
             sFilename = bytes(sFilename, encoding='utf8')
-        return (self.pLibTSG.tsgRead(self.pGrid, c_char_p(sFilename)) != 0)
+        bSuccess = (self.pLibTSG.tsgRead(self.pGrid, c_char_p(sFilename)) != 0)
+        self._resetCachedState()
+        return bSuccess
 
-    def write(self, sFilename, bUseBinaryFormat = False):
+    def write(self, sFilename, bUseBinaryFormat = False, bPackedIndexes = False):
         '''
         writes the grid to a file
 
@@ -336,14 +778,133 @@ class TasmanianSparseGrid:
                 True: write to a binary file
                 False: write to an ASCII file
 
+        bPackedIndexes: boolean (binary format only)
+                True: write the multi-indexes with 8 or 16 bit entries,
+                      the file is smaller but cannot be read by
+                      Tasmanian 6.0 or older
+                False: use the binary format of the older versions
+
         '''
         if (sys.version_info.major == 3):
             sFilename = bytes(sFilename, encoding='utf8')
         if (bUseBinaryFormat):
-            self.pLibTSG.tsgWriteBinary(self.pGrid, c_char_p(sFilename))
+            if (bPackedIndexes):
+                self.pLibTSG.tsgWritePackedBinary(self.pGrid, c_char_p(sFilename))
+            else:
+                self.pLibTSG.tsgWriteBinary(self.pGrid, c_char_p(sFilename))
         else:
             self.pLibTSG.tsgWrite(self.pGrid, c_char_p(sFilename))
 
+    def writeMapped(self, sFilename):
+        '''
+        writes the grid to a binary file that can be used by readMapped()
+        the points, values and surpluses are stored in aligned sections,
+        the file can also be loaded with read() but not by
+        Tasmanian 6.0 or older
+
+        sFilename: string indicating a grid file where a grid will
+                   be written
+
+        '''
+        if (sys.version_info.major == 3):
+            sFilename = bytes(sFilename, encoding='utf8')
+        if (self.pLibTSG.tsgWriteMapped(self.pGrid, c_char_p(sFilename)) == 0):
+            raise TasmanianInputError("sFilename", "ERROR: could not write to the file {0:1s}".format(sFilename.decode('utf8') if (sys.version_info.major == 3) else sFilename))
+
+    def readMapped(self, sFilename):
+        '''
+        reads the grid from a file using a read-only memory map
+        discards any existing grid held by this class
+
+        the points, values and surpluses of a file written by
+        writeMapped() are used directly from the mapped pages,
+        processes that read the same file share one copy in memory
+        and the data is copied only when the grid is modified,
+        e.g., by loadNeededPoints() or the refinement methods
+        the file must not be changed while the grid is in use
+
+        sFilename: string indicating a grid file written in binary
+                   format, files from writeMapped() avoid the copy
+
+        output: boolean
+                True: the read was successful
+                False: the read failed,
+                       check the CLI output for an error message
+
+        '''
+        if (sys.version_info.major == 3):
+            sFilename = bytes(sFilename, encoding='utf8')
+        bSuccess = (self.pLibTSG.tsgReadMapped(self.pGrid, c_char_p(sFilename)) != 0)
+        self._resetCachedState()
+        return bSuccess
+
+    def toBytes(self, bPackedIndexes = False):
+        '''
+        returns the grid in the binary format used by write()
+        the data is written to memory and no file is created
+
+        bPackedIndexes: boolean, see write()
+
+        output: bytes
+                the content of the binary file, can be loaded back
+                with fromBytes() or saved and loaded with read()
+
+        '''
+        pData = self.pLibTSG.tsgWriteBinaryToStringVoidPntr(self.pGrid, (1 if bPackedIndexes else 0))
+        bData = string_at(self.pLibTSG.tsgWriteBinaryToStringPythonGetData(pData),
+                          self.pLibTSG.tsgWriteBinaryToStringPythonGetSize(pData))
+        self.pLibTSG.tsgWriteBinaryToStringPythonDelete(pData)
+        return bData
+
+    def fromBytes(self, bData):
+        '''
+        reads the grid from the binary data returned by toBytes()
+        discards any existing grid held by this class
+
+        bData: bytes or bytearray
+               the content of a binary grid file, e.g., from toBytes()
+               or from reading a file written with bUseBinaryFormat
+
+        output: boolean
+                True: the read was successful
+                False: the read failed,
+                       check the CLI output for an error message
+
+        '''
+        if isinstance(bData, bytearray):
+            pBuffer = (c_char * len(bData)).from_buffer(bData)
+        elif isinstance(bData, bytes):
+            pBuffer = bData
+        else:
+            raise TasmanianInputError("bData", "ERROR: bData should be bytes or bytearray")
+        bSuccess = (self.pLibTSG.tsgReadBinaryFromBuffer(self.pGrid, pBuffer, len(bData)) != 0)
+        self._resetCachedState()
+        return bSuccess
+
+    def __getstate__(self):
+        '''
+        pickle support, the state is the binary data from toBytes(),
+        the library (the default or the path) and the acceleration
+        type and GPU ID, which are not part of the binary data
+
+        '''
+        return (self.toBytes(), self.pTsgLibrary, self.getAccelerationType(), self.getGPUID())
+
+    def __setstate__(self, tState):
+        '''
+        pickle support, creates the grid from the data of __getstate__()
+        using the same library and acceleration settings, the GPU ID is
+        kept only if the GPU is available on the current machine
+
+        '''
+        bData, pTsgLibrary, sAccelerationType, iGPUID = tState
+        self.__init__(pTsgLibrary)
+        if (not self.fromBytes(bData)):
+            raise TasmanianInputError("bData", "ERROR: could not unpickle the grid, the binary data is corrupted")
+        self.enableAcceleration(sAccelerationType)
+        if ((iGPUID != self.getGPUID()) and (iGPUID < self.getNumGPUs())):
+            self.setGPUID(iGPUID)
+
     def makeGlobalGrid(self, iDimension, iOutputs, iDepth, sType, sRule, liAnisotropicWeights=[], fAlpha=0.0, fBeta=0.0, sCustomFilename="", liLevelLimits=[]):
         '''
         creates a new sparse grid using a global rule
@@ -478,6 +1039,7 @@ class TasmanianSparseGrid:
                 pLevelLimits[iI] = liLevelLimits[iI]
 
         self.pLibTSG.tsgMakeGlobalGrid(self.pGrid, iDimension, iOutputs, iDepth, c_char_p(sType), c_char_p(sRule), pAnisoWeights, c_double(fAlpha), c_double(fBeta), pCustomRule, pLevelLimits)
+        self._resetCachedState()
 
     def makeSequenceGrid(self, iDimension, iOutputs, iDepth, sType, sRule, liAnisotropicWeights=[], liLevelLimits=[]):
         '''
@@ -553,6 +1115,7 @@ class TasmanianSparseGrid:
             sRule = bytes(sRule, encoding='utf8')
 
         self.pLibTSG.tsgMakeSequenceGrid(self.pGrid, iDimension, iOutputs, iDepth, c_char_p(sType), c_char_p(sRule), pAnisoWeights, pLevelLimits)
+        self._resetCachedState()
 
     def makeLocalPolynomialGrid(self, iDimension, iOutputs, iDepth, iOrder=1, sRule="localp", liLevelLimits=[]):
         '''
@@ -604,6 +1167,7 @@ class TasmanianSparseGrid:
             sRule = bytes(sRule, encoding='utf8')
 
         self.pLibTSG.tsgMakeLocalPolynomialGrid(self.pGrid, iDimension, iOutputs, iDepth, iOrder, c_char_p(sRule), pLevelLimits)
+        self._resetCachedState()
 
     def makeWaveletGrid(self, iDimension, iOutputs, iDepth, iOrder=1, liLevelLimits=[]):
         '''
@@ -642,6 +1206,7 @@ class TasmanianSparseGrid:
                 pLevelLimits[iI] = liLevelLimits[iI]
 
         self.pLibTSG.tsgMakeWaveletGrid(self.pGrid, iDimension, iOutputs, iDepth, iOrder, pLevelLimits)
+        self._resetCachedState()
 
     def makeFourierGrid(self, iDimension, iOutputs, iDepth, sType, liAnisotropicWeights=[], liLevelLimits=[]):
         '''
@@ -704,6 +1269,7 @@ class TasmanianSparseGrid:
             sType = bytes(sType, encoding='utf8')
 
         self.pLibTSG.tsgMakeFourierGrid(self.pGrid, iDimension, iOutputs, iDepth, c_char_p(sType), pAnisoWeights, pLevelLimits)
+        self._resetCachedState()
 
     def copyGrid(self, pGrid):
         '''
@@ -719,6 +1285,7 @@ class TasmanianSparseGrid:
             raise TasmanianInputError("pGrid", "ERROR: pGrid must be an instance of TasmanianSparseGrid")
 
         self.pLibTSG.tsgCopyGrid(self.pGrid, pGrid.pGrid)
+        self._resetCachedState()
 
     def updateGlobalGrid(self, iDepth, sType, liAnisotropicWeights=[], liLevelLimits=[]):
         '''
@@ -768,6 +1335,7 @@ class TasmanianSparseGrid:
                 pLevelLimits[iI] = liLevelLimits[iI]
 
         self.pLibTSG.tsgUpdateGlobalGrid(self.pGrid, iDepth, sType, pAnisoWeights, pLevelLimits)
+        self._resetCachedState()
 
     def updateSequenceGrid(self, iDepth, sType, liAnisotropicWeights=[], liLevelLimits=[]):
         '''
@@ -817,6 +1385,7 @@ class TasmanianSparseGrid:
                 pLevelLimits[iI] = liLevelLimits[iI]
 
         self.pLibTSG.tsgUpdateSequenceGrid(self.pGrid, iDepth, sType, pAnisoWeights, pLevelLimits)
+        self._resetCachedState()
 
     def getAlpha(self):
         '''
@@ -845,13 +1414,109 @@ class TasmanianSparseGrid:
         '''
         return self.pLibTSG.tsgGetOrder(self.pGrid)
 
+    def getMetadata(self):
+        '''
+        returns a tuple with the number of dimensions, outputs,
+        loaded, needed and total points, i.e.,
+        (getNumDimensions(), getNumOutputs(), getNumLoaded(),
+         getNumNeeded(), getNumPoints())
+
+        the values are cached on the Python side and the cache is reset
+        by every method that modifies the grid, thus repeated calls
+        do not require calls to the library
+
+        '''
+        if (self.tMetadata is None):
+            self.tMetadata = (self.pLibTSG.tsgGetNumDimensions(self.pGrid),
+                              self.pLibTSG.tsgGetNumOutputs(self.pGrid),
+                              self.pLibTSG.tsgGetNumLoaded(self.pGrid),
+                              self.pLibTSG.tsgGetNumNeeded(self.pGrid),
+                              self.pLibTSG.tsgGetNumPoints(self.pGrid))
+        return self.tMetadata
+
+    def _resetCachedState(self, bPointsChanged = True):
+        '''
+        resets the cached metadata and quadrature weights and drops
+        the cached values of evaluate(), called by every method that
+        modifies the grid
+
+        bPointsChanged: False if only the loaded values have changed,
+                        otherwise iPointsGeneration is incremented
+                        which invalidates the existing evaluation plans
+
+        '''
+        if (bPointsChanged):
+            self.iPointsGeneration += 1
+        self.tMetadata = None
+        self.aQuadratureWeights = None
+        if (self.dEvaluateCache):
+            self.dEvaluateCache.clear()
+
+    def enableEvaluateCache(self, iCapacity = 1024):
+        '''
+        enables a least-recently-used cache of the values computed by
+        evaluate() and evaluateBatch(), the key is the exact binary
+        representation of the point, hence the cache helps only when
+        the same points are requested repeatedly (e.g., line searches
+        and rejected MCMC proposals)
+
+        the cache is cleared by every method that modifies the grid,
+        e.g., loadNeededPoints(), setHierarchicalCoefficients(),
+        refinement and domain transforms
+
+        evaluateThreadSafe() and evaluateBatchParallel() do not use
+        the cache
+
+        iCapacity: positive integer
+                   the maximum number of points kept in the cache
+
+        '''
+        if (iCapacity < 1):
+            raise TasmanianInputError("iCapacity", "ERROR: the capacity of the cache should be a positive integer")
+        if (self.dEvaluateCache is None):
+            self.dEvaluateCache = OrderedDict()
+        self.iEvaluateCacheCapacity = iCapacity
+        while (len(self.dEvaluateCache) > iCapacity):
+            self.dEvaluateCache.popitem(last = False)
+
+    def disableEvaluateCache(self):
+        '''
+        disables the cache of evaluate() and evaluateBatch(),
+        the cached values and the counters are discarded
+
+        '''
+        self.dEvaluateCache = None
+        self.iEvaluateCacheCapacity = 0
+        self.iEvaluateCacheHits = 0
+        self.iEvaluateCacheMisses = 0
+
+    def getEvaluateCacheStats(self):
+        '''
+        returns a tuple with the number of cache hits, misses,
+        the number of cached points and the capacity of the cache
+        the hits and misses are counted per point
+
+        '''
+        return (self.iEvaluateCacheHits, self.iEvaluateCacheMisses,
+                len(self.dEvaluateCache) if (self.dEvaluateCache is not None) else 0, self.iEvaluateCacheCapacity)
+
+    def _cacheEvaluate(self, bKey, aY):
+        '''
+        adds the value aY for the point with bytes bKey to the cache
+        and evicts the least recently used points over the capacity
+
+        '''
+        self.dEvaluateCache[bKey] = aY
+        if (len(self.dEvaluateCache) > self.iEvaluateCacheCapacity):
+            self.dEvaluateCache.popitem(last = False)
+
     def getNumDimensions(self):
         '''
         returns the value of iDimension in the make***Grid command
         if no grid has been made, it returns 0
 
         '''
-        return self.pLibTSG.tsgGetNumDimensions(self.pGrid)
+        return self.getMetadata()[0]
 
     def getNumOutputs(self):
         '''
@@ -859,7 +1524,7 @@ class TasmanianSparseGrid:
         if no grid has been made, it returns 0
 
         '''
-        return self.pLibTSG.tsgGetNumOutputs(self.pGrid)
+        return self.getMetadata()[1]
 
     def getRule(self):
         '''
@@ -892,7 +1557,7 @@ class TasmanianSparseGrid:
         returns the number of points loaded in the existing interpolant
 
         '''
-        return self.pLibTSG.tsgGetNumLoaded(self.pGrid)
+        return self.getMetadata()[2]
 
     def getNumNeeded(self):
         '''
@@ -900,7 +1565,7 @@ class TasmanianSparseGrid:
         form the next interpolant following a refinement
 
         '''
-        return self.pLibTSG.tsgGetNumNeeded(self.pGrid)
+        return self.getMetadata()[3]
 
     def getNumPoints(self):
         '''
@@ -908,7 +1573,7 @@ class TasmanianSparseGrid:
         otherwise, returns the same as getNumNeeded()
 
         '''
-        return self.pLibTSG.tsgGetNumPoints(self.pGrid)
+        return self.getMetadata()[4]
 
     def getLoadedPoints(self):
         '''
@@ -945,21 +1610,27 @@ class TasmanianSparseGrid:
         self.pLibTSG.tsgGetNeededPointsStatic(self.pGrid, np.ctypeslib.as_ctypes(aPoints))
         return aPoints.reshape([iNumPoints, iNumDims])
 
-    def getPoints(self):
+    def getPoints(self, out = None):
         '''
         if points have been loaded, gives the same as getLoadedPoints()
         otherwise, returns the same as getNeededPoints()
 
+        out: (optional) a C-contiguous numpy.ndarray of float64 with shape
+             getNumPoints() X iDimension
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
         iNumDims = self.getNumDimensions()
         iNumPoints = self.getNumPoints()
-        if (iNumPoints == 0):
+        if ((iNumPoints == 0) and (out is None)):
             return np.empty([0, 0], np.float64)
-        aPoints = np.empty([iNumPoints * iNumDims], np.float64)
-        self.pLibTSG.tsgGetPointsStatic(self.pGrid, np.ctypeslib.as_ctypes(aPoints))
-        return aPoints.reshape([iNumPoints, iNumDims])
+        aPoints = _tsgOutputArray(out, [iNumPoints, iNumDims])
+        if (iNumPoints > 0):
+            self.pLibTSG.tsgGetPointsStatic(self.pGrid, _tsgDoublePointer(aPoints))
+        return aPoints
 
-    def getQuadratureWeights(self):
+    def getQuadratureWeights(self, out = None):
         '''
         returns the quadrature weights associated with
         the points in getPoints()
@@ -968,12 +1639,16 @@ class TasmanianSparseGrid:
                 the order of the weights matches
                 the order in getPoints()
 
+        out: (optional) a C-contiguous numpy.ndarray of float64 with shape
+             [getNumPoints()]
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
         iNumPoints = self.getNumPoints()
-        if (iNumPoints == 0):
-            return np.empty([0], np.float64)
-        aWeights = np.empty([iNumPoints], np.float64)
-        self.pLibTSG.tsgGetQuadratureWeightsStatic(self.pGrid, np.ctypeslib.as_ctypes(aWeights))
+        aWeights = _tsgOutputArray(out, [iNumPoints])
+        if (iNumPoints > 0):
+            self.pLibTSG.tsgGetQuadratureWeightsStatic(self.pGrid, _tsgDoublePointer(aWeights))
         return aWeights
 
     def getInterpolationWeights(self, lfX):
@@ -998,7 +1673,7 @@ class TasmanianSparseGrid:
         self.pLibTSG.tsgGetInterpolationWeightsStatic(self.pGrid, np.ctypeslib.as_ctypes(lfX), np.ctypeslib.as_ctypes(aWeights))
         return aWeights
 
-    def getInterpolationWeightsBatch(self, llfX):
+    def getInterpolationWeightsBatch(self, llfX, out = None):
         '''
         returns the interpolation weights associated with the points
         in getPoints()
@@ -1008,29 +1683,83 @@ class TasmanianSparseGrid:
 
         llfX: a 2-D numpy.ndarray with second dimension iDimensions
               each row in the array is a single requested point
+              C-contiguous float64 arrays are passed to the library
+              without a copy, other layouts are copied once
+              (see TasmanianSG.iTsgNumInputCopies)
 
         output: a 2-D numpy.ndarray
                 with dimensions llfX.shape[0] X getNumPoints()
                 each row corresponds to the weight for one row of llfX
 
+        out: (optional) a C-contiguous numpy.ndarray of float64 with shape
+             llfX.shape[0] X getNumPoints()
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
         if (len(llfX.shape) != 2):
             raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray instread it has dimension {0:1d}".format(len(llfX.shape)))
         iNumX = llfX.shape[0]
         if (iNumX == 0):
-            return np.empty([0, self.getNumPoints()], np.float64)
+            return _tsgOutputArray(out, [0, self.getNumPoints()])
         iNumDim = llfX.shape[1]
         if (iNumDim != self.getNumDimensions()):
             raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(self.getNumDimensions(), iNumDim))
         iNumPoints = self.getNumPoints()
         if (iNumPoints == 0):
-            return np.empty([0, 0], np.float64)
-        aWeights = np.empty([iNumX, iNumPoints], np.float64)
-        self.pLibTSG.tsgBatchGetInterpolationWeightsStatic(self.pGrid,
-            np.ctypeslib.as_ctypes(llfX.reshape([iNumX * iNumDim])), iNumX,
-            np.ctypeslib.as_ctypes(aWeights.reshape([iNumX * iNumPoints])))
+            return np.empty([0, 0], np.float64) if (out is None) else _tsgOutputArray(out, [iNumX, 0])
+        aX = _tsgFloat64Array("llfX", llfX)
+        aWeights = _tsgOutputArray(out, [iNumX, iNumPoints])
+        self.pLibTSG.tsgBatchGetInterpolationWeightsStatic(self.pGrid, _tsgDoublePointer(aX), iNumX, _tsgDoublePointer(aWeights))
         return aWeights
 
+    def getInterpolationWeightsSparse(self, llfX, bUseScipy = False):
+        '''
+        returns the interpolation weights associated with the points
+        in getPoints(), same as getInterpolationWeightsBatch() but
+        the result is a sparse matrix
+
+        Local Polynomial grids find the non-zero weights with the same
+        tree search used by evaluateSparseHierarchicalFunctions() and
+        never form the dense matrix, all other grids compute the dense
+        weights one row at a time and drop the zeros
+
+        llfX: a 2-D numpy.ndarray with second dimension iDimensions
+              each row in the array is a single requested point
+              C-contiguous float64 arrays are passed to the library
+              without a copy, other layouts are copied once
+              (see TasmanianSG.iTsgNumInputCopies)
+
+        output: returns a TasmanianSimpleSparseMatrix class
+                with iNumRows = llfX.shape[0] and
+                iNumCols = getNumPoints(), each row holds the weights
+                for one row of llfX in compressed sparse row format
+
+        bUseScipy: boolean
+                True: return scipy.sparse.csr_matrix that uses the same
+                      three arrays without making a copy,
+                      requires scipy
+                False: return TasmanianSimpleSparseMatrix
+
+        '''
+        if (len(llfX.shape) != 2):
+            raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray instread it has dimension {0:1d}".format(len(llfX.shape)))
+        if (llfX.shape[1] != self.getNumDimensions()):
+            raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(self.getNumDimensions(), llfX.shape[1]))
+        if (bUseScipy):
+            try:
+                import scipy.sparse
+            except ImportError:
+                raise TasmanianInputError("bUseScipy", "ERROR: bUseScipy is True, but scipy.sparse cannot be imported")
+        iNumX = llfX.shape[0]
+        aX = _tsgFloat64Array("llfX", llfX)
+        pHolder = self.pLibTSG.tsgGetInterpolationWeightsSparseVoidPntr(self.pGrid, _tsgDoublePointer(aX), iNumX)
+        pMat = _tsgSparseMatrixFromLibrary(self.pLibTSG, pHolder, iNumX, self.getNumPoints())
+
+        if (bUseScipy):
+            return scipy.sparse.csr_matrix((pMat.aVals, pMat.aIndx, pMat.aPntr), shape = (pMat.iNumRows, pMat.iNumCols), copy = False)
+        return pMat
+
     def loadNeededPoints(self, llfVals):
         '''
         loads the values of the target function at the needed points
@@ -1047,16 +1776,17 @@ class TasmanianSparseGrid:
         '''
         if (len(llfVals.shape) != 2):
             raise TasmanianInputError("llfVals", "ERROR: llfVals should be a 2-D numpy.ndarray, instead it has {0:1d} dimensions".format(len(llfVals.shape)))
-        if (self.getNumNeeded() == 0):
-            if (llfVals.shape[0] != self.getNumLoaded()):
-                raise TasmanianInputError("llfVals", "ERROR: leading dimension of llfVals is {0:1d} but the number of current points is {1:1d}".format(llfVals.shape[0], self.getNumLoaded()))
-        elif (llfVals.shape[0] != self.getNumNeeded()):
-            raise TasmanianInputError("llfVals", "ERROR: leading dimension of llfVals is {0:1d} but the number of needed points is {1:1d}".format(llfVals.shape[0], self.getNumNeeded()))
-        if (llfVals.shape[1] != self.getNumOutputs()):
-            raise TasmanianInputError("llfVals", "ERROR: second dimension of llfVals is {0:1d} but the number of outputs is set to {1:1d}".format(llfVals.shape[1], self.getNumOutputs()))
-        iNumPoints = llfVals.shape[0]
-        iNumDims = llfVals.shape[1]
-        self.pLibTSG.tsgLoadNeededPoints(self.pGrid, np.ctypeslib.as_ctypes(llfVals.reshape([iNumPoints * iNumDims])))
+        iNumDims, iNumOutputs, iNumLoaded, iNumNeeded = self.getMetadata()[0:4]
+        if (iNumNeeded == 0):
+            if (llfVals.shape[0] != iNumLoaded):
+                raise TasmanianInputError("llfVals", "ERROR: leading dimension of llfVals is {0:1d} but the number of current points is {1:1d}".format(llfVals.shape[0], iNumLoaded))
+        elif (llfVals.shape[0] != iNumNeeded):
+            raise TasmanianInputError("llfVals", "ERROR: leading dimension of llfVals is {0:1d} but the number of needed points is {1:1d}".format(llfVals.shape[0], iNumNeeded))
+        if (llfVals.shape[1] != iNumOutputs):
+            raise TasmanianInputError("llfVals", "ERROR: second dimension of llfVals is {0:1d} but the number of outputs is set to {1:1d}".format(llfVals.shape[1], iNumOutputs))
+        aVals = _tsgFloat64Array("llfVals", llfVals)
+        self.pLibTSG.tsgLoadNeededPoints(self.pGrid, _tsgDoublePointer(aVals))
+        self._resetCachedState(iNumNeeded > 0)
 
     def evaluateThreadSafe(self, lfX):
         '''
@@ -1075,16 +1805,17 @@ class TasmanianSparseGrid:
             the values of the interpolant at lfX
 
         '''
-        if (self.getNumLoaded() == 0):
+        iNumDims, iNumOutputs, iNumLoaded = self.getMetadata()[0:3]
+        if (iNumLoaded == 0):
             raise TasmanianInputError("evaluateThreadSafe", "ERROR: cannot call evaluate for a grid before any points are loaded, i.e., call loadNeededPoints first!")
         if (len(lfX.shape) != 1):
             raise TasmanianInputError("lfX", "ERROR: lfX should be 1D numpy array")
         iNumX = lfX.shape[0]
-        if (iNumX != self.getNumDimensions()):
-            raise TasmanianInputError("lfX", "ERROR: lfX should have lenth {0:1d} instead it has length {1:1d}".format(self.getNumDimensions(),iNumX))
-        iNumOutputs = self.getNumOutputs()
+        if (iNumX != iNumDims):
+            raise TasmanianInputError("lfX", "ERROR: lfX should have lenth {0:1d} instead it has length {1:1d}".format(iNumDims,iNumX))
+        aX = _tsgFloat64Array("lfX", lfX)
         aY = np.empty([iNumOutputs], np.float64)
-        self.pLibTSG.tsgEvaluate(self.pGrid, np.ctypeslib.as_ctypes(lfX), np.ctypeslib.as_ctypes(aY))
+        self.pLibTSG.tsgEvaluate(self.pGrid, _tsgDoublePointer(aX), _tsgDoublePointer(aY))
         return aY
 
     def evaluate(self, lfX):
@@ -1104,19 +1835,30 @@ class TasmanianSparseGrid:
             the values of the interpolant at lfX
 
         '''
-        if (self.getNumLoaded() == 0):
+        iNumDims, iNumOutputs, iNumLoaded = self.getMetadata()[0:3]
+        if (iNumLoaded == 0):
             raise TasmanianInputError("evaluate", "ERROR: cannot call evaluate for a grid before any points are loaded, i.e., call loadNeededPoints first!")
         if (len(lfX.shape) != 1):
             raise TasmanianInputError("lfX", "ERROR: lfX should be 1D numpy array")
         iNumX = lfX.shape[0]
-        if (iNumX != self.getNumDimensions()):
-            raise TasmanianInputError("lfX", "ERROR: lfX should have lenth {0:1d} instead it has length {1:1d}".format(self.getNumDimensions(),iNumX))
-        iNumOutputs = self.getNumOutputs()
+        if (iNumX != iNumDims):
+            raise TasmanianInputError("lfX", "ERROR: lfX should have lenth {0:1d} instead it has length {1:1d}".format(iNumDims,iNumX))
+        aX = _tsgFloat64Array("lfX", lfX)
+        if (self.dEvaluateCache is not None):
+            bKey = aX.tobytes()
+            aCached = self.dEvaluateCache.pop(bKey, None)
+            if (aCached is not None):
+                self.iEvaluateCacheHits += 1
+                self.dEvaluateCache[bKey] = aCached # move to most recently used
+                return aCached.copy()
+            self.iEvaluateCacheMisses += 1
         aY = np.empty([iNumOutputs], np.float64)
-        self.pLibTSG.tsgEvaluateFast(self.pGrid, np.ctypeslib.as_ctypes(lfX), np.ctypeslib.as_ctypes(aY))
+        self.pLibTSG.tsgEvaluateFast(self.pGrid, _tsgDoublePointer(aX), _tsgDoublePointer(aY))
+        if (self.dEvaluateCache is not None):
+            self._cacheEvaluate(bKey, aY.copy())
         return aY
 
-    def evaluateBatch(self, llfX):
+    def evaluateBatch(self, llfX, out = None):
         '''
         evaluates the intepolant at the points of interest and returns
         the result
@@ -1127,28 +1869,163 @@ class TasmanianSparseGrid:
         llfX: a 2-D numpy.ndarray
               with second dimension equal to iDimensions
               each row in the array is a single requested point
+              C-contiguous float64 arrays are passed to the library
+              without a copy, other layouts are copied once
+              (see TasmanianSG.iTsgNumInputCopies)
 
         output: a 2-D numpy.ndarray
                 with dimensions llfX.shape[0] X iOutputs
                 each row corresponds to the value of the interpolant
                 for one row of llfX
 
+        out: (optional) a C-contiguous numpy.ndarray of float64 with shape
+             llfX.shape[0] X iOutputs
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
-        if (self.getNumLoaded() == 0):
+        iNumDims, iNumOutputs, iNumLoaded = self.getMetadata()[0:3]
+        if (iNumLoaded == 0):
             raise TasmanianInputError("evaluateBatch", "ERROR: cannot call evaluateBatch for a grid before any points are loaded, i.e., call loadNeededPoints first!")
         if (len(llfX.shape) != 2):
             raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray instread it has dimension {0:1d}".format(len(llfX.shape)))
         iNumX = llfX.shape[0]
         if (iNumX == 0):
-            return np.empty([0, self.getNumOutputs()], np.float64)
+            return _tsgOutputArray(out, [0, iNumOutputs])
         iNumDim = llfX.shape[1]
-        if (iNumDim != self.getNumDimensions()):
-            raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(self.getNumDimensions(), iNumDim))
-        iNumOutputs = self.getNumOutputs()
-        aY = np.empty([iNumX, iNumOutputs], np.float64)
-        # np.ctypeslib.as_ctypes(llfX.reshape([iNumX*iNumDim,])) messes up, the first 4 entries randomly get set to machine eps (10^-310) and 0
-        lfX = llfX.reshape([iNumX*iNumDim,])
-        self.pLibTSG.tsgEvaluateBatch(self.pGrid, np.ctypeslib.as_ctypes(lfX), iNumX, np.ctypeslib.as_ctypes(aY.reshape([iNumX*iNumOutputs,])))
+        if (iNumDim != iNumDims):
+            raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(iNumDims, iNumDim))
+        aX = _tsgFloat64Array("llfX", llfX)
+        aY = _tsgOutputArray(out, [iNumX, iNumOutputs])
+        if (self.dEvaluateCache is not None):
+            self._evaluateBatchCached(aX, aY)
+        else:
+            self.pLibTSG.tsgEvaluateBatch(self.pGrid, _tsgDoublePointer(aX), iNumX, _tsgDoublePointer(aY))
+        return aY
+
+    def _evaluateBatchCached(self, aX, aY):
+        '''
+        evaluateBatch() using the cache, the rows of aX found in the cache
+        are copied and only the missing rows are sent to the library,
+        repeated rows are computed only once
+
+        '''
+        dCache = self.dEvaluateCache
+        dMissing = OrderedDict() # bytes of missing point -> rows of aX
+        for iI in range(aX.shape[0]):
+            bKey = aX[iI].tobytes()
+            aCached = dCache.pop(bKey, None)
+            if (aCached is not None):
+                dCache[bKey] = aCached # move to most recently used
+                aY[iI] = aCached
+            elif (bKey in dMissing):
+                dMissing[bKey].append(iI)
+            else:
+                dMissing[bKey] = [iI]
+        iNumMissing = sum(len(liRows) for liRows in dMissing.values())
+        self.iEvaluateCacheHits += aX.shape[0] - iNumMissing
+        self.iEvaluateCacheMisses += iNumMissing
+        if (len(dMissing) == 0):
+            return
+        liFirst = [liRows[0] for liRows in dMissing.values()]
+        aMissX = np.ascontiguousarray(aX[liFirst])
+        aMissY = np.empty([len(liFirst), aY.shape[1]], np.float64)
+        self.pLibTSG.tsgEvaluateBatch(self.pGrid, _tsgDoublePointer(aMissX), len(liFirst), _tsgDoublePointer(aMissY))
+        for iJ, (bKey, liRows) in enumerate(dMissing.items()):
+            aY[liRows] = aMissY[iJ]
+            self._cacheEvaluate(bKey, aMissY[iJ].copy())
+
+    def makeEvaluationPlan(self, llfX, bUseSparse = None):
+        '''
+        returns a TasmanianEvaluationPlan for the points llfX, the plan
+        computes the same values as evaluateBatch(llfX) with a single
+        matrix product, which is faster when the same points are used
+        with many different sets of loaded values
+
+        see TasmanianEvaluationPlan for the meaning of llfX and bUseSparse
+
+        '''
+        return TasmanianEvaluationPlan(self, llfX, bUseSparse)
+
+    def evaluateBatchParallel(self, llfX, num_threads = 0, chunk_size = 0, out = None):
+        '''
+        evaluates the intepolant at the points of interest and returns
+        the result, the points are split into chunks and the chunks are
+        distributed between Python threads, each thread calls the thread
+        safe evaluate in the library (the GIL is released during the call)
+        and writes to a disjoint set of rows of the output
+
+        this is useful when the library is compiled without OpenMP or
+        OpenMP is limited, the acceleration mode is ignored
+
+        llfX: a 2-D numpy.ndarray
+              with second dimension equal to iDimensions
+              each row in the array is a single requested point
+
+        num_threads: int (non-negative)
+                     number of threads to use, 0 means one thread per
+                     core reported by the operating system
+
+        chunk_size: int (non-negative)
+                    number of points handled by one library call,
+                    0 means that the chunk size is selected so that
+                    the points and values of one chunk fit in cache,
+                    while still giving several chunks to each thread
+
+        out: (optional) a C-contiguous numpy.ndarray of float64 with shape
+             llfX.shape[0] X iOutputs
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
+        output: a 2-D numpy.ndarray
+                with dimensions llfX.shape[0] X iOutputs
+                each row corresponds to the value of the interpolant
+                for one row of llfX
+
+        '''
+        iNumDims, iNumOutputs, iNumLoaded = self.getMetadata()[0:3]
+        if (iNumLoaded == 0):
+            raise TasmanianInputError("evaluateBatchParallel", "ERROR: cannot call evaluateBatchParallel for a grid before any points are loaded, i.e., call loadNeededPoints first!")
+        if (len(llfX.shape) != 2):
+            raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray instread it has dimension {0:1d}".format(len(llfX.shape)))
+        if (num_threads < 0):
+            raise TasmanianInputError("num_threads", "ERROR: num_threads should be a non-negative integer")
+        if (chunk_size < 0):
+            raise TasmanianInputError("chunk_size", "ERROR: chunk_size should be a non-negative integer")
+        iNumX = llfX.shape[0]
+        if (iNumX == 0):
+            return _tsgOutputArray(out, [0, iNumOutputs])
+        if (llfX.shape[1] != iNumDims):
+            raise TasmanianInputError("llfX", "ERROR: llfX.shape[1] should equal {0:1d} instead it equals {1:1d}".format(iNumDims, llfX.shape[1]))
+        aX = _tsgFloat64Array("llfX", llfX)
+        aY = _tsgOutputArray(out, [iNumX, iNumOutputs])
+
+        iNumThreads = num_threads
+        if (iNumThreads == 0):
+            iNumThreads = (os.cpu_count() if hasattr(os, "cpu_count") else None) or 1
+        iChunkSize = chunk_size
+        if (iChunkSize == 0):
+            # 32768 doubles = 256KB, i.e., the size of a typical L2 cache
+            # but make sure there are at least 4 chunks per thread for load balancing
+            iChunkSize = max(1, min(32768 // (iNumDims + iNumOutputs), (iNumX + 4 * iNumThreads - 1) // (4 * iNumThreads)))
+        iNumChunks = (iNumX + iChunkSize - 1) // iChunkSize
+        iNumThreads = min(iNumThreads, iNumChunks)
+
+        def evaluateChunks(iThread):
+            # chunks are assigned round-robin, thread iThread takes iThread, iThread + iNumThreads, ...
+            for iChunk in range(iThread, iNumChunks, iNumThreads):
+                iStart = iChunk * iChunkSize
+                iEnd = min(iStart + iChunkSize, iNumX)
+                self.pLibTSG.tsgEvaluateBatchThreadSafe(self.pGrid, _tsgDoublePointer(aX[iStart:iEnd]), iEnd - iStart, _tsgDoublePointer(aY[iStart:iEnd]))
+
+        if (iNumThreads == 1):
+            evaluateChunks(0)
+        else:
+            lThreads = [threading.Thread(target = evaluateChunks, args = (iThread,)) for iThread in range(iNumThreads)]
+            for pThread in lThreads:
+                pThread.start()
+            for pThread in lThreads:
+                pThread.join()
         return aY
 
     def integrate(self):
@@ -1166,6 +2043,36 @@ class TasmanianSparseGrid:
         self.pLibTSG.tsgIntegrate(self.pGrid, np.ctypeslib.as_ctypes(aQ))
         return aQ
 
+    def integrateValues(self, llfVals):
+        '''
+        returns the integrals of the interpolants defined by the given
+        values at the points, the grid is not modified
+
+        llfVals: a 2-D numpy.ndarray
+                 with dimensions getNumPoints() X iNumIntegrands
+                 each column holds the values of one integrand at the
+                 points returned by getPoints()
+                 a 1-D array with length getNumPoints() is treated
+                 as a single integrand
+
+        output: a 1-D numpy.ndarray of length iNumIntegrands
+                or a float if llfVals is a 1-D array
+
+        the quadrature weights, including the domain and conformal
+        scaling, are computed once and cached until the grid changes,
+        all integrals are computed with a single matrix-vector product
+        '''
+        iNumPoints = self.getNumPoints()
+        if (iNumPoints == 0):
+            raise TasmanianInputError("integrateValues", "ERROR: cannot call integrateValues for a grid without points")
+        if (len(llfVals.shape) not in [1, 2]):
+            raise TasmanianInputError("llfVals", "ERROR: llfVals should be a 1-D or 2-D numpy.ndarray instead it has dimension {0:1d}".format(len(llfVals.shape)))
+        if (llfVals.shape[0] != iNumPoints):
+            raise TasmanianInputError("llfVals", "ERROR: llfVals.shape[0] should equal getNumPoints() = {0:1d} instead it equals {1:1d}".format(iNumPoints, llfVals.shape[0]))
+        if (self.aQuadratureWeights is None):
+            self.aQuadratureWeights = self.getQuadratureWeights()
+        return np.dot(self.aQuadratureWeights, llfVals)
+
     def isGlobal(self):
         '''
         returns True if using a global grid
@@ -1234,6 +2141,7 @@ class TasmanianSparseGrid:
             pA[iI] = llfTransform[iI][0]
             pB[iI] = llfTransform[iI][1]
         self.pLibTSG.tsgSetDomainTransform(self.pGrid, pA, pB)
+        self._resetCachedState()
 
     def isSetDomainTransfrom(self):
         '''
@@ -1251,6 +2159,7 @@ class TasmanianSparseGrid:
 
         '''
         self.pLibTSG.tsgClearDomainTransform(self.pGrid)
+        self._resetCachedState()
 
     def getDomainTransform(self):
         '''
@@ -1294,6 +2203,7 @@ class TasmanianSparseGrid:
         for iI in range(iNumDimensions):
             pTruncation[iI] = liTruncation[iI] # this converts Python longs to c_int
         self.pLibTSG.tsgSetConformalTransformASIN(self.pGrid, pTruncation)
+        self._resetCachedState()
 
     def isSetConformalTransformASIN(self):
         '''
@@ -1313,6 +2223,7 @@ class TasmanianSparseGrid:
 
         '''
         self.pLibTSG.tsgClearConformalTransform(self.pGrid)
+        self._resetCachedState()
 
     def getConformalTransformASIN(self):
         '''
@@ -1400,6 +2311,7 @@ class TasmanianSparseGrid:
         if (sys.version_info.major == 3):
             sType = bytes(sType, encoding='utf8')
         self.pLibTSG.tsgSetAnisotropicRefinement(self.pGrid, c_char_p(sType), iMinGrowth, iOutput, pLevelLimits)
+        self._resetCachedState()
 
     def estimateAnisotropicCoefficients(self, sType, iOutput):
         '''
@@ -1494,12 +2406,14 @@ class TasmanianSparseGrid:
             if (not self.isSequence()):
                 raise TasmanianInputError("sCriteria", "ERROR: sCriteria must be specified")
             self.pLibTSG.tsgSetGlobalSurplusRefinement(self.pGrid, c_double(fTolerance), iOutput, pLevelLimits)
+            self._resetCachedState()
         else:
             if (self.isSequence()):
                 raise TasmanianInputError("sCriteria", "ERROR: sCriteria cannot be used for sequence grids")
             if (sys.version_info.major == 3):
                 sCriteria = bytes(sCriteria, encoding='utf8')
             self.pLibTSG.tsgSetLocalSurplusRefinement(self.pGrid, c_double(fTolerance), c_char_p(sCriteria), iOutput, pLevelLimits)
+            self._resetCachedState()
 
     def clearRefinement(self):
         '''
@@ -1511,6 +2425,7 @@ class TasmanianSparseGrid:
 
         '''
         self.pLibTSG.tsgClearRefinement(self.pGrid)
+        self._resetCachedState()
 
     def mergeRefinement(self):
         '''
@@ -1524,12 +2439,137 @@ class TasmanianSparseGrid:
 
         '''
         self.pLibTSG.tsgMergeRefinement(self.pGrid)
+        self._resetCachedState()
+
+    def refineSurrogate(self, pModel, fTolerance, iOutput = -1, sCriteria = "", liLevelLimits = [], iMaxPoints = 0,
+                        sAnisotropicType = "", iMinGrowth = 1, iNumWorkers = 0, iChunkSize = 0, pExecutor = None):
+        '''
+        runs the refinement loop getNeededPoints() -> evaluate the model
+        -> loadNeededPoints() -> set***Refinement() until the refinement
+        adds no more points or the budget iMaxPoints is reached,
+        the model is evaluated in parallel using concurrent.futures
+
+        pModel: callable that takes a 1-D numpy.ndarray of size
+                iDimensions and returns iOutputs floats (list or array)
+                the callable must be picklable (e.g., a module level
+                function) when the default process pool is used
+
+        fTolerance, iOutput, sCriteria, liLevelLimits: see
+                setSurplusRefinement(), used when sAnisotropicType is
+                empty, the loop stops when no more points are added
+                sCriteria must be set for local polynomial and wavelet
+                grids and must be empty for sequence grids
+                fTolerance must be 0.0 and sCriteria must be empty when
+                sAnisotropicType is set, since the anisotropic
+                refinement has no tolerance
+
+        iMaxPoints: int (non-negative)
+                    the budget, the loop stops if the next refinement
+                    would increase the number of points above
+                    iMaxPoints, the refinement is cleared in that case
+                    0 means no budget
+                    the loaded plus the needed points at the start
+                    cannot exceed the budget, since the needed points
+                    are evaluated before the first refinement
+
+        sAnisotropicType, iMinGrowth: see setAnisotropicRefinement()
+                    if sAnisotropicType is not empty, the loop uses
+                    anisotropic instead of surplus refinement and
+                    iMaxPoints must be positive
+                    sAnisotropicType must be set for global grids and
+                    can be used only with global and sequence grids
+
+        iNumWorkers: int (non-negative)
+                     number of processes in the pool,
+                     0 means one process per core
+
+        iChunkSize: int (non-negative)
+                    number of points sent to a worker at a time,
+                    0 means split the points into 4 chunks per worker
+
+        pExecutor: (optional) instance of concurrent.futures.Executor
+                   used instead of creating a new process pool,
+                   e.g., to reuse the pool between calls
+
+        output: int
+                the total number of model evaluations
+
+        '''
+        iNumOutputs, iNumLoaded, iNumNeeded = self.getMetadata()[1:4]
+        if (iNumLoaded + iNumNeeded == 0):
+            raise TasmanianInputError("refineSurrogate", "ERROR: cannot call refineSurrogate for an empty grid, call make***Grid first!")
+        if (iNumOutputs == 0):
+            raise TasmanianInputError("refineSurrogate", "ERROR: cannot call refineSurrogate for a grid with no outputs")
+        if (fTolerance < 0.0):
+            raise TasmanianInputError("fTolerance", "ERROR: fTolerance must be non-negative")
+        if (iMaxPoints < 0):
+            raise TasmanianInputError("iMaxPoints", "ERROR: iMaxPoints must be non-negative")
+        if ((len(sAnisotropicType) > 0) and (iMaxPoints == 0)):
+            raise TasmanianInputError("iMaxPoints", "ERROR: iMaxPoints must be positive when using anisotropic refinement")
+        if ((iMaxPoints > 0) and (iNumLoaded + iNumNeeded > iMaxPoints)):
+            raise TasmanianInputError("iMaxPoints", "ERROR: the grid already has {0:1d} loaded and needed points, which exceeds iMaxPoints = {1:1d}".format(iNumLoaded + iNumNeeded, iMaxPoints))
+        if ((len(sAnisotropicType) > 0) and (fTolerance != 0.0)):
+            raise TasmanianInputError("fTolerance", "ERROR: fTolerance is not used by the anisotropic refinement and must be 0.0 when sAnisotropicType is set")
+        if ((len(sAnisotropicType) > 0) and (len(sCriteria) > 0)):
+            raise TasmanianInputError("sCriteria", "ERROR: sCriteria is not used by the anisotropic refinement and must be empty when sAnisotropicType is set")
+        if (len(sAnisotropicType) > 0):
+            if (not (self.isGlobal() or self.isSequence())):
+                raise TasmanianInputError("sAnisotropicType", "ERROR: anisotropic refinement can be used only with global and sequence grids")
+        else:
+            if (self.isGlobal()):
+                raise TasmanianInputError("sAnisotropicType", "ERROR: surplus refinement cannot be used with global grids, sAnisotropicType must be set")
+            if (self.isFourier()):
+                raise TasmanianInputError("refineSurrogate", "ERROR: Fourier grids do not support refinement")
+            if (self.isSequence() and (len(sCriteria) > 0)):
+                raise TasmanianInputError("sCriteria", "ERROR: sCriteria cannot be used for sequence grids")
+            if ((self.isLocalPolynomial() or self.isWavelet()) and (len(sCriteria) == 0)):
+                raise TasmanianInputError("sCriteria", "ERROR: sCriteria must be specified for local polynomial and wavelet grids")
+        if (iNumWorkers < 0):
+            raise TasmanianInputError("iNumWorkers", "ERROR: iNumWorkers must be non-negative")
+        if (iChunkSize < 0):
+            raise TasmanianInputError("iChunkSize", "ERROR: iChunkSize must be non-negative")
+
+        iNumProcs = iNumWorkers
+        if (iNumProcs == 0):
+            iNumProcs = (os.cpu_count() if hasattr(os, "cpu_count") else None) or 1
+
+        def refineLoop(pPool):
+            iNumEvaluations = 0
+            while True:
+                iNumLoaded, iNumNeeded = self.getMetadata()[2:4]
+                if (iNumNeeded == 0):
+                    if (len(sAnisotropicType) > 0):
+                        self.setAnisotropicRefinement(sAnisotropicType, iMinGrowth, iOutput, liLevelLimits)
+                    else:
+                        self.setSurplusRefinement(fTolerance, iOutput, sCriteria, liLevelLimits)
+                    iNumNeeded = self.getNumNeeded()
+                    if (iNumNeeded == 0):
+                        return iNumEvaluations
+                    if ((iMaxPoints > 0) and (iNumLoaded + iNumNeeded > iMaxPoints)):
+                        self.clearRefinement()
+                        return iNumEvaluations
+
+                iChunk = iChunkSize if (iChunkSize > 0) else max(1, (iNumNeeded + 4 * iNumProcs - 1) // (4 * iNumProcs))
+                # map() returns the results in the order of the points
+                aValues = np.array(list(pPool.map(pModel, self.getNeededPoints(), chunksize = iChunk)), np.float64)
+                if (aValues.size != iNumNeeded * iNumOutputs):
+                    raise TasmanianInputError("pModel", "ERROR: pModel must return {0:1d} values for each point".format(iNumOutputs))
+                self.loadNeededPoints(aValues.reshape([iNumNeeded, iNumOutputs]))
+                iNumEvaluations += iNumNeeded
+
+        if (pExecutor is not None):
+            return refineLoop(pExecutor)
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = iNumProcs) as pPool:
+            return refineLoop(pPool)
 
     def beginConstruction(self):
         '''
         start dynamic construction procedure
         '''
         self.pLibTSG.tsgBeginConstruction(self.pGrid)
+        self._resetCachedState()
 
     def isUsingConstruction(self):
         '''
@@ -1578,6 +2618,7 @@ class TasmanianSparseGrid:
             sType = bytes(sType, encoding='utf8')
 
         pVector = self.pLibTSG.tsgGetCandidateConstructionPointsVoidPntr(self.pGrid, c_char_p(sType), iOutput, pAnisoWeights, pLevelLimits)
+        self._resetCachedState()
 
         iNumPoints = self.pLibTSG.tsgGetCandidateConstructionPointsPythonGetNP(self.pGrid, pVector)
         if (iNumPoints == 0):
@@ -1607,12 +2648,215 @@ class TasmanianSparseGrid:
             raise TasmanianInputError("lfY", "ERROR: lfY should be numpy.ndarray with length equal to the model outputs")
 
         self.pLibTSG.tsgLoadConstructedPoint(self.pGrid, np.ctypeslib.as_ctypes(lfX), np.ctypeslib.as_ctypes(lfY))
+        self._resetCachedState()
+
+    def loadConstructedPoints(self, llfX, llfY):
+        '''
+        load multiple computed points with a single call, all tensors
+        completed by the new points are added to the grid at once
+
+        llfX: a 2-D numpy.ndarray
+              with second dimension equal to iDimensions
+              each row is a point from getCandidateConstructionPoints()
+
+        llfY: a 2-D numpy.ndarray
+              with dimensions llfX.shape[0] X iOutputs
+              each row is the model output for the row of llfX
+
+        '''
+        if (not self.isUsingConstruction()):
+            raise TasmanianInputError("loadConstructedPoints", "ERROR: calling loadConstructedPoints() before beginConstruction()")
+        iNumDims, iNumOuts = self.getMetadata()[0:2]
+        if ((len(llfX.shape) != 2) or (llfX.shape[1] != iNumDims)):
+            raise TasmanianInputError("llfX", "ERROR: llfX should be a 2-D numpy.ndarray with second dimension equal to the grid dimension")
+        iNumX = llfX.shape[0]
+        if ((len(llfY.shape) != 2) or (llfY.shape[0] != iNumX) or (llfY.shape[1] != iNumOuts)):
+            raise TasmanianInputError("llfY", "ERROR: llfY should be a 2-D numpy.ndarray with dimensions {0:1d} X {1:1d}".format(iNumX, iNumOuts))
+        if (iNumX == 0):
+            return
+        aX = _tsgFloat64Array("llfX", llfX)
+        aY = _tsgFloat64Array("llfY", llfY)
+
+        self.pLibTSG.tsgLoadConstructedPoints(self.pGrid, _tsgDoublePointer(aX), iNumX, _tsgDoublePointer(aY))
+        self._resetCachedState()
 
     def finishConstruction(self):
         '''
         end the dynamic construction procedure
         '''
         self.pLibTSG.tsgFinishConstruction(self.pGrid)
+        self._resetCachedState()
+
+    def _checkConstructSurrogate(self, sMethod, iMaxPoints, iNumParallel, fTimeLimit):
+        '''
+        checks the common inputs of constructSurrogate() and
+        constructSurrogateAsync(), calls beginConstruction() if needed
+        and returns the number of parallel evaluations and the deadline
+
+        '''
+        iNumOutputs, iNumLoaded, iNumNeeded = self.getMetadata()[1:4]
+        if (iNumLoaded + iNumNeeded == 0):
+            raise TasmanianInputError(sMethod, "ERROR: cannot call {0:1s} for an empty grid, call make***Grid first!".format(sMethod))
+        if (iNumOutputs == 0):
+            raise TasmanianInputError(sMethod, "ERROR: cannot call {0:1s} for a grid with no outputs".format(sMethod))
+        if (not self.isGlobal()):
+            raise TasmanianInputError(sMethod, "ERROR: dynamic construction is implemented only for global grids")
+        if (iMaxPoints < 1):
+            raise TasmanianInputError("iMaxPoints", "ERROR: iMaxPoints must be positive")
+        if (iNumParallel < 0):
+            raise TasmanianInputError("iNumParallel", "ERROR: iNumParallel must be non-negative")
+        if (fTimeLimit < 0.0):
+            raise TasmanianInputError("fTimeLimit", "ERROR: fTimeLimit must be non-negative")
+        if (not self.isUsingConstruction()):
+            self.beginConstruction()
+        if (iNumParallel == 0):
+            iNumParallel = (os.cpu_count() if hasattr(os, "cpu_count") else None) or 1
+        return iNumParallel, ((time.time() + fTimeLimit) if (fTimeLimit > 0.0) else None)
+
+    def constructSurrogate(self, pModel, iMaxPoints, sType = "iptotal", liAnisotropicWeightsOrOutput = -1, liLevelLimits = [],
+                           iNumParallel = 0, fTimeLimit = 0.0, pExecutor = None):
+        '''
+        runs the dynamic construction with the model evaluated
+        asynchronously by a concurrent.futures executor, iNumParallel
+        evaluations are kept running and a new point is taken from
+        the refreshed candidate list as soon as a result is loaded
+
+        beginConstruction() is called if needed, but the construction
+        is not finished, i.e., this can be called again to add more
+        points or followed by finishConstruction()
+
+        pModel: callable that takes a 1-D numpy.ndarray of size
+                iDimensions and returns iOutputs floats (list or array)
+                the callable must be picklable (e.g., a module level
+                function) when the default process pool is used
+
+        iMaxPoints: int (positive)
+                    maximum number of model evaluations
+
+        sType, liAnisotropicWeightsOrOutput, liLevelLimits:
+                    see getCandidateConstructionPoints()
+
+        iNumParallel: int (non-negative)
+                      number of evaluations to keep running,
+                      0 means one per core
+
+        fTimeLimit: float (non-negative)
+                    wall-clock time in seconds, no new evaluations are
+                    started after the time limit, the running ones
+                    are completed and loaded, 0 means no limit
+
+        pExecutor: (optional) instance of concurrent.futures.Executor
+                   used instead of creating a new process pool
+
+        output: int
+                the number of loaded points
+
+        '''
+        iNumParallel, fDeadline = self._checkConstructSurrogate("constructSurrogate", iMaxPoints, iNumParallel, fTimeLimit)
+
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        def constructLoop(pPool):
+            dRunning = {} # maps tuple(point) -> future
+            iNumLaunched = 0
+            iNumLoaded = 0
+            while True:
+                if ((fDeadline is None) or (time.time() < fDeadline)):
+                    iNumNew = min(iNumParallel - len(dRunning), iMaxPoints - iNumLaunched)
+                    for aX in _tsgNextConstructionPoints(self, iNumNew, dRunning, sType, liAnisotropicWeightsOrOutput, liLevelLimits):
+                        dRunning[tuple(aX)] = pPool.submit(pModel, aX)
+                        iNumLaunched += 1
+                if (len(dRunning) == 0):
+                    return iNumLoaded
+                fTimeout = None if ((fDeadline is None) or (time.time() >= fDeadline)) else (fDeadline - time.time())
+                setDone = wait(list(dRunning.values()), timeout = fTimeout, return_when = FIRST_COMPLETED)[0]
+                ltDone = [tX for tX in dRunning if dRunning[tX] in setDone]
+                lpDone = [dRunning.pop(tX) for tX in ltDone]
+                lError = [pFuture.exception() for pFuture in lpDone]
+                ltLoad = [tX for tX, pError in zip(ltDone, lError) if pError is None]
+                if (len(ltLoad) > 0): # load all finished points with one call, including those that finished with a failed one
+                    aY = np.array([pFuture.result() for pFuture, pError in zip(lpDone, lError) if pError is None], np.float64)
+                    self.loadConstructedPoints(np.array(ltLoad, np.float64), aY)
+                    iNumLoaded += len(ltLoad)
+                for pError in lError:
+                    if (pError is not None):
+                        for pFuture in dRunning.values():
+                            pFuture.cancel() # drops the evaluations that have not started
+                        raise pError
+
+        if (pExecutor is not None):
+            return constructLoop(pExecutor)
+
+        with ProcessPoolExecutor(max_workers = iNumParallel) as pPool:
+            return constructLoop(pPool)
+
+    def constructSurrogateAsync(self, pModel, iMaxPoints, sType = "iptotal", liAnisotropicWeightsOrOutput = -1, liLevelLimits = [],
+                                iNumParallel = 0, fTimeLimit = 0.0):
+        '''
+        asyncio version of constructSurrogate(), must be called while
+        an asyncio event loop is running and returns an asyncio.Future,
+        e.g., iNumLoaded = await grid.constructSurrogateAsync(...)
+
+        pModel: coroutine function (async def) that takes a 1-D
+                numpy.ndarray of size iDimensions and returns iOutputs
+                floats (list or array)
+
+        iMaxPoints, sType, liAnisotropicWeightsOrOutput, liLevelLimits,
+        iNumParallel, fTimeLimit: see constructSurrogate()
+
+        output: asyncio.Future
+                the result is the number of loaded points, if pModel
+                raises an exception, the future holds the exception
+                and the other running evaluations are cancelled
+
+        '''
+        iNumParallel, fDeadline = self._checkConstructSurrogate("constructSurrogateAsync", iMaxPoints, iNumParallel, fTimeLimit)
+
+        import asyncio
+
+        if (hasattr(asyncio, "get_running_loop")): # Python 3.7 and newer
+            pResult = asyncio.get_running_loop().create_future()
+        else:
+            pResult = asyncio.get_event_loop().create_future()
+        dRunning = {} # maps tuple(point) -> task
+        dCount = {"launched" : 0, "loaded" : 0}
+
+        def cancelRunning(pFuture):
+            # nothing is running after a success, otherwise pModel or launch() failed or the caller cancelled the result
+            for pTask in list(dRunning.values()):
+                pTask.cancel()
+
+        pResult.add_done_callback(cancelRunning)
+
+        def launch():
+            if ((fDeadline is None) or (time.time() < fDeadline)):
+                iNumNew = min(iNumParallel - len(dRunning), iMaxPoints - dCount["launched"])
+                for aX in _tsgNextConstructionPoints(self, iNumNew, dRunning, sType, liAnisotropicWeightsOrOutput, liLevelLimits):
+                    tX = tuple(aX)
+                    dRunning[tX] = asyncio.ensure_future(pModel(aX))
+                    dRunning[tX].add_done_callback(lambda pTask, tX = tX : finish(tX, pTask))
+                    dCount["launched"] += 1
+            if (len(dRunning) == 0):
+                pResult.set_result(dCount["loaded"])
+
+        def finish(tX, pTask):
+            del dRunning[tX]
+            if (pResult.done()): # an earlier evaluation failed or the result was cancelled
+                if (not pTask.cancelled()):
+                    pTask.exception() # the task finished before the cancel, retrieve the exception so it is not logged
+                return
+            try:
+                self.loadConstructedPoint(np.array(tX), pTask.result())
+                dCount["loaded"] += 1
+                launch()
+            except BaseException as pError:
+                pResult.set_exception(pError)
+
+        try:
+            launch()
+        except BaseException as pError:
+            pResult.set_exception(pError)
+        return pResult
 
     def removePointsByHierarchicalCoefficient(self, fTolerance, iOutput = -1, aScaleCorrection = []):
         '''
@@ -1653,6 +2897,7 @@ class TasmanianSparseGrid:
         if (len(aScaleCorrection) == 0):
             pNullPointer = None
             self.pLibTSG.tsgRemovePointsByHierarchicalCoefficient(self.pGrid, fTolerance, iOutput, pNullPointer)
+            self._resetCachedState()
         else:
             lShape = aScaleCorrection.shape
             if ((iOutput == -1) and (self.getNumOutputs() > 1)):
@@ -1671,8 +2916,9 @@ class TasmanianSparseGrid:
             if (iOutput == -1):
                 iNumWeights *= lShape[1]
             self.pLibTSG.tsgRemovePointsByHierarchicalCoefficient(self.pGrid, fTolerance, iOutput, np.ctypeslib.as_ctypes(aScaleCorrection.reshape([iNumWeights,])))
+            self._resetCachedState()
 
-    def getHierarchicalCoefficients(self):
+    def getHierarchicalCoefficients(self, out = None):
         '''
         For global grids, this just returns the values loaded using the
         call to loadNeededPoints().
@@ -1680,55 +2926,67 @@ class TasmanianSparseGrid:
         coefficients, i.e., surpluses.
 
         returns a 2-D numpy array getNumPoints() by getNumOutputs()
+
+        out: (optional) a C-contiguous numpy.ndarray with shape
+             getNumPoints() X getNumOutputs() and type float64
+             (complex128 for Fourier grids)
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
         iNumOuts = self.getNumOutputs()
-        if (iNumOuts == 0):
+        if ((iNumOuts == 0) and (out is None)):
             return np.empty([0,0], np.float64)
         iNumPoints = self.getNumLoaded()
-        if (iNumPoints == 0):
-            return np.empty([0,iNumOuts], np.float64)
+        aSurp = _tsgOutputArray(out, [iNumPoints, iNumOuts], np.float64 if not self.isFourier() else np.complex128)
+        if ((iNumPoints == 0) or (iNumOuts == 0)):
+            return aSurp
 
         if (not self.isFourier()):
-            aSurp = np.empty([iNumOuts * iNumPoints], np.float64)
-            self.pLibTSG.tsgGetHierarchicalCoefficientsStatic(self.pGrid, np.ctypeslib.as_ctypes(aSurp))
+            self.pLibTSG.tsgGetHierarchicalCoefficientsStatic(self.pGrid, _tsgDoublePointer(aSurp))
         else:
-            aSurp = np.empty([2 * iNumOuts * iNumPoints], np.float64)
-            self.pLibTSG.tsgGetHierarchicalCoefficientsStatic(self.pGrid, np.ctypeslib.as_ctypes(aSurp))
-            aSurp = aSurp[:(iNumOuts * iNumPoints)] + 1j * aSurp[(iNumOuts * iNumPoints):]
+            # the library interleaves the real and imaginary parts, which matches the layout of complex128
+            self.pLibTSG.tsgGetHierarchicalCoefficientsPythonComplex(self.pGrid, _tsgDoublePointer(aSurp))
 
-        return aSurp.reshape([iNumPoints, iNumOuts])
+        return aSurp
 
-    def evaluateHierarchicalFunctions(self, llfX):
+    def evaluateHierarchicalFunctions(self, llfX, out = None):
         '''
         evaluates the hierarchical functions at a set of points in the
         domain and return a 2-D numpy.ndarray with the result
 
         llfX: a 2-D numpy.ndarray with llfX.shape[1] == iDimensions
               the entries indicate the points for evaluating the weights
+              C-contiguous float64 arrays are passed to the library
+              without a copy, other layouts are copied once
+              (see TasmanianSG.iTsgNumInputCopies)
 
         output: returns a 2-D numpy.ndarray of
                 shape == [llfX.shape[0], getNumPoints()]
                 the values of the basis functions at the points
+
+        out: (optional) a C-contiguous numpy.ndarray with shape
+             llfX.shape[0] X getNumPoints() and type float64
+             (complex128 for Fourier grids)
+             the result is written in out and out is returned,
+             i.e., no new memory is allocated
+
         '''
         if (len(llfX.shape) != 2):
             raise TasmanianInputError("llfX", "ERROR: calling evaluateHierarchicalFunctions llfX should be a 2-D numpy array")
         if (llfX.shape[1] != self.getNumDimensions()):
             raise TasmanianInputError("llfX", "ERROR: calling evaluateHierarchicalFunctions llfX.shape[1] is not equal to getNumDimensions()")
         iNumX = llfX.shape[0]
-        # see evaluateBatch()
-        lfX = llfX.reshape([llfX.shape[0] * llfX.shape[1]])
+        aX = _tsgFloat64Array("llfX", llfX)
 
-        if not self.isFourier():
-            aResult = np.empty([iNumX * self.getNumPoints()], np.float64)
-            self.pLibTSG.tsgEvaluateHierarchicalFunctions(self.pGrid, np.ctypeslib.as_ctypes(lfX), iNumX, np.ctypeslib.as_ctypes(aResult))
-        else:
-            aResult = np.empty([2 * iNumX * self.getNumPoints()], np.float64)
-            self.pLibTSG.tsgEvaluateHierarchicalFunctions(self.pGrid, np.ctypeslib.as_ctypes(lfX), iNumX, np.ctypeslib.as_ctypes(aResult))
-            aResult = aResult[0::2] + 1j * aResult[1::2]
+        # Fourier grids return interleaved real and imaginary parts, which matches the layout of complex128
+        aResult = _tsgOutputArray(out, [iNumX, self.getNumPoints()], np.float64 if not self.isFourier() else np.complex128)
+        if (aResult.size > 0):
+            self.pLibTSG.tsgEvaluateHierarchicalFunctions(self.pGrid, _tsgDoublePointer(aX), iNumX, _tsgDoublePointer(aResult))
 
-        return aResult.reshape([iNumX, self.getNumPoints()])
+        return aResult
 
-    def evaluateSparseHierarchicalFunctions(self, llfX):
+    def evaluateSparseHierarchicalFunctions(self, llfX, bUseScipy = False):
         '''
         evaluates the hierarchical functions at a set of points in the
         domain. The distinction between this function and
@@ -1740,6 +2998,9 @@ class TasmanianSparseGrid:
 
         llfX: a 2-D numpy.ndarray with llfX.shape[1] == iDimensions
               the entries indicate the points for evaluating
+              C-contiguous float64 arrays are passed to the library
+              without a copy, other layouts are copied once
+              (see TasmanianSG.iTsgNumInputCopies)
 
         output: returns a TasmanianSimpleSparseMatrix class
                 which is a simple class with three fields:
@@ -1750,26 +3011,33 @@ class TasmanianSparseGrid:
                 iNumCols = self.getNumPoints()
                 The sparse matrix is compressed along the llfX.shape[0]
                 dimension, i.e., using column compressed format
+
+        bUseScipy: boolean
+                True: return scipy.sparse.csr_matrix that uses the same
+                      three arrays without making a copy,
+                      requires scipy
+                False: return TasmanianSimpleSparseMatrix
+
+        the basis functions are evaluated only once and the numpy arrays
+        use the memory allocated by the library, i.e., no copy is made
         '''
         if (len(llfX.shape) != 2):
             raise TasmanianInputError("llfX", "ERROR: calling evaluateSparseHierarchicalFunctions(), llfX should be a 2-D numpy array")
         if (llfX.shape[1] != self.getNumDimensions()):
             raise TasmanianInputError("llfX", "ERROR: calling evaluateSparseHierarchicalFunctions(), llfX.shape[1] is not equal to getNumDimensions()")
+        if (bUseScipy):
+            try:
+                import scipy.sparse
+            except ImportError:
+                raise TasmanianInputError("bUseScipy", "ERROR: bUseScipy is True, but scipy.sparse cannot be imported")
         iNumX = llfX.shape[0]
-        pMat = TasmanianSimpleSparseMatrix()
-        iNumNZ = self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ(self.pGrid, np.ctypeslib.as_ctypes(llfX.reshape([llfX.shape[0] * llfX.shape[1]])), iNumX)
-        pMat.aPntr = np.empty([iNumX+1,], np.int32)
-        pMat.aIndx = np.empty([iNumNZ,], np.int32)
-        pMat.aVals = np.empty([iNumNZ if not self.isFourier() else 2 * iNumNZ,], np.float64)
-        pMat.iNumRows = iNumX
-        pMat.iNumCols = self.getNumPoints()
-        # see evaluateBatch()
-        lfX = llfX.reshape([llfX.shape[0] * llfX.shape[1]])
-        self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsStatic(self.pGrid, np.ctypeslib.as_ctypes(lfX), iNumX,
-                                                        np.ctypeslib.as_ctypes(pMat.aPntr), np.ctypeslib.as_ctypes(pMat.aIndx), np.ctypeslib.as_ctypes(pMat.aVals))
-        if self.isFourier():
-            pMat.aVals = pMat.aVals[0::2] + 1j * pMat.aVals[1::2]
+        aX = _tsgFloat64Array("llfX", llfX)
+        pHolder = self.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsVoidPntr(self.pGrid, _tsgDoublePointer(aX), iNumX)
+        # Fourier grids return interleaved real and imaginary parts, which matches the layout of complex128
+        pMat = _tsgSparseMatrixFromLibrary(self.pLibTSG, pHolder, iNumX, self.getNumPoints(), np.float64 if not self.isFourier() else np.complex128)
 
+        if (bUseScipy):
+            return scipy.sparse.csr_matrix((pMat.aVals, pMat.aIndx, pMat.aPntr), shape = (pMat.iNumRows, pMat.iNumCols), copy = False)
         return pMat
 
     def setHierarchicalCoefficients(self, llfCoefficients):
@@ -1818,7 +3086,9 @@ class TasmanianSparseGrid:
         else:
             llfCoefficients = llfCoefficients.reshape([iNumPoints * iNumDims,])
 
+        bPointsChanged = (self.getNumNeeded() > 0)
         self.pLibTSG.tsgSetHierarchicalCoefficients(self.pGrid, np.ctypeslib.as_ctypes(llfCoefficients))
+        self._resetCachedState(bPointsChanged)
 
     def getGlobalPolynomialSpace(self, bInterpolation):
         '''
@@ -1845,10 +3115,11 @@ class TasmanianSparseGrid:
         pNumIndexes = (c_int*1)()
         pIndexes = self.pLibTSG.tsgPythonGetGlobalPolynomialSpace(self.pGrid, iInterp, pNumIndexes)
         iNumDimensions = self.getNumDimensions()
-        lliPolynomials = np.empty([pNumIndexes[0], iNumDimensions], np.int)
-        for iI in range(pNumIndexes[0]):
-            for iJ in range(iNumDimensions):
-                lliPolynomials[iI][iJ] = pIndexes[iI*iNumDimensions + iJ]
+        if ((pNumIndexes[0] == 0) or (iNumDimensions == 0) or (not pIndexes)):
+            lliPolynomials = np.empty([pNumIndexes[0], iNumDimensions], int)
+        else:
+            # bulk copy from a view of the C array, the C array is deleted right after
+            lliPolynomials = np.ctypeslib.as_array(pIndexes, shape = (pNumIndexes[0], iNumDimensions)).astype(int)
         self.pLibTSG.tsgDeleteInts(pIndexes)
         return lliPolynomials
 
@@ -1931,6 +3202,77 @@ class TasmanianSparseGrid:
             sAccelerationType = bytes(sAccelerationType, encoding='utf8')
         return (self.pLibTSG.tsgIsAccelerationAvailable(sAccelerationType) != 0)
 
+    def enableSupportIndex(self, bEnable = True):
+        '''
+        local polynomial grids only, builds an index of the supports
+        of the basis functions that speeds up evaluate() and
+        evaluateThreadSafe(), i.e., the single point evaluations
+
+        the index takes one int per point and is rebuilt when the
+        points change, the setting is lost by makeLocalPolynomialGrid()
+        and read()
+
+        bEnable: boolean
+                 True builds the index, False removes it
+        '''
+        if (not self.isLocalPolynomial()):
+            raise TasmanianInputError("enableSupportIndex", "ERROR: calling enableSupportIndex() for a grid that is not local polynomial")
+        self.pLibTSG.tsgEnableSupportIndex(self.pGrid, (1 if bEnable else 0))
+
+    def isUsingSupportIndex(self):
+        '''
+        returns True if enableSupportIndex() has been called
+        '''
+        return (self.pLibTSG.tsgIsUsingSupportIndex(self.pGrid) != 0)
+
+    def enableMortonOrder(self, bEnable = True, iMinBatch = 2048):
+        '''
+        local polynomial and wavelet grids only, evaluateBatch() sorts
+        the points along a Morton (z-order) curve before the evaluation
+        and returns the result in the original order, nearby points
+        use the same coefficients which helps the cache when the points
+        are randomly ordered, e.g., Monte Carlo samples
+
+        the setting is reset by the make***Grid() and read() methods,
+        the same as enableAcceleration()
+
+        bEnable: boolean
+                 True enables the sorting, False disables it
+
+        iMinBatch: positive integer
+                   batches with fewer points are not sorted
+        '''
+        if (bEnable and (iMinBatch < 1)):
+            raise TasmanianInputError("iMinBatch", "ERROR: iMinBatch must be positive")
+        self.pLibTSG.tsgEnableMortonOrder(self.pGrid, (1 if bEnable else 0), iMinBatch)
+
+    def isUsingMortonOrder(self):
+        '''
+        returns True if enableMortonOrder() has been called
+        '''
+        return (self.pLibTSG.tsgIsUsingMortonOrder(self.pGrid) != 0)
+
+    def compactIndexes(self):
+        '''
+        stores the multi-indexes of the points in 8 or 16 bit entries,
+        up to 4 times less memory for the indexes of grids with many
+        dimensions, nothing is done if some index needs 32 bits
+
+        evaluate, integrate and the interpolation weights work directly
+        with the compact indexes, the grid goes back to 32 bit indexes
+        when the points change, e.g., by loadNeededPoints() or
+        the refinement methods
+        '''
+        self.pLibTSG.tsgCompactIndexes(self.pGrid)
+
+    def getIndexEntryBytes(self):
+        '''
+        returns the number of bytes used by each entry of the
+        multi-indexes in memory, 1 or 2 after compactIndexes() and 4
+        otherwise
+        '''
+        return self.pLibTSG.tsgGetIndexEntryBytes(self.pGrid)
+
     def setGPUID(self, iGPUID):
         '''
         when using cuda on a machine with multiple GPUs, this helps set
@@ -2012,12 +3354,13 @@ class TasmanianSparseGrid:
         '''
         self.pLibTSG.tsgPrintStats(self.pGrid)
 
-    def plotPoints2D(self, pAxisObject=tsgPlot, sStyle="bo", iMarkerSize=3):
+    def plotPoints2D(self, pAxisObject=None, sStyle="bo", iMarkerSize=3):
         '''
         plots the points in a 2D plot using matplotlib.pyplot
         applicable only for grids with iDimensions == 2
 
         pAxisObject: axis object from the matplotlib.pyplot package
+                     if None, use matplotlib.pyplot
 
         sStyle: string
                 the matplotlib.pyplot style, e.g.,
@@ -2026,8 +3369,9 @@ class TasmanianSparseGrid:
         iMarkerSize: positive integer
                      the marker size for plotting the points
         '''
-        if (not bTsgPlotting):
-            raise TasmanianInputError("plotPoints2D", "ERROR: could not load matplotlib.pyplot")
+        pPlot = _tsgGetPlot("plotPoints2D")
+        if (pAxisObject is None):
+            pAxisObject = pPlot
 
         if (self.getNumDimensions() != 2):
             raise TasmanianInputError("plotPoints2D", "ERROR: cannot plot a grid with other than 2 dimensions")
@@ -2048,7 +3392,7 @@ class TasmanianSparseGrid:
         pAxisObject.plot(aPoints[:,0], aPoints[:,1], sStyle, markersize=iMarkerSize)
         pAxisObject.axis([fXmin - 0.1 * np.fabs(fXmin), fXmax + 0.1 * np.fabs(fYmax), fYmin - 0.1 * np.fabs(fYmin), fYmax + 0.1 * np.fabs(fYmax)])
 
-    def plotResponse2D(self, iOutput=0, iNumDim0=100, iNumDim1=100, pAxisObject=tsgPlot, sCmap="jet"):
+    def plotResponse2D(self, iOutput=0, iNumDim0=100, iNumDim1=100, pAxisObject=None, sCmap="jet"):
         '''
         plots the response in a 2D plot using matplotlib.pyplot
         applicable only for grids with iDimensions == 2
@@ -2061,11 +3405,13 @@ class TasmanianSparseGrid:
                0 and 1 respectively
 
         pAxisObject: axis object from the matplotlib.pyplot package
+                     if None, use matplotlib.pyplot
 
         sCmap: string indicating the map to use, e.g., "jet" or "heat"
         '''
-        if (not bTsgPlotting):
-            raise TasmanianInputError("plotResponse2D", "ERROR: could not load matplotlib.pyplot")
+        pPlot = _tsgGetPlot("plotResponse2D")
+        if (pAxisObject is None):
+            pAxisObject = pPlot
         if (iOutput < 0):
             raise TasmanianInputError("iOutput", "ERROR: iOutput should be a non-negative integer")
         if (iOutput >= self.getNumOutputs()):
@@ -0,0 +1,640 @@
+#!@Tasmanian_string_python_hashbang@
+
+import TasmanianSG
+import TasmanianDREAM
+import numpy as np
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+###############################################################################
+# Micro-benchmarks for the Python interface
+# Similar to "gridtest -bench", each benchmark is selected by name:
+#   benchmarkTSG.py <benchmark> <options>
+# calling without a benchmark name will list the available ones
+###############################################################################
+
+def benchmarkConstruct(lsArgs):
+    '''
+    measures the throughput of creating and destroying empty grid objects
+    and the cost of creating and destroying a small global grid
+
+    options: <iNumObjects> (default 10000)
+
+    '''
+    iNumObjects = int(lsArgs[0]) if (len(lsArgs) > 0) else 10000
+
+    fStart = time.time()
+    for iI in range(iNumObjects):
+        grid = TasmanianSG.TasmanianSparseGrid()
+        del grid
+    fEmpty = time.time() - fStart
+
+    fStart = time.time()
+    for iI in range(iNumObjects):
+        grid = TasmanianSG.TasmanianSparseGrid()
+        grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis')
+        del grid
+    fSmall = time.time() - fStart
+
+    print("construct/destruct {0:1d} empty grids: {1:1.4e} seconds ({2:1.4e} per grid)".format(iNumObjects, fEmpty, fEmpty / iNumObjects))
+    print("construct/make/destruct {0:1d} small grids: {1:1.4e} seconds ({2:1.4e} per grid)".format(iNumObjects, fSmall, fSmall / iNumObjects))
+
+def benchmarkEvaluate(lsArgs):
+    '''
+    measures the per-call latency of evaluate() and evaluateThreadSafe()
+    for single points, the cached grid metadata is compared against
+    resetting the cache before each call which requires the extra
+    library calls to get the dimensions, outputs and loaded points
+
+    options: <iNumCalls> (default 100000)
+
+    '''
+    iNumCalls = int(lsArgs[0]) if (len(lsArgs) > 0) else 100000
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(2, 1, 4, 'level', 'clenshaw-curtis')
+    grid.loadNeededPoints(np.exp(-np.sum(grid.getNeededPoints()**2, axis=1)).reshape([grid.getNumNeeded(), 1]))
+    aX = np.array([0.3, -0.2])
+
+    for sMethod in ["evaluate", "evaluateThreadSafe"]:
+        pMethod = getattr(grid, sMethod)
+
+        fStart = time.time()
+        for iI in range(iNumCalls):
+            grid.tMetadata = None
+            pMethod(aX)
+        fUncached = time.time() - fStart
+
+        fStart = time.time()
+        for iI in range(iNumCalls):
+            pMethod(aX)
+        fCached = time.time() - fStart
+
+        print("{0:1s} no-cache: {1:1.4e} seconds per call".format(sMethod, fUncached / iNumCalls))
+        print("{0:1s}   cached: {1:1.4e} seconds per call".format(sMethod, fCached / iNumCalls))
+
+def benchmarkEvaluateParallel(lsArgs):
+    '''
+    compares evaluateBatch() against evaluateBatchParallel()
+    using a local polynomial grid
+
+    options: <iNumX> <iNumThreads> (default 1000000 and 0)
+
+    '''
+    iNumX = int(lsArgs[0]) if (len(lsArgs) > 0) else 1000000
+    iNumThreads = int(lsArgs[1]) if (len(lsArgs) > 1) else 0
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeLocalPolynomialGrid(4, 2, 6, 2, 'localp')
+    aPoints = grid.getNeededPoints()
+    grid.loadNeededPoints(np.column_stack([np.exp(-np.sum(aPoints**2, axis=1)), np.cos(np.sum(aPoints, axis=1))]))
+    aX = np.random.uniform(-1.0, 1.0, size = [iNumX, 4])
+    aY = np.empty([iNumX, 2])
+
+    fStart = time.time()
+    grid.evaluateBatch(aX, out = aY)
+    fBatch = time.time() - fStart
+
+    fStart = time.time()
+    grid.evaluateBatchParallel(aX, iNumThreads, out = aY)
+    fParallel = time.time() - fStart
+
+    print("evaluateBatch         {0:1d} points: {1:1.4e} seconds".format(iNumX, fBatch))
+    print("evaluateBatchParallel {0:1d} points: {1:1.4e} seconds".format(iNumX, fParallel))
+
+def benchmarkPolynomialSpace(lsArgs):
+    '''
+    measures getGlobalPolynomialSpace() for a large global grid
+
+    options: <iDimension> <iDepth> (default 20 and 4)
+
+    '''
+    iDimension = int(lsArgs[0]) if (len(lsArgs) > 0) else 20
+    iDepth = int(lsArgs[1]) if (len(lsArgs) > 1) else 4
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(iDimension, 0, iDepth, 'level', 'rleja')
+
+    fStart = time.time()
+    aSpace = grid.getGlobalPolynomialSpace(True)
+    fSpace = time.time() - fStart
+
+    print("getGlobalPolynomialSpace {0:1d} indexes in {1:1d} dimensions: {2:1.4e} seconds".format(aSpace.shape[0], aSpace.shape[1], fSpace))
+
+def benchmarkDenseForm(lsArgs):
+    '''
+    measures TasmanianSimpleSparseMatrix.getDenseForm()
+    for a random matrix with fixed number of non-zeros per row
+
+    options: <iNumRows> <iNumCols> <iNumNZperRow> (default 10000, 2000 and 1000)
+
+    '''
+    iNumRows = int(lsArgs[0]) if (len(lsArgs) > 0) else 10000
+    iNumCols = int(lsArgs[1]) if (len(lsArgs) > 1) else 2000
+    iNumNZperRow = int(lsArgs[2]) if (len(lsArgs) > 2) else 1000
+
+    pMat = TasmanianSG.TasmanianSimpleSparseMatrix()
+    pMat.iNumRows = iNumRows
+    pMat.iNumCols = iNumCols
+    pMat.aPntr = np.arange(0, (iNumRows + 1) * iNumNZperRow, iNumNZperRow, dtype = np.int32)
+    pMat.aIndx = np.concatenate([np.sort(np.random.choice(iNumCols, iNumNZperRow, replace = False)) for iI in range(iNumRows)]).astype(np.int32)
+    pMat.aVals = np.random.uniform(-1.0, 1.0, size = [iNumRows * iNumNZperRow])
+
+    fStart = time.time()
+    pMat.getDenseForm()
+    fDense = time.time() - fStart
+
+    print("getDenseForm {0:1d} X {1:1d} with {2:1d} non-zeros: {3:1.4e} seconds".format(iNumRows, iNumCols, iNumRows * iNumNZperRow, fDense))
+
+def benchmarkSparseBasis(lsArgs):
+    '''
+    measures evaluateSparseHierarchicalFunctions() for a local polynomial grid
+    and compares with the two pass GetNZ() and Static() library calls
+
+    options: <iNumX> <iDepth> (default 100000 and 8)
+
+    '''
+    iNumX = int(lsArgs[0]) if (len(lsArgs) > 0) else 100000
+    iDepth = int(lsArgs[1]) if (len(lsArgs) > 1) else 8
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeLocalPolynomialGrid(3, 1, iDepth, 1, 'localp')
+    aX = np.random.uniform(-1.0, 1.0, size = [iNumX, 3])
+
+    fStart = time.time()
+    iNumNZ = grid.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsGetNZ(grid.pGrid, TasmanianSG._tsgDoublePointer(aX), iNumX)
+    aPntr = np.empty([iNumX + 1], np.int32)
+    aIndx = np.empty([iNumNZ], np.int32)
+    aVals = np.empty([iNumNZ], np.float64)
+    grid.pLibTSG.tsgEvaluateSparseHierarchicalFunctionsStatic(grid.pGrid, TasmanianSG._tsgDoublePointer(aX), iNumX,
+                                                             np.ctypeslib.as_ctypes(aPntr), np.ctypeslib.as_ctypes(aIndx), np.ctypeslib.as_ctypes(aVals))
+    fTwoPass = time.time() - fStart
+
+    fStart = time.time()
+    pMat = grid.evaluateSparseHierarchicalFunctions(aX)
+    fOnePass = time.time() - fStart
+
+    print("sparse basis {0:1d} points, {1:1d} non-zeros, two pass: {2:1.4e} seconds".format(iNumX, iNumNZ, fTwoPass))
+    print("sparse basis {0:1d} points, {1:1d} non-zeros, one pass: {2:1.4e} seconds".format(iNumX, len(pMat.aIndx), fOnePass))
+
+def benchmarkSerialize(lsArgs):
+    '''
+    compares the binary write() and read() through a file against
+    toBytes(), fromBytes() and pickle round trips done in memory
+
+    options: <iDepth> <iNumRepeats> (default 10 and 10)
+
+    '''
+    iDepth = int(lsArgs[0]) if (len(lsArgs) > 0) else 10
+    iNumRepeats = int(lsArgs[1]) if (len(lsArgs) > 1) else 10
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeLocalPolynomialGrid(4, 2, iDepth, 1, 'localp')
+    aPoints = grid.getNeededPoints()
+    grid.loadNeededPoints(np.column_stack([np.exp(-np.sum(aPoints**2, axis=1)), np.cos(np.sum(aPoints, axis=1))]))
+    gridB = TasmanianSG.TasmanianSparseGrid()
+
+    fStart = time.time()
+    for iI in range(iNumRepeats):
+        grid.write("benchmarkSave", bUseBinaryFormat = True)
+        gridB.read("benchmarkSave")
+    fFile = (time.time() - fStart) / iNumRepeats
+    os.remove("benchmarkSave")
+
+    fStart = time.time()
+    for iI in range(iNumRepeats):
+        gridB.fromBytes(grid.toBytes())
+    fBytes = (time.time() - fStart) / iNumRepeats
+
+    fStart = time.time()
+    for iI in range(iNumRepeats):
+        gridB = pickle.loads(pickle.dumps(grid, pickle.HIGHEST_PROTOCOL))
+    fPickle = (time.time() - fStart) / iNumRepeats
+
+    iNumBytes = len(grid.toBytes())
+    print("grid with {0:1d} points and {1:1d} bytes".format(grid.getNumPoints(), iNumBytes))
+    print("write/read file:    {0:1.4e} seconds per round trip".format(fFile))
+    print("toBytes/fromBytes:  {0:1.4e} seconds per round trip".format(fBytes))
+    print("pickle dumps/loads: {0:1.4e} seconds per round trip".format(fPickle))
+
+def modelSlowExp(aX):
+    # emulates an expensive model, module level so it can be sent to a process pool
+    time.sleep(fModelDelay)
+    return [np.exp(-np.sum(aX**2))]
+
+fModelDelay = 0.01
+
+def benchmarkRefine(lsArgs):
+    '''
+    compares the serial refinement loop against refineSurrogate()
+    using a model that sleeps for a fixed time on each call
+
+    options: <iNumWorkers> <fModelDelay> (default 0 and 0.01)
+
+    '''
+    global fModelDelay
+    iNumWorkers = int(lsArgs[0]) if (len(lsArgs) > 0) else 0
+    fModelDelay = float(lsArgs[1]) if (len(lsArgs) > 1) else 0.01
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp')
+    fStart = time.time()
+    while (grid.getNumNeeded() > 0):
+        grid.loadNeededPoints(np.array([modelSlowExp(aX) for aX in grid.getNeededPoints()]))
+        grid.setSurplusRefinement(1.E-3, 0, 'classic')
+    fSerial = time.time() - fStart
+
+    grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp')
+    fStart = time.time()
+    grid.refineSurrogate(modelSlowExp, 1.E-3, 0, 'classic', iNumWorkers = iNumWorkers)
+    fParallel = time.time() - fStart
+
+    print("refinement with {0:1d} points and {1:1.2e} seconds per model call".format(grid.getNumLoaded(), fModelDelay))
+    print("serial loop:     {0:1.4e} seconds".format(fSerial))
+    print("refineSurrogate: {0:1.4e} seconds".format(fParallel))
+
+def modelRandomDelay(aX):
+    # emulates a model with runtime that varies a lot between points
+    time.sleep(fModelDelay * (0.1 + 4.0 * np.random.uniform()**4))
+    return [np.exp(-np.sum(aX**2))]
+
+def benchmarkDynamicConstruction(lsArgs):
+    '''
+    compares batch-synchronous anisotropic refinement using
+    refineSurrogate() against the asynchronous constructSurrogate()
+    when the model runtime varies between points
+
+    options: <iNumWorkers> <iNumPoints> <fModelDelay> (default 4, 200 and 0.01)
+
+    '''
+    global fModelDelay
+    iNumWorkers = int(lsArgs[0]) if (len(lsArgs) > 0) else 4
+    iNumPoints = int(lsArgs[1]) if (len(lsArgs) > 1) else 200
+    fModelDelay = float(lsArgs[2]) if (len(lsArgs) > 2) else 0.01
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(3, 1, 3, 'level', 'rleja')
+    fStart = time.time()
+    grid.refineSurrogate(modelRandomDelay, 0.0, 0, iMaxPoints = iNumPoints, sAnisotropicType = 'iptotal', iMinGrowth = iNumWorkers, iNumWorkers = iNumWorkers)
+    fBatch = time.time() - fStart
+    iNumBatch = grid.getNumLoaded()
+
+    grid.makeGlobalGrid(3, 1, 3, 'level', 'rleja')
+    fStart = time.time()
+    iNumLoaded = grid.constructSurrogate(modelRandomDelay, iNumBatch, 'iptotal', 0, iNumParallel = iNumWorkers)
+    fDynamic = time.time() - fStart
+
+    print("batch refinement:     {0:1d} points in {1:1.4e} seconds".format(iNumBatch, fBatch))
+    print("dynamic construction: {0:1d} points in {1:1.4e} seconds".format(iNumLoaded, fDynamic))
+
+def benchmarkLoadConstructed(lsArgs):
+    '''
+    compares loading the candidate construction points one at a time
+    with loadConstructedPoint() against loadConstructedPoints()
+
+    options: <iDimension> <iDepth> (default 4 and 7)
+
+    '''
+    iDimension = int(lsArgs[0]) if (len(lsArgs) > 0) else 4
+    iDepth = int(lsArgs[1]) if (len(lsArgs) > 1) else 7
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(iDimension, 1, iDepth, 'level', 'clenshaw-curtis')
+    grid.beginConstruction()
+    aPoints = grid.getCandidateConstructionPoints('level', 0)
+    aValues = np.exp(-np.sum(aPoints**2, axis=1)).reshape([aPoints.shape[0], 1])
+    sBytes = grid.toBytes()
+
+    fStart = time.time()
+    for iI in range(aPoints.shape[0]):
+        grid.loadConstructedPoint(aPoints[iI, :], aValues[iI, :])
+    fSingle = time.time() - fStart
+
+    grid.fromBytes(sBytes)
+    fStart = time.time()
+    grid.loadConstructedPoints(aPoints, aValues)
+    fBulk = time.time() - fStart
+
+    print("loadConstructedPoint  {0:1d} points: {1:1.4e} seconds".format(aPoints.shape[0], fSingle))
+    print("loadConstructedPoints {0:1d} points: {1:1.4e} seconds".format(aPoints.shape[0], fBulk))
+
+def benchmarkEvaluationPlan(lsArgs):
+    '''
+    compares evaluateBatch() against an evaluation plan when the same
+    points are evaluated after each of several reloads of the values
+
+    options: <iNumPoints> <iNumReloads> (default 2000 and 20)
+
+    '''
+    iNumPoints = int(lsArgs[0]) if (len(lsArgs) > 0) else 2000
+    iNumReloads = int(lsArgs[1]) if (len(lsArgs) > 1) else 20
+
+    aX = np.random.uniform(-1.0, 1.0, [iNumPoints, 3])
+    for sGrid in ["global", "localp"]:
+        grid = TasmanianSG.TasmanianSparseGrid()
+        if (sGrid == "global"):
+            grid.makeGlobalGrid(3, 2, 6, 'level', 'clenshaw-curtis')
+        else:
+            grid.makeLocalPolynomialGrid(3, 2, 6, 1, 'localp')
+        aPoints = grid.getNeededPoints()
+        llfValues = [np.column_stack([np.exp(-fScale * np.sum(aPoints**2, axis=1)), np.cos(fScale * aPoints[:,0])]) for fScale in np.linspace(0.5, 1.5, iNumReloads)]
+
+        fStart = time.time()
+        for aValues in llfValues:
+            grid.loadNeededPoints(aValues)
+            grid.evaluateBatch(aX)
+        fBatch = time.time() - fStart
+
+        fStart = time.time()
+        plan = grid.makeEvaluationPlan(aX)
+        for aValues in llfValues:
+            grid.loadNeededPoints(aValues)
+            plan.evaluate()
+        fPlan = time.time() - fStart
+
+        print("{0:>6s} grid, {1:1d} nodes, {2:1d} reloads of {3:1d} points".format(sGrid, grid.getNumPoints(), iNumReloads, iNumPoints))
+        print("    evaluateBatch:     {0:1.4e} seconds".format(fBatch))
+        print("    plan ({0:1s}): {1:1.4e} seconds".format("sparse" if plan.isSparse() else " dense", fPlan))
+
+def benchmarkIntegrateValues(lsArgs):
+    '''
+    compares loadNeededPoints() followed by integrate() for one integrand
+    at a time against integrateValues() for all integrands at once
+
+    options: <iNumIntegrands> <iDepth> (default 1000 and 6)
+
+    '''
+    iNumIntegrands = int(lsArgs[0]) if (len(lsArgs) > 0) else 1000
+    iDepth = int(lsArgs[1]) if (len(lsArgs) > 1) else 6
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(3, 1, iDepth, 'level', 'clenshaw-curtis')
+    aPoints = grid.getNeededPoints()
+    aVals = np.exp(-np.outer(np.sum(aPoints**2, axis=1), np.linspace(0.5, 1.5, iNumIntegrands)))
+
+    fStart = time.time()
+    aLoaded = np.empty([iNumIntegrands])
+    for iI in range(iNumIntegrands):
+        grid.loadNeededPoints(aVals[:,iI:iI+1])
+        aLoaded[iI] = grid.integrate()[0]
+    fLoaded = time.time() - fStart
+
+    grid.makeGlobalGrid(3, 1, iDepth, 'level', 'clenshaw-curtis')
+    fStart = time.time()
+    aValues = grid.integrateValues(aVals)
+    fValues = time.time() - fStart
+
+    print("{0:1d} integrands over {1:1d} nodes, max difference {2:1.4e}".format(iNumIntegrands, grid.getNumPoints(), np.max(np.abs(aLoaded - aValues))))
+    print("    load + integrate: {0:1.4e} seconds".format(fLoaded))
+    print("    integrateValues:  {0:1.4e} seconds".format(fValues))
+
+def benchmarkRuleCache(lsArgs):
+    '''
+    measures repeated grid constructions with the library cache of one
+    dimensional rules enabled and disabled
+
+    options: <iNumGrids> <iDepth> (default 100 and 30)
+
+    '''
+    iNumGrids = int(lsArgs[0]) if (len(lsArgs) > 0) else 100
+    iDepth = int(lsArgs[1]) if (len(lsArgs) > 1) else 30
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    iCapacity = grid.getRuleCacheStats()[3]
+    for sRule in ["gauss-hermite", "leja", "min-lebesgue"]:
+        for iC in [0, iCapacity]:
+            grid.clearRuleCache()
+            grid.setRuleCacheCapacity(iC)
+            fStart = time.time()
+            for iI in range(iNumGrids):
+                if (sRule == "gauss-hermite"):
+                    grid.makeGlobalGrid(2, 1, iDepth, 'level', sRule, [], 1.0)
+                else:
+                    grid.makeSequenceGrid(2, 1, iDepth, 'level', sRule)
+            fTime = time.time() - fStart
+            print("{0:>14s} {1:1d} grids, cache {2:>8s}: {3:1.4e} seconds".format(sRule, iNumGrids, "enabled" if (iC > 0) else "disabled", fTime))
+    grid.setRuleCacheCapacity(iCapacity)
+
+def benchmarkGreedyNodesFile(lsArgs):
+    '''
+    measures the construction of sequence grids with greedy rules
+    with and without the file cache of the nodes
+
+    options: <iDepth> (default 40)
+
+    '''
+    iDepth = int(lsArgs[0]) if (len(lsArgs) > 0) else 40
+    sFilename = "benchmarkGreedyNodes.bin"
+    if (os.path.isfile(sFilename)):
+        os.remove(sFilename)
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    sDefault = grid.getGreedyNodesCacheFile()
+    grid.setGreedyNodesCacheFile(sFilename)
+    for sRule in ["leja", "max-lebesgue", "min-lebesgue", "min-delta"]:
+        for sRun in ["compute", "file"]:
+            grid.clearRuleCache()
+            fStart = time.time()
+            grid.makeSequenceGrid(1, 1, iDepth, 'level', sRule)
+            fTime = time.time() - fStart
+            print("{0:>13s} level {1:1d}, {2:>7s}: {3:1.4e} seconds".format(sRule, iDepth, sRun, fTime))
+    grid.setGreedyNodesCacheFile(sDefault)
+    os.remove(sFilename)
+
+def benchmarkRefinementStep(lsArgs):
+    '''
+    measures the time of one surplus refinement step of a local
+    polynomial grid against the dimension and the number of points,
+    the step is dominated by the search for parents and children
+
+    options: <iMaxPoints> <dimensions> (default 100000 and 10,20,40)
+
+    '''
+    iMaxPoints = int(lsArgs[0]) if (len(lsArgs) > 0) else 100000
+    liDims = [int(s) for s in lsArgs[1].split(",")] if (len(lsArgs) > 1) else [10, 20, 40]
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    for iDim in liDims:
+        iDepth = 1
+        grid.makeLocalPolynomialGrid(iDim, 1, iDepth, 1, 'localp')
+        while (grid.getNumPoints() <= iMaxPoints):
+            aPoints = grid.getNeededPoints()
+            grid.loadNeededPoints(np.exp(-np.sum(aPoints**2, axis = 1)).reshape((aPoints.shape[0], 1)))
+            fStart = time.time()
+            grid.setSurplusRefinement(1.E-8, 0, 'classic')
+            fTime = time.time() - fStart
+            print("dimension {0:3d} points {1:8d}: {2:1.4e} seconds".format(iDim, grid.getNumPoints(), fTime))
+            iDepth += 1
+            grid.makeLocalPolynomialGrid(iDim, 1, iDepth, 1, 'localp')
+
+def benchmarkSupportIndex(lsArgs):
+    '''
+    measures the latency of single point evaluate() of a local
+    polynomial grid with and without the support index, and the time
+    to build the index, all evaluations use the same random points
+
+    options: <iNumX> <dimensions> <depth> (default 1000 4,10 6,4)
+
+    '''
+    iNumX = int(lsArgs[0]) if (len(lsArgs) > 0) else 1000
+    liDims = [int(s) for s in lsArgs[1].split(",")] if (len(lsArgs) > 1) else [4, 10]
+    liDepths = [int(s) for s in lsArgs[2].split(",")] if (len(lsArgs) > 2) else [6, 4]
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    for iDim, iDepth in zip(liDims, liDepths):
+        grid.makeLocalPolynomialGrid(iDim, 1, iDepth, 1, 'localp')
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(np.exp(-np.sum(aPoints**2, axis = 1)).reshape((aPoints.shape[0], 1)))
+        aX = np.random.uniform(-1.0, 1.0, (iNumX, iDim))
+
+        fStart = time.time()
+        for i in range(iNumX):
+            grid.evaluate(aX[i,:])
+        fDefault = (time.time() - fStart) / iNumX
+
+        fStart = time.time()
+        grid.enableSupportIndex()
+        fBuild = time.time() - fStart
+
+        fStart = time.time()
+        for i in range(iNumX):
+            grid.evaluate(aX[i,:])
+        fIndexed = (time.time() - fStart) / iNumX
+
+        print("dimension {0:3d} points {1:8d}: default {2:1.4e}  indexed {3:1.4e}  build {4:1.4e} seconds".format(iDim, grid.getNumPoints(), fDefault, fIndexed, fBuild))
+
+def benchmarkMortonOrder(lsArgs):
+    '''
+    measures the throughput of evaluateBatch() with random points for
+    local polynomial and wavelet grids, with and without sorting the
+    batch along a Morton curve, the sorting is forced for all sizes
+    so the threshold in enableMortonOrder() can be read from the table
+
+    options: <batch sizes> <iNumRepeat> (default 512,4096,32768 and 3)
+
+    '''
+    liNumX = [int(s) for s in lsArgs[0].split(",")] if (len(lsArgs) > 0) else [512, 4096, 32768]
+    iNumRepeat = int(lsArgs[1]) if (len(lsArgs) > 1) else 3
+
+    lTests = [("localp    2d", 'grid.makeLocalPolynomialGrid(2, 4, 9, 2, "localp")'),
+              ("localp    4d", 'grid.makeLocalPolynomialGrid(4, 4, 7, 1, "localp")'),
+              ("localp   10d", 'grid.makeLocalPolynomialGrid(10, 4, 5, 1, "localp")'),
+              ("wavelet   2d", 'grid.makeWaveletGrid(2, 4, 5, 1)'),
+              ("wavelet   4d", 'grid.makeWaveletGrid(4, 4, 3, 1)')]
+
+    grid = TasmanianSG.TasmanianSparseGrid()
+    for sName, sMake in lTests:
+        exec(sMake)
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(np.column_stack([np.exp(-float(k) * np.sum(aPoints**2, axis = 1)) for k in range(grid.getNumOutputs())]))
+        for iNumX in liNumX:
+            aX = np.random.uniform(-1.0, 1.0, (iNumX, grid.getNumDimensions()))
+            lfTimes = []
+            for bMorton in [False, True]:
+                grid.enableMortonOrder(bMorton, 1)
+                fBest = 1.E+30
+                for r in range(iNumRepeat):
+                    fStart = time.time()
+                    grid.evaluateBatch(aX)
+                    fBest = min(fBest, time.time() - fStart)
+                lfTimes.append(fBest)
+            print("{0:1s} points {1:7d}, batch {2:7d}: unsorted {3:1.4e}  morton {4:1.4e} points/second, speedup {5:1.2f}".format(
+                  sName, grid.getNumPoints(), iNumX, iNumX / lfTimes[0], iNumX / lfTimes[1], lfTimes[0] / lfTimes[1]))
+
+def benchmarkImport(lsArgs):
+    '''
+    measures the time to import TasmanianSG in a new interpreter,
+    numpy is imported first and its time is not counted, the script
+    exits with an error if the median time exceeds the budget
+
+    options: <iNumRuns> <fBudget> (default 10 and 0.1 seconds)
+
+    '''
+    iNumRuns = int(lsArgs[0]) if (len(lsArgs) > 0) else 10
+    fBudget = float(lsArgs[1]) if (len(lsArgs) > 1) else 0.1
+
+    sPath = os.path.dirname(os.path.abspath(TasmanianSG.__file__))
+    sCode = "import sys, time, numpy; sys.path.insert(0, {0:1s}); fStart = time.time(); import TasmanianSG; print(time.time() - fStart)".format(repr(sPath))
+    lfTimes = sorted([float(subprocess.check_output([sys.executable, "-c", sCode])) for i in range(iNumRuns)])
+    fMedian = lfTimes[len(lfTimes) // 2]
+
+    print("import TasmanianSG: {0:1.4e} seconds median, {1:1.4e} min, {2:1.4e} max, budget {3:1.4e}".format(fMedian, lfTimes[0], lfTimes[-1], fBudget))
+    if (fMedian > fBudget):
+        print("ERROR: import TasmanianSG exceeds the time budget")
+        sys.exit(1)
+
+def benchmarkDREAM(lsArgs):
+    '''
+    the basic-alpha case of "tasdream -bench", samples the posterior of
+    a sparse grid model using the likelihood computed in the library,
+    a Python callback that works with all chains in one call and a
+    Python callback that loops over the chains one at a time
+
+    options: <iNumOutputs> <iDepth> <iNumChains> <iNumBurnup> <iNumMCMC>
+             (default 100 8 1000 10 5)
+
+    '''
+    lsDefaults = [100, 8, 1000, 10, 5]
+    iNumOutputs, iDepth, iNumChains, iNumBurnup, iNumMCMC = [int(lsArgs[i]) if (len(lsArgs) > i) else lsDefaults[i] for i in range(5)]
+
+    # same as prepareGrid() and getData() in DREAM/tasdreamBenchmark.cpp
+    aT = (np.arange(iNumOutputs) + 0.5) / iNumOutputs
+    grid = TasmanianSG.TasmanianSparseGrid()
+    grid.makeGlobalGrid(2, iNumOutputs, iDepth, 'iptotal', 'clenshaw-curtis')
+    grid.setDomainTransform(np.array([[1.0, 5.0], [1.0, 5.0]]))
+    aPoints = grid.getNeededPoints()
+    grid.loadNeededPoints(np.sin(np.pi * np.outer(aPoints[:,0], aT)) + np.sin(np.pi * np.outer(aPoints[:,1], aT)))
+    aData = np.sin(2.0 * np.pi * aT) + np.sin(3.0 * np.pi * aT)
+    fScale = float(iNumOutputs) / 10.0
+
+    def logPosteriorBatch(aX):
+        return -np.sum((grid.evaluateBatch(aX) - aData)**2, 1) / fScale
+
+    def logPosteriorLoop(aX):
+        return np.array([-np.sum((grid.evaluate(aX[i,:]) - aData)**2) / fScale for i in range(aX.shape[0])])
+
+    print("basic-alpha, out={0:1d}, nodes={1:1d}, chains={2:1d}, burnup={3:1d}, mcmc={4:1d}".format(iNumOutputs, grid.getNumPoints(), iNumChains, iNumBurnup, iNumMCMC))
+    for sMethod in ["grid", "batch", "loop"]:
+        dream = TasmanianDREAM.TasmanianDREAM()
+        if (sMethod == "grid"):
+            dream.setPosteriorFromGrid(grid, aData, "gauss-scale", [fScale])
+        else:
+            dream.setLogDensity(2, logPosteriorBatch if (sMethod == "batch") else logPosteriorLoop, [1.0, 1.0], [5.0, 5.0])
+        dream.setNumChains(iNumChains)
+        dream.setCorrection("gaussian", [0.0, 0.01])
+
+        fStart = time.time()
+        dream.collectSamples(iNumBurnup, iNumMCMC)
+        fTime = time.time() - fStart
+        print("{0:>5s} log-density: {1:1.4e} seconds".format(sMethod, fTime))
+
+dBenchmarks = {"construct" : benchmarkConstruct,
+               "evaluate"  : benchmarkEvaluate,
+               "parallel"  : benchmarkEvaluateParallel,
+               "polyspace" : benchmarkPolynomialSpace,
+               "denseform" : benchmarkDenseForm,
+               "sparse"    : benchmarkSparseBasis,
+               "serialize" : benchmarkSerialize,
+               "refine"    : benchmarkRefine,
+               "dynamic"   : benchmarkDynamicConstruction,
+               "loadconstr": benchmarkLoadConstructed,
+               "dream"     : benchmarkDREAM,
+               "import"    : benchmarkImport,
+               "plan"      : benchmarkEvaluationPlan,
+               "integrate" : benchmarkIntegrateValues,
+               "rulecache" : benchmarkRuleCache,
+               "greedyfile": benchmarkGreedyNodesFile,
+               "refinestep": benchmarkRefinementStep,
+               "supportidx": benchmarkSupportIndex,
+               "morton"    : benchmarkMortonOrder,
+              }
+
+if __name__ == "__main__":
+    if ((len(sys.argv) < 2) or (sys.argv[1] not in dBenchmarks)):
+        print("usage: benchmarkTSG.py <benchmark> <options>")
+        print("available benchmarks: {0:1s}".format(" ".join(sorted(dBenchmarks))))
+        sys.exit(1 if (len(sys.argv) > 1) else 0)
+    dBenchmarks[sys.argv[1]](sys.argv[2:])
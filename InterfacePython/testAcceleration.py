@@ -1,6 +1,6 @@
 import unittest
 import TasmanianSG
-import sys, os
+import sys, os, pickle
 import numpy as np
 
 from random import uniform
@@ -123,6 +123,11 @@ class TestTasClass(unittest.TestCase):
                     aBatched = grid.evaluateBatch(aTestPoints)
                     np.testing.assert_almost_equal(aRegular, aBatched, 14, "Batch evaluation test not equal: {0:1s}, acceleration: {1:1s}, gpu: {2:1d}".format(sTest, sAcc, iGPU), True)
 
+                    aParallel = grid.evaluateBatchParallel(aTestPoints, 3, 7)
+                    np.testing.assert_almost_equal(aRegular, aParallel, 14, "Parallel batch evaluation test not equal: {0:1s}, acceleration: {1:1s}, gpu: {2:1d}".format(sTest, sAcc, iGPU), True)
+                    aParallel = grid.evaluateBatchParallel(aTestPoints)
+                    np.testing.assert_almost_equal(aRegular, aParallel, 14, "Parallel batch evaluation test not equal: {0:1s}, acceleration: {1:1s}, gpu: {2:1d}".format(sTest, sAcc, iGPU), True)
+
                     aFast = np.array([ grid.evaluate(aTestPoints[i,:]) for i in range(iFastEvalSubtest) ])
                     np.testing.assert_almost_equal(aRegular[0:iFastEvalSubtest,:], aFast, 14, "Batch evaluation test not equal: {0:1s}, acceleration: {1:1s}, gpu: {2:1d}".format(sTest, sAcc, iGPU), True)
 
@@ -137,7 +142,201 @@ class TestTasClass(unittest.TestCase):
                     else:
                         iC += 1
 
+    def checkEvaluationPlan(self):
+        '''
+        The evaluation plan must match evaluateBatch() for all grid types,
+        dense and sparse matrices, and after loading new values.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        aTestPoints = np.array([[ uniform(-1.0, 1.0) for j in range(2) ] for i in range(50) ])
+        aTestPoints[0, :] = [1.0, 1.0] # boundary point
+
+        lTests = [ 'grid.makeGlobalGrid(2, 2, 4, "level", "clenshaw-curtis")',
+                   'grid.makeSequenceGrid(2, 2, 4, "level", "leja")',
+                   'grid.makeLocalPolynomialGrid(2, 3, 4, 1, "localp")',
+                   'grid.makeLocalPolynomialGrid(2, 1, 4, 2, "semi-localp")',
+                   'grid.makeWaveletGrid(2, 1, 3, 1)',
+                   'grid.makeFourierGrid(2, 2, 3, "level")' ]
+
+        for sTest in lTests:
+            exec(sTest)
+            aPoints = grid.getNeededPoints()
+            iOut = grid.getNumOutputs()
+            for bSparse in [None, True, False]:
+                grid.loadNeededPoints(np.column_stack([np.exp(-np.sum(aPoints**2, axis=1)) for i in range(iOut)]))
+                plan = grid.makeEvaluationPlan(aTestPoints, bSparse)
+                self.assertEqual(plan.getNumPoints(), 50, "wrong number of plan points")
+                np.testing.assert_almost_equal(plan.evaluate(), grid.evaluateBatch(aTestPoints), 12, "plan not equal to batch: {0:1s}, sparse: {1:1s}".format(sTest, str(bSparse)), True)
+
+                grid.loadNeededPoints(np.column_stack([np.cos(aPoints[:,0] + i * aPoints[:,1]) for i in range(iOut)]))
+                np.testing.assert_almost_equal(plan.evaluate(), grid.evaluateBatch(aTestPoints), 12, "plan not equal to batch after reload: {0:1s}, sparse: {1:1s}".format(sTest, str(bSparse)), True)
+
+        grid.makeLocalPolynomialGrid(2, 1, 2, 1, "localp")
+        ttc.loadExpN2(grid)
+        plan = grid.makeEvaluationPlan(aTestPoints)
+        self.assertTrue(plan.isSparse(), "local polynomial plan should be sparse")
+        grid.setSurplusRefinement(1.E-4, 0, "classic")
+        ttc.loadExpN2(grid)
+        try:
+            plan.evaluate()
+            self.assertTrue(False, "failed to raise exception for a plan after refinement")
+        except TasmanianSG.TasmanianInputError as TSGError:
+            self.assertEqual(TSGError.sVariable, "evaluate", "error raising exception for plan.evaluate()")
+
+        # changes that keep the number of points must also invalidate the plan
+        lChanges = [ 'grid.setDomainTransform(np.array([[-2.0, 1.0], [-1.0, 2.0]]))',
+                     'grid.setConformalTransformASIN(np.array([4, 4]))',
+                     'grid.setSurplusRefinement(1.E-4, 0, "classic"); grid.clearRefinement()',
+                     'grid.makeLocalPolynomialGrid(2, 1, 2, 1, "semi-localp")' ]
+        for sChange in lChanges:
+            grid.makeLocalPolynomialGrid(2, 1, 2, 1, "localp")
+            ttc.loadExpN2(grid)
+            plan = grid.makeEvaluationPlan(aTestPoints)
+            exec(sChange)
+            ttc.loadExpN2(grid)
+            try:
+                plan.evaluate()
+                self.assertTrue(False, "failed to raise exception for a plan after: {0:1s}".format(sChange))
+            except TasmanianSG.TasmanianInputError as TSGError:
+                self.assertEqual(TSGError.sVariable, "evaluate", "error raising exception for plan.evaluate()")
+
+    def checkLocalBatchTraversal(self):
+        '''
+        Large batches of local polynomial grids walk the tree one level at a time,
+        the result must match the point-by-point evaluate() for all rules and orders.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        aTestPoints = np.array([[ uniform(-1.0, 1.0) for j in range(3) ] for i in range(2000) ])
+        aTestPoints[0, :] = [1.0, 1.0, -1.0] # boundary point
+        aTestPoints[1, :] = [0.5, 0.0, 0.25] # nodes of the grids
+
+        lTests = [ 'grid.makeLocalPolynomialGrid(3, 2, 4, 0, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 2, 5, 1, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 2, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 3, "localp-zero")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 4, "semi-localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 2, "localp-boundary")' ]
+
+        for sTest in lTests:
+            exec(sTest)
+            ttc.loadExpN2(grid)
+            aRegular = np.array([grid.evaluateThreadSafe(aTestPoints[i,:]) for i in range(aTestPoints.shape[0]) ])
+            np.testing.assert_almost_equal(aRegular, grid.evaluateBatch(aTestPoints), 13, "level traversal not equal to evaluate(): {0:1s}".format(sTest), True)
+
+    def checkLocalSupportIndex(self):
+        '''
+        The support index changes only the tree walk of evaluate(),
+        the result must match the default walk for all rules and orders,
+        including points on the edges of the supports and outside of the domain.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        aTestPoints = np.array([[ uniform(-1.0, 1.0) for j in range(3) ] for i in range(200) ])
+        aTestPoints[0, :] = [1.0, 1.0, -1.0] # boundary point
+        aTestPoints[1, :] = [0.5, 0.0, 0.25] # nodes of the grids
+        aTestPoints[2, :] = [1.0/3.0, -7.0/9.0, 0.75] # nodes and edges of the supports
+        aTestPoints[3, :] = [1.5, 0.1, -0.2] # outside of the domain
+        aTestPoints[4, :] = [0.3, -1.2, 2.0]
+
+        lTests = [ 'grid.makeLocalPolynomialGrid(3, 2, 4, 0, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 2, 5, 1, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 2, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 3, "localp-zero")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 4, "semi-localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 2, "localp-boundary")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 1, "localp-boundary")' ]
+
+        for sTest in lTests:
+            exec(sTest)
+            self.assertFalse(grid.isUsingSupportIndex(), "support index enabled by default")
+            grid.enableSupportIndex() # no points yet, the index is built by loadNeededPoints()
+            self.assertTrue(grid.isUsingSupportIndex(), "support index was not enabled")
+            ttc.loadExpN2(grid)
+            grid.setSurplusRefinement(1.E-4, -1, "classic") # the index must follow the new points
+            if (grid.getNumNeeded() > 0):
+                ttc.loadExpN2(grid)
+            aIndexed = np.array([grid.evaluate(aTestPoints[i,:]) for i in range(aTestPoints.shape[0]) ])
+            grid.enableSupportIndex(False)
+            aRegular = np.array([grid.evaluate(aTestPoints[i,:]) for i in range(aTestPoints.shape[0]) ])
+            np.testing.assert_almost_equal(aRegular, aIndexed, 13, "support index not equal to evaluate(): {0:1s}".format(sTest), True)
+
+    def checkMortonOrder(self):
+        '''
+        Sorting the batch along the Morton curve changes only the order of the evaluations,
+        the result must come back in the order of the input points.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        aTestPoints = np.array([[ uniform(-1.0, 1.0) for j in range(3) ] for i in range(2100) ])
+        aTestPoints[0, :] = [1.0, 1.0, -1.0] # boundary point
+        aTestPoints[1, :] = [0.5, 0.0, 0.25] # nodes of the grids
+        aTestPoints[2, :] = [0.5, 0.0, 0.25] # repeated point
+
+        lTests = [ 'grid.makeLocalPolynomialGrid(3, 2, 4, 1, "localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 2, "semi-localp")',
+                   'grid.makeLocalPolynomialGrid(3, 1, 4, 0, "localp-zero")',
+                   'grid.makeWaveletGrid(3, 2, 2, 1)',
+                   'grid.makeWaveletGrid(3, 1, 1, 3)' ]
+
+        for sTest in lTests:
+            exec(sTest)
+            ttc.loadExpN2(grid)
+            aRegular = grid.evaluateBatch(aTestPoints)
+            self.assertFalse(grid.isUsingMortonOrder(), "Morton order enabled by default")
+            for iMinBatch in [1, 2048, 4096]: # sort, sort, below the threshold
+                grid.enableMortonOrder(True, iMinBatch)
+                self.assertTrue(grid.isUsingMortonOrder(), "Morton order was not enabled")
+                np.testing.assert_almost_equal(aRegular, grid.evaluateBatch(aTestPoints), 14, "Morton order changed the result: {0:1s}".format(sTest), True)
+            grid.setDomainTransform(np.array([[2.0, 3.0], [-1.0, 1.0], [0.0, 4.0]])) # the sort works with the canonical points
+            aTransformed = np.column_stack([2.5 + 0.5 * aTestPoints[:,0], aTestPoints[:,1], 2.0 + 2.0 * aTestPoints[:,2]])
+            np.testing.assert_almost_equal(aRegular, grid.evaluateBatch(aTransformed), 13, "Morton order with domain transform: {0:1s}".format(sTest), True)
+
+    def checkCompactIndexes(self):
+        '''
+        The compact multi-indexes change only the memory of the grid,
+        all results must match the grid with int indexes.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        gridRef = TasmanianSG.TasmanianSparseGrid()
+        aTestPoints = np.array([[ uniform(-1.0, 1.0) for j in range(3) ] for i in range(30) ])
+
+        lTests = [ ['makeGlobalGrid(3, 2, 4, "level", "clenshaw-curtis")', lambda g : g.setAnisotropicRefinement("iptotal", 10, 0)],
+                   ['makeSequenceGrid(3, 2, 4, "level", "rleja")', lambda g : g.setAnisotropicRefinement("iptotal", 10, 0)],
+                   ['makeLocalPolynomialGrid(3, 2, 4, 2, "localp")', lambda g : g.setSurplusRefinement(1.E-3, -1, "classic")],
+                   ['makeWaveletGrid(3, 2, 2, 1)', lambda g : g.setSurplusRefinement(1.E-3, -1, "classic")],
+                   ['makeFourierGrid(3, 2, 3, "level")', None] ]
+
+        for sMake, refine in lTests:
+            exec("grid." + sMake)
+            self.assertEqual(grid.getIndexEntryBytes(), 4, "the indexes should not be compact by default: {0:1s}".format(sMake))
+            grid.compactIndexes() # compact needed points
+            self.assertEqual(grid.getIndexEntryBytes(), 1, "the needed points were not compacted: {0:1s}".format(sMake))
+            ttc.loadExpN2(grid)
+            gridRef.copyGrid(grid)
+            grid.compactIndexes()
+            self.assertEqual(grid.getIndexEntryBytes(), 1, "the indexes were not compacted: {0:1s}".format(sMake))
+            np.testing.assert_almost_equal(gridRef.getPoints(), grid.getPoints(), 14, "compact getPoints(): {0:1s}".format(sMake), True)
+            np.testing.assert_almost_equal(gridRef.evaluateBatch(aTestPoints), grid.evaluateBatch(aTestPoints), 14, "compact evaluateBatch(): {0:1s}".format(sMake), True)
+            np.testing.assert_almost_equal(gridRef.evaluate(aTestPoints[0,:]), grid.evaluate(aTestPoints[0,:]), 14, "compact evaluate(): {0:1s}".format(sMake), True)
+            np.testing.assert_almost_equal(gridRef.integrate(), grid.integrate(), 14, "compact integrate(): {0:1s}".format(sMake), True)
+            np.testing.assert_almost_equal(gridRef.getInterpolationWeightsBatch(aTestPoints), grid.getInterpolationWeightsBatch(aTestPoints), 14, "compact weights: {0:1s}".format(sMake), True)
+            if (not grid.isGlobal()):
+                np.testing.assert_almost_equal(gridRef.evaluateHierarchicalFunctions(aTestPoints), grid.evaluateHierarchicalFunctions(aTestPoints), 14, "compact hierarchical functions: {0:1s}".format(sMake), True)
+            ttc.compareGrids(gridRef, pickle.loads(pickle.dumps(grid)))
+            self.assertEqual(grid.getIndexEntryBytes(), 1, "evaluations expanded the indexes: {0:1s}".format(sMake))
+            if (refine is not None): # refinement must work with the compact indexes and expand them
+                refine(grid)
+                refine(gridRef)
+                ttc.compareGrids(gridRef, grid)
+                ttc.loadExpN2(grid)
+                ttc.loadExpN2(gridRef)
+                self.assertEqual(grid.getIndexEntryBytes(), 4, "refinement did not expand the indexes: {0:1s}".format(sMake))
+                ttc.compareGrids(gridRef, grid)
+
     def performAccelerationTest(self):
         self.checkMeta()
         self.checkMultiGPU()
         self.checkEvaluateConsistency()
+        self.checkEvaluationPlan()
+        self.checkLocalBatchTraversal()
+        self.checkLocalSupportIndex()
+        self.checkMortonOrder()
+        self.checkCompactIndexes()
@@ -1,6 +1,6 @@
 import unittest
 import TasmanianSG
-import sys, os
+import sys, os, pickle, struct
 import numpy as np
 
 import testConfigureData as tdata # needed for Gauss-Patterson table file
@@ -352,6 +352,100 @@ class TestTasClass(unittest.TestCase):
                 gridA.write("testSave", bUseBinaryFormat = True)
                 gridB.read("testSave")
 
+    def checkReadWriteBytes(self):
+        '''
+        Test in-memory reading and writing with toBytes(), fromBytes() and pickle.
+        '''
+        lGrids = ['gridA.makeGlobalGrid(3, 2, 4, "level", "clenshaw-curtis"); gridA.setDomainTransform(aTransform); ttc.loadExpN2(gridA)',
+                  'gridA.makeSequenceGrid(3, 1, 5, "level", "leja"); gridA.setConformalTransformASIN(np.array([0,4,2])); ttc.loadExpN2(gridA)',
+                  'gridA.makeLocalPolynomialGrid(3, 1, 4, 2, "localp"); ttc.loadExpN2(gridA); gridA.setSurplusRefinement(0.01, -1, "classic")',
+                  'gridA.makeWaveletGrid(3, 1, 2, 1); gridA.setDomainTransform(aTransform)',
+                  'gridA.makeFourierGrid(3, 1, 3, "level"); ttc.loadExpN2(gridA)',
+                  'gridA.getNumPoints()']
+        aTransform = np.array([[0.0,1.0],[0.0,1.0],[-2.0,-1.0]])
+
+        for sGrid in lGrids:
+            gridA = TasmanianSG.TasmanianSparseGrid()
+            gridB = TasmanianSG.TasmanianSparseGrid()
+
+            exec(sGrid)
+            bData = gridA.toBytes()
+            gridA.write("testSave", bUseBinaryFormat = True)
+            with open("testSave", "rb") as infile:
+                self.assertEqual(bData, infile.read(), "toBytes() differs from the binary file")
+
+            gridB.makeLocalPolynomialGrid(1, 1, 0)
+            self.assertTrue(gridB.fromBytes(bData), "Failed to read from bytes")
+            ttc.compareGrids(gridA, gridB)
+
+            gridB.makeSequenceGrid(1, 1, 0, "level", "leja")
+            self.assertTrue(gridB.fromBytes(bytearray(bData)), "Failed to read from bytearray")
+            ttc.compareGrids(gridA, gridB)
+
+            gridB = pickle.loads(pickle.dumps(gridA))
+            ttc.compareGrids(gridA, gridB)
+
+            # the default format is readable by older versions, the packed indexes are opt-in
+            self.assertEqual(bData[0:4], b"TSG5", "the default binary format changed")
+            bPacked = gridA.toBytes(bPackedIndexes = True)
+            self.assertEqual(bPacked[0:4], b"TSG6", "wrong version of the packed binary format")
+            self.assertTrue((len(bPacked) <= len(bData)), "the packed format is larger than the default")
+            gridA.write("testSave", bUseBinaryFormat = True, bPackedIndexes = True)
+            with open("testSave", "rb") as infile:
+                self.assertEqual(bPacked, infile.read(), "toBytes() differs from the packed binary file")
+            gridB.makeSequenceGrid(1, 1, 0, "level", "leja")
+            self.assertTrue(gridB.read("testSave"), "Failed to read the packed binary file")
+            ttc.compareGrids(gridA, gridB)
+
+            # the mapped format uses aligned sections, readMapped() also works with the other binary formats
+            gridA.writeMapped("testSave")
+            with open("testSave", "rb") as infile:
+                self.assertEqual(infile.read(4), b"TSG7", "wrong version of the mapped binary format")
+            gridB.makeSequenceGrid(1, 1, 0, "level", "leja")
+            self.assertTrue(gridB.readMapped("testSave"), "Failed to read a mapped file")
+            ttc.compareGrids(gridA, gridB)
+            gridB.makeSequenceGrid(1, 1, 0, "level", "leja")
+            self.assertTrue(gridB.read("testSave"), "Failed to read the mapped format without a map")
+            ttc.compareGrids(gridA, gridB)
+            gridA.write("testSave", bUseBinaryFormat = True)
+            self.assertTrue(gridB.readMapped("testSave"), "Failed to map the default binary format")
+            ttc.compareGrids(gridA, gridB)
+
+        # modifying a mapped grid copies the data and leaves the file intact
+        gridA.makeLocalPolynomialGrid(2, 1, 3, 2, "localp")
+        ttc.loadExpN2(gridA)
+        gridA.writeMapped("testSave")
+        self.assertTrue(gridB.readMapped("testSave"), "Failed to read a mapped file")
+        for grid in [gridA, gridB]:
+            grid.setSurplusRefinement(0.01, -1, "classic")
+            ttc.loadExpN2(grid)
+        ttc.compareGrids(gridA, gridB)
+        gridC = TasmanianSG.TasmanianSparseGrid()
+        self.assertTrue(gridC.readMapped("testSave"), "Failed to read a mapped file")
+        self.assertTrue((gridC.getNumPoints() < gridB.getNumPoints()), "the refinement changed the mapped file")
+
+        print("Attempting a bogus read from bytes to see if error would be properly registered")
+        self.assertFalse(gridB.fromBytes(b"TSX5g"), "Failed to flag a fake read")
+        self.assertFalse(gridB.fromBytes(gridA.toBytes()[:3]), "Failed to flag a truncated read")
+        self.assertFalse(gridB.readMapped("testSaveBlah"), "Failed to flag a fake mapped read")
+        gridA.write("testSave")
+        self.assertFalse(gridB.readMapped("testSave"), "Failed to flag a mapped read of an ascii file")
+        gridA.makeSequenceGrid(2, 1, 3, "level", "leja")
+        bData = bytearray(gridA.toBytes())
+        bData[23:27] = struct.pack('i', -1) # negative number of indexes, the resize throws std::length_error
+        self.assertFalse(gridB.fromBytes(bData), "Failed to flag an invalid number of indexes")
+        print("GOOD: error was registered")
+
+        # pickle keeps the library and the acceleration
+        gridA = TasmanianSG.TasmanianSparseGrid(gridA.pLibTSG._name)
+        gridA.makeGlobalGrid(2, 1, 2, "level", "clenshaw-curtis")
+        gridA.enableAcceleration("none")
+        gridB = pickle.loads(pickle.dumps(gridA))
+        ttc.compareGrids(gridA, gridB)
+        self.assertEqual(gridB.pTsgLibrary, gridA.pLibTSG._name, "pickle did not keep the library")
+        self.assertEqual(gridB.getAccelerationType(), "none", "pickle did not keep the acceleration")
+        self.assertEqual(gridB.getGPUID(), gridA.getGPUID(), "pickle did not keep the GPU ID")
+
     def performIOTest(self):
         self.checkMetaIO()
 
@@ -362,3 +456,4 @@ class TestTasClass(unittest.TestCase):
         self.checkReadWriteFourier()
 
         self.checkReadWriteMisc()
+        self.checkReadWriteBytes()
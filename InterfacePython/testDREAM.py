@@ -0,0 +1,144 @@
+import unittest
+import TasmanianSG
+import TasmanianDREAM
+import numpy as np
+
+import testCommon
+
+ttc = testCommon.TestTasCommon()
+
+class TestTasClass(unittest.TestCase):
+    '''
+    Tests for the DREAM sampler, callback and sparse grid densities.
+    '''
+    def __init__(self):
+        unittest.TestCase.__init__(self, "testNothing")
+
+    def testNothing(self):
+        pass
+
+    def checkLogDensityCallback(self):
+        '''
+        Sample a Gaussian given by a Python callback, the callback must be
+        called once per iteration with all chains at once.
+        '''
+        lfMean = np.array([0.5, -0.5])
+        lCalls = []
+        def logGauss(aX):
+            lCalls.append(aX.shape)
+            return -0.5 * np.sum(((aX - lfMean) / 0.2)**2, 1)
+
+        dream = TasmanianDREAM.TasmanianDREAM()
+        dream.setLogDensity(2, logGauss, [-2.0, -2.0], [2.0, 2.0])
+        self.assertEqual(dream.getNumDimensions(), 2, "wrong number of dimensions")
+        dream.setNumChains(50)
+        self.assertEqual(dream.getNumChains(), 50, "wrong number of chains")
+        dream.setCorrection("gaussian", [0.0, 0.0001])
+
+        aSamples = dream.collectSamples(100, 100)
+        self.assertEqual(aSamples.shape, (5000, 2), "wrong shape of the samples")
+        self.assertEqual(len(lCalls), 201, "the callback must be called once per iteration")
+        for tShape in lCalls:
+            self.assertTrue((tShape[0] <= 50) and (tShape[1] == 2), "wrong shape of the callback input")
+        np.testing.assert_almost_equal(np.mean(aSamples, 0), lfMean, 1, "wrong mean of the samples", True)
+        np.testing.assert_almost_equal(dream.getPDFHistory(), logGauss(aSamples), 12, "wrong history", True)
+
+        # unbounded domain requires an initial state
+        dream.setLogDensity(2, logGauss)
+        dream.setNumChains(10)
+        with self.assertRaises(TasmanianSG.TasmanianInputError):
+            dream.collectSamples(1, 1)
+        dream.setChainState(np.random.uniform(-1.0, 1.0, [10, 2]))
+        self.assertEqual(dream.collectSamples(1, 2).shape, (20, 2), "wrong shape of the samples")
+
+        # errors in the callback are raised by collectSamples
+        def logFail(aX):
+            raise ValueError("callback failure")
+        dream.setLogDensity(2, logFail, [-1.0, -1.0], [1.0, 1.0])
+        dream.setNumChains(10)
+        with self.assertRaises(ValueError):
+            dream.collectSamples(1, 1)
+
+    def checkPosteriorFromGrid(self):
+        '''
+        Sample the posterior of a sparse grid model, the history must match
+        the Gaussian likelihood computed with evaluateBatch().
+        '''
+        iNumOutputs = 8
+        aT = (np.arange(iNumOutputs) + 0.5) / iNumOutputs
+        grid = TasmanianSG.TasmanianSparseGrid()
+        grid.makeGlobalGrid(2, iNumOutputs, 8, "iptotal", "clenshaw-curtis")
+        grid.setDomainTransform(np.array([[1.0, 2.0], [2.5, 3.5]]))
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(np.sin(np.outer(aPoints[:,0], aT)) + np.cos(np.outer(aPoints[:,1], aT)))
+        aData = np.sin(1.5 * aT) + np.cos(3.0 * aT)
+
+        dream = TasmanianDREAM.TasmanianDREAM()
+        dream.setPosteriorFromGrid(grid, aData, "gauss-diagonal", np.full([iNumOutputs], 0.01))
+        dream.setNumChains(40)
+        dream.setCorrection("gaussian", [0.0, 0.0001])
+        aSamples = dream.collectSamples(100, 50)
+
+        self.assertTrue(np.all(aSamples[:,0] >= 1.0) and np.all(aSamples[:,0] <= 2.0), "sample outside of the domain")
+        aLog = -np.sum((grid.evaluateBatch(aSamples) - aData)**2, 1) / 0.01
+        aDiff = dream.getPDFHistory() - aLog
+        np.testing.assert_almost_equal(aDiff - aDiff[0], np.zeros(aDiff.shape), 8, "history does not match the likelihood", True)
+        np.testing.assert_almost_equal(np.mean(aSamples, 0), np.array([1.5, 3.0]), 1, "wrong mean of the samples", True)
+
+        # the prior restricts the domain
+        dream.setPrior(1, "uniform", [2.9, 3.2])
+        aSamples = dream.collectSamples(10, 10)
+        self.assertTrue(np.all(aSamples[:,1] >= 2.9) and np.all(aSamples[:,1] <= 3.2), "sample outside of the prior")
+
+        # likelihood stored in a grid
+        lfMean = np.array([0.2, -0.3])
+        grid.makeGlobalGrid(2, 1, 4, "iptotal", "clenshaw-curtis")
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(-np.sum(((aPoints - lfMean) / 0.2)**2, 1).reshape([aPoints.shape[0], 1]))
+        dream.setLikelihoodFromGrid(grid)
+        dream.setNumChains(50)
+        dream.setCorrection("gaussian", [0.0, 0.0001])
+        aSamples = dream.collectSamples(100, 100)
+        np.testing.assert_almost_equal(np.mean(aSamples, 0), lfMean, 1, "wrong mean of the samples", True)
+
+    def checkExceptions(self):
+        '''
+        Check the input errors of the sampler.
+        '''
+        dream = TasmanianDREAM.TasmanianDREAM()
+        grid = TasmanianSG.TasmanianSparseGrid()
+        llTests = [["dream.setNumChains(10)", "setNumChains"],
+                   ["dream.setCorrection('gaussian', [0.0, 0.1])", "setCorrection"],
+                   ["dream.collectSamples(1, 1)", "collectSamples"],
+                   ["dream.setLogDensity(0, lambda x : x)", "iNumDimensions"],
+                   ["dream.setLogDensity(2, 1)", "pLogDensity"],
+                   ["dream.setLogDensity(2, lambda x : x, [0.0], [1.0, 1.0])", "llfLower"],
+                   ["dream.setLogDensity(2, lambda x : x, [0.0, 0.0], [1.0, 0.0])", "llfUpper"],
+                   ["dream.setPrior(0, 'uniform', [0.0, 1.0])", "setPrior"],
+                   ["dream.setPosteriorFromGrid(1, [1.0])", "grid"],
+                   ["dream.setPosteriorFromGrid(grid, [1.0])", "setPosteriorFromGrid"],
+                   ["grid.makeGlobalGrid(2, 2, 2, 'level', 'clenshaw-curtis'); dream.setPosteriorFromGrid(grid, [1.0, 1.0])", "setPosteriorFromGrid"],
+                   ["grid.loadNeededPoints(np.ones([grid.getNumNeeded(), 2])); dream.setPosteriorFromGrid(grid, [1.0])", "llfData"],
+                   ["dream.setPosteriorFromGrid(grid, [1.0, 1.0], 'gauss')", "sLikelihood"],
+                   ["dream.setPosteriorFromGrid(grid, [1.0, 1.0], 'gauss-dense', [1.0, 1.0])", "lfCovariance"],
+                   ["dream.setLikelihoodFromGrid(grid)", "setLikelihoodFromGrid"],
+                   ["dream.setPosteriorFromGrid(grid, [1.0, 1.0]); dream.setPrior(2, 'uniform', [0.0, 1.0])", "iDimension"],
+                   ["dream.setPrior(0, 'weibull', [0.0, 1.0])", "sType"],
+                   ["dream.setPrior(0, 'gamma', [0.0, 1.0])", "lfParameters"],
+                   ["dream.setNumChains(2)", "iNumChains"],
+                   ["dream.setCorrection('gaussian', [0.0, 0.1], 2)", "iDimension"],
+                   ["dream.setChainState(np.ones([10, 2]))", "setChainState"],
+                   ["dream.setNumChains(10); dream.setChainState(np.ones([10, 3]))", "llfState"],
+                   ["dream.collectSamples(-1, 1)", "iNumSamples"],]
+
+        for lTest in llTests:
+            try:
+                exec(lTest[0])
+                self.assertTrue(False, "failed to raise exception for invalid '{0:1s}' using test\n '{1:1s}'".format(lTest[1],lTest[0]))
+            except TasmanianSG.TasmanianInputError as TSGError:
+                self.assertEqual(TSGError.sVariable, lTest[1], "error raising exception for '{0:1s}' using test\n '{1:1s}'\n Error.sVariable = '{2:1s}'".format(lTest[1],lTest[0],TSGError.sVariable))
+
+    def performDREAMTests(self):
+        self.checkLogDensityCallback()
+        self.checkPosteriorFromGrid()
+        self.checkExceptions()
@@ -1,6 +1,10 @@
 import unittest
 import TasmanianSG
 import numpy as np
+import sys
+
+if (sys.version_info >= (3, 2)):
+    from concurrent.futures import ThreadPoolExecutor
 
 import testCommon
 
@@ -92,6 +96,11 @@ class TestTasClass(unittest.TestCase):
                    ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.loadNeededPoints(np.zeros([6,2])); grid.evaluateBatch(np.zeros([1,3]))", "llfX"],
                    ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.loadNeededPoints(np.zeros([6,2])); grid.evaluateBatch(np.zeros([2,]))", "llfX"],
                    ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.integrate()", "integrate"],
+                   ["TasmanianSG.TasmanianSparseGrid().integrateValues(np.ones([1]))", "integrateValues"],
+                   ["grid.setRuleCacheCapacity(-1)", "iCapacity"],
+                   ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.integrateValues(np.ones([5, 2]))", "llfVals"],
+                   ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.integrateValues(np.ones([6, 2, 1]))", "llfVals"],
+                   ["grid.makeSequenceGrid(2, 2, 2, 'level', 'rleja'); grid.integrateValues(np.ones([6, 2]))", "notError"],
                    ["grid.makeGlobalGrid(2, 1, 2, 'level', 'gauss-legendre'); grid.setDomainTransform(np.zeros([2,]))", "llfTransform"],
                    ["grid.makeGlobalGrid(2, 1, 2, 'level', 'gauss-legendre'); grid.setDomainTransform(np.zeros([2,1]))", "llfTransform"],
                    ["grid.makeGlobalGrid(3, 1, 2, 'level', 'gauss-legendre'); grid.setDomainTransform(np.zeros([2,2]))", "llfTransform"],
@@ -159,6 +168,10 @@ class TestTasClass(unittest.TestCase):
                    ["grid.makeLocalPolynomialGrid(2, 1, 1, 1, 'localp'); grid.setHierarchicalCoefficients(np.array([[1.0,],[1.0,],[1.0,],[1.0,],[1.0,]]));", "notError"],
                    ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.enableAcceleration('gpu-wrong');", "sAccelerationType"],
                    ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.enableAcceleration('gpu-default');", "notError"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.enableSupportIndex();", "enableSupportIndex"],
+                   ["grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp'); grid.enableSupportIndex();", "notError"],
+                   ["grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp'); grid.enableMortonOrder(True, 0);", "iMinBatch"],
+                   ["grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp'); grid.enableMortonOrder(False, 0);", "notError"],
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.isAccelerationAvailable('cpu-wrong');", "sAccelerationType"],
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.isAccelerationAvailable('cpu-blas');", "notError"],
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.getGPUMemory(-1);", "iGPUID"],
@@ -169,7 +182,62 @@ class TestTasClass(unittest.TestCase):
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.getGPUName(grid1.getNumGPUs());", "iGPUID"],
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.setGPUID(-1);", "iGPUID"],
                    ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.setGPUID(1000000);", "iGPUID"],
-                   ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.setGPUID(grid1.getNumGPUs());", "iGPUID"],]
+                   ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.setGPUID(grid1.getNumGPUs());", "iGPUID"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getPoints(out = np.empty([13, 2]));", "notError"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getPoints(out = np.empty([13, 3]));", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getPoints(out = np.empty([13, 2], np.float32));", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getPoints(out = np.empty([2, 13]).T);", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getPoints(out = [[0.0, 0.0],]);", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getQuadratureWeights(out = np.empty([12,]));", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatch(np.ones([3, 2]), out = np.empty([3, 1]));", "notError"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatch(np.ones([3, 2]), out = np.empty([3, 2]));", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); aOut = np.empty([3, 1]); aOut.setflags(write = False); grid.evaluateBatch(np.ones([3, 2]), out = aOut);", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.getInterpolationWeightsBatch(np.ones([3, 2]), out = np.empty([3, 12]));", "out"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.getHierarchicalCoefficients(out = np.empty([13, 1], np.complex128));", "out"],
+                   ["grid.makeFourierGrid(2, 1, 2, 'level'); grid.evaluateHierarchicalFunctions(np.ones([3, 2]), out = np.empty([3, grid.getNumPoints()]));", "out"],
+                   ["grid.makeFourierGrid(2, 1, 2, 'level'); grid.evaluateHierarchicalFunctions(np.ones([3, 2]), out = np.empty([3, grid.getNumPoints()], np.complex128));", "notError"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.evaluateBatchParallel(np.ones([3, 2]));", "evaluateBatchParallel"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatchParallel(np.ones([3, 3]));", "llfX"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatchParallel(np.ones([3, 2]), -1);", "num_threads"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatchParallel(np.ones([3, 2]), 2, -1);", "chunk_size"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); ttc.loadExpN2(grid); grid.evaluateBatchParallel(np.ones([3, 2]), 2, 1);", "notError"],
+                   ["grid.fromBytes('TSG5e');", "bData"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.fromBytes(grid.toBytes());", "notError"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis'); grid.__setstate__((grid.toBytes()[:-1], 0, 'none', 0));", "bData"],
+                   ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.refineSurrogate(lambda x : [1.0], 1.E-4);", "refineSurrogate"],
+                   ["grid.makeGlobalGrid(2, 0, 2, 'level', 'clenshaw-curtis'); grid.refineSurrogate(lambda x : [1.0], 1.E-4);", "refineSurrogate"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], -1.0);", "fTolerance"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, iMaxPoints = -1);", "iMaxPoints"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0, sAnisotropicType = 'iptotal');", "iMaxPoints"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0, iMaxPoints = 5);", "iMaxPoints"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0, iMaxPoints = 50, sAnisotropicType = 'iptotal');", "fTolerance"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 0.0, 0, 'classic', iMaxPoints = 50, sAnisotropicType = 'iptotal');", "sCriteria"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0);", "sAnisotropicType"],
+                   ["grid.makeLocalPolynomialGrid(2, 1, 2); grid.refineSurrogate(lambda x : [1.0], 0.0, 0, iMaxPoints = 50, sAnisotropicType = 'iptotal');", "sAnisotropicType"],
+                   ["grid.makeWaveletGrid(2, 1, 2); grid.refineSurrogate(lambda x : [1.0], 0.0, 0, iMaxPoints = 50, sAnisotropicType = 'iptotal');", "sAnisotropicType"],
+                   ["grid.makeLocalPolynomialGrid(2, 1, 2); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0);", "sCriteria"],
+                   ["grid.makeWaveletGrid(2, 1, 2); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0);", "sCriteria"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0, 'classic');", "sCriteria"],
+                   ["grid.makeFourierGrid(2, 1, 2, 'level'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, 0, 'classic');", "refineSurrogate"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, iNumWorkers = -1);", "iNumWorkers"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0], 1.E-4, iChunkSize = -1);", "iChunkSize"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.refineSurrogate(lambda x : [1.0, 2.0], 1.E-4, pExecutor = ThreadPoolExecutor(1));", "pModel"],
+                   ["grid1 = TasmanianSG.TasmanianSparseGrid(); grid1.constructSurrogate(lambda x : [1.0], 10);", "constructSurrogate"],
+                   ["grid.makeSequenceGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogate(lambda x : [1.0], 10);", "constructSurrogate"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogate(lambda x : [1.0], 0);", "iMaxPoints"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogate(lambda x : [1.0], 10, iNumParallel = -1);", "iNumParallel"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogate(lambda x : [1.0], 10, fTimeLimit = -1.0);", "fTimeLimit"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogate(lambda x : [1.0, 2.0], 10, pExecutor = ThreadPoolExecutor(1));", "llfY"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.constructSurrogateAsync(lambda x : [1.0], 0);", "iMaxPoints"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.finishConstruction(); grid.loadConstructedPoints(np.ones([2, 2]), np.ones([2, 1]));", "loadConstructedPoints"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.beginConstruction(); grid.loadConstructedPoints(np.ones([2, 3]), np.ones([2, 1]));", "llfX"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.beginConstruction(); grid.loadConstructedPoints(np.ones([2,]), np.ones([2, 1]));", "llfX"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.beginConstruction(); grid.loadConstructedPoints(np.ones([2, 2]), np.ones([3, 1]));", "llfY"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.beginConstruction(); grid.loadConstructedPoints(np.ones([2, 2]), np.ones([2, 2]));", "llfY"],
+                   ["grid.makeGlobalGrid(2, 1, 2, 'level', 'leja'); grid.beginConstruction(); grid.loadConstructedPoints(np.ones([0, 2]), np.ones([0, 1]));", "notError"],]
+
+        if (sys.version_info < (3, 2)): # no concurrent.futures
+            llTests = [lTest for lTest in llTests if ("ThreadPoolExecutor" not in lTest[0])]
 
         for lTest in llTests:
             try:
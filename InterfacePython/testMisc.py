@@ -1,6 +1,8 @@
 import unittest
 import TasmanianSG
 import os
+import subprocess
+import sys
 import numpy as np
 
 import testCommon
@@ -52,6 +54,400 @@ class TestTasClass(unittest.TestCase):
         aP = grid.getGlobalPolynomialSpace(False)
         np.testing.assert_equal(aP, aA, "poly space mismatch", True)
 
+    def checkSharedLibrary(self):
+        '''
+        All instances of the class must share the same library binding,
+        i.e., the library is loaded and the prototypes are set only once.
+        '''
+        grid1 = TasmanianSG.TasmanianSparseGrid()
+        grid2 = TasmanianSG.TasmanianSparseGrid()
+        self.assertTrue(grid1.pLibTSG is grid2.pLibTSG, "grids do not share the library binding")
+
+        grid3 = TasmanianSG.TasmanianSparseGrid(tasmanian_library = grid1.pLibTSG)
+        self.assertTrue(grid1.pLibTSG is grid3.pLibTSG, "passing the library object created a new binding")
+
+        grid1.makeGlobalGrid(2, 1, 2, 'level', 'clenshaw-curtis')
+        grid3.makeGlobalGrid(2, 1, 3, 'level', 'clenshaw-curtis')
+        self.assertEqual(grid1.getNumPoints(), 13, "wrong number of points for the first grid")
+        self.assertEqual(grid3.getNumPoints(), 29, "wrong number of points for the second grid")
+
+    def checkInputLayout(self):
+        '''
+        Sliced, transposed, Fortran-ordered and non-float64 inputs must
+        give the same results as C-contiguous float64 arrays,
+        copies must be made only when the layout requires it.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        grid.makeLocalPolynomialGrid(2, 1, 4, 1, 'localp')
+        ttc.loadExpN2(grid)
+
+        aDesign = np.random.uniform(-1.0, 1.0, size = [30, 5])
+        aX = np.ascontiguousarray(aDesign[:, 1:3])
+        lInputs = [aDesign[:, 1:3], np.asfortranarray(aX), aX.T.copy().T, aX.astype(np.float32), aDesign[::2, 3:5]]
+        lReference = [aX, aX, aX, aX.astype(np.float32).astype(np.float64), np.ascontiguousarray(aDesign[::2, 3:5])]
+
+        iCopies = TasmanianSG.iTsgNumInputCopies
+        grid.evaluateBatch(aX)
+        grid.getInterpolationWeightsBatch(aX)
+        grid.evaluateHierarchicalFunctions(aX)
+        grid.evaluateSparseHierarchicalFunctions(aX)
+        aX.setflags(write = False)
+        grid.evaluateBatch(aX)
+        self.assertEqual(iCopies, TasmanianSG.iTsgNumInputCopies, "made a copy of a C-contiguous float64 array")
+
+        for aInput, aRef in zip(lInputs, lReference):
+            iCopies = TasmanianSG.iTsgNumInputCopies
+            np.testing.assert_almost_equal(grid.evaluateBatch(aInput), grid.evaluateBatch(aRef), 14, "evaluateBatch layout mismatch", True)
+            np.testing.assert_almost_equal(grid.getInterpolationWeightsBatch(aInput), grid.getInterpolationWeightsBatch(aRef), 14, "getInterpolationWeightsBatch layout mismatch", True)
+            np.testing.assert_almost_equal(grid.evaluateHierarchicalFunctions(aInput), grid.evaluateHierarchicalFunctions(aRef), 14, "evaluateHierarchicalFunctions layout mismatch", True)
+            np.testing.assert_almost_equal(grid.evaluateSparseHierarchicalFunctions(aInput).getDenseForm(), grid.evaluateSparseHierarchicalFunctions(aRef).getDenseForm(), 14, "evaluateSparseHierarchicalFunctions layout mismatch", True)
+            self.assertEqual(iCopies + 4, TasmanianSG.iTsgNumInputCopies, "wrong number of input copies")
+
+    def checkOutputBuffers(self):
+        '''
+        Bulk methods called with out = must write in the provided array
+        and return the same values as the version that allocates.
+        '''
+        aX = np.random.uniform(-1.0, 1.0, size = [20, 2])
+        for sMake in ["grid.makeGlobalGrid(2, 2, 3, 'level', 'clenshaw-curtis')",
+                      "grid.makeLocalPolynomialGrid(2, 2, 3, 2, 'localp')",
+                      "grid.makeFourierGrid(2, 2, 3, 'level')"]:
+            grid = TasmanianSG.TasmanianSparseGrid()
+            exec(sMake)
+            ttc.loadExpN2(grid)
+            iNumPoints = grid.getNumPoints()
+            sType = np.complex128 if grid.isFourier() else np.float64
+
+            aOut = np.empty([iNumPoints, 2])
+            self.assertTrue(grid.getPoints(out = aOut) is aOut, "getPoints did not return out")
+            np.testing.assert_equal(aOut, grid.getPoints(), "getPoints out mismatch", True)
+
+            aOut = np.empty([iNumPoints,])
+            self.assertTrue(grid.getQuadratureWeights(out = aOut) is aOut, "getQuadratureWeights did not return out")
+            np.testing.assert_equal(aOut, grid.getQuadratureWeights(), "getQuadratureWeights out mismatch", True)
+
+            aOut = np.empty([aX.shape[0], 2])
+            self.assertTrue(grid.evaluateBatch(aX, out = aOut) is aOut, "evaluateBatch did not return out")
+            np.testing.assert_equal(aOut, grid.evaluateBatch(aX), "evaluateBatch out mismatch", True)
+
+            aOut = np.empty([aX.shape[0], iNumPoints])
+            self.assertTrue(grid.getInterpolationWeightsBatch(aX, out = aOut) is aOut, "getInterpolationWeightsBatch did not return out")
+            np.testing.assert_equal(aOut, grid.getInterpolationWeightsBatch(aX), "getInterpolationWeightsBatch out mismatch", True)
+
+            aOut = np.empty([aX.shape[0], iNumPoints], sType)
+            self.assertTrue(grid.evaluateHierarchicalFunctions(aX, out = aOut) is aOut, "evaluateHierarchicalFunctions did not return out")
+            np.testing.assert_equal(aOut, grid.evaluateHierarchicalFunctions(aX), "evaluateHierarchicalFunctions out mismatch", True)
+
+            aOut = np.empty([iNumPoints, 2], sType)
+            self.assertTrue(grid.getHierarchicalCoefficients(out = aOut) is aOut, "getHierarchicalCoefficients did not return out")
+            np.testing.assert_equal(aOut, grid.getHierarchicalCoefficients(), "getHierarchicalCoefficients out mismatch", True)
+
+            aCoeff = np.random.uniform(-1.0, 1.0, size = [iNumPoints, 2]).astype(sType)
+            if (grid.isFourier()):
+                aCoeff += 1j * np.random.uniform(-1.0, 1.0, size = [iNumPoints, 2])
+            grid.setHierarchicalCoefficients(aCoeff)
+            grid.getHierarchicalCoefficients(out = aOut)
+            np.testing.assert_equal(aOut, aCoeff, "getHierarchicalCoefficients out does not match setHierarchicalCoefficients", True)
+
+    def checkMetadataCache(self):
+        '''
+        The cached dimensions, outputs and number of points must follow
+        every method that modifies the grid.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        self.assertEqual(grid.getMetadata(), (0, 0, 0, 0, 0), "wrong metadata for empty grid")
+
+        grid.makeLocalPolynomialGrid(2, 1, 2, 1, 'localp')
+        self.assertEqual(grid.getMetadata(), (2, 1, 0, 13, 13), "wrong metadata after make")
+        ttc.loadExpN2(grid)
+        self.assertEqual(grid.getMetadata(), (2, 1, 13, 0, 13), "wrong metadata after load")
+        grid.setSurplusRefinement(1.E-4, 0, 'classic')
+        self.assertEqual(grid.getNumLoaded(), 13, "wrong number of loaded points after refinement")
+        self.assertTrue(grid.getNumNeeded() > 0, "wrong number of needed points after refinement")
+        grid.clearRefinement()
+        self.assertEqual(grid.getMetadata(), (2, 1, 13, 0, 13), "wrong metadata after clear refinement")
+
+        grid.makeGlobalGrid(3, 2, 1, 'level', 'clenshaw-curtis')
+        self.assertEqual(grid.getMetadata(), (3, 2, 0, 7, 7), "wrong metadata after make")
+        grid.updateGlobalGrid(2, 'level')
+        self.assertEqual(grid.getMetadata(), (3, 2, 0, 25, 25), "wrong metadata after update")
+
+        grid2 = TasmanianSG.TasmanianSparseGrid()
+        grid2.getMetadata()
+        grid2.copyGrid(grid)
+        self.assertEqual(grid2.getMetadata(), (3, 2, 0, 25, 25), "wrong metadata after copy")
+
+        grid.makeSequenceGrid(2, 1, 2, 'level', 'rleja')
+        grid.write("testSave", bUseBinaryFormat = True)
+        grid2.read("testSave")
+        self.assertEqual(grid2.getMetadata(), (2, 1, 0, 6, 6), "wrong metadata after read")
+
+    def checkEvaluateCache(self):
+        '''
+        The evaluate cache must return the same values as the library,
+        count hits and misses, evict the oldest points and drop all values
+        when the grid is modified.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        grid.makeGlobalGrid(2, 2, 4, 'level', 'clenshaw-curtis')
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(np.column_stack([np.exp(-np.sum(aPoints**2, 1)), np.cos(aPoints[:,0])]))
+        aX = np.array([[0.3, 0.2], [-0.1, 0.4], [0.3, 0.2], [0.5, -0.5]])
+        aReference = grid.evaluateBatch(aX)
+
+        grid.enableEvaluateCache(3)
+        self.assertEqual(grid.getEvaluateCacheStats(), (0, 0, 0, 3), "wrong stats of empty cache")
+        np.testing.assert_equal(grid.evaluate(aX[0]), aReference[0], "cached evaluate()", True)
+        np.testing.assert_equal(grid.evaluate(aX[0]), aReference[0], "cached evaluate()", True)
+        self.assertEqual(grid.getEvaluateCacheStats(), (1, 1, 1, 3), "wrong stats after evaluate()")
+        np.testing.assert_equal(grid.evaluateBatch(aX), aReference, "cached evaluateBatch()", True)
+        self.assertEqual(grid.getEvaluateCacheStats(), (3, 3, 3, 3), "wrong stats after evaluateBatch()")
+
+        # the missing rows of the batch are added last, aX[0] is the least recently used point
+        grid.evaluate(np.array([0.0, 0.0]))
+        grid.evaluate(aX[0])
+        self.assertEqual(grid.getEvaluateCacheStats(), (3, 5, 3, 3), "wrong stats after eviction")
+
+        grid.setDomainTransform(np.array([[-2.0, 2.0], [-2.0, 2.0]]))
+        self.assertEqual(grid.getEvaluateCacheStats()[2], 0, "domain transform did not clear the cache")
+        np.testing.assert_almost_equal(grid.evaluateBatch(2.0 * aX), aReference, 14, "cached evaluateBatch() after transform", True)
+        grid.clearDomainTransform()
+        grid.evaluateBatch(aX)
+
+        grid.loadNeededPoints(np.ones([grid.getNumPoints(), 2]))
+        self.assertEqual(grid.getEvaluateCacheStats()[2], 0, "loadNeededPoints() did not clear the cache")
+        np.testing.assert_almost_equal(grid.evaluateBatch(aX), np.ones([4, 2]), 14, "cached evaluateBatch() after load", True)
+        grid.setHierarchicalCoefficients(2.0 * grid.getHierarchicalCoefficients())
+        np.testing.assert_almost_equal(grid.evaluate(aX[0]), np.array([2.0, 2.0]), 14, "cached evaluate() after coefficients", True)
+
+        grid.disableEvaluateCache()
+        self.assertEqual(grid.getEvaluateCacheStats(), (0, 0, 0, 0), "wrong stats of disabled cache")
+        try:
+            grid.enableEvaluateCache(0)
+            self.assertTrue(False, "failed to raise exception for invalid capacity")
+        except TasmanianSG.TasmanianInputError as TSGError:
+            self.assertEqual(TSGError.sVariable, "iCapacity", "error raising exception for enableEvaluateCache()")
+
+    def checkDenseForm(self):
+        '''
+        Compare the dense form of a sparse matrix against a matrix
+        assembled by hand, including empty rows and complex values.
+        '''
+        pMat = TasmanianSG.TasmanianSimpleSparseMatrix()
+        np.testing.assert_equal(pMat.getDenseForm(), np.empty([0, 0]), "dense form of empty matrix", True)
+
+        pMat.iNumRows = 4
+        pMat.iNumCols = 3
+        pMat.aPntr = np.array([0, 2, 2, 3, 5], np.int32)
+        pMat.aIndx = np.array([0, 2, 1, 0, 1], np.int32)
+        pMat.aVals = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+        aA = np.array([[1.0, 0.0, 2.0], [0.0, 0.0, 0.0], [0.0, 3.0, 0.0], [4.0, 5.0, 0.0]])
+        np.testing.assert_equal(pMat.getDenseForm(), aA, "dense form mismatch", True)
+
+        pMat.aVals = pMat.aVals * 1j
+        np.testing.assert_equal(pMat.getDenseForm(), aA * 1j, "dense form mismatch", True)
+
+    def checkSparseWeights(self):
+        '''
+        Compare the sparse interpolation weights against the dense
+        getInterpolationWeightsBatch() for all types of grids.
+        '''
+        aX = np.array([[0.0, -0.3], [-0.44, 0.7], [0.82, -0.01], [1.0, 1.0], [0.33, 0.66]])
+        grid = TasmanianSG.TasmanianSparseGrid()
+        lGrids = ["grid.makeGlobalGrid(2, 1, 4, 'level', 'clenshaw-curtis')",
+                  "grid.makeSequenceGrid(2, 1, 4, 'level', 'rleja')",
+                  "grid.makeLocalPolynomialGrid(2, 1, 5, 1, 'localp')",
+                  "grid.makeLocalPolynomialGrid(2, 1, 5, 2, 'semi-localp')",
+                  "grid.makeLocalPolynomialGrid(2, 1, 4, 3, 'localp-zero')",
+                  "grid.makeLocalPolynomialGrid(2, 1, 4, 0, 'localp')",
+                  "grid.makeWaveletGrid(2, 1, 2, 1)",
+                  "grid.makeFourierGrid(2, 1, 3, 'level')"]
+        for sGrid in lGrids:
+            exec(sGrid)
+            aX1 = aX if not grid.isFourier() else 0.5 * (aX + 1.0)
+            aDense = grid.getInterpolationWeightsBatch(aX1)
+            pMat = grid.getInterpolationWeightsSparse(aX1)
+            self.assertEqual((pMat.iNumRows, pMat.iNumCols), aDense.shape, "wrong shape of the sparse weights")
+            np.testing.assert_almost_equal(pMat.getDenseForm(), aDense, 14, "sparse weights mismatch for " + sGrid, True)
+            for iI in range(aX.shape[0]):
+                self.assertTrue(np.all(np.diff(pMat.aIndx[pMat.aPntr[iI]:pMat.aPntr[iI+1]]) > 0), "indexes are not sorted")
+            if grid.isLocalPolynomial():
+                self.assertTrue(pMat.aPntr[-1] < aDense.size, "local polynomial weights should be sparse")
+            pScipy = grid.getInterpolationWeightsSparse(aX1, True)
+            np.testing.assert_almost_equal(pScipy.toarray(), aDense, 14, "scipy weights mismatch for " + sGrid, True)
+
+        # refinement adds needed points, the weights are computed for the loaded points
+        grid.makeLocalPolynomialGrid(2, 1, 3, 2, 'localp')
+        aPoints = grid.getNeededPoints()
+        grid.loadNeededPoints(np.exp(aPoints[:,0:1] + aPoints[:,1:2]))
+        grid.setSurplusRefinement(1.E-4, 0, 'classic')
+        pMat = grid.getInterpolationWeightsSparse(aX)
+        np.testing.assert_almost_equal(pMat.getDenseForm(), grid.getInterpolationWeightsBatch(aX), 14, "sparse weights mismatch with refinement", True)
+        aPoints = grid.getLoadedPoints()
+        np.testing.assert_almost_equal(pMat.getDenseForm().dot(np.exp(aPoints[:,0:1] + aPoints[:,1:2])), grid.evaluateBatch(aX), 12, "sparse weights do not interpolate", True)
+
+        pMat = grid.getInterpolationWeightsSparse(np.empty([0, 2]))
+        self.assertEqual(pMat.aPntr.shape, (1,), "wrong size of the empty matrix")
+
+    def checkIntegrateValues(self):
+        '''
+        Integrate many sets of values at once and compare against
+        loadNeededPoints() followed by integrate(), the grid must not
+        be modified and the cached weights must follow the transforms.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        gridRef = TasmanianSG.TasmanianSparseGrid()
+        for sMake in ["makeGlobalGrid(2, 3, 4, 'level', 'clenshaw-curtis')",
+                      "makeSequenceGrid(2, 3, 4, 'level', 'rleja')",
+                      "makeLocalPolynomialGrid(2, 3, 4, 2, 'localp')"]:
+            exec("grid." + sMake)
+            exec("gridRef." + sMake)
+            for gridT in [grid, gridRef]:
+                gridT.setDomainTransform(np.array([[-2.0, 1.0], [0.5, 3.0]]))
+            aPoints = grid.getPoints()
+            aVals = np.column_stack([np.exp(-aPoints[:,0]), aPoints[:,0] * aPoints[:,1], np.cos(aPoints[:,1])])
+            gridRef.loadNeededPoints(aVals)
+
+            np.testing.assert_almost_equal(grid.integrateValues(aVals), gridRef.integrate(), 12, "integrateValues mismatch for " + sMake, True)
+            self.assertAlmostEqual(grid.integrateValues(aVals[:,1]), gridRef.integrate()[1], 12, "integrateValues mismatch for 1-D values")
+            self.assertEqual(grid.getNumLoaded(), 0, "integrateValues modified the grid")
+
+            # the cached weights must be reset by the transforms
+            for gridT in [grid, gridRef]:
+                gridT.setDomainTransform(np.array([[-1.0, 1.0], [0.0, 2.0]]))
+                if gridT.isGlobal():
+                    gridT.setConformalTransformASIN(np.array([4, 4]))
+            gridRef.loadNeededPoints(aVals)
+            np.testing.assert_almost_equal(grid.integrateValues(aVals), gridRef.integrate(), 12, "integrateValues mismatch after transform", True)
+
+    def checkRuleCache(self):
+        '''
+        Repeated grid constructions must reuse the library cache of
+        one dimensional rules and give the same nodes and weights
+        as a construction without the cache.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        iCapacity = grid.getRuleCacheStats()[3]
+        grid.clearRuleCache()
+        self.assertEqual(grid.getRuleCacheStats(), (0, 0, 0, iCapacity), "clearRuleCache did not reset the cache")
+
+        grid.makeGlobalGrid(2, 1, 5, 'level', 'gauss-jacobi', [], 0.5, 1.5)
+        aPoints, aWeights = grid.getPoints(), grid.getQuadratureWeights()
+        self.assertEqual(grid.getRuleCacheStats()[0:3], (0, 1, 1), "wrong stats after the first construction")
+        grid.makeGlobalGrid(2, 1, 5, 'level', 'gauss-jacobi', [], 0.5, 1.5)
+        self.assertEqual(grid.getRuleCacheStats()[0:3], (1, 1, 1), "wrong stats after the second construction")
+        np.testing.assert_equal(grid.getPoints(), aPoints, "cached points mismatch", True)
+        np.testing.assert_equal(grid.getQuadratureWeights(), aWeights, "cached weights mismatch", True)
+
+        # the parameters are part of the key
+        grid.makeGlobalGrid(2, 1, 5, 'level', 'gauss-jacobi', [], 0.5, 2.5)
+        self.assertEqual(grid.getRuleCacheStats()[0:3], (1, 2, 2), "the rule parameters are not part of the key")
+
+        # the cache is shared between grids
+        grid2 = TasmanianSG.TasmanianSparseGrid()
+        grid2.makeSequenceGrid(2, 1, 6, 'level', 'leja')
+        aPoints = grid2.getPoints()
+        grid.makeSequenceGrid(2, 1, 6, 'level', 'leja')
+        self.assertEqual(grid.getRuleCacheStats()[0:3], (2, 3, 3), "the cache is not shared between grids")
+
+        # the sequence nodes are nested, shorter sequences are served from the cached nodes
+        grid.makeSequenceGrid(1, 1, 3, 'level', 'leja')
+        self.assertEqual(grid.getRuleCacheStats()[0:3], (3, 3, 3), "the sequence prefix was not served from the cache")
+        np.testing.assert_almost_equal(grid.getPoints().reshape((4,)), np.array([0.0, 1.0, -1.0, np.sqrt(1.0/3.0)]), 14, "wrong cached leja nodes", True)
+
+        grid.setRuleCacheCapacity(1)
+        self.assertEqual(grid.getRuleCacheStats()[2:4], (1, 1), "setRuleCacheCapacity did not evict the rules")
+        grid.setRuleCacheCapacity(0)
+        grid2.makeSequenceGrid(2, 1, 6, 'level', 'leja')
+        self.assertEqual(grid.getRuleCacheStats()[2], 0, "disabled cache stored a rule")
+        np.testing.assert_equal(grid2.getPoints(), aPoints, "uncached points mismatch", True)
+        grid.setRuleCacheCapacity(iCapacity)
+
+    def checkGreedyNodesCache(self):
+        '''
+        The greedy nodes must be written to the cache file on the first
+        computation and read back on later constructions, files from
+        other versions must be ignored.
+        '''
+        grid = TasmanianSG.TasmanianSparseGrid()
+        sDefault = grid.getGreedyNodesCacheFile()
+        sFilename = "testGreedyNodesCache.bin"
+        if (os.path.isfile(sFilename)):
+            os.remove(sFilename)
+        grid.setGreedyNodesCacheFile(sFilename)
+        self.assertEqual(grid.getGreedyNodesCacheFile(), sFilename, "wrong cache filename")
+
+        grid.clearRuleCache()
+        grid.makeSequenceGrid(1, 1, 20, 'level', 'leja')
+        aPoints = grid.getPoints()
+        self.assertTrue(os.path.isfile(sFilename), "the cache file was not written")
+        # header (8 chars, 4 ints and 64-bit checksum), then rule and number of nodes, then the nodes
+        iOffset = 8 + 4 * 4 + 8 + 2 * 4
+        aNodes = np.fromfile(sFilename, np.float64, offset = iOffset)
+        np.testing.assert_equal(aNodes, aPoints[:,0], "wrong nodes in the cache file", True)
+
+        def getChecksum(aBytes): # FNV-1a of the data after the header
+            iHash = 14695981039346656037
+            for iByte in aBytes.tolist():
+                iHash = ((iHash ^ iByte) * 1099511628211) % 2**64
+            return iHash
+
+        # modify the nodes without the checksum, the file must be ignored
+        aData = np.fromfile(sFilename, np.uint8)
+        aModified = aNodes.copy()
+        aModified[10] = 0.123
+        aData[iOffset:] = np.frombuffer(aModified.tobytes(), np.uint8)
+        aData.tofile(sFilename)
+        grid.clearRuleCache()
+        grid.makeSequenceGrid(1, 1, 15, 'level', 'leja')
+        self.assertEqual(grid.getPoints()[10,0], aPoints[10,0], "the grid used a file with a wrong checksum")
+
+        # modify the nodes and the checksum, the grid must use the cached nodes
+        aData = np.fromfile(sFilename, np.uint8)
+        aModified = np.fromfile(sFilename, np.float64, offset = iOffset)
+        aModified[10] = 0.123
+        aData[iOffset:] = np.frombuffer(aModified.tobytes(), np.uint8)
+        aData[24:32] = np.frombuffer(np.array([getChecksum(aData[32:])], np.uint64).tobytes(), np.uint8)
+        aData.tofile(sFilename)
+        grid.clearRuleCache()
+        grid.makeSequenceGrid(1, 1, 15, 'level', 'leja')
+        self.assertEqual(grid.getPoints()[10,0], 0.123, "the grid did not use the cached nodes")
+
+        # wrong version, the file is ignored and overwritten
+        aHeader = np.frombuffer(aData[8:24].tobytes(), np.int32).copy()
+        aHeader[2] += 1
+        aData[8:24] = np.frombuffer(aHeader.tobytes(), np.uint8)
+        aData.tofile(sFilename)
+        grid.clearRuleCache()
+        grid.makeSequenceGrid(1, 1, 25, 'level', 'leja')
+        np.testing.assert_equal(grid.getPoints()[0:21,0], aPoints[:,0], "the grid used nodes from a different version", True)
+        self.assertEqual(os.path.getsize(sFilename), iOffset + 26 * 8, "the cache file was not overwritten")
+
+        grid.setGreedyNodesCacheFile("")
+        os.remove(sFilename)
+        grid.clearRuleCache()
+        grid.makeSequenceGrid(1, 1, 20, 'level', 'leja')
+        self.assertFalse(os.path.isfile(sFilename), "wrote to a disabled cache file")
+        grid.setGreedyNodesCacheFile(sDefault)
+
+        # the default comes from the environment
+        sPath = os.path.dirname(os.path.abspath(TasmanianSG.__file__))
+        sCode = "import sys; sys.path.insert(0, {0:1s}); import TasmanianSG; print(TasmanianSG.TasmanianSparseGrid().getGreedyNodesCacheFile())".format(repr(sPath))
+        dEnv = dict(os.environ)
+        dEnv["TASMANIAN_GREEDY_NODES_CACHE"] = sFilename
+        sOut = subprocess.check_output([sys.executable, "-c", sCode], env = dEnv)
+        self.assertEqual(sOut.decode().strip(), sFilename, "the environment variable was not used")
+
+    def checkLazyPlotting(self):
+        '''
+        Importing TasmanianSG must not import matplotlib, the plotting
+        module is loaded on the first call to a plotting method.
+        '''
+        sPath = os.path.dirname(os.path.abspath(TasmanianSG.__file__))
+        sCode = "import sys; sys.path.insert(0, {0:1s}); import TasmanianSG; print('matplotlib' in sys.modules)".format(repr(sPath))
+        sOut = subprocess.check_output([sys.executable, "-c", sCode]).decode("utf-8").strip()
+        self.assertEqual(sOut, "False", "importing TasmanianSG also imported matplotlib")
+
     def checkPlotting(self):
         '''
         If matplotlib is available and there is an active display, then
@@ -123,4 +519,15 @@ class TestTasClass(unittest.TestCase):
 
     def performMiscTests(self):
         self.checkPolynomialSpace()
+        self.checkDenseForm()
+        self.checkSparseWeights()
+        self.checkIntegrateValues()
+        self.checkSharedLibrary()
+        self.checkInputLayout()
+        self.checkOutputBuffers()
+        self.checkMetadataCache()
+        self.checkEvaluateCache()
+        self.checkRuleCache()
+        self.checkGreedyNodesCache()
+        self.checkLazyPlotting()
         self.checkPlotting()
@@ -3,11 +3,31 @@ import TasmanianSG
 import numpy as np
 
 from random import shuffle
+import sys
+import time
+
+if (sys.version_info >= (3, 2)):
+    from concurrent.futures import ThreadPoolExecutor
+if (sys.version_info >= (3, 7)):
+    import testRefinementAsync # uses async def and asyncio.run()
 
 import testCommon
 
 ttc = testCommon.TestTasCommon()
 
+def modelExpSum(aX):
+    # module level function so it can be sent to a process pool
+    return [np.exp(-np.sum(aX**2)), np.cos(np.sum(aX))]
+
+def modelExpSumSlow(aX):
+    time.sleep(0.1)
+    return modelExpSum(aX)
+
+def modelFailAtOrigin(aX):
+    if (np.all(aX == 0.0)):
+        raise ValueError("the model failed at the origin")
+    return modelExpSum(aX)
+
 class TestTasClass(unittest.TestCase):
     '''
     Test the refinement capabilities:
@@ -135,8 +155,147 @@ class TestTasClass(unittest.TestCase):
             gridB.read("testSave")
             ttc.compareGrids(gridA, gridB)
 
+    def checkLoadConstructedPoints(self):
+        '''
+        Compare loading points one at a time and all at once.
+        '''
+        gridA = TasmanianSG.TasmanianSparseGrid()
+        gridA.makeGlobalGrid(3, 2, 2, "level", "clenshaw-curtis")
+        gridB = TasmanianSG.TasmanianSparseGrid()
+        gridB.copyGrid(gridA)
+        gridA.beginConstruction()
+        gridB.beginConstruction()
+
+        for t in range(5):
+            aPoints = gridA.getCandidateConstructionPoints("level", 0)
+            np.testing.assert_almost_equal(aPoints, gridB.getCandidateConstructionPoints("level", 0), decimal=11)
+            aPoints = aPoints[0:min(40, aPoints.shape[0]), :]
+            aValues = np.array([modelExpSum(aX) for aX in aPoints])
+
+            liSamples = list(range(aPoints.shape[0]))
+            shuffle(liSamples)
+            for iI in liSamples:
+                gridA.loadConstructedPoint(aPoints[iI, :], aValues[iI, :])
+            gridB.loadConstructedPoints(aPoints[liSamples, :], aValues[liSamples, :])
+            ttc.compareGrids(gridA, gridB)
+
+        gridA.finishConstruction()
+        gridB.finishConstruction()
+        ttc.compareGrids(gridA, gridB)
+
+    def checkRefineSurrogate(self):
+        '''
+        Compare refineSurrogate() against the serial refinement loop.
+        '''
+        gridA = TasmanianSG.TasmanianSparseGrid()
+        gridA.makeSequenceGrid(2, 2, 2, "level", "rleja")
+        gridB = TasmanianSG.TasmanianSparseGrid()
+        gridB.copyGrid(gridA)
+
+        iNumEvaluations = 0
+        while (gridA.getNumNeeded() > 0):
+            aPoints = gridA.getNeededPoints()
+            gridA.loadNeededPoints(np.array([modelExpSum(aX) for aX in aPoints]))
+            iNumEvaluations += aPoints.shape[0]
+            gridA.setSurplusRefinement(1.E-4, -1)
+        self.assertEqual(gridB.refineSurrogate(modelExpSum, 1.E-4, iNumWorkers = 2), iNumEvaluations, "wrong number of model evaluations")
+        ttc.compareGrids(gridA, gridB)
+
+        # local polynomial grid with a budget and a thread pool
+        gridA.makeLocalPolynomialGrid(2, 2, 2, 1, "localp")
+        with ThreadPoolExecutor(2) as pPool:
+            gridA.refineSurrogate(modelExpSum, 1.E-5, 0, "classic", iMaxPoints = 100, pExecutor = pPool)
+        self.assertTrue((gridA.getNumLoaded() <= 100), "budget exceeded")
+        self.assertTrue((gridA.getNumLoaded() > 13), "no refinement was done")
+        self.assertEqual(gridA.getNumNeeded(), 0, "refinement was not cleared")
+
+        # global grid with anisotropic refinement
+        gridA.makeGlobalGrid(2, 2, 2, "level", "leja")
+        with ThreadPoolExecutor(2) as pPool:
+            iNumEvaluations = gridA.refineSurrogate(modelExpSum, 0.0, 0, iMaxPoints = 50, sAnisotropicType = "iptotal", iMinGrowth = 5, pExecutor = pPool)
+        self.assertEqual(gridA.getNumLoaded(), iNumEvaluations, "wrong number of model evaluations")
+        self.assertTrue((iNumEvaluations <= 50), "budget exceeded")
+
+    def checkConstructSurrogate(self):
+        '''
+        Compare constructSurrogate() against the serial construction loop.
+        '''
+        for sMake in ['gridA.makeGlobalGrid(2, 2, 2, "level", "clenshaw-curtis")',
+                      'gridA.makeGlobalGrid(2, 2, 1, "level", "rleja")']:
+            gridA = TasmanianSG.TasmanianSparseGrid()
+            exec(sMake)
+            gridB = TasmanianSG.TasmanianSparseGrid()
+            gridB.copyGrid(gridA)
+
+            # with one evaluation at a time, the points are added in the order of the serial loop
+            gridA.beginConstruction()
+            for iI in range(40):
+                aX = gridA.getCandidateConstructionPoints("iptotal", 0)[0, :]
+                gridA.loadConstructedPoint(aX, modelExpSum(aX))
+            gridA.finishConstruction()
+
+            with ThreadPoolExecutor(1) as pPool:
+                iNumLoaded = gridB.constructSurrogate(modelExpSum, 40, "iptotal", 0, iNumParallel = 1, pExecutor = pPool)
+            gridB.finishConstruction()
+            self.assertEqual(iNumLoaded, 40, "wrong number of loaded points")
+            ttc.compareGrids(gridA, gridB)
+
+        # process pool with several points in flight
+        gridA.makeGlobalGrid(2, 2, 0, "level", "rleja")
+        self.assertEqual(gridA.constructSurrogate(modelExpSum, 30, "iptotal", 0, iNumParallel = 3), 30, "wrong number of loaded points")
+        gridA.finishConstruction()
+        self.assertEqual(gridA.getNumLoaded(), 30, "wrong number of loaded points")
+
+        # asyncio with several points in flight, the points are loaded as they come
+        if (sys.version_info >= (3, 7)):
+            gridA.makeGlobalGrid(2, 2, 0, "level", "rleja")
+            iNumLoaded = testRefinementAsync.runConstructSurrogateAsync(gridA, 30)
+            gridA.finishConstruction()
+            self.assertEqual(iNumLoaded, 30, "wrong number of loaded points")
+            self.assertEqual(gridA.getNumLoaded(), 30, "wrong number of loaded points")
+            aX = np.array([[0.3, -0.2], [0.7, 0.1]])
+            np.testing.assert_almost_equal(gridA.evaluateBatch(aX), np.array([modelExpSum(aX[0]), modelExpSum(aX[1])]), 2, "bad construction accuracy")
+
+        # the points that finish together with a failed one are loaded before the exception is raised
+        from concurrent.futures import Executor, Future
+        class SerialExecutor(Executor):
+            def submit(self, pFunction, *args):
+                pFuture = Future()
+                try:
+                    pFuture.set_result(pFunction(*args))
+                except Exception as pError:
+                    pFuture.set_exception(pError)
+                return pFuture
+        gridA.makeGlobalGrid(2, 2, 1, "level", "clenshaw-curtis")
+        try:
+            gridA.constructSurrogate(modelFailAtOrigin, 10, "iptotal", 0, iNumParallel = 4, pExecutor = SerialExecutor())
+            self.assertTrue(False, "constructSurrogate() did not raise the exception of the model")
+        except ValueError:
+            pass
+        # the failed point and the point that was not launched complete the grid only if the other three points were loaded
+        for aX in [np.array([0.0, 0.0]), np.array([0.0, 1.0])]:
+            gridA.loadConstructedPoint(aX, modelExpSum(aX))
+        gridA.finishConstruction()
+        self.assertEqual(gridA.getNumLoaded(), 5, "the successful points were not loaded")
+
+        # asyncio cancels the running evaluations after a failure
+        if (sys.version_info >= (3, 7)):
+            gridA.makeGlobalGrid(2, 2, 1, "level", "clenshaw-curtis")
+            self.assertEqual(testRefinementAsync.runConstructSurrogateAsyncFailure(gridA), 0, "evaluations still running after a failure")
+            gridA.finishConstruction()
+
+        # the time limit stops the first set of points
+        gridA.makeGlobalGrid(2, 2, 0, "level", "rleja")
+        with ThreadPoolExecutor(2) as pPool:
+            iNumLoaded = gridA.constructSurrogate(modelExpSumSlow, 30, "iptotal", 0, iNumParallel = 2, fTimeLimit = 0.05, pExecutor = pPool)
+        self.assertTrue((iNumLoaded <= 2), "time limit not respected")
+
     def performRefinementTest(self):
         self.checkSetClear()
         self.checkAnisoCoeff()
         self.checkFileIO()
         self.checkConstruction()
+        self.checkLoadConstructedPoints()
+        if (sys.version_info >= (3, 2)): # the surrogate methods use concurrent.futures
+            self.checkRefineSurrogate()
+            self.checkConstructSurrogate()
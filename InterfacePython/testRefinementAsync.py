@@ -0,0 +1,46 @@
+import TasmanianSG
+import numpy as np
+
+import asyncio
+
+# the coroutines require Python 3.5 and asyncio.run() requires Python 3.7,
+# testRefinement.py imports this module only if the version is recent enough
+
+def modelExpSum(aX):
+    return [np.exp(-np.sum(aX**2)), np.cos(np.sum(aX))]
+
+async def modelExpSumAsync(aX):
+    await asyncio.sleep(0.001 * (1.0 + aX[0]))
+    return modelExpSum(aX)
+
+async def modelFailAtOrigin(aX):
+    if (np.all(aX == 0.0)):
+        raise ValueError("the model failed at the origin")
+    await asyncio.sleep(10.0)
+    return modelExpSum(aX)
+
+async def constructSurrogateAsync(grid, iMaxPoints):
+    return await grid.constructSurrogateAsync(modelExpSumAsync, iMaxPoints, "iptotal", 0, iNumParallel = 4)
+
+def runConstructSurrogateAsync(grid, iMaxPoints):
+    '''
+    runs constructSurrogateAsync() in a new event loop with several
+    points in flight, returns the number of loaded points
+    '''
+    return asyncio.run(constructSurrogateAsync(grid, iMaxPoints))
+
+async def constructSurrogateAsyncFailure(grid):
+    try:
+        await grid.constructSurrogateAsync(modelFailAtOrigin, 10, "iptotal", 0, iNumParallel = 4)
+        return None
+    except ValueError:
+        await asyncio.sleep(0.1) # the cancelled evaluations finish in the next iterations of the loop
+        return len([pTask for pTask in asyncio.all_tasks() if pTask is not asyncio.current_task()])
+
+def runConstructSurrogateAsyncFailure(grid):
+    '''
+    runs constructSurrogateAsync() with a model that fails at the origin
+    and sleeps at all other points, returns the number of evaluations
+    still running after the failure or None if the failure was missed
+    '''
+    return asyncio.run(constructSurrogateAsyncFailure(grid))
@@ -19,6 +19,7 @@ import testMakeUpdate
 import testRefinement
 import testUnstructuredData
 import testMisc
+import testDREAM
 
 grid = TasmanianSG.TasmanianSparseGrid()
 
@@ -64,6 +65,11 @@ class TestTasmanian(unittest.TestCase):
         tester = testMisc.TestTasClass()
         tester.performMiscTests()
 
+    def testDREAM(self):
+        print("\nTesting DREAM sampling")
+        tester = testDREAM.TestTasClass()
+        tester.performDREAMTests()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import TasmanianSG
 import numpy as np
+import gc
 
 import testCommon # needed to compare grids after merge refinement
 
@@ -123,6 +124,46 @@ class TestTasClass(unittest.TestCase):
         pSparse = grid.evaluateSparseHierarchicalFunctions(aPoints)
         np.testing.assert_almost_equal(aDense, pSparse.getDenseForm(), 14, "evaluateSparseHierarchicalFunctions", True)
 
+        grid.makeLocalPolynomialGrid(2, 1, 4, 2, 'localp')
+        pSparse = grid.evaluateSparseHierarchicalFunctions(np.empty([0, 2]))
+        self.assertEqual(pSparse.iNumRows, 0, "wrong number of rows for empty sparse matrix")
+        self.assertEqual(len(pSparse.aIndx), 0, "wrong number of non-zeros for empty sparse matrix")
+
+        # the arrays use the memory of the library and must remain valid after the grid and the other arrays are gone
+        aPoints = np.random.uniform(-1.0, 1.0, size = [30, 2])
+        aDense = grid.evaluateHierarchicalFunctions(aPoints)
+        pSparse = grid.evaluateSparseHierarchicalFunctions(aPoints)
+        aPntr, aIndx, aVals = pSparse.aPntr, pSparse.aIndx, pSparse.aVals
+        del pSparse
+        del grid
+        gc.collect()
+        aResult = np.zeros(aDense.shape)
+        for iI in range(aPoints.shape[0]):
+            aResult[iI, aIndx[aPntr[iI]:aPntr[iI+1]]] = aVals[aPntr[iI]:aPntr[iI+1]]
+        np.testing.assert_almost_equal(aDense, aResult, 14, "sparse arrays after the grid is deleted", True)
+        grid = TasmanianSG.TasmanianSparseGrid()
+
+        bHasScipy = True
+        try:
+            import scipy.sparse
+        except ImportError:
+            bHasScipy = False
+        if (bHasScipy):
+            aPoints = np.random.uniform(-1.0, 1.0, size = [40, 2])
+            for sMake in ["grid.makeLocalPolynomialGrid(2, 1, 4, 2, 'localp')", "grid.makeWaveletGrid(2, 1, 3, 1)", "grid.makeFourierGrid(2, 1, 3, 'level')"]:
+                exec(sMake)
+                aDense = grid.evaluateHierarchicalFunctions(aPoints)
+                pCSR = grid.evaluateSparseHierarchicalFunctions(aPoints, bUseScipy = True)
+                self.assertTrue(isinstance(pCSR, scipy.sparse.csr_matrix), "bUseScipy did not return scipy.sparse.csr_matrix")
+                self.assertEqual(pCSR.shape, aDense.shape, "wrong shape of scipy.sparse.csr_matrix")
+                np.testing.assert_almost_equal(aDense, pCSR.toarray(), 14, "evaluateSparseHierarchicalFunctions with scipy", True)
+        else:
+            try:
+                grid.evaluateSparseHierarchicalFunctions(np.ones([2, 2]), bUseScipy = True)
+                self.assertTrue(False, "failed to raise exception when scipy is missing")
+            except TasmanianSG.TasmanianInputError as TSGError:
+                self.assertEqual(TSGError.sVariable, "bUseScipy", "error raising exception for missing scipy\n Error.sVariable = '{0:1s}'".format(TSGError.sVariable))
+
     def checkSetCoeffsMergeRefine(self):
         '''
         Set the coefficients and use mergeRefinement()
@@ -31,6 +31,8 @@
 #ifndef __TASMANIAN_SPARSE_GRID_CPP
 #define __TASMANIAN_SPARSE_GRID_CPP
 
+#include <cstdint>
+#include <numeric>
 #include <stdexcept>
 #include <string>
 
@@ -62,12 +64,18 @@ bool TasmanianSparseGrid::isOpenMPEnabled(){
     #endif // _OPENMP
 }
 
-TasmanianSparseGrid::TasmanianSparseGrid() : acceleration(accel_none), gpuID(0), usingDynamicConstruction(false){
+void TasmanianSparseGrid::setRuleCacheCapacity(int capacity){ OneDimensionalRuleCache::setCapacity(capacity); }
+void TasmanianSparseGrid::clearRuleCache(){ OneDimensionalRuleCache::clear(); }
+void TasmanianSparseGrid::getRuleCacheStats(int &hits, int &misses, int &size, int &capacity){ OneDimensionalRuleCache::getStats(hits, misses, size, capacity); }
+void TasmanianSparseGrid::setGreedyNodesCacheFile(const char *filename){ Optimizer::setGreedyNodesCacheFile(std::string(filename)); }
+std::string TasmanianSparseGrid::getGreedyNodesCacheFile(){ return Optimizer::getGreedyNodesCacheFile(); }
+
+TasmanianSparseGrid::TasmanianSparseGrid() : acceleration(accel_none), gpuID(0), morton_min_batch(0), usingDynamicConstruction(false){
 #ifdef Tasmanian_ENABLE_BLAS
     acceleration = accel_cpu_blas;
 #endif // Tasmanian_ENABLE_BLAS
 }
-TasmanianSparseGrid::TasmanianSparseGrid(const TasmanianSparseGrid &source) : acceleration(accel_none), gpuID(0), usingDynamicConstruction(false)
+TasmanianSparseGrid::TasmanianSparseGrid(const TasmanianSparseGrid &source) : acceleration(accel_none), gpuID(0), morton_min_batch(0), usingDynamicConstruction(false)
 {
     copyGrid(&source);
 #ifdef Tasmanian_ENABLE_BLAS
@@ -88,20 +96,21 @@ void TasmanianSparseGrid::clear(){
 #else
     acceleration = accel_none;
 #endif // Tasmanian_ENABLE_BLAS
+    morton_min_batch = 0;
 #ifdef Tasmanian_ENABLE_CUDA
     gpuID = 0;
     if (!acc_domain.empty()) acc_domain.clear();
 #endif // Tasmanian_ENABLE_CUDA
 }
 
-void TasmanianSparseGrid::write(const char *filename, bool binary) const{
+void TasmanianSparseGrid::write(const char *filename, bool binary, bool packed_indexes) const{
     std::ofstream ofs;
     if (binary){
         ofs.open(filename, std::ios::out | std::ios::binary);
     }else{
         ofs.open(filename);
     }
-    write(ofs, binary);
+    write(ofs, binary, packed_indexes);
     ofs.close();
 }
 void TasmanianSparseGrid::read(const char *filename){
@@ -123,14 +132,14 @@ void TasmanianSparseGrid::read(const char *filename){
     ifs.close();
 }
 
-void TasmanianSparseGrid::write(std::ofstream &ofs, bool binary) const{
+void TasmanianSparseGrid::write(std::ostream &ofs, bool binary, bool packed_indexes) const{
     if (binary){
-        writeBinary(ofs);
+        writeBinary(ofs, packed_indexes);
     }else{
         writeAscii(ofs);
     }
 }
-void TasmanianSparseGrid::read(std::ifstream &ifs, bool binary){
+void TasmanianSparseGrid::read(std::istream &ifs, bool binary){
     if (binary){
         readBinary(ifs);
     }else{
@@ -138,6 +147,23 @@ void TasmanianSparseGrid::read(std::ifstream &ifs, bool binary){
     }
 }
 
+void TasmanianSparseGrid::writeMapped(const char *filename) const{
+    std::ofstream ofs(filename, std::ios::out | std::ios::binary);
+    if (!ofs.good()) throw std::runtime_error(std::string("ERROR: could not open file ") + filename + " for writing");
+    writeBinary(ofs, false, true);
+    ofs.close();
+}
+void TasmanianSparseGrid::readMapped(const char *filename){
+    #ifndef _WIN32
+    MappedFileBuffer buffer(filename);
+    std::istream ifs(&buffer);
+    readBinary(ifs);
+    if (!ifs.good()) throw std::runtime_error(std::string("ERROR: file ") + filename + " ended unexpectedly (possibly corrupt file)");
+    #else
+    read(filename);
+    #endif
+}
+
 void TasmanianSparseGrid::makeGlobalGrid(int dimensions, int outputs, int depth, TypeDepth type, TypeOneDRule rule, const int *anisotropic_weights, double alpha, double beta, const char* custom_filename, const int *level_limits){
     std::vector<int> aw, ll;
     if (anisotropic_weights != 0){
@@ -462,6 +488,49 @@ void TasmanianSparseGrid::getInterpolationWeights(const std::vector<double> &x,
     weights.resize(base->getNumPoints());
     getInterpolationWeights(x.data(), weights.data());
 }
+void TasmanianSparseGrid::getInterpolationWeightsSparse(const double x[], int num_x, std::vector<int> &pntr, std::vector<int> &indx, std::vector<double> &vals) const{
+    Data2D<double> x_tmp;
+    const double *x_canonical = formCanonicalPoints(x, x_tmp, num_x);
+    if (isLocalPolynomial()){
+        getGridLocalPolynomial()->getInterpolationWeightsSparse(x_canonical, num_x, pntr, indx, vals);
+    }else{
+        int num_dimensions = base->getNumDimensions();
+        int num_points = base->getNumPoints();
+        std::vector<std::vector<int>> tindx(num_x);
+        std::vector<std::vector<double>> tvals(num_x);
+        #pragma omp parallel
+        {
+            std::vector<double> weights(num_points);
+            #pragma omp for
+            for(int i=0; i<num_x; i++){
+                base->getInterpolationWeights(&(x_canonical[((size_t) i) * ((size_t) num_dimensions)]), weights.data());
+                for(int j=0; j<num_points; j++){
+                    if (weights[j] != 0.0){
+                        tindx[i].push_back(j);
+                        tvals[i].push_back(weights[j]);
+                    }
+                }
+            }
+        }
+        pntr.resize(num_x + 1);
+        int num_nz = 0;
+        for(int i=0; i<num_x; i++){
+            pntr[i] = num_nz;
+            num_nz += (int) tindx[i].size();
+        }
+        pntr[num_x] = num_nz;
+        indx.resize(num_nz);
+        vals.resize(num_nz);
+        auto ii = indx.begin();
+        for(auto &idx : tindx) for(auto i: idx) *ii++ = i;
+        auto iv = vals.begin();
+        for(auto &vls : tvals) for(auto v: vls) *iv++ = v;
+    }
+}
+void TasmanianSparseGrid::getInterpolationWeightsSparse(const std::vector<double> &x, std::vector<int> &pntr, std::vector<int> &indx, std::vector<double> &vals) const{
+    if (x.size() % ((size_t) base->getNumDimensions()) != 0) throw std::runtime_error("ERROR: getInterpolationWeightsSparse() incorrect size of x, must be a multiple of getNumDimensions()");
+    getInterpolationWeightsSparse(x.data(), (int) (x.size() / ((size_t) base->getNumDimensions())), pntr, indx, vals);
+}
 
 void TasmanianSparseGrid::loadNeededPoints(const double *vals){
     #ifdef Tasmanian_ENABLE_CUDA
@@ -517,6 +586,30 @@ void TasmanianSparseGrid::evaluateFast(const double x[], double y[]) const{
 void TasmanianSparseGrid::evaluateBatch(const double x[], int num_x, double y[]) const{
     Data2D<double> x_tmp;
     const double *x_canonical = formCanonicalPoints(x, x_tmp, num_x);
+    if ((morton_min_batch > 0) && (num_x >= morton_min_batch) && (isLocalPolynomial() || isWavelet())
+        && ((acceleration == accel_none) || (acceleration == accel_cpu_blas))){
+        // nearby points touch the same branches of the hierarchy, sort the batch and scatter the result back to the caller order
+        int num_dimensions = base->getNumDimensions();
+        int num_outputs = base->getNumOutputs();
+        std::vector<int> order;
+        getMortonOrder(x_canonical, num_x, order);
+
+        Data2D<double> x_sorted; x_sorted.resize(num_dimensions, num_x);
+        #pragma omp parallel for
+        for(int i=0; i<num_x; i++)
+            std::copy_n(&(x_canonical[((size_t) order[i]) * ((size_t) num_dimensions)]), num_dimensions, x_sorted.getStrip(i));
+
+        Data2D<double> y_sorted; y_sorted.resize(num_outputs, num_x);
+        evaluateBatchCanonical(x_sorted.getStrip(0), num_x, y_sorted.getStrip(0));
+
+        #pragma omp parallel for
+        for(int i=0; i<num_x; i++)
+            std::copy_n(y_sorted.getCStrip(i), num_outputs, &(y[((size_t) order[i]) * ((size_t) num_outputs)]));
+    }else{
+        evaluateBatchCanonical(x_canonical, num_x, y);
+    }
+}
+void TasmanianSparseGrid::evaluateBatchCanonical(const double x_canonical[], int num_x, double y[]) const{
     switch (acceleration){
         #ifdef Tasmanian_ENABLE_CUDA
         case accel_gpu_cublas:
@@ -889,6 +982,44 @@ void TasmanianSparseGrid::mapConformalWeights(int num_dimensions, int num_points
     }
 }
 
+void TasmanianSparseGrid::getMortonOrder(const double x[], int num_x, std::vector<int> &order) const{
+    int num_dimensions = base->getNumDimensions();
+    int num_keyed = std::min(num_dimensions, 64); // the key has 64 bits, dimensions past the first 64 are ignored
+    int num_bits = std::min(std::max(1, 64 / num_keyed), 20); // bits per dimension
+
+    // the bounding box of the batch, the canonical domain can be exceeded by the user points
+    std::vector<double> lower(x, x + num_keyed), scale(x, x + num_keyed);
+    for(int i=1; i<num_x; i++){
+        const double *p = &(x[((size_t) i) * ((size_t) num_dimensions)]);
+        for(int j=0; j<num_keyed; j++){
+            lower[j] = std::min(lower[j], p[j]);
+            scale[j] = std::max(scale[j], p[j]);
+        }
+    }
+    double num_cells = (double) (1 << num_bits);
+    for(int j=0; j<num_keyed; j++) scale[j] = (scale[j] > lower[j]) ? num_cells / (scale[j] - lower[j]) : 0.0;
+
+    std::vector<uint64_t> keys(num_x);
+    #pragma omp parallel
+    {
+        std::vector<uint64_t> cells(num_keyed);
+        #pragma omp for
+        for(int i=0; i<num_x; i++){
+            const double *p = &(x[((size_t) i) * ((size_t) num_dimensions)]);
+            for(int j=0; j<num_keyed; j++)
+                cells[j] = std::min((uint64_t) ((p[j] - lower[j]) * scale[j]), (uint64_t) ((1 << num_bits) - 1));
+            uint64_t key = 0;
+            for(int b=num_bits-1; b>=0; b--) // interleave the bits, most significant first
+                for(int j=0; j<num_keyed; j++)
+                    key = (key << 1) | ((cells[j] >> b) & 1);
+            keys[i] = key;
+        }
+    }
+
+    order.resize(num_x);
+    std::iota(order.begin(), order.end(), 0);
+    std::sort(order.begin(), order.end(), [&](int a, int b)->bool{ return keys[a] < keys[b]; });
+}
 const double* TasmanianSparseGrid::formCanonicalPoints(const double *x, Data2D<double> &x_temp, int num_x) const{
     if ((domain_transform_a.size() != 0) || (conformal_asin_power.size() != 0)){
         int num_dimensions = base->getNumDimensions();
@@ -1124,6 +1255,22 @@ void TasmanianSparseGrid::loadConstructedPoint(const double x[], const double y[
     std::vector<double> vecx(x, x + getNumDimensions()), vecy(y, y + getNumOutputs());
     loadConstructedPoint(vecx, vecy);
 }
+void TasmanianSparseGrid::loadConstructedPoints(const std::vector<double> &x, const std::vector<double> &y){
+    if (!usingDynamicConstruction) throw std::runtime_error("ERROR: loadConstructedPoints() called before beginConstruction()");
+    size_t dims = (size_t) getNumDimensions();
+    size_t outs = (size_t) getNumOutputs();
+    if (x.size() % dims != 0) throw std::runtime_error("ERROR: loadConstructedPoints() called with incorrect size for x");
+    int num_x = (int) (x.size() / dims);
+    if (y.size() != ((size_t) num_x) * outs) throw std::runtime_error("ERROR: loadConstructedPoints() called with incorrect size for y");
+    loadConstructedPoints(x.data(), num_x, y.data());
+}
+void TasmanianSparseGrid::loadConstructedPoints(const double x[], int num_x, const double y[]){
+    if (!usingDynamicConstruction) throw std::runtime_error("ERROR: loadConstructedPoints() called before beginConstruction()");
+    if (num_x == 0) return;
+    Data2D<double> x_tmp;
+    const double *x_canonical = formCanonicalPoints(x, x_tmp, num_x);
+    getGridGlobal()->loadConstructedPoints(x_canonical, num_x, y);
+}
 void TasmanianSparseGrid::finishConstruction(){
     if (usingDynamicConstruction) getGridGlobal()->finishConstruction();
     usingDynamicConstruction = false;
@@ -1413,7 +1560,7 @@ void TasmanianSparseGrid::printStats(std::ostream &os) const{
     os << endl;
 }
 
-void TasmanianSparseGrid::writeAscii(std::ofstream &ofs) const{
+void TasmanianSparseGrid::writeAscii(std::ostream &ofs) const{
     using std::endl;
 
     ofs << "TASMANIAN SG " << getVersion() << endl;
@@ -1471,26 +1618,29 @@ void TasmanianSparseGrid::writeAscii(std::ofstream &ofs) const{
     }
     ofs << "TASMANIAN SG end" << endl;
 }
-void TasmanianSparseGrid::writeBinary(std::ofstream &ofs) const{
-    const char *TSG = "TSG5"; // last char indicates version (update only if necessary, no need to sync with getVersionMajor())
+void TasmanianSparseGrid::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
+    // last char indicates version (update only if necessary, no need to sync with getVersionMajor())
+    // version 6 differs only in the packed multi-indexes, the default stays 5 so that older versions of Tasmanian can read the files
+    // version 7 stores the points, values and surpluses in aligned sections, see writeMapped()
+    const char *TSG = (aligned) ? "TSG7" : ((packed_indexes) ? "TSG6" : "TSG5");
     ofs.write(TSG, 4 * sizeof(char)); // mark Tasmanian files
     char flag;
     // use Integers to indicate grid types, empty 'e', global 'g', sequence 's', pwpoly 'p', wavelet 'w', Fourier 'f'
     if (isGlobal()){
         flag = 'g'; ofs.write(&flag, sizeof(char));
-        getGridGlobal()->writeBinary(ofs);
+        getGridGlobal()->writeBinary(ofs, packed_indexes, aligned);
     }else if (isSequence()){
         flag = 's'; ofs.write(&flag, sizeof(char));
-        getGridSequence()->writeBinary(ofs);
+        getGridSequence()->writeBinary(ofs, packed_indexes, aligned);
     }else if (isLocalPolynomial()){
         flag = 'p'; ofs.write(&flag, sizeof(char));
-        getGridLocalPolynomial()->writeBinary(ofs);
+        getGridLocalPolynomial()->writeBinary(ofs, packed_indexes, aligned);
     }else if (isWavelet()){
         flag = 'w'; ofs.write(&flag, sizeof(char));
-        getGridWavelet()->writeBinary(ofs);
+        getGridWavelet()->writeBinary(ofs, packed_indexes, aligned);
     }else if (isFourier()){
         flag = 'f'; ofs.write(&flag, sizeof(char));
-        getGridFourier()->writeBinary(ofs);
+        getGridFourier()->writeBinary(ofs, packed_indexes, aligned);
     }else{
         flag = 'e'; ofs.write(&flag, sizeof(char));
     }
@@ -1523,7 +1673,7 @@ void TasmanianSparseGrid::writeBinary(std::ofstream &ofs) const{
     }
     flag = 'e'; ofs.write(&flag, sizeof(char)); // E stands for END
 }
-void TasmanianSparseGrid::readAscii(std::ifstream &ifs){
+void TasmanianSparseGrid::readAscii(std::istream &ifs){
     std::string T;
     std::string message = ""; // used in case there is an exception
     ifs >> T;  if (!(T.compare("TASMANIAN") == 0)){ throw std::runtime_error("ERROR: wrong file format, first word in not 'TASMANIAN'"); }
@@ -1630,14 +1780,14 @@ void TasmanianSparseGrid::readAscii(std::ifstream &ifs){
         }
     }
 }
-void TasmanianSparseGrid::readBinary(std::ifstream &ifs){
+void TasmanianSparseGrid::readBinary(std::istream &ifs){
     std::vector<char>  TSG(4);
     ifs.read(TSG.data(), 4*sizeof(char));
     if ((TSG[0] != 'T') || (TSG[1] != 'S') || (TSG[2] != 'G')){
         throw std::runtime_error("ERROR: wrong binary file format, first 3 bytes are not 'TSG'");
     }
-    if (TSG[3] != '5'){
-        throw std::runtime_error("ERROR: wrong binary file format, version number is not '5'");
+    if ((TSG[3] != '5') && (TSG[3] != '6') && (TSG[3] != '7')){ // version 6 packs the multi-indexes, version 7 has aligned sections, see MultiIndexSet::writeBinary()
+        throw std::runtime_error("ERROR: wrong binary file format, version number is not '5', '6' or '7'");
     }
     ifs.read(TSG.data(), sizeof(char)); // what type of grid is it?
     clear();
@@ -1715,6 +1865,25 @@ void TasmanianSparseGrid::enableAcceleration(TypeAcceleration acc){
 void TasmanianSparseGrid::favorSparseAcceleration(bool favor){
     if (isLocalPolynomial()) getGridLocalPolynomial()->setFavorSparse(favor);
 }
+void TasmanianSparseGrid::enableSupportIndex(bool enable){
+    if (isLocalPolynomial()) getGridLocalPolynomial()->setSupportIndex(enable);
+}
+bool TasmanianSparseGrid::isUsingSupportIndex() const{
+    return (isLocalPolynomial()) ? getGridLocalPolynomial()->isUsingSupportIndex() : false;
+}
+void TasmanianSparseGrid::enableMortonOrder(bool enable, int min_batch){
+    if (enable && (min_batch < 1)) throw std::invalid_argument("ERROR: enableMortonOrder() requires positive min_batch");
+    morton_min_batch = (enable) ? min_batch : 0;
+}
+bool TasmanianSparseGrid::isUsingMortonOrder() const{
+    return (morton_min_batch > 0);
+}
+void TasmanianSparseGrid::compactIndexes(){
+    if (base) base->compactIndexes();
+}
+int TasmanianSparseGrid::getIndexEntryBytes() const{
+    return (base) ? base->getIndexEntryBytes() : (int) sizeof(int);
+}
 TypeAcceleration TasmanianSparseGrid::getAccelerationType() const{
     return acceleration;
 }
@@ -1826,14 +1995,97 @@ const char* tsgGetLicense(){ return TasmanianSparseGrid::getLicense(); }
 int tsgGetVersionMajor(){ return TasmanianSparseGrid::getVersionMajor(); }
 int tsgGetVersionMinor(){ return TasmanianSparseGrid::getVersionMinor(); }
 int tsgIsOpenMPEnabled(){ return (TasmanianSparseGrid::isOpenMPEnabled()) ? 1 : 0; }
+void tsgSetRuleCacheCapacity(int capacity){ TasmanianSparseGrid::setRuleCacheCapacity(capacity); }
+void tsgClearRuleCache(){ TasmanianSparseGrid::clearRuleCache(); }
+void tsgGetRuleCacheStats(int *stats){ TasmanianSparseGrid::getRuleCacheStats(stats[0], stats[1], stats[2], stats[3]); }
+void tsgSetGreedyNodesCacheFile(const char *filename){ TasmanianSparseGrid::setGreedyNodesCacheFile(filename); }
+int tsgGetGreedyNodesCacheFile(char *filename, int length){ // copies at most length-1 characters and returns the length of the filename
+    std::string name = TasmanianSparseGrid::getGreedyNodesCacheFile();
+    if ((filename != nullptr) && (length > 0)){
+        size_t n = std::min(name.size(), (size_t) (length - 1));
+        std::copy_n(name.c_str(), n, filename);
+        filename[n] = '\0';
+    }
+    return (int) name.size();
+}
 
 void tsgWrite(void *grid, const char* filename){ ((TasmanianSparseGrid*) grid)->write(filename); }
 void tsgWriteBinary(void *grid, const char* filename){ ((TasmanianSparseGrid*) grid)->write(filename, true); }
+void tsgWritePackedBinary(void *grid, const char* filename){ ((TasmanianSparseGrid*) grid)->write(filename, true, true); }
 int tsgRead(void *grid, const char* filename){
     try{
         ((TasmanianSparseGrid*) grid)->read(filename);
         return 1;
-    }catch(std::runtime_error e){
+    }catch(std::exception &e){ // also bad_alloc and length_error from corrupted sizes
+        #ifndef NDEBUG
+        cerr << e.what() << endl;
+        #endif // NDEBUG
+        return 0;
+    }
+}
+int tsgWriteMapped(void *grid, const char* filename){
+    try{
+        ((TasmanianSparseGrid*) grid)->writeMapped(filename);
+        return 1;
+    }catch(std::exception &e){
+        #ifndef NDEBUG
+        cerr << e.what() << endl;
+        #endif // NDEBUG
+        return 0;
+    }
+}
+int tsgReadMapped(void *grid, const char* filename){
+    try{
+        ((TasmanianSparseGrid*) grid)->readMapped(filename);
+        return 1;
+    }catch(std::exception &e){ // also bad_alloc and length_error from corrupted sizes
+        #ifndef NDEBUG
+        cerr << e.what() << endl;
+        #endif // NDEBUG
+        return 0;
+    }
+}
+// in-memory binary I/O used by Python toBytes() and fromBytes(), the buffers avoid the extra copies made by std::stringstream
+class TsgStringOutputBuffer : public std::streambuf{
+public:
+    TsgStringOutputBuffer(std::string &output) : data(output){}
+protected:
+    int_type overflow(int_type c) override{
+        if (!traits_type::eq_int_type(c, traits_type::eof())) data.push_back(traits_type::to_char_type(c));
+        return traits_type::not_eof(c);
+    }
+    std::streamsize xsputn(const char *s, std::streamsize n) override{
+        data.append(s, (size_t) n);
+        return n;
+    }
+private:
+    std::string &data;
+};
+class TsgMemoryInputBuffer : public std::streambuf{
+public:
+    TsgMemoryInputBuffer(const char *buffer, size_t size){
+        char *b = const_cast<char*>(buffer); // the get area is never written
+        setg(b, b, b + size);
+    }
+};
+void* tsgWriteBinaryToStringVoidPntr(void *grid, int packed_indexes){ // internal use only
+    std::string *data = new std::string();
+    TsgStringOutputBuffer buffer(*data);
+    std::ostream os(&buffer);
+    ((TasmanianSparseGrid*) grid)->write(os, true, (packed_indexes != 0));
+    return (void*) data;
+}
+size_t tsgWriteBinaryToStringPythonGetSize(const void *data){ return ((const std::string*) data)->size(); }
+const char* tsgWriteBinaryToStringPythonGetData(const void *data){ return ((const std::string*) data)->data(); }
+void tsgWriteBinaryToStringPythonDelete(void *data){ delete ((std::string*) data); }
+int tsgReadBinaryFromBuffer(void *grid, const char *buffer, size_t size){
+    try{
+        TsgMemoryInputBuffer membuf(buffer, size);
+        std::istream is(&membuf);
+        ((TasmanianSparseGrid*) grid)->read(is, true);
+        if (!is) throw std::runtime_error("ERROR: binary buffer is truncated");
+        return 1;
+    }catch(std::exception &e){ // also bad_alloc and length_error from corrupted sizes
         #ifndef NDEBUG
         cerr << e.what() << endl;
         #endif // NDEBUG
@@ -1958,6 +2210,14 @@ void tsgEvaluateFast(void *grid, const double *x, double *y){ ((TasmanianSparseG
 void tsgIntegrate(void *grid, double *q){ ((TasmanianSparseGrid*) grid)->integrate(q); }
 
 void tsgEvaluateBatch(void *grid, const double *x, int num_x, double *y){ ((TasmanianSparseGrid*) grid)->evaluateBatch(x, num_x, y); }
+void tsgEvaluateBatchThreadSafe(void *grid, const double *x, int num_x, double *y){
+    // serial loop over the thread safe evaluate(), used when the batch is split between threads on the caller side
+    TasmanianSparseGrid* tsg = (TasmanianSparseGrid*) grid;
+    size_t iNumDim = (size_t) tsg->getNumDimensions(), iNumOutputs = (size_t) tsg->getNumOutputs();
+    for(int i=0; i<num_x; i++){
+        tsg->evaluate(&(x[((size_t) i) * iNumDim]), &(y[((size_t) i) * iNumOutputs]));
+    }
+}
 
 void tsgBatchGetInterpolationWeightsStatic(void *grid, const double *x, int num_x, double *weights){
     TasmanianSparseGrid* tsg = (TasmanianSparseGrid*) grid;
@@ -2092,6 +2352,9 @@ void tsgGetCandidateConstructionPointsPythonDeleteVect(void *vecx){ delete ((std
 void tsgLoadConstructedPoint(void *grid, const double *x, const double *y){
     ((TasmanianSparseGrid*) grid)->loadConstructedPoint(x, y);
 }
+void tsgLoadConstructedPoints(void *grid, const double *x, int num_x, const double *y){
+    ((TasmanianSparseGrid*) grid)->loadConstructedPoints(x, num_x, y);
+}
 void tsgFinishConstruction(void *grid){
     ((TasmanianSparseGrid*) grid)->finishConstruction();
 }
@@ -2116,6 +2379,49 @@ int tsgEvaluateSparseHierarchicalFunctionsGetNZ(void *grid, const double x[], in
 void tsgEvaluateSparseHierarchicalFunctionsStatic(void *grid, const double x[], int num_x, int *pntr, int *indx, double *vals){
     ((TasmanianSparseGrid*) grid)->evaluateSparseHierarchicalFunctionsStatic(x, num_x, pntr, indx, vals);
 }
+// single pass alternative to GetNZ() + Static(), the matrix is computed once and Python uses the arrays without a copy
+// the holder is deleted with PythonDelete() when Python no longer references the arrays
+struct TsgSparseMatrixHolder{ int num_x, num_nz, num_vals; int *pntr, *indx; double *vals; };
+TsgSparseMatrixHolder* tsgMakeEmptySparseMatrixHolder(int num_x){
+    TsgSparseMatrixHolder *mat = new TsgSparseMatrixHolder{num_x, 0, 0, new int[num_x + 1], new int[0], new double[0]};
+    std::fill_n(mat->pntr, num_x + 1, 0);
+    return mat;
+}
+void* tsgEvaluateSparseHierarchicalFunctionsVoidPntr(void *grid, const double x[], int num_x){ // internal use only
+    if (((TasmanianSparseGrid*) grid)->empty() || (num_x == 0)) return (void*) tsgMakeEmptySparseMatrixHolder(num_x);
+    TsgSparseMatrixHolder *mat = new TsgSparseMatrixHolder{num_x, 0, 0, nullptr, nullptr, nullptr};
+    ((TasmanianSparseGrid*) grid)->evaluateSparseHierarchicalFunctions(x, num_x, mat->pntr, mat->indx, mat->vals);
+    mat->num_nz = mat->pntr[num_x];
+    mat->num_vals = (((TasmanianSparseGrid*) grid)->isFourier()) ? 2 * mat->num_nz : mat->num_nz;
+    return (void*) mat;
+}
+int tsgEvaluateSparseHierarchicalFunctionsPythonGetNZ(const void *mat){ return ((const TsgSparseMatrixHolder*) mat)->num_nz; }
+int* tsgEvaluateSparseHierarchicalFunctionsPythonGetPntr(void *mat){ return ((TsgSparseMatrixHolder*) mat)->pntr; }
+int* tsgEvaluateSparseHierarchicalFunctionsPythonGetIndx(void *mat){ return ((TsgSparseMatrixHolder*) mat)->indx; }
+double* tsgEvaluateSparseHierarchicalFunctionsPythonGetVals(void *mat){ return ((TsgSparseMatrixHolder*) mat)->vals; }
+void* tsgGetInterpolationWeightsSparseVoidPntr(void *grid, const double x[], int num_x){ // internal use only, the result is accessed with the Python methods above
+    if (((TasmanianSparseGrid*) grid)->empty() || (num_x == 0)) return (void*) tsgMakeEmptySparseMatrixHolder(num_x);
+    TsgSparseMatrixHolder *mat = new TsgSparseMatrixHolder{num_x, 0, 0, nullptr, nullptr, nullptr};
+    std::vector<int> pntr, indx;
+    std::vector<double> vals;
+    ((TasmanianSparseGrid*) grid)->getInterpolationWeightsSparse(x, num_x, pntr, indx, vals);
+    mat->num_nz = pntr[num_x];
+    mat->num_vals = mat->num_nz;
+    mat->pntr = new int[num_x + 1];
+    mat->indx = new int[mat->num_nz];
+    mat->vals = new double[mat->num_nz];
+    std::copy(pntr.begin(), pntr.end(), mat->pntr);
+    std::copy(indx.begin(), indx.end(), mat->indx);
+    std::copy(vals.begin(), vals.end(), mat->vals);
+    return (void*) mat;
+}
+void tsgEvaluateSparseHierarchicalFunctionsPythonDelete(void *mat){
+    TsgSparseMatrixHolder *m = (TsgSparseMatrixHolder*) mat;
+    delete[] m->pntr;
+    delete[] m->indx;
+    delete[] m->vals;
+    delete m;
+}
 const double* tsgGetHierarchicalCoefficients(void *grid){
     return ((TasmanianSparseGrid*) grid)->getHierarchicalCoefficients();
 }
@@ -2126,6 +2432,15 @@ void tsgGetHierarchicalCoefficientsStatic(void *grid, double *coeff){
     const double *surp = ((TasmanianSparseGrid*) grid)->getHierarchicalCoefficients();
     std::copy(surp, surp + (((TasmanianSparseGrid*) grid)->isFourier() ? 2 : 1) * num_outputs * num_points, coeff);
 }
+void tsgGetHierarchicalCoefficientsPythonComplex(void *grid, double *coeff){ // internal use only, Fourier grids, interleaves the real and imaginary parts
+    size_t num_coeff = ((size_t) ((TasmanianSparseGrid*) grid)->getNumPoints()) * ((size_t) ((TasmanianSparseGrid*) grid)->getNumOutputs());
+    if (num_coeff == 0) return;
+    const double *surp = ((TasmanianSparseGrid*) grid)->getHierarchicalCoefficients();
+    for(size_t i=0; i<num_coeff; i++){
+        coeff[2*i] = surp[i];
+        coeff[2*i+1] = surp[num_coeff + i];
+    }
+}
 void tsgSetHierarchicalCoefficients(void *grid, const double *c){
     ((TasmanianSparseGrid*) grid)->setHierarchicalCoefficients(c);
 }
@@ -2153,6 +2468,12 @@ void tsgPrintStats(void *grid){ ((TasmanianSparseGrid*) grid)->printStats(); }
 void tsgEnableAcceleration(void *grid, const char *accel){ ((TasmanianSparseGrid*) grid)->enableAcceleration(AccelerationMeta::getIOAccelerationString(accel)); }
 //int tsgGetAccelerationTypeInt(void *grid){ return AccelerationMeta::getIOAccelerationInt(((TasmanianSparseGrid*) grid)->getAccelerationType()); } // int to acceleration type
 const char* tsgGetAccelerationType(void *grid){ return AccelerationMeta::getIOAccelerationString(((TasmanianSparseGrid*) grid)->getAccelerationType()); }
+void tsgEnableSupportIndex(void *grid, int enable){ ((TasmanianSparseGrid*) grid)->enableSupportIndex(enable != 0); }
+int tsgIsUsingSupportIndex(void *grid){ return (((TasmanianSparseGrid*) grid)->isUsingSupportIndex()) ? 1 : 0; }
+void tsgEnableMortonOrder(void *grid, int enable, int min_batch){ ((TasmanianSparseGrid*) grid)->enableMortonOrder((enable != 0), min_batch); }
+int tsgIsUsingMortonOrder(void *grid){ return (((TasmanianSparseGrid*) grid)->isUsingMortonOrder()) ? 1 : 0; }
+void tsgCompactIndexes(void *grid){ ((TasmanianSparseGrid*) grid)->compactIndexes(); }
+int tsgGetIndexEntryBytes(void *grid){ return ((TasmanianSparseGrid*) grid)->getIndexEntryBytes(); }
 
 void tsgSetGPUID(void *grid, int gpuID){ ((TasmanianSparseGrid*) grid)->setGPUID(gpuID); }
 int tsgGetGPUID(void *grid){ return ((TasmanianSparseGrid*) grid)->getGPUID(); }
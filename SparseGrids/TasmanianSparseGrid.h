@@ -43,9 +43,17 @@ const char* tsgGetLicense();
 int tsgGetVersionMajor();
 int tsgGetVersionMinor();
 int tsgIsOpenMPEnabled();
+void tsgSetRuleCacheCapacity(int capacity);
+void tsgClearRuleCache();
+void tsgGetRuleCacheStats(int *stats);
+void tsgSetGreedyNodesCacheFile(const char *filename);
+int tsgGetGreedyNodesCacheFile(char *filename, int length);
 void tsgWrite(void *grid, const char* filename);
 void tsgWriteBinary(void *grid, const char* filename);
+void tsgWritePackedBinary(void *grid, const char* filename);
 int tsgRead(void *grid, const char* filename);
+int tsgWriteMapped(void *grid, const char* filename);
+int tsgReadMapped(void *grid, const char* filename);
 void tsgMakeGlobalGrid(void *grid, int dimensions, int outputs, int depth, const char * sType, const char *sRule, const int *anisotropic_weights, double alpha, double beta, const char* custom_filename, const int *limit_levels);
 void tsgMakeSequenceGrid(void *grid, int dimensions, int outputs, int depth, const char *sType, const char *sRule, const int *anisotropic_weights, const int *limit_levels);
 void tsgMakeLocalPolynomialGrid(void *grid, int dimensions, int outputs, int depth, int order, const char *sRule, const int *limit_levels);
@@ -78,6 +86,7 @@ void tsgEvaluate(void *grid, const double *x, double *y);
 void tsgEvaluateFast(void *grid, const double *x, double *y);
 void tsgIntegrate(void *grid, double *q);
 void tsgEvaluateBatch(void *grid, const double *x, int num_x, double *y);
+void tsgEvaluateBatchThreadSafe(void *grid, const double *x, int num_x, double *y);
 void tsgBatchGetInterpolationWeightsStatic(void *grid, const double *x, int num_x, double *weights);
 double* tsgBatchGetInterpolationWeights(void *grid, const double *x, int num_x);
 int tsgIsGlobal(void *grid);
@@ -118,6 +127,12 @@ void tsgPrintStats(void *grid);
 void tsgEnableAcceleration(void *grid, const char *accel);
 //int tsgGetAccelerationTypeInt(void *grid){ return AccelerationMeta::getIOAccelerationInt(((TasmanianSparseGrid*) grid)->getAccelerationType()); } // int to acceleration type
 const char* tsgGetAccelerationType(void *grid);
+void tsgEnableSupportIndex(void *grid, int enable);
+int tsgIsUsingSupportIndex(void *grid);
+void tsgEnableMortonOrder(void *grid, int enable, int min_batch);
+int tsgIsUsingMortonOrder(void *grid);
+void tsgCompactIndexes(void *grid);
+int tsgGetIndexEntryBytes(void *grid);
 void tsgSetGPUID(void *grid, int gpuID);
 int tsgGetGPUID(void *grid);
 int tsgGetNumGPUs();
@@ -59,11 +59,29 @@ public:
     static const char* getCmakeCxxFlags();
     static bool isOpenMPEnabled();
 
-    void write(const char *filename, bool binary = false) const;
+    // process-wide cache of one dimensional rules shared by all grids, see OneDimensionalRuleCache
+    static void setRuleCacheCapacity(int capacity); // zero disables the cache
+    static void clearRuleCache(); // drops all rules and resets the statistics
+    static void getRuleCacheStats(int &hits, int &misses, int &size, int &capacity);
+
+    // file that keeps the greedy sequence nodes (leja, lebesgue, delta) between runs, empty string disables the file
+    // the default is the value of the environment variable TASMANIAN_GREEDY_NODES_CACHE
+    static void setGreedyNodesCacheFile(const char *filename);
+    static std::string getGreedyNodesCacheFile();
+
+    // packed_indexes writes the binary format TSG6 with 8 or 16 bit multi-indexes, smaller files that cannot be read by Tasmanian 6.0 or older
+    void write(const char *filename, bool binary = false, bool packed_indexes = false) const;
     void read(const char *filename); // auto-check if format is binary or ascii
 
-    void write(std::ofstream &ofs, bool binary = false) const;
-    void read(std::ifstream &ifs, bool binary = false);
+    void write(std::ostream &ofs, bool binary = false, bool packed_indexes = false) const;
+    void read(std::istream &ifs, bool binary = false);
+
+    // writeMapped uses the binary format TSG7 where the points, values and surpluses are stored in 64-byte aligned sections
+    // readMapped maps the file in memory and uses the sections in-place, i.e., processes reading the same file share the physical pages
+    // the points, values and surpluses are copied only if the grid is modified, e.g., loadNeededPoints() or setSurplusRefinement()
+    // the file must not be modified while the grid is in use, on Windows readMapped() falls back to read()
+    void writeMapped(const char *filename) const;
+    void readMapped(const char *filename);
 
     void makeGlobalGrid(int dimensions, int outputs, int depth, TypeDepth type, TypeOneDRule rule, const int *anisotropic_weights = 0, double alpha = 0.0, double beta = 0.0, const char* custom_filename = 0, const int *level_limits = 0);
     void makeGlobalGrid(int dimensions, int outputs, int depth, TypeDepth type, TypeOneDRule rule, const std::vector<int> &anisotropic_weights, double alpha = 0.0, double beta = 0.0, const char* custom_filename = 0, const std::vector<int> &level_limits = std::vector<int>());
@@ -122,6 +140,11 @@ public:
     void getQuadratureWeights(std::vector<double> &weights) const; // dynamic memory, resizes weights
     void getInterpolationWeights(const std::vector<double> &x, std::vector<double> &weights) const; // dynamic memory, resizes weights
 
+    // interpolation weights for a batch of points in compressed sparse row format, one row per point
+    // the weights are sparse for Local Polynomial grids, other grids drop the zeros of the dense weights
+    void getInterpolationWeightsSparse(const double x[], int num_x, std::vector<int> &pntr, std::vector<int> &indx, std::vector<double> &vals) const;
+    void getInterpolationWeightsSparse(const std::vector<double> &x, std::vector<int> &pntr, std::vector<int> &indx, std::vector<double> &vals) const;
+
     void loadNeededPoints(const double *vals); // no error checking
     void loadNeededPoints(const std::vector<double> &vals); // checks if vals has size num_outputs X getNumNeeded()
 
@@ -194,6 +217,13 @@ public:
     void loadConstructedPoint(const std::vector<double> &x, const std::vector<double> &y);
     //! \brief Same as \b loadConstructedPoint() but using arrays in place of vectors (array size is not checked)
     void loadConstructedPoint(const double x[], const double y[]);
+    //! \brief Add the values of multiple points, all tensors completed by the batch are added to the grid with a single update
+
+    //! The sizes of \b x and \b y must be multiples of the number of dimensions and outputs respectively,
+    //! with the same number of points in both.
+    void loadConstructedPoints(const std::vector<double> &x, const std::vector<double> &y);
+    //! \brief Same as \b loadConstructedPoints() but using arrays in place of vectors (array size is not checked)
+    void loadConstructedPoints(const double x[], int num_x, const double y[]);
     //! \brief End the procedure, clears flags and unused constructed points, can go back to using regular refinement
     void finishConstruction();
 
@@ -212,6 +242,14 @@ public:
 
     void enableAcceleration(TypeAcceleration acc);
     void favorSparseAcceleration(bool favor);
+    void enableSupportIndex(bool enable); // local polynomial grids only, faster evaluate() at the cost of one int per point
+    bool isUsingSupportIndex() const;
+    void enableMortonOrder(bool enable, int min_batch = 2048); // local polynomial and wavelet grids sort batches of at least min_batch points along a Morton curve
+    bool isUsingMortonOrder() const;
+    // stores the multi-indexes of the points in 8 or 16 bit entries (if all entries fit), up to 4 times less memory for the indexes
+    // evaluate, integrate and the interpolation weights work with the compact indexes, the grid goes back to int entries when modified
+    void compactIndexes();
+    int getIndexEntryBytes() const; // returns 1 or 2 after compactIndexes(), sizeof(int) otherwise
     TypeAcceleration getAccelerationType() const;
     static bool isAccelerationAvailable(TypeAcceleration acc);
 
@@ -266,16 +304,18 @@ protected:
     void mapConformalWeights(int num_dimensions, int num_points, double weights[]) const;
 
     const double* formCanonicalPoints(const double *x, Data2D<double> &x_temp, int num_x) const;
+    void getMortonOrder(const double x[], int num_x, std::vector<int> &order) const; // the order of the canonical points along a Morton (z-order) curve
+    void evaluateBatchCanonical(const double x[], int num_x, double y[]) const;
     #ifdef Tasmanian_ENABLE_CUDA
     const double* formCanonicalPointsGPU(const double *gpu_x, int num_x, cudaDoubles &gpu_x_temp) const;
     #endif
     void formTransformedPoints(int num_points, double x[]) const; // when calling get***Points()
 
-    void writeAscii(std::ofstream &ofs) const;
-    void readAscii(std::ifstream &ifs);
+    void writeAscii(std::ostream &ofs) const;
+    void readAscii(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned = false) const;
+    void readBinary(std::istream &ifs);
 
 private:
     std::unique_ptr<BaseCanonicalGrid> base;
@@ -286,6 +326,7 @@ private:
 
     TypeAcceleration acceleration;
     int gpuID;
+    int morton_min_batch; // zero if the batches are not sorted
 
     bool usingDynamicConstruction;
 
@@ -848,14 +848,21 @@ bool ExternalTester::testDynamicRefinement(const BaseFunction *f, TasmanianSpars
         for(size_t i=0; i<num_points; i++) pindex[i] = i;
         std::shuffle(pindex.begin(), pindex.end(), std::default_random_engine(random()));
 
-        for(auto i : pindex){
-            std::vector<double> x(&(points[i * dims]), &(points[i * dims]) + dims);
-            std::vector<double> y(outs);
-            f->eval(x.data(), y.data());
-            if (i % 3 == 0){ // every third point uses the array interface for testing purpose
-                grid->loadConstructedPoint(x.data(), y.data());
-            }else{
-                grid->loadConstructedPoint(x, y);
+        if (itr % 2 == 1){ // every other iteration loads all points with a single call
+            std::vector<double> x, y(num_points * outs);
+            for(auto i : pindex) x.insert(x.end(), &(points[i * dims]), &(points[i * dims]) + dims);
+            for(size_t i=0; i<num_points; i++) f->eval(&(x[i * dims]), &(y[i * outs]));
+            grid->loadConstructedPoints(x, y);
+        }else{
+            for(auto i : pindex){
+                std::vector<double> x(&(points[i * dims]), &(points[i * dims]) + dims);
+                std::vector<double> y(outs);
+                f->eval(x.data(), y.data());
+                if (i % 3 == 0){ // every third point uses the array interface for testing purpose
+                    grid->loadConstructedPoint(x.data(), y.data());
+                }else{
+                    grid->loadConstructedPoint(x, y);
+                }
             }
         }
 
@@ -96,7 +96,7 @@ bool GridUnitTester::testAllException(){
     pass = true;
 
     // perform std::runtime_error tests
-    for(int i=0; i<41; i++){
+    for(int i=0; i<42; i++){
         try{
             runtimeErrorCall(i);
             cout << "Missed run exception i = " << i << " see GridUnitTester::runtimeErrorCall()" << endl;
@@ -257,6 +257,8 @@ void GridUnitTester::runtimeErrorCall(int i){
     case 39: custom.read(ExternalTester::findGaussPattersonTable()); custom.getIExact(11); break;
     case 40: custom.read(ExternalTester::findGaussPattersonTable()); custom.getQExact(11); break;
 
+    case 41: grid.readMapped("phantom.file"); break; // file does not exist
+
     default: break;
     }
 }
@@ -425,6 +427,128 @@ bool GridUnitTester::testAPIconsistency(){
     if (verbose) cout << setw(wfirst) << "API variation" << setw(wsecond) << "wavelet sparse basis" << setw(wthird) << ((pass) ? "Pass" : "FAIL") << endl;
     passAll = pass && passAll;
 
+    // test the hashed and the binary search in MultiIndexSet::getSlot()
+    pass = true;
+    MultiIndexSet mset;
+    MultiIndexManipulations::generateFullTensorSet<int>(std::vector<int>{3, 3, 3}, mset); // below the hash threshold
+    std::vector<int> addition;
+    for(int i=0; i<11; i++) for(int j=0; j<11; j++) addition.insert(addition.end(), {j, 10 - i, i + j}); // unsorted, overlaps mset
+    for(int k=0; k<2; k++){
+        for(int i=0; i<mset.getNumIndexes(); i++){
+            if (mset.getSlot(mset.getIndex(i)) != i) pass = false;
+        }
+        if (!mset.missing(std::vector<int>{-1, 0, 0}) || !mset.missing(std::vector<int>{0, 0, 21})) pass = false;
+        mset.addUnsortedInsexes(addition); // goes over the threshold
+    }
+    MultiIndexSet mcopy = mset;
+    mset.addSortedInsexes(std::vector<int>{20, 20, 20}); // updates the table built in the loop above
+    if ((mset.getSlot(std::vector<int>{20, 20, 20}) != mset.getNumIndexes() - 1) || !mcopy.missing(std::vector<int>{20, 20, 20})) pass = false;
+
+    if (verbose) cout << setw(wfirst) << "API variation" << setw(wsecond) << "multi-index hash" << setw(wthird) << ((pass) ? "Pass" : "FAIL") << endl;
+    passAll = pass && passAll;
+
+    // test the packed binary format of the multi-indexes, entries that need 1, 2 and 4 bytes and the old format
+    pass = true;
+    std::vector<int> max_entries = {127, -128, 128, 32767, -32769, 100000};
+    std::vector<size_t> entry_sizes = {1, 1, 2, 2, 4, 4};
+    for(size_t i=0; i<max_entries.size(); i++){
+        std::vector<int> entries = {0, 1, 2, max_entries[i], 3, 4};
+        MultiIndexSet packed(2), unpacked;
+        packed.addUnsortedInsexes(entries);
+        std::stringstream ss;
+        packed.writeBinary(ss, true);
+        if (ss.str().size() != 3 * sizeof(int) + entries.size() * entry_sizes[i]) pass = false;
+        unpacked.readBinary(ss);
+        if ((unpacked.getNumDimensions() != 2) || (*unpacked.getVector() != *packed.getVector())) pass = false;
+
+        std::stringstream ss_default; // the default format uses int for all entries
+        packed.writeBinary(ss_default);
+        if (ss_default.str().size() != 2 * sizeof(int) + entries.size() * sizeof(int)) pass = false;
+        unpacked.readBinary(ss_default);
+        if ((unpacked.getNumDimensions() != 2) || (*unpacked.getVector() != *packed.getVector())) pass = false;
+    }
+    std::vector<int> old_format = {2, 3, 0, 1, 0, 2, 1000, 0}; // number of dimensions, number of indexes, indexes
+    std::stringstream ss;
+    ss.write((char*) old_format.data(), old_format.size() * sizeof(int));
+    mset.readBinary(ss);
+    if ((mset.getNumIndexes() != 3) || (mset.getSlot(std::vector<int>{1000, 0}) != 2)) pass = false;
+
+    if (verbose) cout << setw(wfirst) << "API variation" << setw(wsecond) << "multi-index binary I/O" << setw(wthird) << ((pass) ? "Pass" : "FAIL") << endl;
+    passAll = pass && passAll;
+
+    // test the memory mapped format, the mapped grid must match the original before and after refinement
+    pass = true;
+    std::vector<double> xmap = {0.33, -0.21, 0.66, 0.1};
+    for(int t=0; t<5; t++){
+        TasmanianSparseGrid source, mapped;
+        if (t == 0) source.makeGlobalGrid(2, 2, 3, type_iptotal, rule_clenshawcurtis);
+        if (t == 1) source.makeSequenceGrid(2, 2, 3, type_iptotal, rule_rleja);
+        if (t == 2) source.makeLocalPolynomialGrid(2, 2, 3, 2);
+        if (t == 3) source.makeWaveletGrid(2, 2, 2, 1);
+        if (t == 4) source.makeFourierGrid(2, 2, 3, type_level);
+        gridLoadEN2(&source);
+        source.writeMapped("testMapped.grid");
+        mapped.readMapped("testMapped.grid");
+        std::vector<double> ysource, ymapped;
+        source.evaluateBatch(xmap, ysource);
+        mapped.evaluateBatch(xmap, ymapped);
+        if (!doesMatch(ysource, ymapped)) pass = false;
+        if (t == 4) continue; // Fourier grids do not support refinement
+        for(auto g : std::vector<TasmanianSparseGrid*>{&source, &mapped}){ // modifies the mapped data
+            if ((t == 0) || (t == 1)) g->setAnisotropicRefinement(type_iptotal, 5, 0);
+            else g->setSurplusRefinement(1.E-4, refine_classic);
+            gridLoadEN2(g);
+        }
+        source.evaluateBatch(xmap, ysource);
+        mapped.evaluateBatch(xmap, ymapped);
+        if (!doesMatch(ysource, ymapped) || (source.getNumPoints() != mapped.getNumPoints())) pass = false;
+    }
+    std::remove("testMapped.grid");
+
+    if (verbose) cout << setw(wfirst) << "API variation" << setw(wsecond) << "memory mapped I/O" << setw(wthird) << ((pass) ? "Pass" : "FAIL") << endl;
+    passAll = pass && passAll;
+
+    // test the compact multi-indexes, the set must behave the same as the one with int entries
+    pass = true;
+    std::vector<int> compact_bytes = {1, 2, (int) sizeof(int)};
+    max_entries = {100, 1000, 100000};
+    for(size_t i=0; i<max_entries.size(); i++){
+        MultiIndexSet reference(3), compact, remainder, compact_remainder;
+        for(int j=0; j<10; j++) for(int k=0; k<10; k++) reference.addSortedInsexes(std::vector<int>{j, k, (j * k) % 7});
+        reference.addSortedInsexes(std::vector<int>{max_entries[i], 0, 1});
+        compact = reference;
+        compact.compact();
+        if ((compact.getEntryBytes() != compact_bytes[i]) || (reference.getEntryBytes() != (int) sizeof(int))) pass = false;
+
+        std::vector<int> entries, scratch;
+        compact.copyEntries(entries);
+        if (entries != *reference.getVector()) pass = false;
+        for(int j=0; j<reference.getNumIndexes(); j++){
+            if (!std::equal(reference.getIndex(j), reference.getIndex(j) + 3, compact.getIndex(j, scratch))) pass = false;
+            if (!std::equal(reference.getIndex(j), reference.getIndex(j) + 3, compact.getIndex(j))) pass = false;
+            if ((compact.getEntry(j, 2) != reference.getIndex(j)[2]) || (compact.getSlot(reference.getIndex(j)) != j)) pass = false;
+        }
+        if (!compact.missing(std::vector<int>{1, 1, 2})) pass = false;
+
+        MultiIndexSet tensor(3);
+        tensor.addSortedInsexes(std::vector<int>{0, 0, 0, 1, 1, 1, 2, 2, 2});
+        tensor.diffSets(reference, remainder);
+        tensor.diffSets(compact, compact_remainder);
+        if ((remainder.getNumIndexes() != 1) || (*remainder.getVector() != *compact_remainder.getVector())) pass = false;
+
+        std::stringstream ss_compact, ss_reference;
+        compact.writeBinary(ss_compact, true);
+        reference.writeBinary(ss_reference, true);
+        if ((ss_compact.str() != ss_reference.str()) || (ss_compact.str().size() != 3 * sizeof(int) + compact.getTotalEntries() * compact_bytes[i])) pass = false;
+
+        compact.addSortedInsexes(std::vector<int>{0, 0, 20}); // goes back to int entries
+        reference.addSortedInsexes(std::vector<int>{0, 0, 20});
+        if (compact.isCompact() || (*compact.getVector() != *reference.getVector())) pass = false;
+    }
+
+    if (verbose) cout << setw(wfirst) << "API variation" << setw(wsecond) << "compact multi-indexes" << setw(wthird) << ((pass) ? "Pass" : "FAIL") << endl;
+    passAll = pass && passAll;
+
     // test integer-to-enumerate and string-to-enumerate conversion
     pass = true;
     std::vector<TypeAcceleration> allacc = {accel_none, accel_cpu_blas, accel_gpu_default, accel_gpu_cublas, accel_gpu_cuda, accel_gpu_magma};
@@ -37,6 +37,7 @@
 #include <fstream>
 #include <string>
 #include <iomanip>
+#include <sstream>
 #include <string.h>
 #include <math.h>
 
@@ -44,7 +44,7 @@ CustomTabulated::~CustomTabulated(){}
 void CustomTabulated::reset(){ num_levels = 0; }
 
 // I/O subroutines
-void CustomTabulated::write(std::ofstream &ofs) const{
+void CustomTabulated::write(std::ostream &ofs) const{
     ofs << "description: " << description.c_str() << std::endl;
     ofs << "levels: " << num_levels << std::endl;
     for(int i=0; i<num_levels; i++){
@@ -56,7 +56,7 @@ void CustomTabulated::write(std::ofstream &ofs) const{
         for(auto w : weights[l]) ofs << w << " " << *x++ << std::endl;
     }
 }
-void CustomTabulated::writeBinary(std::ofstream &ofs) const{
+void CustomTabulated::writeBinary(std::ostream &ofs) const{
     int num_description = (int) description.size();
     ofs.write((char*) &num_description, sizeof(int));
     ofs.write(description.c_str(), num_description * sizeof(char));
@@ -78,19 +78,19 @@ void CustomTabulated::read(const char* filename){
     read(ifs);
     ifs.close();
 }
-void CustomTabulated::read(std::ifstream &ifs){
+void CustomTabulated::read(std::istream &ifs){
     reset();
 
     std::string T;
     char dummy;
     ifs >> T;
-    if (!(T.compare("description:") == 0)){ ifs.close(); throw std::invalid_argument("ERROR: wrong file format of custom tables on line 1"); }
+    if (!(T.compare("description:") == 0)){ throw std::invalid_argument("ERROR: wrong file format of custom tables on line 1"); }
     ifs.get(dummy);
     description = std::string();
     getline(ifs, description);
 
     ifs >> T;
-    if (!(T.compare("levels:") == 0)){ ifs.close(); throw std::invalid_argument("ERROR: wrong file format of custom tables on line 2"); }
+    if (!(T.compare("levels:") == 0)){ throw std::invalid_argument("ERROR: wrong file format of custom tables on line 2"); }
     ifs >> num_levels;
 
     num_nodes.resize(num_levels);
@@ -108,7 +108,7 @@ void CustomTabulated::read(std::ifstream &ifs){
         for(auto &w : weights[l]) ifs >> w >> *x++;
     }
 }
-void CustomTabulated::readBinary(std::ifstream &ifs){
+void CustomTabulated::readBinary(std::istream &ifs){
     reset();
 
     int num_description = 0;
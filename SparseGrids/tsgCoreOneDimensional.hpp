@@ -67,13 +67,13 @@ public:
     //! \brief Read from a custom user provided ASCII file, see the file-format section.
     void read(const char* filename);
     //! \brief Read from an already open ASCII file, used in conjunction with \b GlobalGrid::read()
-    void read(std::ifstream &ifs);
+    void read(std::istream &ifs);
     //! \brief Read from an already open binary file, used in conjunction with \b GlobalGrid::readBinary()
-    void readBinary(std::ifstream &ifs);
+    void readBinary(std::istream &ifs);
     //! \brief Write to an already open ASCII file, used in conjunction with \b GlobalGrid::write()
-    void write(std::ofstream &ofs) const;
+    void write(std::ostream &ofs) const;
     //! \brief Write to an already open binary file, used in conjunction with \b GlobalGrid::writeBinary()
-    void writeBinary(std::ofstream &ofs) const;
+    void writeBinary(std::ostream &ofs) const;
 
     //! \brief Returns the number of loaded levels.
     int getNumLevels() const;
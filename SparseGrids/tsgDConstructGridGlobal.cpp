@@ -39,7 +39,7 @@ DynamicConstructorDataGlobal::DynamicConstructorDataGlobal(int cnum_dimensions,
     : num_dimensions(cnum_dimensions), num_outputs(cnum_outputs){}
 DynamicConstructorDataGlobal::~DynamicConstructorDataGlobal(){}
 
-void DynamicConstructorDataGlobal::write(std::ofstream &ofs) const{
+void DynamicConstructorDataGlobal::write(std::ostream &ofs) const{
     std::vector<const TensorData*> tensor_refs;
     makeReverseReferenceVector<TensorData>(tensors, tensor_refs);
 
@@ -63,7 +63,7 @@ void DynamicConstructorDataGlobal::write(std::ofstream &ofs) const{
         ofs << std::endl;
     }
 }
-void DynamicConstructorDataGlobal::writeBinary(std::ofstream &ofs) const{
+void DynamicConstructorDataGlobal::writeBinary(std::ostream &ofs) const{
     std::vector<const TensorData*> tensor_refs;
     makeReverseReferenceVector<TensorData>(tensors, tensor_refs);
 
@@ -84,7 +84,7 @@ void DynamicConstructorDataGlobal::writeBinary(std::ofstream &ofs) const{
         ofs.write((char*) d->value.data(), num_outputs * sizeof(double));
     }
 }
-int DynamicConstructorDataGlobal::read(std::ifstream &ifs){
+int DynamicConstructorDataGlobal::read(std::istream &ifs){
     int num, max_tensor = 0;
     ifs >> num; // get the number of tensors
     for(int i=0; i<num; i++){
@@ -106,7 +106,7 @@ int DynamicConstructorDataGlobal::read(std::ifstream &ifs){
     }
     return max_tensor;
 }
-int DynamicConstructorDataGlobal::readBinary(std::ifstream &ifs){
+int DynamicConstructorDataGlobal::readBinary(std::istream &ifs){
     int num, max_tensor = 0;
     ifs.read((char*) &num, sizeof(int)); // get the number of tensors
     for(int i=0; i<num; i++){
@@ -117,13 +117,13 @@ public:
     ~DynamicConstructorDataGlobal();
 
     //! \brief Write the data to a file in ascii format.
-    void write(std::ofstream &ofs) const;
+    void write(std::ostream &ofs) const;
     //! \brief Write the data to a file in binary format.
-    void writeBinary(std::ofstream &ofs) const;
+    void writeBinary(std::ostream &ofs) const;
     //! \brief Read the data from a file in ascii format, returns the maximum tensor index so the 1D wrapper cache structure can be updated.
-    int read(std::ifstream &ifs);
+    int read(std::istream &ifs);
     //! \brief Read the data from a file in binary format, returns the maximum tensor index so the 1D wrapper cache structure can be updated.
-    int readBinary(std::ifstream &ifs);
+    int readBinary(std::istream &ifs);
 
     //! \brief Called after read, reinitializes the points and loaded structures for the tensors.
     void reloadPoints(std::function<int(int)> getNumPoints);
@@ -92,6 +92,8 @@ public:
     virtual void evaluateHierarchicalFunctions(const double x[], int num_x, double y[]) const = 0; // add acceleration here
     virtual void setHierarchicalCoefficients(const double c[], TypeAcceleration acc) = 0;
 
+    virtual void compactIndexes() = 0;
+    virtual int getIndexEntryBytes() const = 0;
     virtual void clearAccelerationData() = 0;
 };
 
@@ -39,7 +39,7 @@ namespace TasGrid{
 GridFourier::GridFourier() : num_dimensions(0), num_outputs(0), max_levels(0){}
 GridFourier::~GridFourier(){}
 
-void GridFourier::write(std::ofstream &ofs) const{
+void GridFourier::write(std::ostream &ofs) const{
     using std::endl;
 
     ofs << std::scientific; ofs.precision(17);
@@ -73,7 +73,8 @@ void GridFourier::write(std::ofstream &ofs) const{
             values.write(ofs);
             if (fourier_coefs.getNumStrips() > 0){
                 ofs << "1";
-                for(auto c : *fourier_coefs.getVector()) ofs << " " << c;
+                const double *c = fourier_coefs.getCStrip(0);
+                for(size_t i=0; i<fourier_coefs.getTotalEntries(); i++) ofs << " " << c[i];
             }else{
                 ofs << "0";
             }
@@ -99,7 +100,7 @@ void GridFourier::write(std::ofstream &ofs) const{
     }
 }
 
-void GridFourier::read(std::ifstream &ifs){
+void GridFourier::read(std::istream &ifs){
     reset();
     ifs >> num_dimensions >> num_outputs;
     if (num_dimensions > 0){
@@ -138,33 +139,36 @@ void GridFourier::read(std::ifstream &ifs){
     }
 }
 
-void GridFourier::writeBinary(std::ofstream &ofs) const{
+void GridFourier::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
     int num_dim_out[2];
     num_dim_out[0] = num_dimensions;
     num_dim_out[1] = num_outputs;
     ofs.write((char*) num_dim_out, 2*sizeof(int));
     if (num_dimensions > 0){
-        tensors.writeBinary(ofs);
-        active_tensors.writeBinary(ofs);
+        tensors.writeBinary(ofs, packed_indexes);
+        active_tensors.writeBinary(ofs, packed_indexes);
         ofs.write((char*) active_w.data(), active_tensors.getNumIndexes() * sizeof(int));
         char flag;
         if (points.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            points.writeBinary(ofs);
+            points.writeBinary(ofs, packed_indexes, aligned);
         }
         if (needed.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            needed.writeBinary(ofs);
+            needed.writeBinary(ofs, packed_indexes);
         }
         ofs.write((char*) max_levels.data(), num_dimensions * sizeof(int));
 
         if (num_outputs > 0){
-            values.writeBinary(ofs);
-            if (fourier_coefs.getNumStrips() > 0){
+            values.writeBinary(ofs, aligned);
+            if ((fourier_coefs.getNumStrips() > 0) && aligned){
+                flag = 'a'; ofs.write(&flag, sizeof(char));
+                IO::writeAligned(ofs, 2 * ((size_t) getNumPoints()) * ((size_t) num_outputs), fourier_coefs.getCStrip(0));
+            }else if (fourier_coefs.getNumStrips() > 0){
                 flag = 'y'; ofs.write(&flag, sizeof(char));
                 ofs.write((char*) fourier_coefs.getCStrip(0), 2 * ((size_t) getNumPoints()) * ((size_t) num_outputs) * sizeof(double));
             }else{
@@ -176,8 +180,8 @@ void GridFourier::writeBinary(std::ofstream &ofs) const{
         /* don't need this right now; will need later when refinement is added
         if (updated_tensors != 0){
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            updated_tensors->writeBinary(ofs);
-            updated_active_tensors->writeBinary(ofs);
+            updated_tensors->writeBinary(ofs, packed_indexes);
+            updated_active_tensors->writeBinary(ofs, packed_indexes);
             ofs.write((char*) updated_active_w, updated_active_tensors->getNumIndexes() * sizeof(int));
         }else{
             flag = 'n'; ofs.write(&flag, sizeof(char));
@@ -186,7 +190,7 @@ void GridFourier::writeBinary(std::ofstream &ofs) const{
     }
 }
 
-void GridFourier::readBinary(std::ifstream &ifs){
+void GridFourier::readBinary(std::istream &ifs){
     reset();
     int num_dim_out[2];
     ifs.read((char*) num_dim_out, 2*sizeof(int));
@@ -215,6 +219,8 @@ void GridFourier::readBinary(std::ifstream &ifs){
             if (flag == 'y'){
                 fourier_coefs.resize(num_outputs, 2 * work.getNumIndexes());
                 ifs.read((char*) fourier_coefs.getStrip(0), 2 * ((size_t) num_outputs) * ((size_t) work.getNumIndexes()) * sizeof(double));
+            }else if (flag == 'a'){ // aligned section, stays in the file when using readMapped()
+                fourier_coefs.readAligned(ifs, num_outputs, 2 * work.getNumIndexes());
             }
         }
         ifs.read((char*) &flag, sizeof(char));
@@ -327,7 +333,8 @@ void GridFourier::getLoadedPoints(double *x) const{
     int num_points = points.getNumIndexes();
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = points.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = points.getIndex(i, scratch);
         for(int j=0; j<num_dimensions; j++){
             x[i*num_dimensions + j] = wrapper.getNode(p[j]);
         }
@@ -337,7 +344,8 @@ void GridFourier::getNeededPoints(double *x) const{
     int num_points = needed.getNumIndexes();
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = needed.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = needed.getIndex(i, scratch);
         for(int j=0; j<num_dimensions; j++){
             x[i*num_dimensions + j] = wrapper.getNode(p[j]);
         }
@@ -702,6 +710,14 @@ void GridFourier::evaluateHierarchicalFunctionsInternalGPU(const double gpu_x[],
 }
 #endif
 
+void GridFourier::compactIndexes(){
+    points.compact();
+    needed.compact();
+}
+int GridFourier::getIndexEntryBytes() const{
+    return ((points.empty()) ? needed : points).getEntryBytes();
+}
+
 void GridFourier::clearAccelerationData(){
     #ifdef Tasmanian_ENABLE_CUDA
     cuda_real.clear();
@@ -54,11 +54,11 @@ public:
 
     bool isFourier() const{ return true; }
 
-    void write(std::ofstream &ofs) const;
-    void read(std::ifstream &ifs);
+    void write(std::ostream &ofs) const;
+    void read(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const;
+    void readBinary(std::istream &ifs);
 
     void makeGrid(int cnum_dimensions, int cnum_outputs, int depth, TypeDepth type, const std::vector<int> &anisotropic_weights, const std::vector<int> &level_limits);
     void copyGrid(const GridFourier *fourier);
@@ -114,6 +114,8 @@ public:
     void evaluateHierarchicalFunctionsInternalGPU(const double gpu_x[], int num_x, cudaDoubles &wreal, cudaDoubles &wimag) const;
     #endif
 
+    void compactIndexes();
+    int getIndexEntryBytes() const;
     void clearAccelerationData();
     void clearRefinement();
     void mergeRefinement();
@@ -146,8 +148,9 @@ protected:
             }
         }
 
+        std::vector<int> scratch; // used only by compact sets
         for(int i=0; i<num_points; i++){
-            const int *p = work.getIndex(i);
+            const int *p = work.getIndex(i, scratch);
 
             std::complex<T> v(1.0, 0.0);
             for(int j=0; j<num_dimensions; j++){
@@ -186,7 +189,7 @@ protected:
         Data2D<int> transpoints; transpoints.resize(work.getNumIndexes(), num_dimensions);
         for(int i=0; i<num_points; i++){
             for(int j=0; j<num_dimensions; j++){
-                transpoints.getStrip(j)[i] = work.getIndex(i)[j];
+                transpoints.getStrip(j)[i] = work.getEntry(i, j);
             }
         }
         cuda_points.load(*(transpoints.getVector()));
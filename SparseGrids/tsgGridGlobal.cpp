@@ -47,7 +47,7 @@ namespace TasGrid{
 GridGlobal::GridGlobal() : num_dimensions(0), num_outputs(0), alpha(0.0), beta(0.0){}
 GridGlobal::~GridGlobal(){}
 
-void GridGlobal::write(std::ofstream &ofs) const{
+void GridGlobal::write(std::ostream &ofs) const{
     using std::endl;
 
     ofs << std::scientific; ofs.precision(17);
@@ -96,7 +96,7 @@ void GridGlobal::write(std::ofstream &ofs) const{
         ofs << endl;
     }
 }
-void GridGlobal::writeBinary(std::ofstream &ofs) const{
+void GridGlobal::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
     int num_dim_out[2];
     num_dim_out[0] = num_dimensions;
     num_dim_out[1] = num_outputs;
@@ -111,36 +111,36 @@ void GridGlobal::writeBinary(std::ofstream &ofs) const{
         if (rule == rule_customtabulated){
             custom.writeBinary(ofs);
         }
-        tensors.writeBinary(ofs);
-        active_tensors.writeBinary(ofs);
+        tensors.writeBinary(ofs, packed_indexes);
+        active_tensors.writeBinary(ofs, packed_indexes);
         if (!active_w.empty()) ofs.write((char*) (active_w.data()), active_tensors.getNumIndexes() * sizeof(int));
         char flag;
         if (points.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            points.writeBinary(ofs);
+            points.writeBinary(ofs, packed_indexes, aligned);
         }
         if (needed.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            needed.writeBinary(ofs);
+            needed.writeBinary(ofs, packed_indexes);
         }
         ofs.write((char*) max_levels.data(), num_dimensions * sizeof(int));
 
-        if (num_outputs > 0) values.writeBinary(ofs);
+        if (num_outputs > 0) values.writeBinary(ofs, aligned);
         if (!updated_tensors.empty()){
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            updated_tensors.writeBinary(ofs);
-            updated_active_tensors.writeBinary(ofs);
+            updated_tensors.writeBinary(ofs, packed_indexes);
+            updated_active_tensors.writeBinary(ofs, packed_indexes);
             ofs.write((char*) (updated_active_w.data()), updated_active_tensors.getNumIndexes() * sizeof(int));
         }else{
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }
     }
 }
-void GridGlobal::read(std::ifstream &ifs){
+void GridGlobal::read(std::istream &ifs){
     reset(true); // true deletes any custom rule
     ifs >> num_dimensions >> num_outputs >> alpha >> beta;
     if (num_dimensions > 0){
@@ -182,7 +182,7 @@ void GridGlobal::read(std::ifstream &ifs){
     }
 }
 
-void GridGlobal::readBinary(std::ifstream &ifs){
+void GridGlobal::readBinary(std::istream &ifs){
     reset(true); // true deletes any custom rule
     int num_dim_out[2];
     ifs.read((char*) num_dim_out, 2*sizeof(int));
@@ -414,12 +414,11 @@ int GridGlobal::getNumLoaded() const{ return (num_outputs == 0) ? 0 : points.get
 int GridGlobal::getNumNeeded() const{ return needed.getNumIndexes(); }
 int GridGlobal::getNumPoints() const{ return ((points.empty()) ? needed.getNumIndexes() : points.getNumIndexes()); }
 
-void GridGlobal::mapIndexesToNodes(const std::vector<int> *indexes, double *x) const{
-    int num_points = (int) (indexes->size() / (size_t) num_dimensions);
+void GridGlobal::mapIndexesToNodes(int num_points, const int *indexes, double *x) const{
     Data2D<double> splitx;
     splitx.load(num_dimensions, num_points, x);
     Data2D<int> spliti;
-    spliti.cload(num_dimensions, num_points, indexes->data());
+    spliti.cload(num_dimensions, num_points, indexes);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
         const int *p = spliti.getCStrip(i);
@@ -429,11 +428,24 @@ void GridGlobal::mapIndexesToNodes(const std::vector<int> *indexes, double *x) c
     }
 }
 
+void GridGlobal::mapIndexesToNodes(const MultiIndexSet &mset, double *x) const{
+    Data2D<double> splitx;
+    splitx.load(num_dimensions, mset.getNumIndexes(), x);
+    #pragma omp parallel for schedule(static)
+    for(int i=0; i<mset.getNumIndexes(); i++){
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = mset.getIndex(i, scratch);
+        double *xx = splitx.getStrip(i);
+        for(int j=0; j<num_dimensions; j++)
+            xx[j] = wrapper.getNode(p[j]);
+    }
+}
+
 void GridGlobal::getLoadedPoints(double *x) const{
-    mapIndexesToNodes(points.getVector(), x);
+    mapIndexesToNodes(points, x);
 }
 void GridGlobal::getNeededPoints(double *x) const{
-    mapIndexesToNodes(needed.getVector(), x);
+    mapIndexesToNodes(needed, x);
 }
 void GridGlobal::getPoints(double *x) const{
     if (points.empty()){ getNeededPoints(x); }else{ getLoadedPoints(x); };
@@ -551,20 +563,20 @@ void GridGlobal::beginConstruction(){
         values.resize(num_outputs, 0);
     }
 }
-void GridGlobal::writeConstructionDataBinary(std::ofstream &ofs) const{
+void GridGlobal::writeConstructionDataBinary(std::ostream &ofs) const{
     dynamic_values->writeBinary(ofs);
 }
-void GridGlobal::writeConstructionData(std::ofstream &ofs) const{
+void GridGlobal::writeConstructionData(std::ostream &ofs) const{
     dynamic_values->write(ofs);
 }
-void GridGlobal::readConstructionDataBinary(std::ifstream &ifs){
+void GridGlobal::readConstructionDataBinary(std::istream &ifs){
     dynamic_values = std::unique_ptr<DynamicConstructorDataGlobal>(new DynamicConstructorDataGlobal(num_dimensions, num_outputs));
     int max_level = dynamic_values->readBinary(ifs);
     if (max_level + 1 > wrapper.getNumLevels())
         wrapper.load(custom, max_level, rule, alpha, beta);
     dynamic_values->reloadPoints([&](int l)->int{ return wrapper.getNumPoints(l); });
 }
-void GridGlobal::readConstructionData(std::ifstream &ifs){
+void GridGlobal::readConstructionData(std::istream &ifs){
     dynamic_values = std::unique_ptr<DynamicConstructorDataGlobal>(new DynamicConstructorDataGlobal(num_dimensions, num_outputs));
     int max_level = dynamic_values->read(ifs);
     if (max_level + 1 > wrapper.getNumLevels())
@@ -691,19 +703,27 @@ void GridGlobal::getCandidateConstructionPoints(std::function<double(const int *
     std::vector<int> node_indexes;
     dynamic_values->getNodesIndexes(node_indexes);
     x.resize(node_indexes.size());
-    mapIndexesToNodes(&node_indexes, x.data());
+    mapIndexesToNodes((int) (node_indexes.size() / (size_t) num_dimensions), node_indexes.data(), x.data());
 }
 void GridGlobal::loadConstructedPoint(const double x[], const std::vector<double> &y){
+    loadConstructedPoints(x, 1, y.data());
+}
+void GridGlobal::loadConstructedPoints(const double x[], int num_x, const double y[]){
     std::vector<int> p(num_dimensions);
-    for(int j=0; j<num_dimensions; j++){
-        int i = 0;
-        while(fabs(wrapper.getNode(i) - x[j]) > TSG_NUM_TOL) i++; // convert canonical node to index
-        p[j] = i;
+    std::vector<double> v(num_outputs);
+    bool any_complete = false;
+    for(int k=0; k<num_x; k++){
+        const double *xk = &(x[((size_t) k) * ((size_t) num_dimensions)]);
+        for(int j=0; j<num_dimensions; j++){
+            int i = 0;
+            while(fabs(wrapper.getNode(i) - xk[j]) > TSG_NUM_TOL) i++; // convert canonical node to index
+            p[j] = i;
+        }
+        std::copy_n(&(y[((size_t) k) * ((size_t) num_outputs)]), num_outputs, v.data());
+        if (dynamic_values->addNewNode(p, v)) any_complete = true;
     }
 
-    if (dynamic_values->addNewNode(p, y)){ // if a new tensor is complete
-        loadConstructedTensors();
-    }
+    if (any_complete) loadConstructedTensors(); // add all completed tensors with a single update of the grid
 }
 void GridGlobal::loadConstructedTensors(){
     #ifdef Tasmanian_ENABLE_CUDA
@@ -782,7 +802,7 @@ void GridGlobal::evaluateBatchCPUblas(const double x[], int num_x, double y[]) c
 
 #ifdef Tasmanian_ENABLE_CUDA
 void GridGlobal::evaluateFastGPUcublas(const double x[], double y[]) const{
-    if (cuda_vals.size() == 0) cuda_vals.load(*(values.aliasValues()));
+    if (cuda_vals.size() == 0) cuda_vals.load(((size_t) num_outputs) * ((size_t) points.getNumIndexes()), values.getValues(0));
 
     std::vector<double> weights(points.getNumIndexes());
     getInterpolationWeights(x, weights.data());
@@ -793,7 +813,7 @@ void GridGlobal::evaluateFastGPUcuda(const double x[], double y[]) const{
     evaluateFastGPUcublas(x, y);
 }
 void GridGlobal::evaluateBatchGPUcublas(const double x[], int num_x, double y[]) const{
-    if (cuda_vals.size() == 0) cuda_vals.load(*(values.aliasValues()));
+    if (cuda_vals.size() == 0) cuda_vals.load(((size_t) num_outputs) * ((size_t) points.getNumIndexes()), values.getValues(0));
 
     int num_points = points.getNumIndexes();
     Data2D<double> weights; weights.resize(num_points, num_x);
@@ -808,7 +828,7 @@ void GridGlobal::evaluateBatchGPUcuda(const double x[], int num_x, double y[]) c
 
 #ifdef Tasmanian_ENABLE_MAGMA
 void GridGlobal::evaluateFastGPUmagma(int gpuID, const double x[], double y[]) const{
-    if (cuda_vals.size() == 0) cuda_vals.load(*(values.aliasValues()));
+    if (cuda_vals.size() == 0) cuda_vals.load(((size_t) num_outputs) * ((size_t) points.getNumIndexes()), values.getValues(0));
 
     std::vector<double> weights(points.getNumIndexes());
     getInterpolationWeights(x, weights.data());
@@ -816,7 +836,7 @@ void GridGlobal::evaluateFastGPUmagma(int gpuID, const double x[], double y[]) c
     cuda_engine.magmaCudaDGEMM(gpuID, num_outputs, 1, points.getNumIndexes(), 1.0, cuda_vals, weights, 0.0, y);
 }
 void GridGlobal::evaluateBatchGPUmagma(int gpuID, const double x[], int num_x, double y[]) const{
-    if (cuda_vals.size() == 0) cuda_vals.load(*(values.aliasValues()));
+    if (cuda_vals.size() == 0) cuda_vals.load(((size_t) num_outputs) * ((size_t) points.getNumIndexes()), values.getValues(0));
 
     int num_points = points.getNumIndexes();
     Data2D<double> weights; weights.resize(num_points, num_x);
@@ -1064,6 +1084,14 @@ double GridGlobal::legendre(int n, double x){
     return l;
 }
 
+void GridGlobal::compactIndexes(){
+    points.compact();
+    needed.compact();
+}
+int GridGlobal::getIndexEntryBytes() const{
+    return ((points.empty()) ? needed : points).getEntryBytes();
+}
+
 void GridGlobal::clearAccelerationData(){
     #ifdef Tasmanian_ENABLE_CUDA
     cuda_engine.reset();
@@ -57,11 +57,11 @@ public:
 
     bool isGlobal() const{ return true; }
 
-    void write(std::ofstream &ofs) const;
-    void read(std::ifstream &ifs);
+    void write(std::ostream &ofs) const;
+    void read(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const;
+    void readBinary(std::istream &ifs);
 
     void makeGrid(int cnum_dimensions, int cnum_outputs, int depth, TypeDepth type, TypeOneDRule crule, const std::vector<int> &anisotropic_weights, double calpha, double cbeta, const char* custom_filename, const std::vector<int> &level_limits);
     void copyGrid(const GridGlobal *global);
@@ -122,19 +122,22 @@ public:
     void mergeRefinement();
 
     void beginConstruction();
-    void writeConstructionDataBinary(std::ofstream &ofs) const;
-    void writeConstructionData(std::ofstream &ofs) const;
-    void readConstructionDataBinary(std::ifstream &ifs);
-    void readConstructionData(std::ifstream &ifs);
+    void writeConstructionDataBinary(std::ostream &ofs) const;
+    void writeConstructionData(std::ostream &ofs) const;
+    void readConstructionDataBinary(std::istream &ifs);
+    void readConstructionData(std::istream &ifs);
     void getCandidateConstructionPoints(TypeDepth type, const std::vector<int> &weights, std::vector<double> &x, const std::vector<int> &level_limits);
     void getCandidateConstructionPoints(TypeDepth type, int output, std::vector<double> &x, const std::vector<int> &level_limits);
     void getCandidateConstructionPoints(std::function<double(const int *)> getTensorWeight, std::vector<double> &x, const std::vector<int> &level_limits);
     void loadConstructedPoint(const double x[], const std::vector<double> &y);
+    void loadConstructedPoints(const double x[], int num_x, const double y[]);
     void finishConstruction();
 
     void evaluateHierarchicalFunctions(const double x[], int num_x, double y[]) const;
     void setHierarchicalCoefficients(const double c[], TypeAcceleration acc);
 
+    void compactIndexes();
+    int getIndexEntryBytes() const;
     void clearAccelerationData();
 
     void getPolynomialSpace(bool interpolation, int &n, int* &poly) const;
@@ -156,7 +159,8 @@ protected:
     void acceptUpdatedTensors();
     void getPolynomialSpace(bool interpolation, MultiIndexSet &polynomial_set) const;
 
-    void mapIndexesToNodes(const std::vector<int> *indexes, double *x) const;
+    void mapIndexesToNodes(int num_points, const int *indexes, double *x) const;
+    void mapIndexesToNodes(const MultiIndexSet &mset, double *x) const;
     void loadConstructedTensors();
 
 private:
@@ -38,7 +38,7 @@
 
 namespace TasGrid{
 
-GridLocalPolynomial::GridLocalPolynomial() : num_dimensions(0), num_outputs(0), order(1), top_level(0), sparse_affinity(0)  {}
+GridLocalPolynomial::GridLocalPolynomial() : num_dimensions(0), num_outputs(0), order(1), top_level(0), sparse_affinity(0), use_support_index(false)  {}
 GridLocalPolynomial::~GridLocalPolynomial(){}
 
 void GridLocalPolynomial::reset(bool clear_rule){
@@ -50,6 +50,10 @@ void GridLocalPolynomial::reset(bool clear_rule){
     if (clear_rule){ rule = std::unique_ptr<BaseRuleLocalPolynomial>(); order = 1; }
     parents.load(0, 0, 0);
     sparse_affinity = 0;
+    use_support_index = false;
+    tree_direction = std::vector<int>();
+    support_left = std::vector<double>();
+    support_right = std::vector<double>();
     surpluses.clear();
 }
 template<class T> std::unique_ptr<T> make_unique_ptr(){ return std::unique_ptr<T>(new T()); } // in C++14 this is called std::make_unique()
@@ -69,7 +73,7 @@ void GridLocalPolynomial::makeRule(TypeOneDRule crule){
     rule->setMaxOrder(order);
 }
 
-void GridLocalPolynomial::write(std::ofstream &ofs) const{
+void GridLocalPolynomial::write(std::ostream &ofs) const{
     using std::endl;
 
     ofs << std::scientific; ofs.precision(17);
@@ -86,7 +90,8 @@ void GridLocalPolynomial::write(std::ofstream &ofs) const{
             ofs << "0" << endl;
         }else{
             ofs << "1 ";
-            for(auto s: *surpluses.getVector()) ofs << " " << s;
+            const double *s = surpluses.getCStrip(0);
+            for(size_t i=0; i<surpluses.getTotalEntries(); i++) ofs << " " << s[i];
             ofs << endl;
         }
         if (needed.empty()){
@@ -110,7 +115,7 @@ void GridLocalPolynomial::write(std::ofstream &ofs) const{
         if (num_outputs > 0) values.write(ofs);
     }
 }
-void GridLocalPolynomial::writeBinary(std::ofstream &ofs) const{
+void GridLocalPolynomial::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
     int dims[4];
     dims[0] = num_dimensions;
     dims[1] = num_outputs;
@@ -126,22 +131,28 @@ void GridLocalPolynomial::writeBinary(std::ofstream &ofs) const{
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            points.writeBinary(ofs);
+            points.writeBinary(ofs, packed_indexes, aligned);
         }
         if (needed.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            needed.writeBinary(ofs);
+            needed.writeBinary(ofs, packed_indexes);
         }
         if (surpluses.getNumStrips() == 0){
             flag = 'n'; ofs.write(&flag, sizeof(char));
+        }else if (aligned){
+            flag = 'a'; ofs.write(&flag, sizeof(char));
+            IO::writeAligned(ofs, surpluses.getTotalEntries(), surpluses.getCStrip(0));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
             ofs.write((char*) surpluses.getCStrip(0), surpluses.getTotalEntries() * sizeof(double));
         }
         if (parents.getTotalEntries() == 0){
             flag = 'n'; ofs.write(&flag, sizeof(char));
+        }else if (aligned){
+            flag = 'a'; ofs.write(&flag, sizeof(char));
+            IO::writeAligned(ofs, parents.getTotalEntries(), parents.getCStrip(0));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
             ofs.write((char*) parents.getCStrip(0), parents.getTotalEntries() * sizeof(int));
@@ -154,10 +165,10 @@ void GridLocalPolynomial::writeBinary(std::ofstream &ofs) const{
         ofs.write((char*) pntr.data(), (num_points+1) * sizeof(int));
         ofs.write((char*) indx.data(), pntr[num_points] * sizeof(int));
 
-        if (num_outputs > 0) values.writeBinary(ofs);
+        if (num_outputs > 0) values.writeBinary(ofs, aligned);
     }
 }
-void GridLocalPolynomial::read(std::ifstream &ifs){
+void GridLocalPolynomial::read(std::istream &ifs){
     reset();
     ifs >> num_dimensions >> num_outputs >> order >> top_level;
     if (num_dimensions > 0){
@@ -202,7 +213,7 @@ void GridLocalPolynomial::read(std::ifstream &ifs){
         if (num_outputs > 0) values.read(ifs);
     }
 }
-void GridLocalPolynomial::readBinary(std::ifstream &ifs){
+void GridLocalPolynomial::readBinary(std::istream &ifs){
     reset();
     int dims[4];
     ifs.read((char*) dims, 4 * sizeof(int));
@@ -225,12 +236,16 @@ void GridLocalPolynomial::readBinary(std::ifstream &ifs){
         if (flag == 'y'){
             surpluses.resize(num_outputs, points.getNumIndexes());
             ifs.read((char*) surpluses.getStrip(0), surpluses.getTotalEntries() * sizeof(double));
+        }else if (flag == 'a'){ // aligned section, stays in the file when using readMapped()
+            surpluses.readAligned(ifs, num_outputs, points.getNumIndexes());
         }
 
         ifs.read((char*) &flag, sizeof(char));
         if (flag == 'y'){
             parents.resize(rule->getMaxNumParents() * num_dimensions, points.getNumIndexes());
             ifs.read((char*) parents.getStrip(0), parents.getTotalEntries() * sizeof(int));
+        }else if (flag == 'a'){
+            parents.readAligned(ifs, rule->getMaxNumParents() * num_dimensions, points.getNumIndexes());
         }
 
         int num_points = (points.empty()) ? needed.getNumIndexes() : points.getNumIndexes();
@@ -303,7 +318,7 @@ void GridLocalPolynomial::copyGrid(const GridLocalPolynomial *pwpoly){
 
     if ((!points.empty()) && (num_outputs > 0)){ // points are loaded
         surpluses.resize(num_outputs, points.getNumIndexes());
-        *surpluses.getVector() = *pwpoly->surpluses.getVector(); // copy assignment
+        std::copy_n(pwpoly->surpluses.getCStrip(0), surpluses.getTotalEntries(), surpluses.getStrip(0));
     }
 }
 
@@ -322,7 +337,8 @@ void GridLocalPolynomial::getLoadedPoints(double *x) const{
     split.load(num_dimensions, num_points, x);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = points.getIndex(i);
+        std::vector<int> scratch;
+        const int *p = points.getIndex(i, scratch);
         double *xx = split.getStrip(i);
         for(int j=0; j<num_dimensions; j++){
             xx[j] = rule->getNode(p[j]);
@@ -335,7 +351,8 @@ void GridLocalPolynomial::getNeededPoints(double *x) const{
     split.load(num_dimensions, num_points, x);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = needed.getIndex(i);
+        std::vector<int> scratch;
+        const int *p = needed.getIndex(i, scratch);
         double *xx = split.getStrip(i);
         for(int j=0; j<num_dimensions; j++){
             xx[j] = rule->getNode(p[j]);
@@ -347,16 +364,21 @@ void GridLocalPolynomial::getPoints(double *x) const{
 }
 
 void GridLocalPolynomial::evaluate(const double x[], double y[]) const{
+    if (!tree_direction.empty()){
+        evaluateIndexed(x, y);
+        return;
+    }
     std::vector<int> monkey_count(top_level+1);
     std::vector<int> monkey_tail(top_level+1);
 
     bool isSupported;
     int offset;
+    std::vector<int> scratch; // used only by compact sets
 
     std::fill(y, y + num_outputs, 0.0);
 
     for(auto const &r : roots){
-        double basis_value = evalBasisSupported(points.getIndex(r), x, isSupported);
+        double basis_value = evalBasisSupported(points.getIndex(r, scratch), x, isSupported);
 
         if (isSupported){
             const double *s = surpluses.getCStrip(r);
@@ -369,7 +391,7 @@ void GridLocalPolynomial::evaluate(const double x[], double y[]) const{
             while(monkey_count[0] < pntr[monkey_tail[0]+1]){
                 if (monkey_count[current] < pntr[monkey_tail[current]+1]){
                     offset = indx[monkey_count[current]];
-                    basis_value = evalBasisSupported(points.getIndex(offset), x, isSupported);
+                    basis_value = evalBasisSupported(points.getIndex(offset, scratch), x, isSupported);
                     if (isSupported){
                         s = surpluses.getCStrip(offset);
                         for(int k=0; k<num_outputs; k++) y[k] += basis_value * s[k];
@@ -386,12 +408,148 @@ void GridLocalPolynomial::evaluate(const double x[], double y[]) const{
         }
     }
 }
+void GridLocalPolynomial::evaluateIndexed(const double x[], double y[]) const{
+    std::vector<int> monkey_count(top_level+1);
+    std::vector<int> monkey_tail(top_level+1);
+    std::vector<double> monkey_basis(top_level+1);
+
+    bool isSupported;
+    std::vector<int> scratch; // used only by compact sets
+
+    std::fill(y, y + num_outputs, 0.0);
+
+    for(auto const &r : roots){
+        double basis_value = evalBasisSupported(points.getIndex(r, scratch), x, isSupported);
+
+        if (isSupported){
+            const double *s = surpluses.getCStrip(r);
+            for(int k=0; k<num_outputs; k++) y[k] += basis_value * s[k];
+
+            int current = 0;
+            monkey_tail[0] = r;
+            monkey_count[0] = pntr[r];
+            monkey_basis[0] = basis_value;
+
+            while(monkey_count[0] < pntr[monkey_tail[0]+1]){
+                if (monkey_count[current] < pntr[monkey_tail[current]+1]){
+                    int offset = indx[monkey_count[current]];
+                    int dir = tree_direction[monkey_count[current]];
+                    const int *p = points.getIndex(offset, scratch);
+                    isSupported = false;
+                    double kid_value = 0.0;
+                    if ((x[dir] >= support_left[p[dir]]) && (x[dir] <= support_right[p[dir]])) // the intervals are padded, always checked below
+                        kid_value = rule->evalSupport(p[dir], x[dir], isSupported);
+                    if (isSupported){
+                        double dad_value = rule->evalRaw(points.getEntry(monkey_tail[current], dir), x[dir]);
+                        basis_value = (dad_value != 0.0) ? (monkey_basis[current] / dad_value) * kid_value : evalBasisRaw(p, x);
+                        s = surpluses.getCStrip(offset);
+                        for(int k=0; k<num_outputs; k++) y[k] += basis_value * s[k];
+
+                        monkey_tail[++current] = offset;
+                        monkey_count[current] = pntr[offset];
+                        monkey_basis[current] = basis_value;
+                    }else{
+                        monkey_count[current]++;
+                    }
+                }else{
+                    monkey_count[--current]++;
+                }
+            }
+        }
+    }
+}
 void GridLocalPolynomial::evaluateBatch(const double x[], int num_x, double y[]) const{
+    if (num_x < 2 * batch_traversal_chunk){ // too few points to share the traversal, walk the tree for each point
+        Data2D<double> xx; xx.cload(num_dimensions, num_x, x);
+        Data2D<double> yy; yy.load(num_outputs, num_x, y);
+        #pragma omp parallel for
+        for(int i=0; i<num_x; i++)
+            evaluate(xx.getCStrip(i), yy.getStrip(i));
+        return;
+    }
+
+    int num_blocks = num_x / batch_traversal_chunk + ((num_x % batch_traversal_chunk != 0) ? 1 : 0);
+    #pragma omp parallel for
+    for(int b=0; b<num_blocks; b++){
+        int chunk_size = (b < num_blocks - 1) ? batch_traversal_chunk : (num_x - (num_blocks - 1) * batch_traversal_chunk);
+        evaluateBatchLevels(&(x[((size_t) b) * ((size_t) batch_traversal_chunk) * ((size_t) num_dimensions)]), chunk_size,
+                            &(y[((size_t) b) * ((size_t) batch_traversal_chunk) * ((size_t) num_outputs)]));
+    }
+}
+void GridLocalPolynomial::evaluateBatchLevels(const double x[], int num_x, double y[]) const{
     Data2D<double> xx; xx.cload(num_dimensions, num_x, x);
     Data2D<double> yy; yy.load(num_outputs, num_x, y);
-    #pragma omp parallel for
-    for(int i=0; i<num_x; i++)
-        evaluate(xx.getCStrip(i), yy.getStrip(i));
+    std::fill(y, y + ((size_t) num_x) * ((size_t) num_outputs), 0.0);
+
+    // the active (node, point) pairs on one level of the tree are stored in compressed form,
+    // nodes[i] supports points x_list[pntr[i]] ... x_list[pntr[i+1]-1] and the basis values are in basis_list
+    std::vector<int> active_nodes, active_pntr, active_x;
+    std::vector<double> active_basis;
+    std::vector<int> next_nodes, next_pntr(1, 0), next_x;
+    std::vector<double> next_basis;
+
+    // adds the contribution of the node to the supported points and records the pairs for the next level
+    auto add_supported = [&](int node, int xi, double basis_value) ->
+        void{
+            const double *s = surpluses.getCStrip(node);
+            double *yi = yy.getStrip(xi);
+            for(int k=0; k<num_outputs; k++) yi[k] += basis_value * s[k];
+            next_x.push_back(xi);
+            next_basis.push_back(basis_value);
+        };
+    auto close_node = [&](int node, size_t num_supported) ->
+        void{
+            if (next_x.size() > num_supported){
+                next_nodes.push_back(node);
+                next_pntr.push_back((int) next_x.size());
+            }
+        };
+
+    bool isSupported;
+    std::vector<int> scratch, scratch_dad; // used only by compact sets
+    for(auto const &r : roots){
+        const int *p = points.getIndex(r, scratch);
+        size_t num_supported = next_x.size();
+        for(int i=0; i<num_x; i++){
+            double basis_value = evalBasisSupported(p, xx.getCStrip(i), isSupported);
+            if (isSupported) add_supported(r, i, basis_value);
+        }
+        close_node(r, num_supported);
+    }
+
+    while(!next_nodes.empty()){
+        std::swap(active_nodes, next_nodes);
+        std::swap(active_pntr, next_pntr);
+        std::swap(active_x, next_x);
+        std::swap(active_basis, next_basis);
+        next_nodes.clear();
+        next_pntr.resize(1);
+        next_x.clear();
+        next_basis.clear();
+
+        for(size_t i=0; i<active_nodes.size(); i++){
+            const int *dad = points.getIndex(active_nodes[i], scratch_dad);
+            for(int c=pntr[active_nodes[i]]; c<pntr[active_nodes[i]+1]; c++){
+                // the kid differs from the parent only in one direction, the support and the basis in the other directions are the same
+                int kid = indx[c];
+                const int *p = points.getIndex(kid, scratch);
+                int dir = 0;
+                while(p[dir] == dad[dir]) dir++;
+
+                size_t num_supported = next_x.size();
+                for(int j=active_pntr[i]; j<active_pntr[i+1]; j++){
+                    const double *this_x = xx.getCStrip(active_x[j]);
+                    double kid_value = rule->evalSupport(p[dir], this_x[dir], isSupported);
+                    if (isSupported){
+                        double dad_value = rule->evalRaw(dad[dir], this_x[dir]);
+                        double basis_value = (dad_value != 0.0) ? (active_basis[j] / dad_value) * kid_value : evalBasisRaw(p, this_x);
+                        add_supported(kid, active_x[j], basis_value);
+                    }
+                }
+                close_node(kid, num_supported);
+            }
+        }
+    }
 }
 
 #ifdef Tasmanian_ENABLE_BLAS
@@ -451,7 +609,7 @@ void GridLocalPolynomial::evaluateFastGPUcublas(const double x[], double y[]) co
 // evaluation of a single x cannot be accelerated with a gpu (not parallelizable), do that on the CPU and use the GPU only for the case of many outputs
 void GridLocalPolynomial::evaluateFastGPUcuda(const double x[], double y[]) const{ evaluateFastGPUcublas(x, y); }
 void GridLocalPolynomial::evaluateBatchGPUcublas(const double x[], int num_x, double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(*(surpluses.getVector()));
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
 
     std::vector<int> sindx, spntr;
     std::vector<double> svals;
@@ -508,6 +666,7 @@ void GridLocalPolynomial::loadNeededPoints(const double *vals, TypeAcceleration)
         values.setValues(vals);
         points = std::move(needed);
         needed = MultiIndexSet();
+        buildSupportIndex(); // the tree is already built for the same points
     }else if (needed.empty()){
         values.setValues(vals);
     }else{
@@ -530,6 +689,7 @@ void GridLocalPolynomial::mergeRefinement(){
     if (points.empty()){
         points = std::move(needed);
         needed = MultiIndexSet();
+        buildSupportIndex(); // the tree is already built for the same points
     }else{
         points.addMultiIndexSet(needed);
         needed = MultiIndexSet();
@@ -551,10 +711,11 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
     double basis_value;
     bool isSupported;
     int offset;
+    std::vector<int> scratch, scratch_func; // used only by compact sets
 
     for(unsigned r=0; r<roots.size(); r++){
 
-        basis_value = evalBasisSupported(work.getIndex(roots[r]), x, isSupported);
+        basis_value = evalBasisSupported(work.getIndex(roots[r], scratch), x, isSupported);
 
         if (isSupported){
             active_points.push_back(roots[r]);
@@ -568,7 +729,7 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
                 if (monkey_count[current] < pntr[monkey_tail[current]+1]){
                     offset = indx[monkey_count[current]];
 
-                    basis_value = evalBasisSupported(work.getIndex(offset), x, isSupported);
+                    basis_value = evalBasisSupported(work.getIndex(offset, scratch), x, isSupported);
 
                     if (isSupported){
                         active_points.push_back(offset);
@@ -596,7 +757,7 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
     std::vector<int> level(active_points.size());
     int active_top_level = 0;
     for(size_t i=0; i<active_points.size(); i++){
-        const int *p = work.getIndex(active_points[i]);
+        const int *p = work.getIndex(active_points[i], scratch);
         int current_level = rule->getLevel(p[0]);
         for(int j=1; j<num_dimensions; j++){
             current_level += rule->getLevel(p[j]);
@@ -612,7 +773,7 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
     for(int l=active_top_level; l>0; l--){
         for(size_t i=0; i<active_points.size(); i++){
             if (level[i] == l){
-                const int* p = work.getIndex(active_points[i]);
+                const int* p = work.getIndex(active_points[i], scratch);
                 for(int j=0; j<num_dimensions; j++) node[j] = rule->getNode(p[j]);
 
                 std::fill(used.begin(), used.end(), false);
@@ -627,7 +788,7 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
                         if ((branch == -1) || used[branch]){
                             monkey_count[current]++;
                         }else{
-                            const int *func = work.getIndex(branch);
+                            const int *func = work.getIndex(branch, scratch_func);
                             basis_value = rule->evalRaw(func[0], node[0]);
                             for(int j=1; j<num_dimensions; j++) basis_value *= rule->evalRaw(func[j], node[j]);
                             weights[branch] -= weights[active_points[i]] * basis_value;
@@ -644,6 +805,117 @@ void GridLocalPolynomial::getInterpolationWeights(const double x[], double *weig
         }
     }
 }
+void GridLocalPolynomial::getInterpolationWeightsSparse(const double x[], int num_x, std::vector<int> &spntr, std::vector<int> &sindx, std::vector<double> &svals) const{
+    const MultiIndexSet &work = (points.empty()) ? needed : points;
+    int num_points = work.getNumIndexes();
+
+    // the supported basis functions come from the same tree search used by evaluateSparseHierarchicalFunctions()
+    std::vector<int> bpntr, bindx;
+    std::vector<double> bvals;
+    buildSpareBasisMatrix(x, num_x, 32, bpntr, bindx, bvals);
+
+    // apply the transpose of the surplus transformation, same as getInterpolationWeights()
+    // but the non-zeros are restricted to the supported points and their ancestors
+    Data2D<int> lparents;
+    if (parents.getNumStrips() != num_points) // if the current dag loaded in parents does not reflect the indexes in work
+        MultiIndexManipulations::computeDAGup(work, rule.get(), lparents);
+
+    const Data2D<int> &dagUp = (parents.getNumStrips() != num_points) ? lparents : parents;
+    int max_parents = rule->getMaxNumParents() * num_dimensions;
+
+    std::vector<std::vector<int>> tindx(num_x);
+    std::vector<std::vector<double>> tvals(num_x);
+
+    #pragma omp parallel
+    {
+        // dense scratch space per thread, only the entries touched by the current row are reset
+        std::vector<double> weights(num_points, 0.0);
+        std::vector<bool> active(num_points, false), used(num_points, false);
+        std::vector<int> visited, level(num_points), order;
+        std::vector<int> monkey_count(top_level+1);
+        std::vector<int> monkey_tail(top_level+1);
+        std::vector<double> node(num_dimensions);
+        std::vector<int> scratch, scratch_func; // used only by compact sets
+
+        #pragma omp for
+        for(int i=0; i<num_x; i++){
+            std::vector<int> &row = tindx[i];
+            row.assign(bindx.begin() + bpntr[i], bindx.begin() + bpntr[i+1]);
+            for(int k=bpntr[i]; k<bpntr[i+1]; k++){
+                const int *p = work.getIndex(bindx[k], scratch);
+                int current_level = rule->getLevel(p[0]);
+                for(int j=1; j<num_dimensions; j++) current_level += rule->getLevel(p[j]);
+                level[bindx[k]] = current_level;
+                weights[bindx[k]] = bvals[k];
+                active[bindx[k]] = true;
+            }
+
+            order = row; // children must be processed before the parents
+            std::sort(order.begin(), order.end(), [&](int a, int b)->bool{ return (level[a] > level[b]); });
+
+            for(auto a : order){
+                if (level[a] == 0) break;
+                const int* p = work.getIndex(a, scratch);
+                for(int j=0; j<num_dimensions; j++) node[j] = rule->getNode(p[j]);
+
+                monkey_count[0] = 0;
+                monkey_tail[0] = a;
+                int current = 0;
+
+                while(monkey_count[0] < max_parents){
+                    if (monkey_count[current] < max_parents){
+                        int branch = dagUp.getCStrip(monkey_tail[current])[monkey_count[current]];
+                        if ((branch == -1) || used[branch]){
+                            monkey_count[current]++;
+                        }else{
+                            const int *func = work.getIndex(branch, scratch_func);
+                            double basis_value = rule->evalRaw(func[0], node[0]);
+                            for(int j=1; j<num_dimensions; j++) basis_value *= rule->evalRaw(func[j], node[j]);
+                            weights[branch] -= weights[a] * basis_value;
+                            used[branch] = true;
+                            visited.push_back(branch);
+                            if (!active[branch]){
+                                active[branch] = true;
+                                row.push_back(branch);
+                            }
+
+                            monkey_count[++current] = 0;
+                            monkey_tail[current] = branch;
+                        }
+                    }else{
+                        monkey_count[--current]++;
+                    }
+                }
+                for(auto v : visited) used[v] = false;
+                visited.clear();
+            }
+
+            std::sort(row.begin(), row.end());
+            tvals[i].resize(row.size());
+            auto iv = tvals[i].begin();
+            for(auto r : row){
+                *iv++ = weights[r];
+                weights[r] = 0.0;
+                active[r] = false;
+            }
+        }
+    }
+
+    spntr.resize(num_x + 1);
+    int nz = 0;
+    for(int i=0; i<num_x; i++){
+        spntr[i] = nz;
+        nz += (int) tindx[i].size();
+    }
+    spntr[num_x] = nz;
+
+    sindx.resize(nz);
+    svals.resize(nz);
+    auto ii = sindx.begin();
+    for(auto &idx : tindx) for(auto i: idx) *ii++ = i;
+    auto iv = svals.begin();
+    for(auto &vls : tvals) for(auto v: vls) *iv++ = v;
+}
 
 void GridLocalPolynomial::evaluateHierarchicalFunctions(const double x[], int num_x, double y[]) const{
     const MultiIndexSet &work = (points.empty()) ? needed : points;
@@ -655,8 +927,9 @@ void GridLocalPolynomial::evaluateHierarchicalFunctions(const double x[], int nu
         const double *this_x = xx.getCStrip(i);
         double *this_y = yy.getStrip(i);
         bool dummy;
+        std::vector<int> scratch; // used only by compact sets
         for(int j=0; j<num_points; j++){
-            this_y[j] = evalBasisSupported(work.getIndex(j), this_x, dummy);
+            this_y[j] = evalBasisSupported(work.getIndex(j, scratch), this_x, dummy);
         }
     }
 }
@@ -888,7 +1161,8 @@ void GridLocalPolynomial::buildTree(){
     std::vector<int> level(num_points);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = work.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = work.getIndex(i, scratch);
         int current_level =rule->getLevel(p[0]);
         for(int j=1; j<num_dimensions; j++){
             current_level += rule->getLevel(p[j]);
@@ -906,6 +1180,7 @@ void GridLocalPolynomial::buildTree(){
     std::vector<int>  tree(max_kids * num_points, -1);
     std::vector<bool> free(num_points, true);
     std::vector<int>  kid(num_dimensions);
+    std::vector<int>  scratch;
 
     int next_root = 0;
     roots.resize(0);
@@ -920,7 +1195,7 @@ void GridLocalPolynomial::buildTree(){
 
         while(monkey_count[0] < max_kids){
             if (monkey_count[current] < max_kids){
-                const int *p = work.getIndex(monkey_tail[current]);
+                const int *p = work.getIndex(monkey_tail[current], scratch);
 
                 int dir = monkey_count[current] / max_1d_kids;
                 int ikid = rule->getKid(p[dir], monkey_count[current] % max_1d_kids);
@@ -971,6 +1246,8 @@ void GridLocalPolynomial::buildTree(){
             if (t > -1) indx[count++] = t;
         }
     }
+
+    buildSupportIndex();
 }
 
 void GridLocalPolynomial::getBasisIntegrals(double *integrals) const{
@@ -984,8 +1261,9 @@ void GridLocalPolynomial::getBasisIntegrals(double *integrals) const{
         OneDimensionalNodes::getGaussLegendre(n, w, x);
     }
 
+    std::vector<int> scratch; // used only by compact sets
     for(int i=0; i<work.getNumIndexes(); i++){
-        const int* p = work.getIndex(i);
+        const int* p = work.getIndex(i, scratch);
         integrals[i] = rule->getArea(p[0], n, w.data(), x.data());
         for(int j=1; j<num_dimensions; j++){
             integrals[i] *= rule->getArea(p[j], n, w.data(), x.data());
@@ -1009,8 +1287,9 @@ void GridLocalPolynomial::getQuadratureWeights(double *weights) const{
 
     int num_points = work.getNumIndexes();
     std::vector<int> level(num_points);
+    std::vector<int> scratch, scratch_func; // used only by compact sets
     for(int i=0; i<num_points; i++){
-        const int *p = work.getIndex(i);
+        const int *p = work.getIndex(i, scratch);
         level[i] = rule->getLevel(p[0]);
         for(int j=1; j<num_dimensions; j++){
             level[i] += rule->getLevel(p[j]);
@@ -1023,7 +1302,7 @@ void GridLocalPolynomial::getQuadratureWeights(double *weights) const{
     for(int l=top_level; l>0; l--){
         for(int i=0; i<num_points; i++){
             if (level[i] == l){
-                const int* p = work.getIndex(i);
+                const int* p = work.getIndex(i, scratch);
                 for(int j=0; j<num_dimensions; j++) node[j] = rule->getNode(p[j]);
 
                 std::vector<bool> used(work.getNumIndexes(), false);
@@ -1038,7 +1317,7 @@ void GridLocalPolynomial::getQuadratureWeights(double *weights) const{
                         if ((branch == -1) || used[branch]){
                             monkey_count[current]++;
                         }else{
-                            const int *func = work.getIndex(branch);
+                            const int *func = work.getIndex(branch, scratch_func);
                             basis_value = rule->evalRaw(func[0], node[0]);
                             for(int j=1; j<num_dimensions; j++) basis_value *= rule->evalRaw(func[j], node[j]);
                             weights[branch] -= weights[i] * basis_value;
@@ -1263,7 +1542,7 @@ void GridLocalPolynomial::addChildLimited(const int point[], int direction, cons
 
 void GridLocalPolynomial::clearRefinement(){ needed = MultiIndexSet(); }
 const double* GridLocalPolynomial::getSurpluses() const{
-    return surpluses.getVector()->data();
+    return surpluses.getCStrip(0);
 }
 const int* GridLocalPolynomial::getPointIndexes() const{
     return ((points.empty()) ? needed.getIndex(0) : points.getIndex(0));
@@ -1388,6 +1667,7 @@ void GridLocalPolynomial::setHierarchicalCoefficients(const double c[], TypeAcce
     if (points.empty()){
         points = std::move(needed);
         needed = MultiIndexSet();
+        buildSupportIndex(); // the tree is already built for the same points
     }else{
         clearRefinement();
     }
@@ -1412,6 +1692,14 @@ void GridLocalPolynomial::setHierarchicalCoefficients(const double c[], TypeAcce
     }
 }
 
+void GridLocalPolynomial::compactIndexes(){
+    points.compact();
+    needed.compact();
+}
+int GridLocalPolynomial::getIndexEntryBytes() const{
+    return ((points.empty()) ? needed : points).getEntryBytes();
+}
+
 void GridLocalPolynomial::clearAccelerationData(){
     #ifdef Tasmanian_ENABLE_CUDA
     cuda_engine.reset();
@@ -1419,6 +1707,46 @@ void GridLocalPolynomial::clearAccelerationData(){
     #endif
 }
 
+void GridLocalPolynomial::setSupportIndex(bool use){
+    use_support_index = use;
+    buildSupportIndex();
+}
+void GridLocalPolynomial::buildSupportIndex(){
+    tree_direction = std::vector<int>();
+    support_left = std::vector<double>();
+    support_right = std::vector<double>();
+    if (!use_support_index || points.empty()) return; // evaluate() requires loaded points, the index is built by loadNeededPoints()
+
+    int num_points = points.getNumIndexes();
+    tree_direction.resize(indx.size());
+    #pragma omp parallel for
+    for(int i=0; i<num_points; i++){
+        std::vector<int> scratch_dad, scratch; // used only by compact sets
+        const int *dad = points.getIndex(i, scratch_dad);
+        for(int c=pntr[i]; c<pntr[i+1]; c++){
+            const int *kid = points.getIndex(indx[c], scratch);
+            int dir = 0;
+            while(kid[dir] == dad[dir]) dir++;
+            tree_direction[c] = dir;
+        }
+    }
+
+    int num_1d = 1;
+    std::vector<int> scratch;
+    for(int i=0; i<num_points; i++){
+        const int *p = points.getIndex(i, scratch);
+        num_1d = std::max(num_1d, 1 + *std::max_element(p, p + num_dimensions));
+    }
+    support_left.resize(num_1d);
+    support_right.resize(num_1d);
+    for(int i=0; i<num_1d; i++){
+        rule->getSupportInterval(i, support_left[i], support_right[i]);
+        // pad the interval to account for rounding in evalSupport(), the index must never reject a supported point
+        double pad = 1.E-12 * (1.0 + support_right[i] - support_left[i]);
+        support_left[i] -= pad;
+        support_right[i] += pad;
+    }
+}
 void GridLocalPolynomial::setFavorSparse(bool favor){
     // sparse_affinity == -1: use dense algorithms
     // sparse_affinity ==  1: use sparse algorithms
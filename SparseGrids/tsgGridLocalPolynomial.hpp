@@ -66,11 +66,11 @@ public:
 
     bool isLocalPolynomial() const{ return true; }
 
-    void write(std::ofstream &ofs) const;
-    void read(std::ifstream &ifs);
+    void write(std::ostream &ofs) const;
+    void read(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const;
+    void readBinary(std::istream &ifs);
 
     void makeGrid(int cnum_dimensions, int cnum_outputs, int depth, int corder, TypeOneDRule crule, const std::vector<int> &level_limits);
     void copyGrid(const GridLocalPolynomial *pwpoly);
@@ -90,6 +90,7 @@ public:
 
     void getQuadratureWeights(double weights[]) const;
     void getInterpolationWeights(const double x[], double weights[]) const;
+    void getInterpolationWeightsSparse(const double x[], int num_x, std::vector<int> &spntr, std::vector<int> &sindx, std::vector<double> &svals) const;
 
     void loadNeededPoints(const double *vals, TypeAcceleration acc = accel_none);
 
@@ -123,8 +124,12 @@ public:
     void evaluateHierarchicalFunctions(const double x[], int num_x, double y[]) const;
     void setHierarchicalCoefficients(const double c[], TypeAcceleration acc);
 
+    void compactIndexes();
+    int getIndexEntryBytes() const;
     void clearAccelerationData();
     void setFavorSparse(bool favor);
+    void setSupportIndex(bool use); // builds or drops the index used by evaluate(), see buildSupportIndex()
+    bool isUsingSupportIndex() const{ return use_support_index; }
 
     const double* getSurpluses() const;
     const int* getPointIndexes() const;
@@ -153,6 +158,38 @@ protected:
 
     void buildTree();
 
+    //! \internal
+    //! \brief Evaluates the surrogate at a batch of points walking the tree one level at a time
+    //! \ingroup TasmanianLocalPolynomialGrids
+
+    //! Each level of the tree is processed for all points together, each node visits only the points supported by its parent,
+    //! which replaces **num_x** independent traversals with a few contiguous loops per node.
+    //! The result is the same as **evaluate()** up to the order of the floating point additions.
+    void evaluateBatchLevels(const double x[], int num_x, double y[]) const;
+
+    //! \internal
+    //! \brief Number of points handled by each call to **evaluateBatchLevels()** in **evaluateBatch()**, i.e., the chunk given to each thread
+    //! \ingroup TasmanianLocalPolynomialGrids
+    static const int batch_traversal_chunk = 256;
+
+    //! \internal
+    //! \brief Builds the index used by **evaluateIndexed()**, called by **buildTree()** and **setSupportIndex()**
+    //! \ingroup TasmanianLocalPolynomialGrids
+
+    //! The index holds the direction in which each node of the tree differs from its parent,
+    //! and the interval of the support for each one dimensional index.
+    //! The memory is one `int` per node and two `double` values per one dimensional index.
+    void buildSupportIndex();
+
+    //! \internal
+    //! \brief Same as **evaluate()** but the tree walk uses the index built by **buildSupportIndex()**
+    //! \ingroup TasmanianLocalPolynomialGrids
+
+    //! Most kids in the tree are not supported, each one is rejected with two comparisons against the interval of the support
+    //! in the direction that differs from the parent. The basis of a supported kid is computed from the value of the parent
+    //! and a single one dimensional function, instead of the product over all dimensions.
+    void evaluateIndexed(const double x[], double y[]) const;
+
     void recomputeSurpluses();
 
     void buildSparseMatrixBlockForm(const double x[], int num_x, int num_chunk, std::vector<int> &numnz,
@@ -174,11 +211,12 @@ protected:
 
         bool isSupported;
         int p;
+        std::vector<int> scratch; // used only by compact sets
 
         num_nz = 0;
 
         for(const auto &r : roots){
-            double basis_value = evalBasisSupported(work.getIndex(r), x, isSupported);
+            double basis_value = evalBasisSupported(work.getIndex(r, scratch), x, isSupported);
 
             if (isSupported){
                 if (mode == 1){
@@ -197,7 +235,7 @@ protected:
                 while(monkey_count[0] < pntr[monkey_tail[0]+1]){
                     if (monkey_count[current] < pntr[monkey_tail[current]+1]){
                         p = indx[monkey_count[current]];
-                        basis_value = evalBasisSupported(work.getIndex(p), x, isSupported);
+                        basis_value = evalBasisSupported(work.getIndex(p, scratch), x, isSupported);
                         if (isSupported){
                             if (mode == 1){
                                 sindx[num_nz] = p;
@@ -304,8 +342,9 @@ protected:
     // synchronize with tasgpu_devalpwpoly_feval
     template<int order, TypeOneDRule crule>
     void encodeSupportForGPU(const MultiIndexSet &work, double *cpu_support) const{
+        std::vector<int> scratch;
         for(int i=0; i<work.getNumIndexes(); i++){
-            const int* p = work.getIndex(i);
+            const int* p = work.getIndex(i, scratch);
             for(int j=0; j<num_dimensions; j++){
                 cpu_support[i*num_dimensions + j] = rule->getSupport(p[j]);
                 if (order != 0){
@@ -330,8 +369,9 @@ protected:
     template<int order, TypeOneDRule crule>
     void encodeSupportForGPU(const MultiIndexSet &work, Data2D<double> &cpu_support) const{
         cpu_support.resize(num_dimensions, work.getNumIndexes());
+        std::vector<int> scratch;
         for(int i=0; i<work.getNumIndexes(); i++){
-            const int* p = work.getIndex(i);
+            const int* p = work.getIndex(i, scratch);
             double *s = cpu_support.getStrip(i);
             for(int j=0; j<num_dimensions; j++){
                 s[j] = rule->getSupport(p[j]);
@@ -354,7 +394,7 @@ protected:
         }
     }
     void loadCudaData() const{
-        cuda_surpluses.load(*(surpluses.getVector()));
+        cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
         std::vector<double> cpu_nodes(((size_t) getNumPoints()) * ((size_t) num_dimensions));
         getPoints(cpu_nodes.data());
         cuda_nodes.load(cpu_nodes);
@@ -417,6 +457,11 @@ private:
 
     int sparse_affinity;
 
+    // optional index for the tree walk in evaluate()
+    bool use_support_index;
+    std::vector<int> tree_direction; // direction in which indx[i] differs from the parent
+    std::vector<double> support_left, support_right; // the support of each one dimensional index
+
     #ifdef Tasmanian_ENABLE_CUDA
     mutable LinearAlgebraEngineGPU cuda_engine;
     mutable cudaDoubles cuda_surpluses, cuda_nodes, cuda_support;
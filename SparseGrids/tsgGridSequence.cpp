@@ -42,7 +42,7 @@ namespace TasGrid{
 GridSequence::GridSequence() : num_dimensions(0), num_outputs(0){}
 GridSequence::~GridSequence(){}
 
-void GridSequence::write(std::ofstream &ofs) const{
+void GridSequence::write(std::ostream &ofs) const{
     using std::endl;
 
     ofs << std::scientific; ofs.precision(17);
@@ -61,17 +61,18 @@ void GridSequence::write(std::ofstream &ofs) const{
             ofs << "1 ";
             needed.write(ofs);
         }
-        if (surpluses.empty()){
+        if (surpluses.getTotalEntries() == 0){
             ofs << "0";
         }else{
             ofs << "1";
-            for(auto s : surpluses) ofs << " " << s;
+            const double *s = surpluses.getCStrip(0);
+            for(size_t i=0; i<surpluses.getTotalEntries(); i++) ofs << " " << s[i];
         }
         ofs << endl;
         if (num_outputs > 0) values.write(ofs);
     }
 }
-void GridSequence::writeBinary(std::ofstream &ofs) const{
+void GridSequence::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
     int num_dim_out[2];
     num_dim_out[0] = num_dimensions;
     num_dim_out[1] = num_outputs;
@@ -85,24 +86,27 @@ void GridSequence::writeBinary(std::ofstream &ofs) const{
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            points.writeBinary(ofs);
+            points.writeBinary(ofs, packed_indexes, aligned);
         }
         if (needed.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            needed.writeBinary(ofs);
+            needed.writeBinary(ofs, packed_indexes);
         }
-        if (surpluses.empty()){
+        if (surpluses.getTotalEntries() == 0){
             flag = 'n'; ofs.write(&flag, sizeof(char));
+        }else if (aligned){
+            flag = 'a'; ofs.write(&flag, sizeof(char));
+            IO::writeAligned(ofs, surpluses.getTotalEntries(), surpluses.getCStrip(0));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            ofs.write((char*) surpluses.data(), surpluses.size() * sizeof(double));
+            ofs.write((char*) surpluses.getCStrip(0), surpluses.getTotalEntries() * sizeof(double));
         }
-        if (num_outputs > 0) values.writeBinary(ofs);
+        if (num_outputs > 0) values.writeBinary(ofs, aligned);
     }
 }
-void GridSequence::read(std::ifstream &ifs){
+void GridSequence::read(std::istream &ifs){
     reset();
     ifs >> num_dimensions >> num_outputs;
     if (num_dimensions > 0){
@@ -114,15 +118,15 @@ void GridSequence::read(std::ifstream &ifs){
         ifs >> flag;  if (flag == 1) needed.read(ifs);
         ifs >> flag;
         if (flag == 1){
-            surpluses.resize(((size_t) num_outputs) * ((size_t) points.getNumIndexes()));
-            for(auto &s : surpluses) ifs >> s;
+            surpluses.resize(num_outputs, points.getNumIndexes());
+            for(auto &s : *surpluses.getVector()) ifs >> s;
         }
         if (num_outputs > 0) values.read(ifs);
 
         prepareSequence();
     }
 }
-void GridSequence::readBinary(std::ifstream &ifs){
+void GridSequence::readBinary(std::istream &ifs){
     reset();
     int num_dim_out[2];
     ifs.read((char*) num_dim_out, 2*sizeof(int));
@@ -138,8 +142,10 @@ void GridSequence::readBinary(std::ifstream &ifs){
 
         ifs.read((char*) &flag, sizeof(char));
         if (flag == 'y'){
-            surpluses.resize(((size_t) num_outputs) * ((size_t) points.getNumIndexes()));
-            ifs.read((char*) surpluses.data(), surpluses.size() * sizeof(double));
+            surpluses.resize(num_outputs, points.getNumIndexes());
+            ifs.read((char*) surpluses.getStrip(0), surpluses.getTotalEntries() * sizeof(double));
+        }else if (flag == 'a'){ // aligned section, stays in the file when using readMapped()
+            surpluses.readAligned(ifs, num_outputs, points.getNumIndexes());
         }
 
         if (num_outputs > 0) values.readBinary(ifs);
@@ -155,8 +161,7 @@ void GridSequence::reset(){
     values = StorageSet();
     nodes.clear();
     coeff.clear();
-    surpluses.resize(0);
-    surpluses.shrink_to_fit();
+    surpluses.clear();
 }
 void GridSequence::clearRefinement(){ needed = MultiIndexSet(); }
 
@@ -191,7 +196,10 @@ void GridSequence::copyGrid(const GridSequence *seq){
         needed = seq->needed;
         prepareSequence();
     }
-    surpluses = seq->surpluses;
+    if (seq->surpluses.getTotalEntries() > 0){
+        surpluses.resize(num_outputs, seq->surpluses.getNumStrips());
+        std::copy_n(seq->surpluses.getCStrip(0), surpluses.getTotalEntries(), surpluses.getStrip(0));
+    }
 }
 
 void GridSequence::setPoints(MultiIndexSet &pset, int cnum_outputs, TypeOneDRule crule){
@@ -249,7 +257,8 @@ void GridSequence::getLoadedPoints(double *x) const{
     split.load(num_dimensions, num_points, x);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = points.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = points.getIndex(i, scratch);
         double *xx = split.getStrip(i);
         for(int j=0; j<num_dimensions; j++){
             xx[j] = nodes[p[j]];
@@ -262,7 +271,8 @@ void GridSequence::getNeededPoints(double *x) const{
     split.load(num_dimensions, num_points, x);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = needed.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = needed.getIndex(i, scratch);
         double *xx = split.getStrip(i);
         for(int j=0; j<num_dimensions; j++){
             xx[j] = nodes[p[j]];
@@ -278,8 +288,9 @@ void GridSequence::getQuadratureWeights(double *weights) const{
     std::vector<double> integ;
     cacheBasisIntegrals(integ);
     int n = work.getNumIndexes();
+    std::vector<int> scratch; // used only by compact sets
     for(int i=0; i<n; i++){
-        const int* p = work.getIndex(i);
+        const int* p = work.getIndex(i, scratch);
         weights[i] = integ[p[0]];
         for(int j=1; j<num_dimensions; j++){
             weights[i] *= integ[p[j]];
@@ -295,8 +306,9 @@ void GridSequence::getInterpolationWeights(const double x[], double *weights) co
     const MultiIndexSet& work = (points.empty()) ? needed : points;
     int n = work.getNumIndexes();
     weights[0] = 1.0;
+    std::vector<int> scratch; // used only by compact sets
     for(int i=1; i<n; i++){
-        const int* p = work.getIndex(i);
+        const int* p = work.getIndex(i, scratch);
         weights[i] = cache[0][p[0]];
         for(int j=1; j<num_dimensions; j++){
             weights[i] *= cache[j][p[j]];
@@ -338,9 +350,8 @@ void GridSequence::mergeRefinement(){
         needed = MultiIndexSet();
         prepareSequence();
     }
-    surpluses.resize(num_vals);
-    surpluses.shrink_to_fit();
-    std::fill(surpluses.begin(), surpluses.end(), 0.0);
+    surpluses.clear();
+    surpluses.resize(num_outputs, num_all_points, 0.0);
 }
 
 void GridSequence::evaluate(const double x[], double y[]) const{
@@ -352,10 +363,11 @@ void GridSequence::evaluate(const double x[], double y[]) const{
     int num_points = points.getNumIndexes();
 
     Data2D<double> surps;
-    surps.cload(num_outputs, num_points, surpluses.data());
+    surps.cload(num_outputs, num_points, surpluses.getCStrip(0));
 
+    std::vector<int> scratch; // used only by compact sets
     for(int i=0; i<num_points; i++){
-        const int* p = points.getIndex(i);
+        const int* p = points.getIndex(i, scratch);
         const double *s = surps.getCStrip(i);
         double basis_value = cache[0][p[0]];
         for(int j=1; j<num_dimensions; j++){
@@ -379,20 +391,20 @@ void GridSequence::evaluateBatch(const double x[], int num_x, double y[]) const{
 void GridSequence::evaluateFastCPUblas(const double x[], double y[]) const{
     std::vector<double> fvalues(getNumPoints());
     evalHierarchicalFunctions(x, fvalues.data());
-    TasBLAS::dgemv(num_outputs, points.getNumIndexes(), surpluses.data(), fvalues.data(), y);
+    TasBLAS::dgemv(num_outputs, points.getNumIndexes(), surpluses.getCStrip(0), fvalues.data(), y);
 }
 void GridSequence::evaluateBatchCPUblas(const double x[], int num_x, double y[]) const{
     int num_points = points.getNumIndexes();
     Data2D<double> weights; weights.resize(num_points, num_x);
     evaluateHierarchicalFunctions(x, num_x, weights.getStrip(0));
 
-    TasBLAS::dgemm(num_outputs, num_x, num_points, 1.0, surpluses.data(), weights.getStrip(0), 0.0, y);
+    TasBLAS::dgemm(num_outputs, num_x, num_points, 1.0, surpluses.getCStrip(0), weights.getStrip(0), 0.0, y);
 }
 #endif // Tasmanian_ENABLE_BLAS
 
 #ifdef Tasmanian_ENABLE_CUDA
 void GridSequence::evaluateFastGPUcublas(const double x[], double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses);
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
 
     std::vector<double> hweights(points.getNumIndexes());
     evalHierarchicalFunctions(x, hweights.data());
@@ -401,7 +413,7 @@ void GridSequence::evaluateFastGPUcublas(const double x[], double y[]) const{
 }
 void GridSequence::evaluateFastGPUcuda(const double x[], double y[]) const{ evaluateFastGPUcublas(x, y); }
 void GridSequence::evaluateBatchGPUcublas(const double x[], int num_x, double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses);
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
 
     Data2D<double> hweights; hweights.resize(points.getNumIndexes(), num_x);
     evaluateHierarchicalFunctions(x, num_x, hweights.getStrip(0));
@@ -409,7 +421,7 @@ void GridSequence::evaluateBatchGPUcublas(const double x[], int num_x, double y[
     cuda_engine.cublasDGEMM(num_outputs, num_x, points.getNumIndexes(), 1.0, cuda_surpluses, *(hweights.getVector()), 0.0, y);
 }
 void GridSequence::evaluateBatchGPUcuda(const double x[], int num_x, double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses);
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
     loadCudaNodes();
 
     int num_points = points.getNumIndexes();
@@ -426,7 +438,7 @@ void GridSequence::evaluateBatchGPUcuda(const double x[], int num_x, double y[])
 
 #ifdef Tasmanian_ENABLE_MAGMA
 void GridSequence::evaluateFastGPUmagma(int gpuID, const double x[], double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses);
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
 
     std::vector<double> hweights((size_t) points.getNumIndexes());
     evalHierarchicalFunctions(x, hweights.data());
@@ -434,7 +446,7 @@ void GridSequence::evaluateFastGPUmagma(int gpuID, const double x[], double y[])
     cuda_engine.magmaCudaDGEMM(gpuID, num_outputs, 1, points.getNumIndexes(), 1.0, cuda_surpluses, hweights, 0.0, y);
 }
 void GridSequence::evaluateBatchGPUmagma(int gpuID, const double x[], int num_x, double y[]) const{
-    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses);
+    if (cuda_surpluses.size() == 0) cuda_surpluses.load(surpluses.getTotalEntries(), surpluses.getCStrip(0));
     loadCudaNodes();
 
     int num_points = points.getNumIndexes();
@@ -454,7 +466,7 @@ void GridSequence::integrate(double q[], double *conformal_correction) const{
     std::fill(q, q + num_outputs, 0.0);
 
     Data2D<double> surp;
-    surp.cload(num_outputs, num_points, surpluses.data());
+    surp.cload(num_outputs, num_points, surpluses.getCStrip(0));
 
     // for sequence grids, quadrature weights are expensive,
     // if using simple integration use the basis integral + surpluses, which is fast
@@ -462,8 +474,9 @@ void GridSequence::integrate(double q[], double *conformal_correction) const{
     if (conformal_correction == 0){
         std::vector<double> integ;
         cacheBasisIntegrals(integ);
+        std::vector<int> scratch; // used only by compact sets
         for(int i=0; i<num_points; i++){
-            const int* p = points.getIndex(i);
+            const int* p = points.getIndex(i, scratch);
             double w = integ[p[0]];
             const double *s = surp.getCStrip(i);
             for(int j=1; j<num_dimensions; j++){
@@ -502,8 +515,9 @@ void GridSequence::evalHierarchicalFunctions(const double x[], double fvalues[])
     std::vector<std::vector<double>> cache;
     cacheBasisValues<double>(x, cache);
 
+    std::vector<int> scratch; // used only by compact sets
     for(int i=0; i<num_points; i++){
-        const int* p = work.getIndex(i);
+        const int* p = work.getIndex(i, scratch);
         fvalues[i] = cache[0][p[0]];
         for(int j=1; j<num_dimensions; j++){
             fvalues[i] *= cache[j][p[j]];
@@ -532,8 +546,8 @@ void GridSequence::setHierarchicalCoefficients(const double c[], TypeAcceleratio
     }
     vals = values.aliasValues();
     vals->resize(num_vals);
-    surpluses.resize(num_vals);
-    std::copy_n(c, num_vals, surpluses.data());
+    surpluses.resize(num_outputs, (int) num_ponits);
+    std::copy_n(c, num_vals, surpluses.getStrip(0));
     std::vector<double> x(((size_t) getNumPoints()) * ((size_t) num_dimensions));
     getPoints(x.data());
     switch(acc){
@@ -565,7 +579,7 @@ void GridSequence::estimateAnisotropicCoefficients(TypeDepth type, int output, s
             }
         }
         Data2D<double> surp;
-        surp.cload(num_outputs, num_points, surpluses.data());
+        surp.cload(num_outputs, num_points, surpluses.getCStrip(0));
         #pragma omp parallel for
         for(int i=0; i<num_points; i++){
             const double *s = surp.getCStrip(i);
@@ -578,7 +592,7 @@ void GridSequence::estimateAnisotropicCoefficients(TypeDepth type, int output, s
         }
     }else{
         Data2D<double> surp;
-        surp.cload(num_outputs, num_points, surpluses.data());
+        surp.cload(num_outputs, num_points, surpluses.getCStrip(0));
         int i = 0;
         for(auto &m : max_surp) m = surp.getCStrip(i++)[output];
     }
@@ -695,7 +709,7 @@ void GridSequence::setSurplusRefinement(double tolerance, int output, const std:
     }
 
     Data2D<double> surp;
-    surp.cload(num_outputs, num_points, surpluses.data());
+    surp.cload(num_outputs, num_points, surpluses.getCStrip(0));
 
     if (output == -1){
         for(int i=0; i<num_points; i++){
@@ -737,7 +751,7 @@ void GridSequence::getPolynomialSpace(bool interpolation, int &n, int* &poly) co
     std::copy(result.getVector()->begin(), result.getVector()->end(), poly);
 }
 const double* GridSequence::getSurpluses() const{
-    return surpluses.data();
+    return surpluses.getCStrip(0);
 }
 const int* GridSequence::getPointIndexes() const{
     return ((points.empty()) ? needed.getIndex(0) : points.getIndex(0));
@@ -757,18 +771,22 @@ void GridSequence::prepareSequence(){
     max_level++;
 
     if ((size_t) max_level > nodes.size()){
-        if (rule == rule_leja){
-            Optimizer::getGreedyNodes<rule_leja>(max_level, nodes);
-        }else if (rule == rule_maxlebesgue){
-            Optimizer::getGreedyNodes<rule_maxlebesgue>(max_level, nodes);
-        }else if (rule == rule_minlebesgue){
-            Optimizer::getGreedyNodes<rule_minlebesgue>(max_level, nodes);
-        }else if (rule == rule_mindelta){
-            Optimizer::getGreedyNodes<rule_mindelta>(max_level, nodes);
-        }else if (rule == rule_rleja){
-            OneDimensionalNodes::getRLeja(max_level, nodes);
-        }else if (rule == rule_rlejashifted){
-            OneDimensionalNodes::getRLejaShifted(max_level, nodes);
+        // the sequence rules are nested, any prefix of the cached nodes is the same as a new computation
+        if (!OneDimensionalRuleCache::copySequenceNodes(rule, max_level, nodes)){
+            if (rule == rule_leja){
+                Optimizer::getGreedyNodes<rule_leja>(max_level, nodes);
+            }else if (rule == rule_maxlebesgue){
+                Optimizer::getGreedyNodes<rule_maxlebesgue>(max_level, nodes);
+            }else if (rule == rule_minlebesgue){
+                Optimizer::getGreedyNodes<rule_minlebesgue>(max_level, nodes);
+            }else if (rule == rule_mindelta){
+                Optimizer::getGreedyNodes<rule_mindelta>(max_level, nodes);
+            }else if (rule == rule_rleja){
+                OneDimensionalNodes::getRLeja(max_level, nodes);
+            }else if (rule == rule_rlejashifted){
+                OneDimensionalNodes::getRLejaShifted(max_level, nodes);
+            }
+            OneDimensionalRuleCache::storeSequenceNodes(rule, nodes);
         }
     }
     coeff.resize((size_t) max_level);
@@ -815,10 +833,11 @@ double GridSequence::evalBasis(const int f[], const int p[]) const{
 
 void GridSequence::recomputeSurpluses(){
     int num_points = points.getNumIndexes();
-    surpluses = *(values.aliasValues());
+    surpluses.resize(num_outputs, num_points);
+    std::copy_n(values.getValues(0), surpluses.getTotalEntries(), surpluses.getStrip(0));
 
     Data2D<double> surp;
-    surp.load(num_outputs, num_points, surpluses.data());
+    surp.load(num_outputs, num_points, surpluses.getStrip(0));
 
     std::vector<int> level;
     MultiIndexManipulations::computeLevels(points, level);
@@ -884,9 +903,11 @@ void GridSequence::applyTransformationTransposed(double weights[]) const{
     std::vector<bool> used(num_points);
 
     for(int l=top_level; l>0; l--){
+        std::vector<int> scratch; // used only by compact sets
+        std::vector<int> scratch_func; // used only by compact sets
         for(int i=0; i<num_points; i++){
             if (level[i] == l){
-                const int* p = work.getIndex(i);
+                const int* p = work.getIndex(i, scratch);
                 int current = 0;
 
                 monkey_count[0] = 0;
@@ -899,7 +920,7 @@ void GridSequence::applyTransformationTransposed(double weights[]) const{
                         if ((branch == -1) || used[branch]){
                             monkey_count[current]++;
                         }else{
-                            weights[branch] -= weights[i] * evalBasis(work.getIndex(branch), p);
+                            weights[branch] -= weights[i] * evalBasis(work.getIndex(branch, scratch_func), p);
                             used[branch] = true;
 
                             monkey_count[++current] = 0;
@@ -914,6 +935,14 @@ void GridSequence::applyTransformationTransposed(double weights[]) const{
     }
 }
 
+void GridSequence::compactIndexes(){
+    points.compact();
+    needed.compact();
+}
+int GridSequence::getIndexEntryBytes() const{
+    return ((points.empty()) ? needed : points).getEntryBytes();
+}
+
 void GridSequence::clearAccelerationData(){
     #ifdef Tasmanian_ENABLE_CUDA
     cuda_engine.reset();
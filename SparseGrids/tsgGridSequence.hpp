@@ -53,11 +53,11 @@ public:
 
     bool isSequence() const{ return true; }
 
-    void write(std::ofstream &ofs) const;
-    void read(std::ifstream &ifs);
+    void write(std::ostream &ofs) const;
+    void read(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const;
+    void readBinary(std::istream &ifs);
 
     void makeGrid(int cnum_dimensions, int cnum_outputs, int depth, TypeDepth type, TypeOneDRule crule, const std::vector<int> &anisotropic_weights, const std::vector<int> &level_limits);
     void copyGrid(const GridSequence *seq);
@@ -123,6 +123,8 @@ public:
     const double* getSurpluses() const;
     const int* getPointIndexes() const;
 
+    void compactIndexes();
+    int getIndexEntryBytes() const;
     void clearAccelerationData();
 
 protected:
@@ -171,7 +173,7 @@ protected:
         Data2D<int> transpoints; transpoints.resize(work->getNumIndexes(), num_dimensions);
         for(int i=0; i<num_points; i++){
             for(int j=0; j<num_dimensions; j++){
-                transpoints.getStrip(j)[i] = work->getIndex(i)[j];
+                transpoints.getStrip(j)[i] = work->getEntry(i, j);
             }
         }
         cuda_points.load(*(transpoints.getVector()));
@@ -191,7 +193,7 @@ private:
     MultiIndexSet points;
     MultiIndexSet needed;
 
-    std::vector<double> surpluses;
+    Data2D<double> surpluses;
     std::vector<double> nodes;
     std::vector<double> coeff;
 
@@ -50,7 +50,7 @@ void GridWavelet::reset(){
     coefficients.clear();
 }
 
-void GridWavelet::write(std::ofstream &ofs) const{
+void GridWavelet::write(std::ostream &ofs) const{
     using std::endl;
 
     ofs << std::scientific; ofs.precision(17);
@@ -66,7 +66,8 @@ void GridWavelet::write(std::ofstream &ofs) const{
             ofs << "0" << endl;
         }else{
             ofs << "1 ";
-            for(auto c: *coefficients.getVector()) ofs << " " << c;
+            const double *c = coefficients.getCStrip(0);
+            for(size_t i=0; i<coefficients.getTotalEntries(); i++) ofs << " " << c[i];
             ofs << endl;
         }
         if (needed.empty()){
@@ -78,7 +79,7 @@ void GridWavelet::write(std::ofstream &ofs) const{
         if (num_outputs > 0) values.write(ofs);
     }
 }
-void GridWavelet::writeBinary(std::ofstream &ofs) const{
+void GridWavelet::writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const{
     int dims[3];
     dims[0] = num_dimensions;
     dims[1] = num_outputs;
@@ -90,24 +91,27 @@ void GridWavelet::writeBinary(std::ofstream &ofs) const{
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            points.writeBinary(ofs);
+            points.writeBinary(ofs, packed_indexes, aligned);
         }
         if (needed.empty()){
             flag = 'n'; ofs.write(&flag, sizeof(char));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
-            needed.writeBinary(ofs);
+            needed.writeBinary(ofs, packed_indexes);
         }
         if (coefficients.getTotalEntries()  == 0){
             flag = 'n'; ofs.write(&flag, sizeof(char));
+        }else if (aligned){
+            flag = 'a'; ofs.write(&flag, sizeof(char));
+            IO::writeAligned(ofs, coefficients.getTotalEntries(), coefficients.getCStrip(0));
         }else{
             flag = 'y'; ofs.write(&flag, sizeof(char));
             ofs.write((char*) coefficients.getCStrip(0), coefficients.getTotalEntries() * sizeof(double));
         }
-        if (num_outputs > 0) values.writeBinary(ofs);
+        if (num_outputs > 0) values.writeBinary(ofs, aligned);
     }
 }
-void GridWavelet::read(std::ifstream &ifs){
+void GridWavelet::read(std::istream &ifs){
     reset();
     ifs >> num_dimensions >> num_outputs >> order;
     if (num_dimensions > 0){
@@ -128,7 +132,7 @@ void GridWavelet::read(std::ifstream &ifs){
     }
     buildInterpolationMatrix();
 }
-void GridWavelet::readBinary(std::ifstream &ifs){
+void GridWavelet::readBinary(std::istream &ifs){
     reset();
     int dims[3];
     ifs.read((char*) dims, 3 * sizeof(int));
@@ -146,6 +150,8 @@ void GridWavelet::readBinary(std::ifstream &ifs){
         if (flag == 'y'){
             coefficients.resize(num_outputs, points.getNumIndexes());
             ifs.read((char*) coefficients.getStrip(0), coefficients.getTotalEntries() * sizeof(double));
+        }else if (flag == 'a'){ // aligned section, stays in the file when using readMapped()
+            coefficients.readAligned(ifs, num_outputs, points.getNumIndexes());
         }
 
         if (num_outputs > 0) values.readBinary(ifs);
@@ -232,7 +238,8 @@ void GridWavelet::getLoadedPoints(double *x) const{
     int num_points = points.getNumIndexes();
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = points.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = points.getIndex(i, scratch);
         for(int j=0; j<num_dimensions; j++){
             x[i*num_dimensions + j] = rule1D.getNode(p[j]);
         }
@@ -242,7 +249,8 @@ void GridWavelet::getNeededPoints(double *x) const{
     int num_points = needed.getNumIndexes();
     #pragma omp parallel for schedule(static)
     for(int i=0; i<num_points; i++){
-        const int *p = needed.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int *p = needed.getIndex(i, scratch);
         for(int j=0; j<num_dimensions; j++){
             x[i*num_dimensions + j] = rule1D.getNode(p[j]);
         }
@@ -257,7 +265,8 @@ void GridWavelet::getQuadratureWeights(double *weights) const{
     int num_points = work.getNumIndexes();
 	#pragma omp parallel for
 	for(int i=0; i<num_points; i++){
-		weights[i] = evalIntegral(work.getIndex(i));
+		std::vector<int> scratch; // used only by compact sets
+		weights[i] = evalIntegral(work.getIndex(i, scratch));
 	}
 	solveTransposed(weights);
 }
@@ -266,7 +275,8 @@ void GridWavelet::getInterpolationWeights(const double x[], double *weights) con
     int num_points = work.getNumIndexes();
 	#pragma omp parallel for
 	for(int i=0; i<num_points; i++){
-        weights[i] = evalBasis(work.getIndex(i), x);
+        std::vector<int> scratch; // used only by compact sets
+        weights[i] = evalBasis(work.getIndex(i, scratch), x);
 	}
 	solveTransposed(weights);
 }
@@ -306,7 +316,8 @@ void GridWavelet::evaluate(const double x[], double y[]) const{
 	std::vector<double> basis_values(num_points);
 	#pragma omp parallel for
 	for(int i=0; i<num_points; i++){
-        basis_values[i] = evalBasis(points.getIndex(i), x);
+        std::vector<int> scratch; // used only by compact sets
+        basis_values[i] = evalBasis(points.getIndex(i, scratch), x);
 	}
 	for(int j=0; j<num_outputs; j++){
         double sum = 0.0;
@@ -349,7 +360,8 @@ void GridWavelet::integrate(double q[], double *conformal_correction) const{
         std::vector<double> basis_integrals(num_points);
         #pragma omp parallel for
         for(int i=0; i<num_points; i++){
-            basis_integrals[i] = evalIntegral(points.getIndex(i));
+            std::vector<int> scratch; // used only by compact sets
+            basis_integrals[i] = evalIntegral(points.getIndex(i, scratch));
         }
         for(int j=0; j<num_outputs; j++){
             double sum = 0.0;
@@ -410,16 +422,18 @@ void GridWavelet::buildInterpolationMatrix(){
     #pragma omp parallel for
     for(int b=0; b<num_blocks; b++){
         int block_end = (b < num_blocks - 1) ? (b+1) * num_chunk : num_points;
+        std::vector<int> scratch; // used only by compact sets
         for(int i=b * num_chunk; i < block_end; i++){
-            const int *p = work.getIndex(i);
+            const int *p = work.getIndex(i, scratch);
             std::vector<double> xi(num_dimensions);
             for(int j = 0; j<num_dimensions; j++) // get the node
                 xi[j] = rule1D.getNode(p[j]);
 
             // loop over the basis functions to see if supported
             int numpntr = 0;
+            std::vector<int> scratch_w; // used only by compact sets
             for(int wi=0; wi<num_points; wi++){
-                const int *w = work.getIndex(wi);
+                const int *w = work.getIndex(wi, scratch_w);
 
                 double v = 1.0;
                 for(int j=0; j<num_dimensions; j++){
@@ -638,8 +652,9 @@ void GridWavelet::evaluateHierarchicalFunctions(const double x[], int num_x, dou
     for(int i=0; i<num_x; i++){
         double *this_y = &(y[i*num_points]);
         const double *this_x = &(x[i*num_dimensions]);
+        std::vector<int> scratch; // used only by compact sets
         for(int j=0; j<num_points; j++){
-            const int* p = work.getIndex(j);
+            const int* p = work.getIndex(j, scratch);
             double v = 1.0;
             for(int k=0; k<num_dimensions; k++){
                 v *= rule1D.eval(p[k], this_x[k]);
@@ -726,6 +741,14 @@ void GridWavelet::setSurplusRefinement(double tolerance, TypeRefinement criteria
     }
 }
 
+void GridWavelet::compactIndexes(){
+    points.compact();
+    needed.compact();
+}
+int GridWavelet::getIndexEntryBytes() const{
+    return ((points.empty()) ? needed : points).getEntryBytes();
+}
+
 void GridWavelet::clearAccelerationData(){}
 
 }
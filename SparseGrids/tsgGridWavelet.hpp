@@ -47,11 +47,11 @@ public:
 
     bool isWavelet() const{ return true; }
 
-    void write(std::ofstream &ofs) const;
-    void read(std::ifstream &ifs);
+    void write(std::ostream &ofs) const;
+    void read(std::istream &ifs);
 
-    void writeBinary(std::ofstream &ofs) const;
-    void readBinary(std::ifstream &ifs);
+    void writeBinary(std::ostream &ofs, bool packed_indexes, bool aligned) const;
+    void readBinary(std::istream &ifs);
 
     void makeGrid(int cnum_dimensions, int cnum_outputs, int depth, int corder, const std::vector<int> &level_limits);
     void copyGrid(const GridWavelet *wav);
@@ -108,6 +108,8 @@ public:
     const double* getSurpluses() const;
     const int* getPointIndexes() const;
 
+    void compactIndexes();
+    int getIndexEntryBytes() const;
     void clearAccelerationData();
 
 protected:
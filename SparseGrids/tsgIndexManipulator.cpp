@@ -71,7 +71,8 @@ void MultiIndexManipulations::computeLevels(const MultiIndexSet &mset, std::vect
     level.resize((size_t) num_indexes);
     #pragma omp parallel for
     for(int i=0; i<num_indexes; i++){
-        const int* p = mset.getIndex(i);
+        std::vector<int> scratch; // used only by compact sets
+        const int* p = mset.getIndex(i, scratch);
         level[i] = std::accumulate(p, p + num_dimensions, 0);
     }
 }
@@ -80,8 +81,9 @@ void MultiIndexManipulations::getMaxIndex(const MultiIndexSet &mset, std::vector
     size_t num_dimensions = (size_t) mset.getNumDimensions();
     max_levels.resize(num_dimensions, 0);
     int n = mset.getNumIndexes();
+    std::vector<int> scratch; // used only by compact sets
     for(int i=0; i<n; i++){
-        const int* t = mset.getIndex(i);
+        const int* t = mset.getIndex(i, scratch);
         for(size_t j=0; j<num_dimensions; j++) if (max_levels[j] < t[j]) max_levels[j] = t[j];
     }
     total_max = *std::max_element(max_levels.begin(), max_levels.end());
@@ -93,8 +95,8 @@ void MultiIndexManipulations::computeDAGup(const MultiIndexSet &mset, Data2D<int
     parents.resize(mset.getNumDimensions(), n);
     #pragma omp parallel for schedule(static)
     for(int i=0; i<n; i++){
-        std::vector<int> dad(num_dimensions);
-        std::copy_n(mset.getIndex(i), num_dimensions, dad.data());
+        std::vector<int> dad(num_dimensions), scratch;
+        std::copy_n(mset.getIndex(i, scratch), num_dimensions, dad.data());
         int *v = parents.getStrip(i);
         for(auto &d : dad){
             d--;
@@ -114,7 +116,8 @@ void MultiIndexManipulations::computeDAGup(const MultiIndexSet &mset, const Base
         int level0_offset = rule->getNumPoints(0);
         #pragma omp parallel for schedule(static)
         for(int i=0; i<num_points; i++){
-            const int *p = mset.getIndex(i);
+            std::vector<int> scratch; // used only by compact sets
+            const int *p = mset.getIndex(i, scratch);
             std::vector<int> dad(num_dimensions);
             std::copy_n(p, num_dimensions, dad.data());
             int *pp = parents.getStrip(i);
@@ -140,7 +143,8 @@ void MultiIndexManipulations::computeDAGup(const MultiIndexSet &mset, const Base
         parents.resize((int) num_dimensions, num_points);
         #pragma omp parallel for schedule(static)
         for(int i=0; i<num_points; i++){
-            const int *p = mset.getIndex(i);
+            std::vector<int> scratch; // used only by compact sets
+            const int *p = mset.getIndex(i, scratch);
             std::vector<int> dad(num_dimensions);
             std::copy_n(p, num_dimensions, dad.data());
             int *pp = parents.getStrip(i);
@@ -206,7 +210,7 @@ void MultiIndexManipulations::removeIndexesByLimit(const std::vector<int> &level
     int num_indexes = mset.getNumIndexes();
     std::vector<int> keep;
     keep.reserve((size_t) num_indexes);
-    auto imset = mset.getVector()->begin();
+    const int *imset = mset.getIndex(0);
     for(int i=0; i<num_indexes; i++){
         bool obey = true;
         for(auto l : level_limits){
@@ -365,7 +369,7 @@ void MultiIndexManipulations::createActiveTensors(const MultiIndexSet &mset, con
     std::vector<int> indexes(nz_weights * num_dimensions);
     nz_weights = 0;
     auto iter = indexes.begin();
-    auto iset = mset.getVector()->begin();
+    const int *iset = mset.getIndex(0);
     for(auto w: weights){
         if (w != 0){
             std::copy_n(iset, num_dimensions, iter);
@@ -33,52 +33,247 @@
 
 #include "tsgIndexSets.hpp"
 
+#include <cstdint>
+#include <limits>
+#include <stdexcept>
+
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
 namespace TasGrid{
 
-MultiIndexSet::MultiIndexSet() : num_dimensions(0), cache_num_indexes(0){}
-MultiIndexSet::MultiIndexSet(int cnum_dimensions)  : num_dimensions(cnum_dimensions), cache_num_indexes(0){}
+#ifndef _WIN32
+MappedFileBuffer::MappedFileBuffer(const char *filename){
+    int fd = open(filename, O_RDONLY);
+    if (fd == -1) throw std::runtime_error(std::string("ERROR: cannot open the file ") + filename);
+    struct stat file_stat;
+    if ((fstat(fd, &file_stat) != 0) || (file_stat.st_size == 0)){
+        close(fd);
+        throw std::runtime_error(std::string("ERROR: cannot map the empty or unreadable file ") + filename);
+    }
+    size_t size = (size_t) file_stat.st_size;
+    void *addr = mmap(nullptr, size, PROT_READ, MAP_SHARED, fd, 0);
+    close(fd); // the mapping keeps its own reference to the file
+    if (addr == MAP_FAILED) throw std::runtime_error(std::string("ERROR: cannot map the file ") + filename);
+    region = std::shared_ptr<const void>(addr, [size](const void *p)->void{ munmap(const_cast<void*>(p), size); });
+    char *begin = (char*) addr; // the get area is never written, the pages are mapped read-only
+    setg(begin, begin, begin + size);
+}
+#else
+MappedFileBuffer::MappedFileBuffer(const char *){
+    throw std::runtime_error("ERROR: memory mapped files are not supported on Windows");
+}
+#endif
+MappedFileBuffer::~MappedFileBuffer(){}
+
+const char* MappedFileBuffer::take(size_t num_bytes){
+    if (num_bytes > (size_t) (egptr() - gptr())) return nullptr;
+    char *result = gptr();
+    setg(eback(), result + num_bytes, egptr());
+    return result;
+}
+
+MultiIndexSet::MultiIndexSet() : num_dimensions(0), cache_num_indexes(0), mapped_indexes(nullptr), compact_bytes(0){}
+MultiIndexSet::MultiIndexSet(int cnum_dimensions)  : num_dimensions(cnum_dimensions), cache_num_indexes(0), mapped_indexes(nullptr), compact_bytes(0){}
 MultiIndexSet::~MultiIndexSet(){}
 
-void MultiIndexSet::write(std::ofstream &ofs) const{
+void MultiIndexSet::detach(){
+    if ((mapped_indexes == nullptr) && (compact_bytes == 0)) return;
+    std::vector<int> entries;
+    copyEntries(entries);
+    releaseEntries();
+    indexes = std::move(entries);
+}
+void MultiIndexSet::releaseEntries(){
+    indexes = std::vector<int>();
+    mapped_indexes = nullptr;
+    mapped_region.reset();
+    compact_bytes = 0;
+    compact8 = std::vector<int8_t>();
+    compact16 = std::vector<int16_t>();
+    expanded.reset();
+}
+
+void MultiIndexSet::compact(){
+    if (compact_bytes != 0) return;
+    const int *entries = getIndex(0);
+    size_t num_entries = getTotalEntries();
+    if (num_entries == 0) return;
+    auto range = std::minmax_element(entries, entries + num_entries);
+    if ((*range.first < std::numeric_limits<int16_t>::min()) || (*range.second > std::numeric_limits<int16_t>::max())) return; // cannot compact
+    if ((*range.first < std::numeric_limits<int8_t>::min()) || (*range.second > std::numeric_limits<int8_t>::max())){
+        std::vector<int16_t> packed(entries, entries + num_entries);
+        releaseEntries();
+        compact16 = std::move(packed);
+        compact_bytes = 2;
+    }else{
+        std::vector<int8_t> packed(entries, entries + num_entries);
+        releaseEntries();
+        compact8 = std::move(packed);
+        compact_bytes = 1;
+    }
+}
+void MultiIndexSet::decodeIndex(int i, std::vector<int> &scratch) const{
+    scratch.resize(num_dimensions);
+    size_t offset = ((size_t) i) * num_dimensions;
+    if (compact_bytes == 1){
+        std::copy_n(compact8.begin() + offset, num_dimensions, scratch.begin());
+    }else{
+        std::copy_n(compact16.begin() + offset, num_dimensions, scratch.begin());
+    }
+}
+const int* MultiIndexSet::getExpandedEntries() const{
+    std::shared_ptr<const std::vector<int>> entries = std::atomic_load(&expanded);
+    if (!entries){ // same as the hash table, concurrent calls may expand more than once, but all copies are identical
+        std::shared_ptr<std::vector<int>> full = std::make_shared<std::vector<int>>();
+        copyEntries(*full);
+        entries = full;
+        std::atomic_store(&expanded, entries);
+    }
+    return entries->data();
+}
+void MultiIndexSet::copyEntries(std::vector<int> &entries) const{
+    if (compact_bytes == 1){
+        entries = std::vector<int>(compact8.begin(), compact8.end());
+    }else if (compact_bytes == 2){
+        entries = std::vector<int>(compact16.begin(), compact16.end());
+    }else{
+        entries = std::vector<int>(getIndex(0), getIndex(0) + getTotalEntries());
+    }
+}
+
+void MultiIndexSet::write(std::ostream &ofs) const{
     ofs << num_dimensions << " " << cache_num_indexes;
-    for(auto i : indexes) ofs << " " << i;
+    std::vector<int> scratch;
+    for(int i=0; i<cache_num_indexes; i++){
+        const int *p = getIndex(i, scratch);
+        for(size_t j=0; j<num_dimensions; j++) ofs << " " << p[j];
+    }
     ofs << std::endl;
 }
-void MultiIndexSet::read(std::ifstream &ifs){
-    indexes = std::vector<int>();
+void MultiIndexSet::read(std::istream &ifs){
+    releaseEntries();
+    hash_table.reset();
     ifs >> num_dimensions >> cache_num_indexes;
     indexes.resize(num_dimensions * ((size_t) cache_num_indexes));
     for(auto &i : indexes) ifs >> i;
 }
 
-void MultiIndexSet::writeBinary(std::ofstream &ofs) const{
-    int sizes[2];
-    sizes[0] = (int) num_dimensions;
-    sizes[1] = cache_num_indexes;
-    ofs.write((char*) sizes, 2*sizeof(int));
-    ofs.write((char*) indexes.data(), indexes.size() * sizeof(int));
+void MultiIndexSet::writeBinary(std::ostream &ofs, bool packed, bool aligned) const{
+    size_t num_entries = getTotalEntries();
+    if (packed && !aligned && (compact_bytes != 0)){ // compact() picks the same entry size as the packed format
+        int sizes[3];
+        sizes[0] = -compact_bytes;
+        sizes[1] = (int) num_dimensions;
+        sizes[2] = cache_num_indexes;
+        ofs.write((char*) sizes, 3*sizeof(int));
+        if (compact_bytes == 1){
+            ofs.write((char*) compact8.data(), num_entries * sizeof(int8_t));
+        }else{
+            ofs.write((char*) compact16.data(), num_entries * sizeof(int16_t));
+        }
+        return;
+    }
+    std::vector<int> decoded; // temporary copy of the entries of a compact set
+    if (compact_bytes != 0) copyEntries(decoded);
+    const int *entries = (compact_bytes != 0) ? decoded.data() : getIndex(0);
+    if (aligned){
+        int sizes[3];
+        sizes[0] = aligned_marker;
+        sizes[1] = (int) num_dimensions;
+        sizes[2] = cache_num_indexes;
+        ofs.write((char*) sizes, 3*sizeof(int));
+        IO::writeAligned(ofs, num_entries, entries);
+        return;
+    }
+    if (!packed){
+        int sizes[2];
+        sizes[0] = (int) num_dimensions;
+        sizes[1] = cache_num_indexes;
+        ofs.write((char*) sizes, 2*sizeof(int));
+        ofs.write((char*) entries, num_entries * sizeof(int));
+        return;
+    }
+    int entry_size = 1;
+    if (num_entries > 0){
+        auto range = std::minmax_element(entries, entries + num_entries);
+        if ((*range.first < std::numeric_limits<int16_t>::min()) || (*range.second > std::numeric_limits<int16_t>::max())){
+            entry_size = 4;
+        }else if ((*range.first < std::numeric_limits<int8_t>::min()) || (*range.second > std::numeric_limits<int8_t>::max())){
+            entry_size = 2;
+        }
+    }
+    int sizes[3];
+    sizes[0] = -entry_size;
+    sizes[1] = (int) num_dimensions;
+    sizes[2] = cache_num_indexes;
+    ofs.write((char*) sizes, 3*sizeof(int));
+    if (entry_size == 1){
+        std::vector<int8_t> packed_entries(entries, entries + num_entries);
+        ofs.write((char*) packed_entries.data(), packed_entries.size() * sizeof(int8_t));
+    }else if (entry_size == 2){
+        std::vector<int16_t> packed_entries(entries, entries + num_entries);
+        ofs.write((char*) packed_entries.data(), packed_entries.size() * sizeof(int16_t));
+    }else{
+        ofs.write((char*) entries, num_entries * sizeof(int));
+    }
 }
-void MultiIndexSet::readBinary(std::ifstream &ifs){
+void MultiIndexSet::readBinary(std::istream &ifs){
     int sizes[2];
-    ifs.read((char*) sizes, 2*sizeof(int));
+    ifs.read((char*) sizes, sizeof(int));
+    int entry_size = 4;
+    bool aligned = (sizes[0] == aligned_marker);
+    if (sizes[0] < 0){ // packed or aligned format, the first int is the negative size of the entries or the marker
+        entry_size = -sizes[0];
+        ifs.read((char*) sizes, 2*sizeof(int));
+    }else{
+        ifs.read((char*) &sizes[1], sizeof(int));
+    }
     num_dimensions = (size_t) sizes[0];
     cache_num_indexes = sizes[1];
+    hash_table.reset();
+    releaseEntries();
+    if (aligned){
+        const int *entries = IO::readAligned(ifs, getTotalEntries(), indexes, mapped_region);
+        if (mapped_region) mapped_indexes = entries;
+        return;
+    }
     indexes.resize(num_dimensions * ((size_t) cache_num_indexes));
-    ifs.read((char*) indexes.data(), indexes.size() * sizeof(int));
+    if (entry_size == 1){
+        std::vector<int8_t> packed(indexes.size());
+        ifs.read((char*) packed.data(), packed.size() * sizeof(int8_t));
+        std::copy(packed.begin(), packed.end(), indexes.begin());
+    }else if (entry_size == 2){
+        std::vector<int16_t> packed(indexes.size());
+        ifs.read((char*) packed.data(), packed.size() * sizeof(int16_t));
+        std::copy(packed.begin(), packed.end(), indexes.begin());
+    }else if (entry_size == 4){
+        ifs.read((char*) indexes.data(), indexes.size() * sizeof(int));
+    }else{
+        throw std::runtime_error("ERROR: wrong binary file format, unknown size of the multi-index entries");
+    }
 }
 
 void MultiIndexSet::setNumDimensions(int new_dimensions){
-    indexes = std::vector<int>();
+    releaseEntries();
+    hash_table.reset();
     cache_num_indexes = 0;
     num_dimensions = (size_t) new_dimensions;
 }
 
 void MultiIndexSet::setIndexes(std::vector<int> &new_indexes){
+    releaseEntries();
     indexes = std::move(new_indexes);
     cache_num_indexes = (int) (indexes.size() / num_dimensions);
+    hash_table.reset();
 }
 
 void MultiIndexSet::addSortedInsexes(const std::vector<int> &addition){
+    detach();
     if (indexes.empty()){
         indexes.resize(addition.size());
         std::copy(addition.begin(), addition.end(), indexes.data());
@@ -111,8 +306,10 @@ void MultiIndexSet::addSortedInsexes(const std::vector<int> &addition){
         }
     }
     cache_num_indexes = (int) (indexes.size() / num_dimensions);
+    updateHashTable();
 }
 void MultiIndexSet::addUnsortedInsexes(const std::vector<int> &addition){
+    detach();
     size_t num = addition.size() / num_dimensions;
     std::vector<std::vector<int>::const_iterator> index_refs(num);
     auto iadd = addition.begin();
@@ -173,11 +370,65 @@ void MultiIndexSet::addUnsortedInsexes(const std::vector<int> &addition){
         }
     }
     cache_num_indexes = (int) (indexes.size() / num_dimensions);
+    updateHashTable();
+}
+
+const int MultiIndexSet::hash_threshold;
+const int MultiIndexSet::aligned_marker;
+
+size_t MultiIndexSet::hashIndex(const int *p) const{
+    unsigned long long h = 14695981039346656037ULL; // FNV-1a over the entries, followed by the murmur3 finalizer
+    for(size_t j=0; j<num_dimensions; j++) h = (h ^ ((unsigned long long) (unsigned int) p[j])) * 1099511628211ULL;
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33;
+    h *= 0xc4ceb9fe1a85ec53ULL;
+    h ^= h >> 33;
+    return (size_t) h;
+}
+
+std::shared_ptr<const std::vector<int>> MultiIndexSet::makeHashTable() const{
+    size_t table_size = 2;
+    while(table_size < 2 * ((size_t) cache_num_indexes)) table_size *= 2; // keep the load factor at most 1/2
+    size_t mask = table_size - 1;
+
+    std::shared_ptr<std::vector<int>> table = std::make_shared<std::vector<int>>(table_size, -1);
+    std::vector<int> scratch;
+    for(int i=0; i<cache_num_indexes; i++){
+        size_t h = hashIndex(getIndex(i, scratch)) & mask;
+        while((*table)[h] != -1) h = (h + 1) & mask; // linear probing
+        (*table)[h] = i;
+    }
+    return table;
+}
+
+void MultiIndexSet::updateHashTable(){
+    if (hash_table) hash_table = (cache_num_indexes >= hash_threshold) ? makeHashTable() : nullptr;
 }
 
 int MultiIndexSet::getSlot(const int *p) const{
+    if (cache_num_indexes < hash_threshold) return getSlotSorted(p);
+
+    std::shared_ptr<const std::vector<int>> table = std::atomic_load(&hash_table);
+    if (!table){ // concurrent calls may build the table more than once, but all tables are identical
+        table = makeHashTable();
+        std::atomic_store(&hash_table, table);
+    }
+
+    size_t mask = table->size() - 1;
+    size_t h = hashIndex(p) & mask;
+    std::vector<int> scratch;
+    while((*table)[h] != -1){
+        if (std::equal(p, p + num_dimensions, getIndex((*table)[h], scratch))) return (*table)[h];
+        h = (h + 1) & mask;
+    }
+    return -1;
+}
+
+int MultiIndexSet::getSlotSorted(const int *p) const{
     int sstart = 0, send = cache_num_indexes - 1;
     int current = (sstart + send) / 2;
+    std::vector<int> scratch;
     while (sstart <= send){
         TypeIndexRelation t = [&](const int *a, const int *b) ->
             TypeIndexRelation{
@@ -186,7 +437,7 @@ int MultiIndexSet::getSlot(const int *p) const{
                     if (a[j] > b[j]) return type_bbeforea;
                 }
                 return type_asameb;
-            }(&(indexes[(size_t) current * num_dimensions]), p);
+            }(getIndex(current, scratch), p);
         if (t == type_abeforeb){
             sstart = current+1;
         }else if (t == type_bbeforea){
@@ -202,63 +453,64 @@ int MultiIndexSet::getSlot(const int *p) const{
 void MultiIndexSet::diffSets(const MultiIndexSet &substract, MultiIndexSet &result){
     result = MultiIndexSet((int) num_dimensions);
 
-    std::vector<std::vector<int>::iterator> kept_indexes;
-
-    auto ithis = indexes.begin();
-    auto endthis = indexes.end();
-    auto iother = substract.getVector()->begin();
-    auto endother = substract.getVector()->end();
+    std::vector<int> new_indexes;
+    std::vector<int> scratch_this, scratch_other; // used only by compact sets
 
-    while(ithis != endthis){
-        if (iother == endother){
-            kept_indexes.push_back(ithis);
-            std::advance(ithis, num_dimensions);
+    int ithis = 0, iother = 0;
+    int num_other = substract.getNumIndexes();
+    while(ithis < cache_num_indexes){
+        const int *pthis = getIndex(ithis, scratch_this);
+        if (iother == num_other){
+            new_indexes.insert(new_indexes.end(), pthis, pthis + num_dimensions);
+            ithis++;
         }else{
-            TypeIndexRelation t = [&](std::vector<int>::iterator ia, std::vector<int>::const_iterator ib) ->
+            TypeIndexRelation t = [&](const int *ia, const int *ib) ->
                                         TypeIndexRelation{
                                             for(size_t j=0; j<num_dimensions; j++){
                                                 if (*ia   < *ib)   return type_abeforeb;
                                                 if (*ia++ > *ib++) return type_bbeforea;
                                             }
                                             return type_asameb;
-                                        }(ithis, iother);
+                                        }(pthis, substract.getIndex(iother, scratch_other));
             if (t == type_abeforeb){
-                kept_indexes.push_back(ithis);
-                std::advance(ithis, num_dimensions);
+                new_indexes.insert(new_indexes.end(), pthis, pthis + num_dimensions);
+                ithis++;
             }else{
-                std::advance(iother, num_dimensions);
-                if (t == type_asameb) std::advance(ithis, num_dimensions);
+                iother++;
+                if (t == type_asameb) ithis++;
             }
         }
     }
 
-    if (kept_indexes.size() > 0){
-        std::vector<int> new_indexes(num_dimensions * kept_indexes.size());
-        auto inew = new_indexes.begin();
-        for(auto i : kept_indexes){
-            std::copy_n(i, num_dimensions, inew);
-            std::advance(inew, num_dimensions);
-        }
-        result.setIndexes(new_indexes);
-    }
+    if (new_indexes.size() > 0) result.setIndexes(new_indexes);
 }
 
-StorageSet::StorageSet() : num_outputs(0), num_values(0){}
+StorageSet::StorageSet() : num_outputs(0), num_values(0), mapped_values(nullptr){}
 StorageSet::~StorageSet(){}
 
-void StorageSet::write(std::ofstream &ofs) const{
+void StorageSet::detach(){
+    if (mapped_values == nullptr) return;
+    values = std::vector<double>(mapped_values, mapped_values + num_outputs * num_values);
+    mapped_values = nullptr;
+    mapped_region.reset();
+}
+
+void StorageSet::write(std::ostream &ofs) const{
     ofs << num_outputs << " " << num_values;
-    if (values.size() != 0){
+    if ((mapped_values != nullptr) || (values.size() != 0)){
         ofs << " 1";
         ofs << std::scientific; ofs.precision(17);
-        for(auto v : values) ofs << " " << v;
+        const double *vals = getValues(0);
+        for(size_t i=0; i<num_outputs * num_values; i++) ofs << " " << vals[i];
     }else{
         ofs << " 0";
     }
     ofs << std::endl;
 }
-void StorageSet::read(std::ifstream &ifs){
+void StorageSet::read(std::istream &ifs){
     values = std::vector<double>(); // empty values if the file doesn't contain vals
+    mapped_values = nullptr;
+    mapped_region.reset();
     int has_vals;
     ifs >> num_outputs >> num_values >> has_vals;
     if (has_vals == 1){
@@ -266,25 +518,33 @@ void StorageSet::read(std::ifstream &ifs){
         for(auto &v : values) ifs >> v;
     }
 }
-void StorageSet::writeBinary(std::ofstream &ofs) const{
+void StorageSet::writeBinary(std::ostream &ofs, bool aligned) const{
     int num_out_vals[2];
     num_out_vals[0] = (int) num_outputs;
     num_out_vals[1] = (int) num_values;
     ofs.write((char*) num_out_vals, 2*sizeof(int));
-    if (values.size() != 0){
+    if (aligned && ((mapped_values != nullptr) || (values.size() != 0))){
+        char flag = 'a'; ofs.write((char*) &flag, sizeof(char));
+        IO::writeAligned(ofs, num_outputs * num_values, getValues(0));
+    }else if ((mapped_values != nullptr) || (values.size() != 0)){
         char flag = 'y'; ofs.write((char*) &flag, sizeof(char));
-        ofs.write((char*) values.data(), values.size() * sizeof(double));
+        ofs.write((char*) getValues(0), num_outputs * num_values * sizeof(double));
     }else{
         char flag = 'n'; ofs.write((char*) &flag, sizeof(char));
     }
 }
-void StorageSet::readBinary(std::ifstream &ifs){
+void StorageSet::readBinary(std::istream &ifs){
     int num_out_vals[2];
     ifs.read((char*) num_out_vals, 2*sizeof(int));
     num_outputs = (size_t) num_out_vals[0];
     num_values = (size_t) num_out_vals[1];
+    mapped_values = nullptr;
+    mapped_region.reset();
     char flag; ifs.read((char*) &flag, sizeof(char));
-    if (flag == 'y'){
+    if (flag == 'a'){ // aligned section, see IO::readAligned()
+        const double *vals = IO::readAligned(ifs, num_outputs * num_values, values, mapped_region);
+        if (mapped_region) mapped_values = vals;
+    }else if (flag == 'y'){
         values.resize(num_outputs * num_values);
         ifs.read((char*) values.data(), values.size() * sizeof(double));
     }else{
@@ -294,21 +554,27 @@ void StorageSet::readBinary(std::ifstream &ifs){
 
 void StorageSet::resize(int cnum_outputs, int cnum_values){
     values = std::vector<double>();
+    mapped_values = nullptr;
+    mapped_region.reset();
     num_outputs = cnum_outputs;
     num_values = cnum_values;
 }
 
 int StorageSet::getNumOutputs() const{ return (int) num_outputs; }
-const double* StorageSet::getValues(int i) const{ return &(values[i*num_outputs]); }
-double* StorageSet::getValues(int i){ return &(values[i*num_outputs]); }
-std::vector<double>* StorageSet::aliasValues(){ return &values; }
+const double* StorageSet::getValues(int i) const{ return ((mapped_values != nullptr) ? mapped_values : values.data()) + i*num_outputs; }
+double* StorageSet::getValues(int i){ detach(); return &(values[i*num_outputs]); }
+std::vector<double>* StorageSet::aliasValues(){ detach(); return &values; }
 const std::vector<double>* StorageSet::aliasValues() const{ return &values; }
 
 void StorageSet::setValues(const double vals[]){
+    mapped_values = nullptr;
+    mapped_region.reset();
     values.resize(num_outputs * num_values);
     std::copy_n(vals, num_values * num_outputs, values.data());
 }
 void StorageSet::setValues(std::vector<double> &vals){
+    mapped_values = nullptr;
+    mapped_region.reset();
     num_values = vals.size() / num_outputs;
     values = std::move(vals); // move assignment
 }
@@ -318,6 +584,7 @@ void StorageSet::addValues(const MultiIndexSet &old_set, const MultiIndexSet &ne
     int num_new = new_set.getNumIndexes();
     int num_dimensions = old_set.getNumDimensions();
 
+    detach();
     num_values += (size_t) num_new;
     std::vector<double> combined_values(num_values * num_outputs);
 
@@ -32,9 +32,13 @@
 #define __TASMANIAN_SPARSE_GRID_INDEX_SETS_HPP
 
 #include "tsgEnumerates.hpp"
+#include <cstdint>
 #include <vector>
 #include <functional>
 #include <algorithm>
+#include <memory>
+#include <iostream>
+#include <stdexcept>
 
 //! \internal
 //! \file tsgIndexSets.hpp
@@ -109,6 +113,85 @@ void push_merge_map(const std::vector<T> &a, const std::vector<B> &b,
 }
 }
 
+//! \brief Read-only memory map of a binary file, used by **TasmanianSparseGrid::readMapped()**
+//! \ingroup TasmanianSets
+
+//! The buffer maps the entire file and serves it through the `std::streambuf` interface.
+//! The headers are read (i.e., copied) as from any other stream, while the aligned sections written by **IO::writeAligned()**
+//! are used directly from the mapped region by **MultiIndexSet**, **StorageSet** and **Data2D**.
+//! The mapping stays alive until the buffer and all the sets that use it are destroyed (or modified),
+//! the pages of the file are shared between all processes that map the same file.
+//! Memory mapping requires POSIX, on Windows the constructor throws `std::runtime_error`.
+class MappedFileBuffer : public std::streambuf{
+public:
+    //! \brief Maps the file **filename**, throws `std::runtime_error` if the file cannot be opened or mapped
+    MappedFileBuffer(const char *filename);
+    //! \brief Default destructor, the region is unmapped only if no set holds a reference to it
+    ~MappedFileBuffer();
+
+    //! \brief Returns a pointer to the next **num_bytes** of the file and moves past them, returns `nullptr` if the file is shorter
+    const char* take(size_t num_bytes);
+    //! \brief Returns the pointer that keeps the mapping alive
+    std::shared_ptr<const void> getRegion() const{ return region; }
+
+private:
+    std::shared_ptr<const void> region;
+};
+
+namespace IO{
+
+//! \brief The aligned sections start at a multiple of this number of bytes from the beginning of the file (a cache line)
+//! \ingroup TasmanianSets
+const size_t aligned_section_bytes = 64;
+
+//! \brief Write **num_entries** of **data** into an aligned section of the binary file **ofs**
+//! \ingroup TasmanianSets
+
+//! The section consists of one `int` that holds the number of padding bytes, followed by the padding and the data,
+//! the padding puts the data at a multiple of **aligned_section_bytes** from the beginning of the file.
+//! The position is taken from `ofs.tellp()`, hence **ofs** must be a file stream (or another stream that supports `tellp()`)
+//! and must have been opened at the beginning of the file.
+template<typename T>
+void writeAligned(std::ostream &ofs, size_t num_entries, const T *data){
+    std::streamoff position = ofs.tellp();
+    if (position < 0) throw std::runtime_error("ERROR: aligned binary sections can be written only to a file stream");
+    size_t padding = (aligned_section_bytes - (((size_t) position) + sizeof(int)) % aligned_section_bytes) % aligned_section_bytes;
+    int num_padding = (int) padding;
+    ofs.write((char*) &num_padding, sizeof(int));
+    std::vector<char> zeros(padding, 0);
+    ofs.write(zeros.data(), padding);
+    ofs.write((const char*) data, num_entries * sizeof(T));
+}
+
+//! \brief Read **num_entries** from an aligned section written by **writeAligned()**, returns a pointer to the data
+//! \ingroup TasmanianSets
+
+//! If **ifs** reads from a **MappedFileBuffer**, the returned pointer is inside the mapped region, **region** is set to keep the mapping alive
+//! and **copy** is emptied. Otherwise, the data is copied into **copy**, **region** is reset and the result is `copy.data()`.
+template<typename T>
+const T* readAligned(std::istream &ifs, size_t num_entries, std::vector<T> &copy, std::shared_ptr<const void> &region){
+    int num_padding;
+    ifs.read((char*) &num_padding, sizeof(int));
+    if ((num_padding < 0) || (((size_t) num_padding) >= aligned_section_bytes))
+        throw std::runtime_error("ERROR: wrong binary file format, invalid padding of an aligned section");
+    MappedFileBuffer *mapped = dynamic_cast<MappedFileBuffer*>(ifs.rdbuf());
+    if (mapped != nullptr){
+        mapped->take((size_t) num_padding);
+        const char *data = mapped->take(num_entries * sizeof(T));
+        if (data == nullptr) throw std::runtime_error("ERROR: the memory mapped file is truncated");
+        copy = std::vector<T>();
+        region = mapped->getRegion();
+        return (const T*) data;
+    }
+    ifs.ignore(num_padding);
+    region.reset();
+    copy.resize(num_entries);
+    ifs.read((char*) copy.data(), num_entries * sizeof(T));
+    return copy.data();
+}
+
+}
+
 //! \brief Generic 2D data structure divided into contiguous strips of fixed length (similar to a matrix)
 //! \ingroup TasmanianSets
 
@@ -135,6 +218,7 @@ public:
         vec.resize(stride * num_strips);
         data = vec.data();
         cdata = vec.data();
+        region.reset();
     }
     //! \brief Clear any existing data, allocate a new data-structure with given **stride** and number of **strips** and initializes the data to **val** (using `std::vector::resize()`)
     void resize(int new_stride, int new_num_strips, T val){
@@ -143,6 +227,7 @@ public:
         vec.resize(stride * num_strips, val);
         data = vec.data();
         cdata = vec.data();
+        region.reset();
     }
     //! \brief Wrap around an existing array, the size of the array must be at least **new_stride** times **new_num_strips**
     void load(int new_stride, int new_num_strips, T* new_data){
@@ -151,6 +236,7 @@ public:
         data = new_data;
         cdata = data;
         vec.resize(0);
+        region.reset();
     }
     //! \brief Wrap around an existing const array, the size of the array must be at least **new_stride** times **new_num_strips**
     void cload(int new_stride, int new_num_strips, const T* new_data){
@@ -159,9 +245,20 @@ public:
         cdata = new_data;
         data = 0;
         vec.resize(0);
+        region.reset();
+    }
+    //! \brief Read the data from an aligned section of a binary file, see **IO::readAligned()**
+    //!
+    //! If **ifs** reads from a **MappedFileBuffer**, the data stays in the mapped file and the structure behaves as after **cload()**,
+    //! i.e., **getStrip()** and **getVector()** cannot be used until the next **resize()**.
+    void readAligned(std::istream &ifs, int new_stride, int new_num_strips){
+        stride = (size_t) new_stride;
+        num_strips = (size_t) new_num_strips;
+        cdata = IO::readAligned<T>(ifs, stride * num_strips, vec, region);
+        data = (region) ? 0 : vec.data();
     }
 
-    //! \brief Returns a reference to the **i**-th strip, cannot be called after **cload()** since the reference is non-const
+    //! \brief Returns a reference to the **i**-th strip, cannot be called after **cload()** (or a mapped **readAligned()**) since the reference is non-const
     T* getStrip(int i){ return &(data[i*stride]); }
     //! \brief Returns a const reference to the **i**-th strip, can be called even after **cload()**
     const T* getCStrip(int i) const{ return &(cdata[i*stride]); }
@@ -181,6 +278,7 @@ public:
         num_strips = 0;
         vec.clear();
         vec.shrink_to_fit();
+        region.reset();
     }
 
     //! \brief Uses `std::vector::insert` to append a strip **x** to the existing data
@@ -194,6 +292,7 @@ private:
     T* data;
     const T* cdata;
     std::vector<T> vec;
+    std::shared_ptr<const void> region; // keeps the memory mapped file alive, see readAligned()
 };
 
 
@@ -203,7 +302,7 @@ private:
 //! At the core of each sparse grid, there are multiple multi-index sets.
 //! The organization of the data is similar to the **Data2D<T>** class, but at any time the indexes
 //! are stored in a lexicographical order. The main functionality provided here is:
-//! * fast *O(log(n))* search utilizing the lexicographical order
+//! * fast *O(log(n))* search utilizing the lexicographical order, or *O(1)* expected search using a hash table for large sets
 //! * synchronization between multi-indexes and values (i.e., model outputs)
 //! * adding or removing indexes while preserving the order
 //! * basic file I/O
@@ -220,26 +319,57 @@ public:
     //!
     //! The format consists of two `int` values corresponding to the number of dimensions and number of indexes,
     //! followed by all the entries of the array on a single line separated by a space.
-    void write(std::ofstream &ofs) const;
+    void write(std::ostream &ofs) const;
 
     //! \brief Read from file **ofs** in ASCII format
     //!
     //! See **write()** for the ASCII file format.
-    void read(std::ifstream &ifs);
+    void read(std::istream &ifs);
 
     //! \brief Write to file **ofs** in binary format
     //!
-    //! The format consists of two `int` values corresponding to the number of dimensions and number of indexes,
+    //! The default format consists of two `int` values corresponding to the number of dimensions and number of indexes,
     //! followed by all the entries of the array written by a single `write()` command.
-    void writeBinary(std::ofstream &ofs) const;
+    //!
+    //! If **packed** is **true**, the format consists of three `int` values, the negative of the number of bytes used by each entry (1, 2 or 4),
+    //! the number of dimensions and the number of indexes, followed by all the entries written by a single `write()` command.
+    //! The entries are packed into the smallest of `int8_t`, `int16_t` and `int` that can hold all of them,
+    //! levels and point indexes rarely go above 127 and the file is up to four times smaller.
+    //! Only the file is packed, the set in memory uses `int` entries unless **compact()** is called.
+    //!
+    //! If **aligned** is **true**, the format consists of three `int` values, **aligned_marker**,
+    //! the number of dimensions and the number of indexes, followed by the entries in an aligned section, see **IO::writeAligned()**.
+    //! The aligned format is used by **TasmanianSparseGrid::writeMapped()** and cannot be combined with **packed**.
+    void writeBinary(std::ostream &ofs, bool packed = false, bool aligned = false) const;
 
-    //! \brief Write to file **ofs** in binary format
+    //! \brief Read from file **ofs** in binary format
     //!
-    //! See **writeBinary()** for the binary file format.
-    void readBinary(std::ifstream &ifs);
+    //! See **writeBinary()** for the binary file formats, the packed and aligned formats are recognized by the first `int`
+    //! (the number of dimensions is never negative).
+    //! An aligned set read through a **MappedFileBuffer** uses the indexes directly from the mapped file,
+    //! the indexes are copied into memory only if the set is modified.
+    void readBinary(std::istream &ifs);
+
+    //! \brief Marks the aligned binary format, see **writeBinary()**
+    static const int aligned_marker = -64;
 
     //! \brief Returns **true** if there are no multi-indexes in the set, **false** otherwise
-    inline bool empty() const{ return indexes.empty(); }
+    inline bool empty() const{ return (cache_num_indexes == 0); }
+    //! \brief Returns **true** if the indexes are read from a memory mapped file, see **readBinary()**
+    inline bool isMapped() const{ return (mapped_indexes != nullptr); }
+
+    //! \brief Stores the entries in the smallest of `int8_t` and `int16_t` that can hold all of them, does nothing if some entry needs an `int`
+    //!
+    //! Levels and point indexes rarely go above 127, a compact set uses up to four times less memory.
+    //! The entries are decoded by **getIndex()** with a scratch buffer, the methods of the set and the evaluation
+    //! of the grids use the scratch buffer and work directly with the compact entries.
+    //! Calls to **getIndex()** without a scratch buffer expand the entries into a cache kept until the set is modified,
+    //! and the set goes back to `int` entries when it is modified, e.g., by **addSortedInsexes()**.
+    void compact();
+    //! \brief Returns **true** if the entries are stored in `int8_t` or `int16_t`, see **compact()**
+    inline bool isCompact() const{ return (compact_bytes != 0); }
+    //! \brief Returns the number of bytes used to store each entry in memory, i.e., 1, 2 or `sizeof(int)`
+    inline int getEntryBytes() const{ return (compact_bytes != 0) ? compact_bytes : (int) sizeof(int); }
 
     //! \brief Clears any currently loaded multi-indexes and set the dimensions to **new_dimensions**
     void setNumDimensions(int new_dimensions);
@@ -255,16 +385,29 @@ public:
     //! \brief Add more indexes to the set, **addition** is assumed unsorted (will be sorted first)
     void addUnsortedInsexes(const std::vector<int> &addition);
     //! \brief Add indexes from another **MultiIndexSet**, makes a call to **addSortedInsexes()**
-    inline void addMultiIndexSet(const MultiIndexSet &addition){ addSortedInsexes(*addition.getVector()); }
+    inline void addMultiIndexSet(const MultiIndexSet &addition){
+        if (addition.isMapped() || addition.isCompact()){
+            std::vector<int> entries;
+            addition.copyEntries(entries);
+            addSortedInsexes(entries);
+        }else{
+            addSortedInsexes(*addition.getVector());
+        }
+    }
     //! \brief Add indexes from a general **Data<>** structure, makes a call to **addUnsortedInsexes()**
     inline void addData2D(const Data2D<int> &addition){ addUnsortedInsexes(*addition.getVector()); }
 
-    //! \brief Returns a const reference to the internal data
+    //! \brief Returns a const reference to the internal data, cannot be used if the set **isMapped()** or **isCompact()**, use **getIndex()** and **getTotalEntries()** instead
     inline const std::vector<int>* getVector() const{ return &indexes; }
     //! \brief Returns a reference to the internal data, must not modify the lexicographical order or the size of the vector
-    inline std::vector<int>* getVector(){ return &indexes; } // used for remapping during tensor generic points
+    inline std::vector<int>* getVector(){ detach(); hash_table.reset(); return &indexes; } // used for remapping during tensor generic points
+    //! \brief Returns the number of dimensions times the number of indexes using `size_t` arithmetic
+    inline size_t getTotalEntries() const{ return num_dimensions * ((size_t) cache_num_indexes); }
 
     //! \brief Returns the slot containing index **p**, returns `-1` if not found
+    //!
+    //! Sets with at least **hash_threshold** indexes use a hash table, the table is built on the first call
+    //! and rebuilt by **addSortedInsexes()** and **addUnsortedInsexes()**, smaller sets use binary search.
     int getSlot(const int *p) const;
     //! \brief Returns the slot containing index **p**, returns `-1` if not found
     inline int getSlot(const std::vector<int> &p) const{ return getSlot(p.data()); }
@@ -272,7 +415,29 @@ public:
     inline bool missing(const std::vector<int> &p) const{ return (getSlot(p.data()) == -1); }
 
     //! \brief Returns the **i**-th index of the set, useful to loop over all indexes or to cross reference with values
-    inline const int *getIndex(int i) const{ return &(indexes[((size_t) i) * num_dimensions]); }
+    //!
+    //! If the set **isCompact()**, the first call expands all entries into a cache, see **compact()**.
+    inline const int *getIndex(int i) const{
+        const int *entries = (mapped_indexes != nullptr) ? mapped_indexes : ((compact_bytes == 0) ? indexes.data() : getExpandedEntries());
+        return entries + ((size_t) i) * num_dimensions;
+    }
+    //! \brief Returns the **i**-th index of the set, a compact set decodes the index into **scratch** and returns `scratch.data()`
+    //!
+    //! The pointer is valid until the next call that uses the same **scratch**, sets that are not compact return the same pointer as **getIndex(i)**.
+    inline const int *getIndex(int i, std::vector<int> &scratch) const{
+        if (compact_bytes == 0) return getIndex(i);
+        decodeIndex(i, scratch);
+        return scratch.data();
+    }
+    //! \brief Returns the **j**-th entry of the **i**-th index, works with compact sets without a scratch buffer
+    inline int getEntry(int i, int j) const{
+        size_t offset = ((size_t) i) * num_dimensions + ((size_t) j);
+        if (compact_bytes == 1) return (int) compact8[offset];
+        if (compact_bytes == 2) return (int) compact16[offset];
+        return getIndex(0)[offset];
+    }
+    //! \brief Overwrites **entries** with a copy of all the entries of the set
+    void copyEntries(std::vector<int> &entries) const;
 
     //! \brief A new ordered set is created in **result**, which holds the indexes from this set that are not present in **substract**
     //!
@@ -280,10 +445,43 @@ public:
     //! i.e., does not use **missing()** which would add a logarithmic factor.
     void diffSets(const MultiIndexSet &substract, MultiIndexSet &result);
 
+    //! \brief Sets with fewer indexes use binary search in **getSlot()**, since the comparisons are cheap enough
+    static const int hash_threshold = 64;
+
+protected:
+    //! \brief Returns the hash of the multi-index **p** with **num_dimensions** entries
+    size_t hashIndex(const int *p) const;
+    //! \brief Returns a new open addressing table with the slots of all indexes, the empty entries are `-1`
+    std::shared_ptr<const std::vector<int>> makeHashTable() const;
+    //! \brief Returns the slot of **p** using the binary search
+    int getSlotSorted(const int *p) const;
+    //! \brief Called after the indexes change, rebuilds the hash table only if the old table was in use
+    void updateHashTable();
+    //! \brief Copies the indexes of a mapped or compact set into an `int` vector, called before the set is modified
+    void detach();
+    //! \brief Releases the mapped, compact and `int` entries, the caller sets the new entries
+    void releaseEntries();
+    //! \brief Decodes the **i**-th index of a compact set into **scratch**
+    void decodeIndex(int i, std::vector<int> &scratch) const;
+    //! \brief Returns all entries of a compact set expanded to `int`, the expanded entries are cached
+    const int* getExpandedEntries() const;
+
 private:
     size_t num_dimensions;
     int cache_num_indexes;
     std::vector<int> indexes;
+    // if the set was read from a memory mapped file, the indexes are in the file and the region keeps the mapping alive
+    const int *mapped_indexes;
+    std::shared_ptr<const void> mapped_region;
+    // compact storage, compact_bytes is 0 if the entries are in indexes, otherwise 1 or 2 for compact8 or compact16
+    int compact_bytes;
+    std::vector<int8_t> compact8;
+    std::vector<int16_t> compact16;
+    // built lazily by getIndex() for compact sets, replaced only as a whole (same as hash_table)
+    mutable std::shared_ptr<const std::vector<int>> expanded;
+    // built lazily in getSlot(), the table is never modified only replaced, so copies of the set can share it
+    // the pointer is accessed with std::atomic_load() and std::atomic_store() since getSlot() is called in parallel
+    mutable std::shared_ptr<const std::vector<int>> hash_table;
 };
 
 //! \brief Class that stores values, i.e., model outputs, the order of the values is in sync with the order of some **MultiIndexSet**
@@ -305,23 +503,26 @@ public:
     //!
     //! The format consists of two `int` values corresponding to the number of outputs and number of values,
     //! followed by all the entries of the array on a single line separated by a space.
-    void write(std::ofstream &ofs) const;
+    void write(std::ostream &ofs) const;
 
     //! \brief Read from file **ofs** in ASCII format
     //!
     //! See **write()** for the ASCII file format.
-    void read(std::ifstream &ifs);
+    void read(std::istream &ifs);
 
     //! \brief Write to file **ofs** in binary format
     //!
     //! The format consists of two `int` values corresponding to the number of outputs and number of values,
     //! followed by all the entries of the array written in a single `write()` command.
-    void writeBinary(std::ofstream &ofs) const;
+    //! If **aligned** is **true**, the entries are written in an aligned section, see **IO::writeAligned()**.
+    void writeBinary(std::ostream &ofs, bool aligned = false) const;
 
     //! \brief Write to file **ofs** in binary format
     //!
     //! See **writeBinary()** for the binary file format.
-    void readBinary(std::ifstream &ifs);
+    //! Aligned values read through a **MappedFileBuffer** are used directly from the mapped file,
+    //! the values are copied into memory only if they are modified.
+    void readBinary(std::istream &ifs);
 
     //! \brief Clear the existing values and assigns new dimensions, does not allocate memory for the new values
     void resize(int cnum_outputs, int cnum_values);
@@ -332,7 +533,7 @@ public:
     double* getValues(int i);
     //! \brief Returns reference to the internal data vector
     std::vector<double>* aliasValues(); // alternative to setValues()
-    //! \brief Returns const reference to the internal data vector
+    //! \brief Returns const reference to the internal data vector, cannot be used if the values are memory mapped, use **getValues()** instead
     const std::vector<double>* aliasValues() const; // alternative to setValues()
     //! \brief Read the number of outputs
     int getNumOutputs() const;
@@ -352,10 +553,15 @@ public:
 protected:
     //! \brief Returns the relation between **a** and **b**, used for the merge
     TypeIndexRelation compareIndexes(int num_dimensions, const int a[], const int b[]) const;
+    //! \brief Copies memory mapped values into memory, called before the values are modified
+    void detach();
 
 private:
     size_t num_outputs, num_values; // kept as size_t to avoid conversions in products, but each one is small individually
     std::vector<double> values;
+    // if the values were read from a memory mapped file, the values are in the file and the region keeps the mapping alive
+    const double *mapped_values;
+    std::shared_ptr<const void> mapped_region;
 };
 
 }
@@ -33,14 +33,138 @@
 
 #include <stdexcept>
 #include <string>
+#include <list>
+#include <map>
+#include <mutex>
+#include <tuple>
 
 #include "tsgOneDimensionalWrapper.hpp"
 
 namespace TasGrid{
 
+namespace OneDimensionalRuleCache{
+
+// the key is (rule, max_level, alpha, beta), the parameters are zero for rules that do not use them
+typedef std::tuple<int, int, double, double> RuleKey;
+
+struct RuleCacheData{
+    std::mutex access;
+    int capacity, hits, misses;
+    std::list<std::pair<RuleKey, OneDimensionalWrapper>> entries; // ordered from most to least recently used
+    std::map<RuleKey, std::list<std::pair<RuleKey, OneDimensionalWrapper>>::iterator> lookup;
+    std::map<int, std::vector<double>> sequences; // the nodes of the sequence rules, at most one vector per rule
+    RuleCacheData() : capacity(64), hits(0), misses(0){}
+};
+
+RuleCacheData& getCache(){
+    static RuleCacheData cache; // initialization of local statics is thread safe
+    return cache;
+}
+
+RuleKey makeKey(int max_level, TypeOneDRule rule, double alpha, double beta){
+    bool uses_alpha = ((rule == rule_gaussgegenbauer) || (rule == rule_gaussgegenbauerodd) || (rule == rule_gausshermite) || (rule == rule_gausshermiteodd)
+                       || (rule == rule_gaussjacobi) || (rule == rule_gaussjacobiodd) || (rule == rule_gausslaguerre) || (rule == rule_gausslaguerreodd));
+    bool uses_beta = ((rule == rule_gaussjacobi) || (rule == rule_gaussjacobiodd));
+    return RuleKey((int) rule, max_level, (uses_alpha) ? alpha : 0.0, (uses_beta) ? beta : 0.0);
+}
+
+bool copyCached(const RuleKey &key, OneDimensionalWrapper &wrapper){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    auto iter = cache.lookup.find(key);
+    if (iter == cache.lookup.end()){
+        cache.misses++;
+        return false;
+    }
+    cache.hits++;
+    cache.entries.splice(cache.entries.begin(), cache.entries, iter->second);
+    wrapper = iter->second->second;
+    return true;
+}
+
+void evict(RuleCacheData &cache){
+    while(((int) (cache.entries.size() + cache.sequences.size()) > cache.capacity) && (!cache.entries.empty())){
+        cache.lookup.erase(cache.entries.back().first);
+        cache.entries.pop_back();
+    }
+    while((int) cache.sequences.size() > cache.capacity) cache.sequences.erase(cache.sequences.begin());
+}
+
+bool copySequenceNodes(TypeOneDRule rule, int num_nodes, std::vector<double> &nodes){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    auto iter = cache.sequences.find((int) rule);
+    if ((iter == cache.sequences.end()) || ((int) iter->second.size() < num_nodes)){
+        cache.misses++;
+        return false;
+    }
+    cache.hits++;
+    nodes = std::vector<double>(iter->second.begin(), iter->second.begin() + num_nodes);
+    return true;
+}
+
+void storeSequenceNodes(TypeOneDRule rule, const std::vector<double> &nodes){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    if (cache.capacity == 0) return;
+    std::vector<double> &cached = cache.sequences[(int) rule];
+    if (cached.size() < nodes.size()) cached = nodes;
+    evict(cache);
+}
+
+void store(const RuleKey &key, const OneDimensionalWrapper &wrapper){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    if ((cache.capacity == 0) || (cache.lookup.find(key) != cache.lookup.end())) return; // another thread may have stored the rule already
+    cache.entries.emplace_front(key, wrapper);
+    cache.lookup[key] = cache.entries.begin();
+    evict(cache);
+}
+
+void setCapacity(int capacity){
+    if (capacity < 0) throw std::runtime_error("ERROR: the capacity of the one dimensional rule cache cannot be negative");
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    cache.capacity = capacity;
+    evict(cache);
+}
+
+void clear(){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    cache.entries.clear();
+    cache.lookup.clear();
+    cache.sequences.clear();
+    cache.hits = 0;
+    cache.misses = 0;
+}
+
+void getStats(int &hits, int &misses, int &size, int &capacity){
+    RuleCacheData &cache = getCache();
+    std::lock_guard<std::mutex> lock(cache.access);
+    hits = cache.hits;
+    misses = cache.misses;
+    size = (int) (cache.entries.size() + cache.sequences.size());
+    capacity = cache.capacity;
+}
+
+}
+
 OneDimensionalWrapper::OneDimensionalWrapper() : num_levels(0), rule(rule_none){}
 
 void OneDimensionalWrapper::load(const CustomTabulated &custom, int max_level, TypeOneDRule crule, double alpha, double beta){
+    if (crule == rule_customtabulated){ // the custom table is not part of the key
+        compute(custom, max_level, crule, alpha, beta);
+        return;
+    }
+    OneDimensionalRuleCache::RuleKey key = OneDimensionalRuleCache::makeKey(max_level, crule, alpha, beta);
+    if (!OneDimensionalRuleCache::copyCached(key, *this)){
+        compute(custom, max_level, crule, alpha, beta);
+        OneDimensionalRuleCache::store(key, *this);
+    }
+}
+
+void OneDimensionalWrapper::compute(const CustomTabulated &custom, int max_level, TypeOneDRule crule, double alpha, double beta){
     if (crule == rule_customtabulated){
         if (max_level + 1 > custom.getNumLevels()){
             std::string message = "ERROR: custom-tabulated rule needed with levels ";
@@ -77,6 +201,8 @@ void OneDimensionalWrapper::load(const CustomTabulated &custom, int max_level, T
     coeff.resize(num_levels);
 
     if (isNonNested){
+        indx.clear(); // the wrapper may be reloaded with more levels
+        unique.clear();
         indx.reserve(num_total);
         unique.reserve(num_total);
 
@@ -87,6 +87,9 @@ public:
     int getNumLevels() const;
 
 private:
+    //! \brief Compute the nodes, weights and coefficients, called by \b load() when the rule is not cached.
+    void compute(const CustomTabulated &custom, int max_level, TypeOneDRule crule, double alpha, double beta);
+
     bool isNonNested;
     int num_levels;
     TypeOneDRule rule;
@@ -102,6 +105,31 @@ private:
     std::vector<std::vector<double>> coeff; // the coefficients of the Lagrange
 };
 
+//! \internal
+//! \brief Process-wide cache of loaded one dimensional rules.
+//! \ingroup TasmanianCoreOneDimensional
+//!
+//! Computing the nodes of Gauss rules requires eigenvalue solves and the greedy sequences
+//! require non-linear optimization, \b OneDimensionalWrapper::load() keeps the most recently
+//! used rules keyed by (rule, max level, alpha, beta) so that repeated grid constructions
+//! reuse the same data. Custom-tabulated rules are never cached. The cache is shared
+//! by all grids and all threads, access is guarded by a mutex.
+//!
+//! The sequence grids need only the nodes, which are nested, the cache keeps the longest
+//! computed sequence for each rule and serves any shorter prefix.
+namespace OneDimensionalRuleCache{
+    //! \brief Copy the first \b num_nodes nodes of the sequence \b rule, returns \b false if fewer nodes are cached.
+    bool copySequenceNodes(TypeOneDRule rule, int num_nodes, std::vector<double> &nodes);
+    //! \brief Keep the \b nodes of the sequence \b rule, unless a longer sequence is already cached.
+    void storeSequenceNodes(TypeOneDRule rule, const std::vector<double> &nodes);
+    //! \brief Set the maximum number of cached rules, zero disables the cache and drops all entries.
+    void setCapacity(int capacity);
+    //! \brief Drop all cached rules and reset the statistics.
+    void clear();
+    //! \brief Return the number of cache hits and misses, the current number of cached rules and the capacity.
+    void getStats(int &hits, int &misses, int &size, int &capacity);
+}
+
 }
 
 #endif
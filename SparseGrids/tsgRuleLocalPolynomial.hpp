@@ -31,6 +31,8 @@
 #ifndef __TSG_RULE_LOCAL_POLYNOMIAL_HPP
 #define __TSG_RULE_LOCAL_POLYNOMIAL_HPP
 
+#include <limits>
+
 #include "tsgEnumerates.hpp"
 
 namespace TasGrid{
@@ -61,6 +63,7 @@ public:
 
     virtual double evalRaw(int point, double x) const = 0; // normalizes x (i.e., (x-node) / support), but it does not check the support
     virtual double evalSupport(int point, double x, bool &isSupported) const = 0; // // normalizes x (i.e., (x-node) / support) and checks if x is within the support
+    virtual void getSupportInterval(int point, double &left, double &right) const = 0; // the interval where evalSupport() sets isSupported to true
 
     virtual double getArea(int point, int n, const double w[], const double x[]) const = 0;
     // integrate the function associated with the point, constant to cubic are known analytically, higher order need a 1-D quadrature rule
@@ -276,6 +279,16 @@ public:
             }
         }
     }
+    void getSupportInterval(int point, double &left, double &right) const{
+        if (!isZeroOrder && (((rule == rule_localp) && (point == 0)) || ((rule == rule_semilocalp) && (point <= 2)))){
+            left = -std::numeric_limits<double>::infinity(); // supported everywhere, see evalSupport()
+            right = std::numeric_limits<double>::infinity();
+        }else{
+            double node = getNode(point), support = (isZeroOrder) ? 2.0 * getSupport(point) : getSupport(point);
+            left = node - support;
+            right = node + support;
+        }
+    }
     double getArea(int point, int n, const double w[], const double x[]) const{
         if (isZeroOrder){
             return 2.0 * getSupport(point);
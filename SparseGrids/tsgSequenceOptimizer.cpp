@@ -31,12 +31,168 @@
 #ifndef __TASMANIAN_SPARSE_GRID_SEQUENCE_OPTIMIZER_CPP
 #define __TASMANIAN_SPARSE_GRID_SEQUENCE_OPTIMIZER_CPP
 
+#include <cstdio>
+#include <cstdlib>
+#include <cstdint>
+#include <chrono>
+#include <fstream>
+#include <map>
+#include <mutex>
+#include <random>
+#include <sstream>
+
+#ifdef _WIN32
+#include <process.h>
+#define TASMANIAN_GETPID _getpid
+#else
+#include <unistd.h>
+#define TASMANIAN_GETPID getpid
+#endif
+
 #include "tsgSequenceOptimizer.hpp"
 
 namespace TasGrid{
 
 namespace Optimizer{
 
+// binary file layout: "TSGNODES", format version, Tasmanian major and minor versions, number of rules,
+// 64-bit checksum of the rest of the file, then for each rule: rule enumerate, number of nodes, the nodes
+constexpr int greedy_cache_format = 2;
+
+// FNV-1a hash of the bytes, the checksum catches files mixed by concurrent writers and torn writes
+void updateGreedyNodesChecksum(const char *bytes, size_t num_bytes, uint64_t &checksum){
+    for(size_t i=0; i<num_bytes; i++){
+        checksum ^= (uint64_t) (unsigned char) bytes[i];
+        checksum *= 1099511628211ULL;
+    }
+}
+constexpr uint64_t greedy_cache_checksum_seed = 14695981039346656037ULL;
+
+struct GreedyNodesCacheData{
+    std::mutex access; // guards the filename and the file
+    bool initialized;
+    std::string filename;
+    GreedyNodesCacheData() : initialized(false){}
+};
+
+GreedyNodesCacheData& getGreedyNodesCacheData(){
+    static GreedyNodesCacheData cache;
+    return cache;
+}
+
+bool readGreedyNodesFile(const std::string &filename, std::map<int, std::vector<double>> &entries){
+    std::ifstream ifs(filename, std::ios::in | std::ios::binary);
+    if (!ifs.good()) return false;
+    char magic[8];
+    ifs.read(magic, 8);
+    if (!ifs.good() || (std::string(magic, 8) != "TSGNODES")) return false;
+    int header[4];
+    ifs.read((char*) header, 4 * sizeof(int));
+    if (!ifs.good() || (header[0] != greedy_cache_format) || (header[1] != TASMANIAN_VERSION_MAJOR) || (header[2] != TASMANIAN_VERSION_MINOR) || (header[3] < 0)) return false;
+    uint64_t stored_checksum, checksum = greedy_cache_checksum_seed;
+    ifs.read((char*) &stored_checksum, sizeof(uint64_t));
+    if (!ifs.good()) return false;
+    std::map<int, std::vector<double>> file_entries;
+    for(int i=0; i<header[3]; i++){
+        int meta[2];
+        ifs.read((char*) meta, 2 * sizeof(int));
+        if (!ifs.good() || (meta[1] < 0) || (meta[1] > 100000)) return false;
+        updateGreedyNodesChecksum((const char*) meta, 2 * sizeof(int), checksum);
+        std::vector<double> nodes((size_t) meta[1]);
+        ifs.read((char*) nodes.data(), meta[1] * sizeof(double));
+        if (!ifs.good()) return false;
+        updateGreedyNodesChecksum((const char*) nodes.data(), nodes.size() * sizeof(double), checksum);
+        for(auto x : nodes) if (!(fabs(x) <= 1.0)) return false; // also catches nan
+        file_entries[meta[0]] = std::move(nodes);
+    }
+    if ((checksum != stored_checksum) || (ifs.peek() != std::ifstream::traits_type::eof())) return false;
+    entries = std::move(file_entries);
+    return true;
+}
+
+std::string makeGreedyNodesTempFilename(const std::string &filename){
+    // the mutex guards only this process, other processes (e.g., MPI ranks) may write the same cache
+    // the process id and a random number give each writer its own temporary file on a shared file system
+    std::random_device device;
+    std::stringstream ss;
+    ss << filename << "." << TASMANIAN_GETPID() << "." << std::hex << (device() ^ (unsigned) std::chrono::high_resolution_clock::now().time_since_epoch().count()) << ".tmp";
+    return ss.str();
+}
+
+void setGreedyNodesCacheFile(const std::string &filename){
+    GreedyNodesCacheData &cache = getGreedyNodesCacheData();
+    std::lock_guard<std::mutex> lock(cache.access);
+    cache.filename = filename;
+    cache.initialized = true;
+}
+
+std::string getGreedyNodesCacheFile(){
+    GreedyNodesCacheData &cache = getGreedyNodesCacheData();
+    std::lock_guard<std::mutex> lock(cache.access);
+    if (!cache.initialized){
+        const char *env = std::getenv("TASMANIAN_GREEDY_NODES_CACHE");
+        if (env != nullptr) cache.filename = env;
+        cache.initialized = true;
+    }
+    return cache.filename;
+}
+
+bool readGreedyNodesCache(TypeOneDRule rule, std::vector<double> &nodes){
+    std::string filename = getGreedyNodesCacheFile();
+    if (filename.empty()) return false;
+    GreedyNodesCacheData &cache = getGreedyNodesCacheData();
+    std::lock_guard<std::mutex> lock(cache.access);
+    std::map<int, std::vector<double>> entries;
+    if (!readGreedyNodesFile(filename, entries)) return false;
+    auto iter = entries.find((int) rule);
+    if (iter == entries.end()) return false;
+    nodes = std::move(iter->second);
+    return true;
+}
+
+void writeGreedyNodesCache(TypeOneDRule rule, const std::vector<double> &nodes){
+    std::string filename = getGreedyNodesCacheFile();
+    if (filename.empty()) return;
+    GreedyNodesCacheData &cache = getGreedyNodesCacheData();
+    std::lock_guard<std::mutex> lock(cache.access);
+    std::map<int, std::vector<double>> entries;
+    if (!readGreedyNodesFile(filename, entries)) entries.clear(); // missing, corrupted or old files are overwritten
+    auto iter = entries.find((int) rule);
+    if ((iter != entries.end()) && (iter->second.size() >= nodes.size())) return;
+    entries[(int) rule] = nodes;
+
+    uint64_t checksum = greedy_cache_checksum_seed;
+    for(auto &e : entries){
+        int meta[2] = {e.first, (int) e.second.size()};
+        updateGreedyNodesChecksum((const char*) meta, 2 * sizeof(int), checksum);
+        updateGreedyNodesChecksum((const char*) e.second.data(), e.second.size() * sizeof(double), checksum);
+    }
+
+    // the cache is an optimization, failing to write the file is not an error
+    // write to a temporary file and rename, so other processes never see a partial file
+    std::string tmp_filename = makeGreedyNodesTempFilename(filename);
+    std::ofstream ofs(tmp_filename, std::ios::out | std::ios::binary);
+    if (!ofs.good()) return;
+    int header[4] = {greedy_cache_format, TASMANIAN_VERSION_MAJOR, TASMANIAN_VERSION_MINOR, (int) entries.size()};
+    ofs.write("TSGNODES", 8);
+    ofs.write((const char*) header, 4 * sizeof(int));
+    ofs.write((const char*) &checksum, sizeof(uint64_t));
+    for(auto &e : entries){
+        int meta[2] = {e.first, (int) e.second.size()};
+        ofs.write((const char*) meta, 2 * sizeof(int));
+        ofs.write((const char*) e.second.data(), e.second.size() * sizeof(double));
+    }
+    ofs.close();
+    if (!ofs.good()){
+        std::remove(tmp_filename.c_str());
+        return;
+    }
+    if (std::rename(tmp_filename.c_str(), filename.c_str()) != 0){ // rename does not replace existing files on Windows
+        std::remove(filename.c_str());
+        if (std::rename(tmp_filename.c_str(), filename.c_str()) != 0) std::remove(tmp_filename.c_str());
+    }
+}
+
 VectorFunctional::VectorFunctional(){}
 VectorFunctional::~VectorFunctional(){}
 
@@ -32,6 +32,7 @@
 #define __TASMANIAN_SPARSE_GRID_SEQUENCE_OPTIMIZER_HPP
 
 #include <vector>
+#include <string>
 
 #include "tsgEnumerates.hpp"
 
@@ -278,6 +279,13 @@ private:
 void getPrecomputedMinLebesgueNodes(std::vector<double> &precomputed);
 void getPrecomputedMinDeltaNodes(std::vector<double> &precomputed);
 
+// persistent cache of the greedy nodes, the file is given by setGreedyNodesCacheFile() or the environment variable TASMANIAN_GREEDY_NODES_CACHE
+// an empty filename disables the cache, the file is ignored and overwritten if it was written by a different version of Tasmanian or fails the checksum
+void setGreedyNodesCacheFile(const std::string &filename);
+std::string getGreedyNodesCacheFile();
+bool readGreedyNodesCache(TypeOneDRule rule, std::vector<double> &nodes); // returns false if there are no cached nodes for the rule
+void writeGreedyNodesCache(TypeOneDRule rule, const std::vector<double> &nodes); // keeps the longest sequence for each rule
+
 template<TypeOneDRule rule>
 void getGreedyNodes(int n, std::vector<double> &nodes){
     nodes.clear();
@@ -297,11 +305,16 @@ void getGreedyNodes(int n, std::vector<double> &nodes){
     nodes.resize(usefirst);
     std::copy(precomputed.data(), precomputed.data() + usefirst, nodes.data());
     if (n > (int) precomputed.size()){
-        for(int i = (int) precomputed.size(); i<n; i++){
+        std::vector<double> cached; // nodes computed by an earlier run, must start with the precomputed ones
+        if (readGreedyNodesCache(rule, cached) && (cached.size() > nodes.size()) && std::equal(nodes.begin(), nodes.end(), cached.begin()))
+            nodes.assign(cached.begin(), cached.begin() + ((n > (int) cached.size()) ? (int) cached.size() : n));
+        size_t num_known = nodes.size();
+        for(int i = (int) nodes.size(); i<n; i++){
             Optimizer::tempFunctional<rule> g(nodes);
             Optimizer::OptimizerResult R = Optimizer::argMaxGlobal(g);
             nodes.push_back(R.xmax);
         }
+        if (nodes.size() > num_known) writeGreedyNodesCache(rule, nodes);
     }
 }
 